@@ -7,6 +7,7 @@ import re
 from six import add_metaclass
 
 from django.conf import settings
+from django.core.cache import cache
 from django.utils.translation import ugettext_lazy, ugettext as _
 from django.core.urlresolvers import resolve
 
@@ -17,6 +18,7 @@ from openedx.core.lib.courses import course_image_url
 from search.search_engine_base import SearchEngine
 from xmodule.annotator_mixin import html_to_text
 from xmodule.modulestore import ModuleStoreEnum
+from xmodule.modulestore.split_mongo import BlockKey
 from xmodule.library_tools import normalize_key_for_search
 
 # REINDEX_AGE is the default amount of time that we look back for changes
@@ -48,6 +50,91 @@ def indexing_is_enabled():
     return settings.FEATURES.get('ENABLE_COURSEWARE_INDEX', False)
 
 
+class StructureChanges(object):
+    """
+    The blocks that changed between two versions of a split course or library
+    structure, as found by `diff_structures`.
+
+    - `changed`: the blocks which were added, changed or moved, and whose
+      whole subtree needs to be indexed again, since the index of a block
+      includes its inherited fields and the names of its ancestors
+    - `ancestors`: the other blocks that need to be indexed again, which are
+      the ancestors of the changed blocks and the parents of removed blocks,
+      since the content groups of a block depend on its children
+    - `removed`: the blocks which are no longer in the structure
+    """
+    def __init__(self, changed, ancestors, removed):
+        self.changed = changed
+        self.ancestors = ancestors
+        self.removed = removed
+
+
+def _structure_tree(structure):
+    """
+    Returns the blocks of the split structure which are reachable from its
+    root, and a dict of the parents of each of them.
+    """
+    blocks = structure['blocks']
+    parents = {}
+    reachable = set()
+    to_visit = [structure['root']]
+    while to_visit:
+        block_key = to_visit.pop()
+        if block_key in reachable or block_key not in blocks:
+            continue
+        reachable.add(block_key)
+        for child in blocks[block_key].fields.get('children', []):
+            child_key = BlockKey(*child)
+            parents.setdefault(child_key, set()).add(block_key)
+            to_visit.append(child_key)
+    return reachable, parents
+
+
+def diff_structures(old_structure, new_structure):
+    """
+    Returns the StructureChanges from the old to the new version of a split
+    structure, or None if their root block changed, which affects the index
+    of every block.
+    """
+    old_blocks = old_structure['blocks']
+    new_blocks = new_structure['blocks']
+    old_reachable, old_parents = _structure_tree(old_structure)
+    new_reachable, new_parents = _structure_tree(new_structure)
+
+    def block_content(block):
+        """ Returns what the index of the block depends on, besides its children """
+        fields = {name: value for name, value in block.fields.iteritems() if name != 'children'}
+        return block.block_type, fields, block.definition, block.defaults
+
+    changed = set()
+    children_changed = set()
+    for block_key in new_reachable:
+        if block_key not in old_reachable or old_parents.get(block_key) != new_parents.get(block_key):
+            changed.add(block_key)
+            continue
+        old_block = old_blocks[block_key]
+        new_block = new_blocks[block_key]
+        if block_content(old_block) != block_content(new_block):
+            changed.add(block_key)
+        elif old_block.fields.get('children', []) != new_block.fields.get('children', []):
+            children_changed.add(block_key)
+
+    if new_structure['root'] in changed:
+        return None
+
+    ancestors = set()
+    to_visit = list(children_changed)
+    for block_key in changed:
+        to_visit.extend(new_parents.get(block_key, ()))
+    while to_visit:
+        block_key = to_visit.pop()
+        if block_key not in ancestors:
+            ancestors.add(block_key)
+            to_visit.extend(new_parents.get(block_key, ()))
+
+    return StructureChanges(changed, ancestors - changed, old_reachable - new_reachable)
+
+
 class SearchIndexingError(Exception):
     """ Indicates some error(s) occured during indexing """
 
@@ -72,6 +159,12 @@ class SearchIndexerBase(object):
         'category': None
     }
 
+    # The branch of split structures that gets indexed
+    INDEXED_BRANCH = ModuleStoreEnum.BranchName.published
+
+    # Cache key of the version of the structure that was last indexed
+    INDEXED_VERSION_CACHE_KEY = u"{index_name}.indexed_version.{structure_key}"
+
     @classmethod
     def indexing_is_enabled(cls):
         """
@@ -114,7 +207,71 @@ class SearchIndexerBase(object):
         searcher.remove(cls.DOCUMENT_TYPE, result_ids)
 
     @classmethod
-    def index(cls, modulestore, structure_key, triggered_at=None, reindex_age=REINDEX_AGE):
+    def index_changes(cls, modulestore, structure_key, triggered_at=None, reindex_age=REINDEX_AGE):
+        """
+        Update the index of the items which changed since the structure was
+        last indexed.
+
+        The changes are found by comparing the indexed version of the split
+        structure with the current one, so only the added, changed and removed
+        items and their ancestors are loaded and sent to the search engine.
+        Falls back to `index` with the given `triggered_at` and `reindex_age`
+        if the structure isn't in split, or its indexed version isn't known.
+
+        Returns:
+        Number of items that have been added to the index
+        """
+        split_store = cls._get_split_store(modulestore, structure_key)
+        indexed_version = cache.get(cls._indexed_version_cache_key(structure_key))
+        if split_store is None or indexed_version is None:
+            return cls.index(modulestore, structure_key, triggered_at, reindex_age)
+
+        changes = None
+        old_structure = split_store.get_structure(structure_key, structure_key.as_object_id(indexed_version))
+        new_version = cls._get_structure_version(modulestore, structure_key)
+        if old_structure is not None and new_version is not None:
+            new_structure = split_store.get_structure(structure_key, new_version)
+            changes = diff_structures(old_structure, new_structure)
+        if changes is None:
+            return cls.index(modulestore, structure_key, triggered_at, reindex_age)
+        return cls.index(modulestore, structure_key, changes=changes)
+
+    @classmethod
+    def _get_split_store(cls, modulestore, structure_key):
+        """
+        Returns the split modulestore of the structure, or None if it isn't in split.
+        """
+        if hasattr(modulestore, '_get_modulestore_for_courselike'):
+            modulestore = modulestore._get_modulestore_for_courselike(structure_key)  # pylint: disable=protected-access
+        if modulestore.get_modulestore_type() != ModuleStoreEnum.Type.split:
+            return None
+        return modulestore
+
+    @classmethod
+    def _get_structure_version(cls, modulestore, structure_key):
+        """
+        Returns the id of the current version of the indexed branch of the
+        structure, or None if it isn't in split.
+        """
+        split_store = cls._get_split_store(modulestore, structure_key)
+        if split_store is None:
+            return None
+        course_index = split_store.get_course_index(structure_key)
+        if course_index is None:
+            return None
+        return course_index['versions'].get(cls.INDEXED_BRANCH)
+
+    @classmethod
+    def _indexed_version_cache_key(cls, structure_key):
+        """
+        Returns the cache key of the version of the structure that was last indexed.
+        """
+        return cls.INDEXED_VERSION_CACHE_KEY.format(
+            index_name=cls.INDEX_NAME, structure_key=unicode(cls.normalize_structure_key(structure_key))
+        )
+
+    @classmethod
+    def index(cls, modulestore, structure_key, triggered_at=None, reindex_age=REINDEX_AGE, changes=None):
         """
         Process course for indexing
 
@@ -130,6 +287,10 @@ class SearchIndexerBase(object):
             which items may need to be removed from the index
             If None, then a full reindex takes place
 
+        changes (StructureChanges) - the changes of the split structure since it
+            was last indexed; only the changed items and their ancestors are
+            then indexed, and the removed items are removed from the index
+
         Returns:
         Number of items that have been added to the index
         """
@@ -138,6 +299,9 @@ class SearchIndexerBase(object):
         if not searcher:
             return
 
+        # Read before the items, so that changes made while indexing are indexed again next time.
+        structure_version = cls._get_structure_version(modulestore, structure_key)
+
         structure_key = cls.normalize_structure_key(structure_key)
         location_info = cls._get_location_info(structure_key)
 
@@ -163,7 +327,13 @@ class SearchIndexerBase(object):
             """
             return item.location.version_agnostic().replace(branch=None)
 
-        def prepare_item_index(item, skip_index=False, groups_usage_info=None):
+        def get_block_key(item):
+            """
+            Gets the key of the item in the split structure
+            """
+            return BlockKey(item.location.block_type, item.location.block_id)
+
+        def prepare_item_index(item, skip_index=False, groups_usage_info=None, changed_only=False):
             """
             Add this item to the items_index and indexed_items list
 
@@ -175,6 +345,9 @@ class SearchIndexerBase(object):
                 This should really only be passed from the recursive child calls when
                 this method has determined that it is safe to do so
 
+            changed_only - only walk the children which changed, or are ancestors
+                of changed items
+
             Returns:
             item_content_groups - content groups assigned to indexed item
             """
@@ -214,12 +387,18 @@ class SearchIndexerBase(object):
                     (triggered_at is not None and (triggered_at - item.subtree_edited_on) > reindex_age)
                 children_groups_usage = []
                 for child_item in item.get_children():
+                    # the content groups of the item depend on all of its children
+                    child_changed_only = changed_only and not item_content_groups and \
+                        get_block_key(child_item) not in changes.changed
+                    if child_changed_only and get_block_key(child_item) not in changes.ancestors:
+                        continue
                     if modulestore.has_published_version(child_item):
                         children_groups_usage.append(
                             prepare_item_index(
                                 child_item,
                                 skip_index=skip_child_index,
-                                groups_usage_info=groups_usage_info
+                                groups_usage_info=groups_usage_info,
+                                changed_only=child_changed_only
                             )
                         )
                 if None in children_groups_usage:
@@ -256,9 +435,21 @@ class SearchIndexerBase(object):
 
                 # Now index the content
                 for item in structure.get_children():
-                    prepare_item_index(item, groups_usage_info=groups_usage_info)
+                    if changes is None:
+                        prepare_item_index(item, groups_usage_info=groups_usage_info)
+                    elif get_block_key(item) in changes.changed:
+                        prepare_item_index(item, groups_usage_info=groups_usage_info)
+                    elif get_block_key(item) in changes.ancestors:
+                        prepare_item_index(item, groups_usage_info=groups_usage_info, changed_only=True)
                 searcher.index(cls.DOCUMENT_TYPE, items_index)
-                cls.remove_deleted_items(searcher, structure_key, indexed_items)
+                if changes is None:
+                    cls.remove_deleted_items(searcher, structure_key, indexed_items)
+                elif changes.removed:
+                    removed_ids = []
+                    for block_key in changes.removed:
+                        usage_key = structure_key.make_usage_key(block_key.type, block_key.id)
+                        removed_ids.append(unicode(cls._id_modifier(usage_key.for_branch(None).version_agnostic())))
+                    searcher.remove(cls.DOCUMENT_TYPE, removed_ids)
         except Exception as err:  # pylint: disable=broad-except
             # broad exception so that index operation does not prevent the rest of the application from working
             log.exception(
@@ -271,6 +462,9 @@ class SearchIndexerBase(object):
         if error_list:
             raise SearchIndexingError('Error(s) present during indexing', error_list)
 
+        if structure_version is not None:
+            cache.set(cls._indexed_version_cache_key(structure_key), unicode(structure_version), None)
+
         return indexed_count["count"]
 
     @classmethod
@@ -440,6 +634,8 @@ class LibrarySearchIndexer(SearchIndexerBase):
         'category': 'library_index'
     }
 
+    INDEXED_BRANCH = ModuleStoreEnum.BranchName.library
+
     @classmethod
     def normalize_structure_key(cls, structure_key):
         """ Normalizes structure key for use in indexing """
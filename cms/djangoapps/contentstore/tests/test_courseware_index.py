@@ -8,6 +8,7 @@ import time
 from datetime import datetime
 from dateutil.tz import tzutc
 from mock import patch, call
+from nose.plugins.skip import SkipTest
 from pytz import UTC
 from uuid import uuid4
 from unittest import skip
@@ -48,6 +49,13 @@ from contentstore.courseware_index import (
 )
 from contentstore.signals import listen_for_course_publish, listen_for_library_update
 from contentstore.utils import reverse_course_url, reverse_usage_url
+
+# The dependency below needs to be installed manually from the development.txt file, which doesn't
+# get installed during unit tests!
+try:
+    from code_block_timer import CodeBlockTimer
+except ImportError:
+    CodeBlockTimer = None
 from contentstore.tests.utils import CourseTestCase
 
 COURSE_CHILD_STRUCTURE = {
@@ -547,6 +555,53 @@ class TestCoursewareSearchIndexer(MixedWithOptionsTestCase):
         self.assertEqual(result["course_name"], "Search Index Test Course")
         self.assertEqual(result["location"], ["Week 1", CoursewareSearchIndexer.UNNAMED_MODULE_NAME, "Subsection 2"])
 
+    def _test_index_changes(self, store):
+        """ Test that only the items changed since the course was last indexed get indexed """
+        self.publish_item(store, self.vertical.location)
+        sequential2 = ItemFactory.create(
+            parent_location=self.chapter.location,
+            category='sequential',
+            display_name='Section 2',
+            modulestore=store,
+            publish_item=True,
+        )
+        vertical2 = ItemFactory.create(
+            parent_location=sequential2.location,
+            category='vertical',
+            display_name='Subsection 2',
+            modulestore=store,
+            publish_item=True,
+        )
+        ItemFactory.create(
+            parent_location=vertical2.location,
+            category="html",
+            display_name="Some other content",
+            modulestore=store,
+            publish_item=True,
+        )
+        self.assertEqual(self.reindex_course(store), 7)
+
+        # the html and its vertical, sequential and chapter
+        self.html_unit.display_name = "Changed Html Content"
+        self.update_item(store, self.html_unit)
+        self.publish_item(store, self.vertical.location)
+        self.assertEqual(CoursewareSearchIndexer.index_changes(store, self.course.id), 4)
+        response = self.search()
+        self.assertEqual(response["total"], 7)
+        self.assertIn(
+            "Changed Html Content",
+            [result["data"]["content"]["display_name"] for result in response["results"]]
+        )
+
+        # the parents of the deleted vertical
+        self.delete_item(store, vertical2.location)
+        self.assertEqual(CoursewareSearchIndexer.index_changes(store, self.course.id), 2)
+        response = self.search()
+        self.assertEqual(response["total"], 5)
+
+        # nothing changed
+        self.assertEqual(CoursewareSearchIndexer.index_changes(store, self.course.id), 0)
+
     @patch('django.conf.settings.SEARCH_ENGINE', 'search.tests.utils.ErroringIndexEngine')
     def _test_exception(self, store):
         """ Test that exception within indexing yields a SearchIndexingError """
@@ -582,6 +637,9 @@ class TestCoursewareSearchIndexer(MixedWithOptionsTestCase):
     def test_time_based_index(self, store_type):
         self._perform_test_using_store(store_type, self._test_time_based_index)
 
+    def test_index_changes(self):
+        self._perform_test_using_store(ModuleStoreEnum.Type.split, self._test_index_changes)
+
     @ddt.data(*WORKS_WITH_STORES)
     def test_exception(self, store_type):
         self._perform_test_using_store(store_type, self._test_exception)
@@ -692,6 +750,51 @@ class TestLargeCourseDeletions(MixedWithOptionsTestCase):
         self._perform_test_using_store(store_type, self._test_large_course_deletion)
 
 
+@skip("Only run manually.")
+class IndexChangesPerformanceTest(MixedWithOptionsTestCase):
+    """
+    Times updating the index of a large split course after publishing a change
+    to one of its html blocks, with a time based index and with an index of
+    the changes since the course was last indexed.
+    """
+    # Use this attribute to skip this test on regular unittest CI runs.
+    perf_test = True
+
+    # load_factor ^ 4 html blocks, about 4,700 blocks in all
+    LOAD_FACTOR = 8
+
+    def change_html_block(self, store, html_block):
+        """ Changes and publishes the html block, and returns the time before the change """
+        before_change = datetime.now(UTC)
+        html_block.display_name = u"Changed {}".format(time.time())
+        self.update_item(store, html_block)
+        self.publish_item(store, html_block.location)
+        return before_change
+
+    def _test_index_time(self, store):
+        """ Times each way of updating the index """
+        course, course_size = create_large_course(store, self.LOAD_FACTOR)
+        CoursewareSearchIndexer.do_course_reindex(store, course.id)
+        html_block = store.get_items(course.id, qualifiers={'category': 'html'})[0]
+
+        with CodeBlockTimer("IndexChanges:{}".format(course_size)):
+            before_change = self.change_html_block(store, html_block)
+            with CodeBlockTimer("time_based_index"):
+                trigger_time = datetime.now(UTC)
+                CoursewareSearchIndexer.index(
+                    store, course.id, triggered_at=trigger_time, reindex_age=(trigger_time - before_change)
+                )
+
+            self.change_html_block(store, html_block)
+            with CodeBlockTimer("index_changes"):
+                CoursewareSearchIndexer.index_changes(store, course.id)
+
+    def test_index_time(self):
+        if CodeBlockTimer is None:
+            raise SkipTest("CodeBlockTimer undefined.")
+        self._perform_test_using_store(ModuleStoreEnum.Type.split, self._test_index_time)
+
+
 class TestTaskExecution(ModuleStoreTestCase):
     """
     Set of tests to ensure that the task code will do the right thing when
@@ -920,6 +1023,41 @@ class TestLibrarySearchIndexer(MixedWithOptionsTestCase):
         indexed_count = self.reindex_library(store)
         self.assertFalse(indexed_count)
 
+    def _test_index_changes(self, store):
+        """ Test that only the items changed since the library was last indexed get indexed """
+        library_key = self.library.location.library_key
+        self.assertEqual(self.reindex_library(store), 2)
+
+        # the changed html
+        new_data = "I'm new data"
+        self.html_unit1.data = new_data
+        self.update_item(store, self.html_unit1)
+        self.assertEqual(LibrarySearchIndexer.index_changes(store, library_key), 1)
+        response = self.search()
+        self.assertEqual(response["total"], 2)
+        self.assertIn(new_data, [cont['html_content'] for cont in self._get_contents(response)])
+
+        # the added html
+        ItemFactory.create(
+            parent_location=self.library.location,
+            category="html",
+            display_name="Html Content 3",
+            modulestore=store,
+            publish_item=False,
+        )
+        self.assertEqual(LibrarySearchIndexer.index_changes(store, library_key), 1)
+        response = self.search()
+        self.assertEqual(response["total"], 3)
+
+        # the deleted html is removed from the index
+        self.delete_item(store, self.html_unit2.location)
+        self.assertEqual(LibrarySearchIndexer.index_changes(store, library_key), 0)
+        response = self.search()
+        self.assertEqual(response["total"], 2)
+
+        # nothing changed
+        self.assertEqual(LibrarySearchIndexer.index_changes(store, library_key), 0)
+
     @patch('django.conf.settings.SEARCH_ENGINE', 'search.tests.utils.ErroringIndexEngine')
     def _test_exception(self, store):
         """ Test that exception within indexing yields a SearchIndexingError """
@@ -950,6 +1088,9 @@ class TestLibrarySearchIndexer(MixedWithOptionsTestCase):
     def test_search_disabled(self, store_type):
         self._perform_test_using_store(store_type, self._test_search_disabled)
 
+    def test_index_changes(self):
+        self._perform_test_using_store(ModuleStoreEnum.Type.split, self._test_index_changes)
+
     @ddt.data(*WORKS_WITH_STORES)
     def test_exception(self, store_type):
         self._perform_test_using_store(store_type, self._test_exception)
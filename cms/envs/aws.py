@@ -278,6 +278,13 @@ for database_name in DATABASES:
 MODULESTORE = convert_module_store_setting_if_needed(AUTH_TOKENS.get('MODULESTORE', MODULESTORE))
 CONTENTSTORE = AUTH_TOKENS['CONTENTSTORE']
 DOC_STORE_CONFIG = AUTH_TOKENS['DOC_STORE_CONFIG']
+COURSE_STRUCTURE_LRU_CACHE_MAX_BLOCKS = ENV_TOKENS.get(
+    'COURSE_STRUCTURE_LRU_CACHE_MAX_BLOCKS', COURSE_STRUCTURE_LRU_CACHE_MAX_BLOCKS
+)
+STATIC_CONTENT_CHUNK_CACHE_DIR = ENV_TOKENS.get('STATIC_CONTENT_CHUNK_CACHE_DIR', STATIC_CONTENT_CHUNK_CACHE_DIR)
+STATIC_CONTENT_CHUNK_CACHE_MAX_SIZE = ENV_TOKENS.get(
+    'STATIC_CONTENT_CHUNK_CACHE_MAX_SIZE', STATIC_CONTENT_CHUNK_CACHE_MAX_SIZE
+)
 # Datadog for events!
 DATADOG = AUTH_TOKENS.get("DATADOG", {})
 DATADOG.update(ENV_TOKENS.get("DATADOG", {}))
@@ -396,6 +396,17 @@ MODULESTORE = {
     }
 }
 
+# Maximum total number of blocks of the deserialized split course structures
+# kept in each process, in front of the 'course_structure_cache' cache.
+# 0 disables the in-process cache.
+COURSE_STRUCTURE_LRU_CACHE_MAX_BLOCKS = 0
+
+# Local directory in which the contentserver caches the chunks of assets that
+# are too large for memcached, and the maximum total size of those chunks in
+# bytes. Chunk caching is disabled if the directory is None.
+STATIC_CONTENT_CHUNK_CACHE_DIR = None
+STATIC_CONTENT_CHUNK_CACHE_MAX_SIZE = 2 * 1024 * 1024 * 1024
+
 ############################ DJANGO_BUILTINS ################################
 # Change DEBUG in your environment settings files, not here
 DEBUG = False
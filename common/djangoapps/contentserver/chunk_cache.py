@@ -0,0 +1,193 @@
+"""
+A local disk cache for the chunks of static assets streamed from the contentstore.
+
+Assets too large to be kept in memcached are streamed from GridFS on every
+request. The chunk cache keeps copies of the GridFS chunks of these assets on
+the local disk, so that full and byte range requests for them can be served
+without reading from Mongo again.
+
+Chunks are stored as files named after a hash of the asset's location and
+version and the index of the chunk in the asset:
+
+    <root>/<key[:2]>/<key>/<chunk index>
+
+Since the key changes whenever the asset is replaced, stale chunks are never
+served; they are removed by pruning, which deletes the least recently used
+chunks whenever the cache grows past its maximum size.
+"""
+import errno
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+
+from django.conf import settings
+
+log = logging.getLogger(__name__)
+
+
+class AssetChunkCache(object):
+    """
+    A size-bounded cache of asset chunks in a local directory.
+    """
+    # The cache is pruned to this fraction of its maximum size, so that
+    # it isn't pruned again on the next write.
+    PRUNE_TO_RATIO = 0.9
+
+    def __init__(self, root_path, max_size):
+        self.root_path = root_path
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._size = None
+
+    @staticmethod
+    def key_for(content):
+        """
+        Returns the cache key for the chunks of the given StaticContentStream.
+
+        The key includes everything that changes when an asset is replaced,
+        so that the chunks of an older version are never served.
+        """
+        return hashlib.sha1(u'{}|{}|{}|{}'.format(
+            unicode(content.location),
+            content.last_modified_at.isoformat() if content.last_modified_at else '',
+            content.length,
+            content.chunk_size,
+        ).encode('utf-8')).hexdigest()
+
+    def _path(self, key, index):
+        """
+        Returns the path of the file for the given chunk.
+        """
+        return os.path.join(self.root_path, key[:2], key, str(index))
+
+    def get(self, key, index):
+        """
+        Returns the data of the given chunk, or None if it isn't cached.
+        """
+        path = self._path(key, index)
+        try:
+            with open(path, 'rb') as chunk_file:
+                data = chunk_file.read()
+            # Pruning removes the chunks that were least recently read.
+            os.utime(path, None)
+        except (IOError, OSError):
+            return None
+        return data
+
+    def set(self, key, index, data):
+        """
+        Stores the data of the given chunk.
+
+        Failures are logged rather than raised, since the chunk can always
+        be read from the contentstore again.
+        """
+        path = self._path(key, index)
+        try:
+            try:
+                os.makedirs(os.path.dirname(path))
+            except OSError as exc:
+                if exc.errno != errno.EEXIST:
+                    raise
+            # Write to a temporary file first, so that concurrent readers
+            # never see a partially written chunk.
+            file_descriptor, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp')
+            try:
+                with os.fdopen(file_descriptor, 'wb') as chunk_file:
+                    chunk_file.write(data)
+                os.rename(temp_path, path)
+            except Exception:
+                os.remove(temp_path)
+                raise
+        except (IOError, OSError):
+            log.exception(u"Unable to cache chunk %s of asset %s", index, key)
+            return
+
+        with self._lock:
+            if self._size is None:
+                self._size = self._disk_usage()[0]
+            self._size += len(data)
+            needs_pruning = self._size > self.max_size
+        if needs_pruning:
+            self.prune()
+
+    def _disk_usage(self):
+        """
+        Returns the total size of the cached chunks, and a list of
+        (last access time, size, path) for each of them.
+        """
+        total_size = 0
+        chunks = []
+        for dirpath, __, filenames in os.walk(self.root_path):
+            for filename in filenames:
+                if filename.startswith('.tmp'):
+                    continue
+                path = os.path.join(dirpath, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                total_size += stat.st_size
+                chunks.append((stat.st_mtime, stat.st_size, path))
+        return total_size, chunks
+
+    def prune(self):
+        """
+        Deletes the least recently used chunks until the cache is below
+        PRUNE_TO_RATIO of its maximum size.
+        """
+        total_size, chunks = self._disk_usage()
+        target_size = self.max_size * self.PRUNE_TO_RATIO
+        for __, size, path in sorted(chunks):
+            if total_size <= target_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total_size -= size
+            try:
+                os.rmdir(os.path.dirname(path))
+            except OSError:
+                # The asset still has other chunks.
+                pass
+
+        with self._lock:
+            self._size = total_size
+
+    def stream_data_in_range(self, content, first_byte, last_byte):
+        """
+        Streams the data of the given StaticContentStream between first_byte
+        and last_byte (included), reading from the contentstore only the
+        chunks that aren't cached yet.
+        """
+        chunk_size = content.chunk_size
+        key = self.key_for(content)
+        for index in xrange(first_byte // chunk_size, last_byte // chunk_size + 1):
+            chunk_start = index * chunk_size
+            chunk = self.get(key, index)
+            if chunk is None:
+                chunk_end = min(chunk_start + chunk_size, content.length) - 1
+                chunk = ''.join(content.stream_data_in_range(chunk_start, chunk_end))
+                self.set(key, index, chunk)
+            yield chunk[max(first_byte - chunk_start, 0):last_byte - chunk_start + 1]
+
+
+_CHUNK_CACHES = {}
+
+
+def get_chunk_cache():
+    """
+    Returns the AssetChunkCache configured by the STATIC_CONTENT_CHUNK_CACHE_DIR
+    and STATIC_CONTENT_CHUNK_CACHE_MAX_SIZE settings, or None if chunk caching
+    is disabled.
+    """
+    root_path = getattr(settings, 'STATIC_CONTENT_CHUNK_CACHE_DIR', None)
+    if not root_path:
+        return None
+    max_size = settings.STATIC_CONTENT_CHUNK_CACHE_MAX_SIZE
+    cache_key = (root_path, max_size)
+    if cache_key not in _CHUNK_CACHES:
+        _CHUNK_CACHES[cache_key] = AssetChunkCache(root_path, max_size)
+    return _CHUNK_CACHES[cache_key]
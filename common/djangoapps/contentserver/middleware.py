@@ -3,18 +3,20 @@ Middleware to serve assets.
 """
 
 import logging
+from uuid import uuid4
 
 from django.http import (
-    HttpResponse, HttpResponseNotModified, HttpResponseForbidden
+    HttpResponse, HttpResponseNotModified, HttpResponseForbidden, StreamingHttpResponse
 )
 from student.models import CourseEnrollment
 
 from xmodule.assetstore.assetmgr import AssetManager
-from xmodule.contentstore.content import StaticContent, XASSET_LOCATION_TAG
+from xmodule.contentstore.content import StaticContent, StaticContentStream, XASSET_LOCATION_TAG
 from xmodule.modulestore import InvalidLocationError
 from opaque_keys import InvalidKeyError
 from opaque_keys.edx.locator import AssetLocator
 from cache_toolbox.core import get_cached_content, set_cached_content
+from contentserver.chunk_cache import get_chunk_cache
 from xmodule.modulestore.exceptions import ItemNotFoundError
 from xmodule.exceptions import NotFoundError
 
@@ -95,11 +97,8 @@ class StaticContentServer(object):
             # Response -> Content-Range attribute structure: "Content-Range: bytes first-last/totalLength"
             # http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.35
             response = None
+            content_type = content.content_type
             if request.META.get('HTTP_RANGE'):
-                # Data from cache (StaticContent) has no easy byte management, so we use the DB instead (StaticContentStream)
-                if type(content) == StaticContent:
-                    content = AssetManager.find(loc, as_stream=True)
-
                 header_value = request.META['HTTP_RANGE']
                 try:
                     unit, ranges = parse_range_header(header_value, content.length)
@@ -112,43 +111,120 @@ class StaticContentServer(object):
                     if unit != 'bytes':
                         # Only accept ranges in bytes
                         log.warning(u"Unknown unit in Range header: %s for content: %s", header_value, unicode(loc))
-                    elif len(ranges) > 1:
-                        # According to Http/1.1 spec content for multiple ranges should be sent as a multipart message.
-                        # http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.16
-                        # But we send back the full content.
-                        log.warning(
-                            u"More than 1 ranges in Range header: %s for content: %s", header_value, unicode(loc)
-                        )
                     else:
-                        first, last = ranges[0]
-
-                        if 0 <= first <= last < content.length:
-                            # If the byte range is satisfiable
-                            response = HttpResponse(content.stream_data_in_range(first, last))
+                        satisfiable_ranges = [
+                            (first, last) for first, last in ranges if 0 <= first <= last < content.length
+                        ]
+                        if not satisfiable_ranges:
+                            log.warning(
+                                u"Cannot satisfy ranges in Range header: %s for content: %s", header_value, unicode(loc)
+                            )
+                            return HttpResponse(status=416)  # Requested Range Not Satisfiable
+                        elif len(satisfiable_ranges) == 1:
+                            first, last = satisfiable_ranges[0]
+                            response = _content_response(content, _stream_data_in_range(content, first, last))
                             response['Content-Range'] = 'bytes {first}-{last}/{length}'.format(
                                 first=first, last=last, length=content.length
                             )
                             response['Content-Length'] = str(last - first + 1)
                             response.status_code = 206  # Partial Content
                         else:
-                            log.warning(
-                                u"Cannot satisfy ranges in Range header: %s for content: %s", header_value, unicode(loc)
+                            # Content for multiple ranges is sent as a multipart message.
+                            # http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.16
+                            boundary = uuid4().hex
+                            response = _content_response(
+                                content, _stream_multipart_ranges(content, satisfiable_ranges, boundary)
                             )
-                            return HttpResponse(status=416)  # Requested Range Not Satisfiable
+                            response['Content-Length'] = str(
+                                _multipart_ranges_length(content, satisfiable_ranges, boundary)
+                            )
+                            response.status_code = 206  # Partial Content
+                            content_type = 'multipart/byteranges; boundary={}'.format(boundary)
 
             # If Range header is absent or syntactically invalid return a full content response.
             if response is None:
-                response = HttpResponse(content.stream_data())
+                if content.length:
+                    response = _content_response(content, _stream_data_in_range(content, 0, content.length - 1))
+                else:
+                    response = HttpResponse(content.stream_data())
                 response['Content-Length'] = content.length
 
             # "Accept-Ranges: bytes" tells the user that only "bytes" ranges are allowed
             response['Accept-Ranges'] = 'bytes'
-            response['Content-Type'] = content.content_type
+            response['Content-Type'] = content_type
             response['Last-Modified'] = last_modified_at_str
 
             return response
 
 
+def _content_response(content, data):
+    """
+    Returns a response with the given data of the given content.
+
+    Content read from memcached is sent as a regular response. Content that
+    was too large to be cached is streamed, rather than read into memory.
+    """
+    if isinstance(content, StaticContentStream):
+        return StreamingHttpResponse(data)
+    return HttpResponse(data)
+
+
+def _stream_data_in_range(content, first_byte, last_byte):
+    """
+    Streams the data of the given content between first_byte and last_byte
+    (included), through the chunk cache if the content is streamed from the
+    contentstore and chunk caching is enabled.
+    """
+    chunk_cache = get_chunk_cache()
+    if chunk_cache is not None and isinstance(content, StaticContentStream):
+        return chunk_cache.stream_data_in_range(content, first_byte, last_byte)
+    return content.stream_data_in_range(first_byte, last_byte)
+
+
+def _multipart_range_headers(content, ranges, boundary):
+    """
+    Returns the headers of each part of a multipart/byteranges body for the
+    given ranges of the given content, followed by the closing delimiter.
+    """
+    part_headers = [
+        (
+            '\r\n--{boundary}\r\n'
+            'Content-Type: {content_type}\r\n'
+            'Content-Range: bytes {first}-{last}/{length}\r\n\r\n'
+        ).format(
+            boundary=boundary, content_type=content.content_type, first=first, last=last, length=content.length
+        )
+        for first, last in ranges
+    ]
+    return part_headers, '\r\n--{boundary}--\r\n'.format(boundary=boundary)
+
+
+def _multipart_ranges_length(content, ranges, boundary):
+    """
+    Returns the length of the multipart/byteranges body for the given ranges
+    of the given content.
+    """
+    part_headers, closing_delimiter = _multipart_range_headers(content, ranges, boundary)
+    return (
+        sum(len(header) for header in part_headers) +
+        sum(last - first + 1 for first, last in ranges) +
+        len(closing_delimiter)
+    )
+
+
+def _stream_multipart_ranges(content, ranges, boundary):
+    """
+    Streams the multipart/byteranges body for the given ranges of the given
+    content.
+    """
+    part_headers, closing_delimiter = _multipart_range_headers(content, ranges, boundary)
+    for header, (first, last) in zip(part_headers, ranges):
+        yield header
+        for chunk in _stream_data_in_range(content, first, last):
+            yield chunk
+    yield closing_delimiter
+
+
 def parse_range_header(header_value, content_length):
     """
     Returns the unit and a list of (start, end) tuples of ranges.
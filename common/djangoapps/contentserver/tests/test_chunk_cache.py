@@ -0,0 +1,92 @@
+"""
+Tests for the contentserver chunk cache.
+"""
+from datetime import datetime
+import os
+import shutil
+from StringIO import StringIO
+import tempfile
+import unittest
+
+from mock import patch
+from opaque_keys.edx.locator import CourseLocator
+
+from xmodule.contentstore.content import StaticContentStream
+
+from contentserver.chunk_cache import AssetChunkCache
+
+
+class ChunkedStream(StringIO):
+    """
+    An in-memory stand-in for a GridFS file, which is stored in chunks.
+    """
+    chunk_size = 10
+
+
+class AssetChunkCacheTestCase(unittest.TestCase):
+    """
+    Tests for AssetChunkCache.
+    """
+    DATA = ''.join(chr(ord('a') + index % 26) for index in range(95))
+
+    def setUp(self):
+        super(AssetChunkCacheTestCase, self).setUp()
+        self.root_path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root_path)
+        self.chunk_cache = AssetChunkCache(self.root_path, 1000)
+        self.location = CourseLocator('org', 'course', 'run').make_asset_key('asset', 'video.mp4')
+
+    def create_content(self, data=DATA, last_modified_at=datetime(2015, 1, 1)):
+        """
+        Returns a StaticContentStream of the given data.
+        """
+        return StaticContentStream(
+            self.location, 'video.mp4', 'video/mp4', ChunkedStream(data),
+            last_modified_at=last_modified_at, length=len(data),
+        )
+
+    def stream_range(self, content, first_byte, last_byte):
+        """
+        Returns the data streamed through the chunk cache for the given range.
+        """
+        return ''.join(self.chunk_cache.stream_data_in_range(content, first_byte, last_byte))
+
+    def test_stream_data_in_range(self):
+        content = self.create_content()
+        for first_byte, last_byte in [(0, 94), (0, 0), (3, 7), (5, 25), (10, 19), (90, 94), (9, 10)]:
+            self.assertEqual(self.stream_range(content, first_byte, last_byte), self.DATA[first_byte:last_byte + 1])
+
+    def test_cached_chunks_are_not_read_again(self):
+        self.stream_range(self.create_content(), 15, 24)
+
+        content = self.create_content()
+        with patch.object(content, 'stream_data_in_range', wraps=content.stream_data_in_range) as mock_stream:
+            self.assertEqual(self.stream_range(content, 10, 39), self.DATA[10:40])
+        # Only the chunks that weren't in the first range are read from the stream.
+        self.assertEqual(
+            sorted(call[0] for call in mock_stream.call_args_list),
+            [(30, 39)],
+        )
+
+    def test_new_version_is_not_served_from_cache(self):
+        self.stream_range(self.create_content(), 0, 94)
+
+        new_data = self.DATA.upper()
+        content = self.create_content(data=new_data, last_modified_at=datetime(2015, 1, 2))
+        self.assertEqual(self.stream_range(content, 0, 94), new_data)
+
+    def test_prune(self):
+        chunk_cache = AssetChunkCache(self.root_path, 50)
+        self.assertEqual(''.join(chunk_cache.stream_data_in_range(self.create_content(), 0, 94)), self.DATA)
+
+        total_size = sum(
+            os.path.getsize(os.path.join(dirpath, filename))
+            for dirpath, __, filenames in os.walk(self.root_path)
+            for filename in filenames
+        )
+        self.assertLessEqual(total_size, 50)
+
+    def test_unwritable_cache(self):
+        with patch('contentserver.chunk_cache.tempfile.mkstemp', side_effect=OSError):
+            self.assertEqual(self.stream_range(self.create_content(), 0, 94), self.DATA)
+        self.assertIsNone(self.chunk_cache.get(AssetChunkCache.key_for(self.create_content()), 0))
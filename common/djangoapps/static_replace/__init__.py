@@ -1,5 +1,7 @@
+from collections import OrderedDict
 import logging
 import re
+import threading
 
 from django.contrib.staticfiles.storage import staticfiles_storage
 from django.contrib.staticfiles import finders
@@ -11,8 +13,16 @@ from xmodule.contentstore.content import StaticContent
 
 from opaque_keys.edx.locator import AssetLocator
 
+import request_cache
+
 log = logging.getLogger(__name__)
 
+# The largest number of staticfiles_storage lookups kept by StaticAssetLookupCache.
+STATIC_ASSET_LOOKUPS_MAX_SIZE = 10000
+
+# The name of the request cache of the modulestore types of the courses.
+MODULESTORE_TYPES_CACHE_NAME = 'static_replace.modulestore_types'
+
 
 def _url_replace_regex(prefix):
     """
@@ -30,6 +40,93 @@ def _url_replace_regex(prefix):
         """.format(prefix=prefix)
 
 
+_URL_REPLACE_PATTERNS = {}
+
+
+def _compiled_url_replace_regex(prefix):
+    """
+    Returns the compiled _url_replace_regex for the prefix, which is only
+    built once for each prefix, e.g. each STATIC_URL and data directory.
+    """
+    pattern = _URL_REPLACE_PATTERNS.get(prefix)
+    if pattern is None:
+        pattern = _URL_REPLACE_PATTERNS[prefix] = re.compile(_url_replace_regex(prefix))
+    return pattern
+
+
+class StaticAssetLookupCache(object):
+    """
+    A bounded, in-process cache of the lookups of paths in a staticfiles
+    storage, which evicts the least recently used lookups first.
+
+    Collected static files don't change while a process runs, so whether a
+    path exists and what its url is are only looked up once, rather than for
+    every url of every rendered block. Failed lookups aren't cached.
+    """
+    def __init__(self, storage, max_size):
+        self.storage = storage
+        self.max_size = max_size
+        self._lookups = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _lookup(self, key, lookup_function, path):
+        """
+        Returns the cached result of lookup_function(path), calling it if needed.
+        """
+        with self._lock:
+            result = self._lookups.pop(key, None)
+            if result is not None:
+                self._lookups[key] = result
+                return result
+        result = lookup_function(path)
+        with self._lock:
+            self._lookups[key] = result
+            while len(self._lookups) > self.max_size:
+                self._lookups.popitem(last=False)
+        return result
+
+    def exists(self, path):
+        """
+        Returns whether the path exists in the storage.
+        """
+        return self._lookup(('exists', path), self.storage.exists, path)
+
+    def url(self, path):
+        """
+        Returns the url of the path in the storage.
+        """
+        return self._lookup(('url', path), self.storage.url, path)
+
+
+_static_asset_lookups = None
+
+
+def get_static_asset_lookups():
+    """
+    Returns the StaticAssetLookupCache of staticfiles_storage, or the storage
+    itself in debug mode, where static files can change at any time.
+    """
+    global _static_asset_lookups  # pylint: disable=global-statement
+    if settings.DEBUG:
+        return staticfiles_storage
+    if _static_asset_lookups is None or _static_asset_lookups.storage is not staticfiles_storage:
+        _static_asset_lookups = StaticAssetLookupCache(staticfiles_storage, STATIC_ASSET_LOOKUPS_MAX_SIZE)
+    return _static_asset_lookups
+
+
+def get_modulestore_type(course_id):
+    """
+    Returns the modulestore type of the course, which is only looked up once
+    per request.
+    """
+    if request_cache.get_request() is None:
+        return modulestore().get_modulestore_type(course_id)
+    modulestore_types = request_cache.get_cache(MODULESTORE_TYPES_CACHE_NAME)
+    if course_id not in modulestore_types:
+        modulestore_types[course_id] = modulestore().get_modulestore_type(course_id)
+    return modulestore_types[course_id]
+
+
 def try_staticfiles_lookup(path):
     """
     Try to lookup a path in staticfiles_storage.  If it fails, return
@@ -71,7 +168,7 @@ def replace_jump_to_id_urls(text, course_id, jump_to_id_base_url):
         rest = match.group('rest')
         return "".join([quote, jump_to_id_base_url + rest, quote])
 
-    return re.sub(_url_replace_regex('/jump_to_id/'), replace_jump_to_id_url, text)
+    return _compiled_url_replace_regex('/jump_to_id/').sub(replace_jump_to_id_url, text)
 
 
 def replace_course_urls(text, course_key):
@@ -91,7 +188,7 @@ def replace_course_urls(text, course_key):
         rest = match.group('rest')
         return "".join([quote, '/courses/' + course_id + '/', rest, quote])
 
-    return re.sub(_url_replace_regex('/course/'), replace_course_url, text)
+    return _compiled_url_replace_regex('/course/').sub(replace_course_url, text)
 
 
 def process_static_urls(text, replacement_function, data_dir=None):
@@ -110,14 +207,10 @@ def process_static_urls(text, replacement_function, data_dir=None):
         rest = match.group('rest')
         return replacement_function(original, prefix, quote, rest)
 
-    return re.sub(
-        _url_replace_regex(u'(?:{static_url}|/static/)(?!{data_dir})'.format(
-            static_url=settings.STATIC_URL,
-            data_dir=data_dir
-        )),
-        wrap_part_extraction,
-        text
-    )
+    return _compiled_url_replace_regex(u'(?:{static_url}|/static/)(?!{data_dir})'.format(
+        static_url=settings.STATIC_URL,
+        data_dir=data_dir
+    )).sub(wrap_part_extraction, text)
 
 
 def make_static_urls_absolute(request, html):
@@ -149,6 +242,7 @@ def replace_static_urls(text, data_directory=None, course_id=None, static_asset_
     course_id: The course identifier used to distinguish static content for this course in studio
     static_asset_path: Path for static assets, which overrides data_directory and course_namespace, if nonempty
     """
+    static_asset_lookups = get_static_asset_lookups()
 
     def replace_static_url(original, prefix, quote, rest):
         """
@@ -164,19 +258,19 @@ def replace_static_urls(text, data_directory=None, course_id=None, static_asset_
         # if we're running with a MongoBacked store course_namespace is not None, then use studio style urls
         elif (not static_asset_path) \
                 and course_id \
-                and modulestore().get_modulestore_type(course_id) != ModuleStoreEnum.Type.xml:
+                and get_modulestore_type(course_id) != ModuleStoreEnum.Type.xml:
             # first look in the static file pipeline and see if we are trying to reference
             # a piece of static content which is in the edx-platform repo (e.g. JS associated with an xmodule)
 
             exists_in_staticfiles_storage = False
             try:
-                exists_in_staticfiles_storage = staticfiles_storage.exists(rest)
+                exists_in_staticfiles_storage = static_asset_lookups.exists(rest)
             except Exception as err:
                 log.warning("staticfiles_storage couldn't find path {0}: {1}".format(
                     rest, str(err)))
 
             if exists_in_staticfiles_storage:
-                url = staticfiles_storage.url(rest)
+                url = static_asset_lookups.url(rest)
             else:
                 # if not, then assume it's courseware specific content and then look in the
                 # Mongo-backed database
@@ -190,10 +284,10 @@ def replace_static_urls(text, data_directory=None, course_id=None, static_asset_
             course_path = "/".join((static_asset_path or data_directory, rest))
 
             try:
-                if staticfiles_storage.exists(rest):
-                    url = staticfiles_storage.url(rest)
+                if static_asset_lookups.exists(rest):
+                    url = static_asset_lookups.url(rest)
                 else:
-                    url = staticfiles_storage.url(course_path)
+                    url = static_asset_lookups.url(course_path)
             # And if that fails, assume that it's course content, and add manually data directory
             except Exception as err:
                 log.warning("staticfiles_storage couldn't find path {0}: {1}".format(
@@ -1,14 +1,17 @@
 import re
 
+from django.test.client import RequestFactory
 from nose.tools import assert_equals, assert_true, assert_false  # pylint: disable=no-name-in-module
 from static_replace import (
     replace_static_urls,
     replace_course_urls,
     _url_replace_regex,
     process_static_urls,
-    make_static_urls_absolute
+    make_static_urls_absolute,
+    StaticAssetLookupCache,
 )
 from mock import patch, Mock
+from request_cache.middleware import RequestCache
 
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
 from xmodule.modulestore.mongo import MongoModuleStore
@@ -83,6 +86,49 @@ def test_storage_url_not_exists(mock_storage):
     mock_storage.url.assert_called_once_with('data_dir/file.png')
 
 
+@patch('static_replace.staticfiles_storage', autospec=True)
+def test_storage_lookups_cached(mock_storage):
+    mock_storage.exists.return_value = True
+    mock_storage.url.return_value = '/static/file.png'
+
+    for __ in range(3):
+        assert_equals('"/static/file.png"', replace_static_urls(STATIC_SOURCE, DATA_DIRECTORY))
+    mock_storage.exists.assert_called_once_with('file.png')
+    mock_storage.url.assert_called_once_with('file.png')
+
+
+def test_storage_lookup_cache_evicts_least_recently_used():
+    storage = Mock()
+    storage.exists.side_effect = lambda path: path.startswith('a')
+    lookups = StaticAssetLookupCache(storage, 2)
+
+    assert_true(lookups.exists('a.png'))
+    assert_false(lookups.exists('b.png'))
+    assert_true(lookups.exists('a.png'))
+    assert_false(lookups.exists('c.png'))
+    assert_equals(storage.exists.call_count, 3)
+
+    # b.png was the least recently used lookup, so it's looked up again.
+    assert_false(lookups.exists('b.png'))
+    assert_false(lookups.exists('c.png'))
+    assert_equals(storage.exists.call_count, 4)
+
+
+@patch('static_replace.StaticContent', autospec=True)
+@patch('static_replace.modulestore', autospec=True)
+def test_modulestore_type_looked_up_once_per_request(mock_modulestore, mock_static_content):
+    mock_modulestore.return_value = Mock(MongoModuleStore)
+    mock_static_content.convert_legacy_static_url_with_course_id.return_value = "c4x://mock_url"
+
+    RequestCache().process_request(RequestFactory().get('/'))
+    try:
+        for __ in range(3):
+            replace_static_urls(STATIC_SOURCE, DATA_DIRECTORY, course_id=COURSE_KEY)
+    finally:
+        RequestCache.clear_request_cache()
+    mock_modulestore.return_value.get_modulestore_type.assert_called_once_with(COURSE_KEY)
+
+
 @patch('static_replace.StaticContent', autospec=True)
 @patch('static_replace.modulestore', autospec=True)
 def test_mongo_filestore(mock_modulestore, mock_static_content):
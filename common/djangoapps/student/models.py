@@ -41,6 +41,7 @@ import dogstats_wrapper as dog_stats_api
 from eventtracking import tracker
 from opaque_keys.edx.keys import CourseKey
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
+import request_cache
 from simple_history.models import HistoricalRecords
 from track import contexts
 from xmodule_django.models import CourseKeyField, NoneToEmptyManager
@@ -906,6 +907,10 @@ class CourseEnrollment(models.Model):
     # cache key format e.g enrollment.<username>.<course_key>.mode = 'honor'
     COURSE_ENROLLMENT_CACHE_KEY = u"enrollment.{}.{}.mode"
 
+    # Name of the request cache of the (mode, is_active) enrollment states,
+    # by (user id, course id).
+    ENROLLMENT_STATES_CACHE_NAME = u"student.models.CourseEnrollment.states"
+
     class Meta(object):
         unique_together = (('user', 'course_id'),)
         ordering = ('user', 'course_id')
@@ -1266,11 +1271,8 @@ class CourseEnrollment(models.Model):
         if not user.is_authenticated():
             return False
 
-        try:
-            record = CourseEnrollment.objects.get(user=user, course_id=course_key)
-            return record.is_active
-        except cls.DoesNotExist:
-            return False
+        __, is_active = cls.enrollment_mode_for_user(user, course_key)
+        return bool(is_active)
 
     @classmethod
     def is_enrolled_by_partial(cls, user, course_id_partial):
@@ -1312,11 +1314,96 @@ class CourseEnrollment(models.Model):
             and is_active is whether the enrollment is active.
         Returns (None, None) if the courseenrollment record does not exist.
         """
-        try:
-            record = CourseEnrollment.objects.get(user=user, course_id=course_id)
-            return (record.mode, record.is_active)
-        except cls.DoesNotExist:
-            return (None, None)
+        return cls.enrollment_modes_for_courses(user, [course_id])[course_id]
+
+    @classmethod
+    def enrollment_modes_for_courses(cls, user, course_keys):
+        """
+        Returns the enrollment modes of the user in each of the given courses,
+        with at most one query.
+
+        Returns a dict of (mode, is_active) by course key, like
+        `enrollment_mode_for_user`.
+        """
+        states = cls._get_enrollment_states([(user.id, course_key) for course_key in course_keys])
+        return {course_key: states[user.id, course_key] for course_key in course_keys}
+
+    @classmethod
+    def enrollment_modes_for_users(cls, users, course_key):
+        """
+        Returns the enrollment modes of each of the given users in the course,
+        with at most one query.
+
+        Returns a dict of (mode, is_active) by user id, like
+        `enrollment_mode_for_user`.
+        """
+        states = cls._get_enrollment_states([(user.id, course_key) for user in users])
+        return {user.id: states[user.id, course_key] for user in users}
+
+    @classmethod
+    def _get_enrollment_states(cls, user_course_keys):
+        """
+        Returns a dict of the (mode, is_active) enrollment state, or (None, None)
+        if there's no enrollment, by (user id, course key) pair.
+
+        The states are read from the request cache, and the remaining ones from
+        the database, in a single query.
+
+        The states aren't kept in the shared cache, which could be filled with
+        the state of an enrollment that is being changed in a transaction that
+        isn't committed yet, after the change has invalidated it.
+        """
+        states = {}
+        missing = {}
+        request_states = cls._request_enrollment_states()
+        for user_id, course_key in user_course_keys:
+            state_key = _enrollment_state_key(user_id, course_key)
+            if user_id is None:
+                states[user_id, course_key] = (None, None)
+            elif state_key in request_states:
+                states[user_id, course_key] = request_states[state_key]
+            else:
+                missing.setdefault(state_key, []).append((user_id, course_key))
+        if not missing:
+            return states
+
+        records = CourseEnrollment.objects.filter(
+            user_id__in=set(user_id for user_id, __ in missing),
+            course_id__in=set(user_course_keys[0][1] for user_course_keys in missing.itervalues()),
+        ).values_list('user_id', 'course_id', 'mode', 'is_active')
+        found = {state_key: (None, None) for state_key in missing}
+        for user_id, course_id, mode, is_active in records:
+            state_key = _enrollment_state_key(user_id, course_id)
+            if state_key in found:
+                found[state_key] = (mode, is_active)
+
+        for state_key, state in found.iteritems():
+            request_states[state_key] = state
+            for user_course_key in missing[state_key]:
+                states[user_course_key] = state
+        return states
+
+    @classmethod
+    def _request_enrollment_states(cls):
+        """
+        Returns the enrollment states cached in the current request, or an
+        empty dict outside of a request.
+        """
+        if request_cache.get_request() is None:
+            return {}
+        return request_cache.get_cache(cls.ENROLLMENT_STATES_CACHE_NAME)
+
+    @classmethod
+    def cache_enrollment_states(cls, enrollments):
+        """
+        Caches the states of the given enrollments in the current request, so
+        that checking them doesn't query the database again.
+        """
+        request_states = cls._request_enrollment_states()
+        for enrollment in enrollments:
+            request_states[_enrollment_state_key(enrollment.user_id, enrollment.course_id)] = (
+                enrollment.mode, enrollment.is_active
+            )
 
     @classmethod
     def enrollments_for_user(cls, user):
@@ -1471,6 +1558,18 @@ def invalidate_enrollment_mode_cache(sender, instance, **kwargs):  # pylint: dis
         unicode(instance.course_id)
     )
     cache.delete(cache_key)
+    state_key = _enrollment_state_key(instance.user_id, instance.course_id)
+    CourseEnrollment._request_enrollment_states().pop(state_key, None)  # pylint: disable=protected-access
+
+
+def _enrollment_state_key(user_id, course_key):
+    """
+    Returns the (user id, course id) key of an enrollment state, without the
+    branch and version of the course key, like it is stored.
+    """
+    if hasattr(course_key, 'version_agnostic') and hasattr(course_key, 'for_branch'):
+        course_key = course_key.for_branch(None).version_agnostic()
+    return user_id, unicode(course_key)
 
 
 class ManualEnrollmentAudit(models.Model):
@@ -8,6 +8,7 @@ from abc import ABCMeta, abstractmethod
 from django.contrib.auth.models import User
 import logging
 
+import request_cache
 from student.models import CourseAccessRole
 from xmodule_django.models import CourseKeyField
 
@@ -38,11 +39,54 @@ class RoleCache(object):
     """
     A cache of the CourseAccessRoles held by a particular user
     """
+    # The name of the request cache of the RoleCaches of the users, by user id.
+    REQUEST_CACHE_NAME = u"student.roles.RoleCache"
+
     def __init__(self, user):
         self._roles = set(
             CourseAccessRole.objects.filter(user=user).all()
         )
 
+    @classmethod
+    def _request_role_caches(cls):
+        """
+        Return the RoleCaches of the current request, or None outside of a request.
+        """
+        if request_cache.get_request() is None:
+            return None
+        return request_cache.get_cache(cls.REQUEST_CACHE_NAME)
+
+    @classmethod
+    def for_user(cls, user):
+        """
+        Return the RoleCache of the supplied django user.
+
+        Within a request, the RoleCache is shared by all the objects of the user,
+        so that their roles are loaded once per request.
+        """
+        # pylint: disable=protected-access
+        if not hasattr(user, '_roles'):
+            request_role_caches = cls._request_role_caches()
+            role_cache = request_role_caches.get(user.id) if request_role_caches is not None else None
+            if role_cache is None:
+                role_cache = cls(user)
+                if request_role_caches is not None:
+                    request_role_caches[user.id] = role_cache
+            user._roles = role_cache
+        return user._roles
+
+    @classmethod
+    def invalidate(cls, user):
+        """
+        Forget the cached roles of the supplied django user, after they changed.
+        """
+        # pylint: disable=protected-access
+        if hasattr(user, '_roles'):
+            del user._roles
+        request_role_caches = cls._request_role_caches()
+        if request_role_caches is not None:
+            request_role_caches.pop(user.id, None)
+
     def has_role(self, role, course_id, org):
         """
         Return whether this RoleCache contains a role with the specified role, course_id, and org
@@ -137,13 +181,7 @@ class RoleBase(AccessRole):
         if not (user.is_authenticated() and user.is_active):
             return False
 
-        # pylint: disable=protected-access
-        if not hasattr(user, '_roles'):
-            # Cache a list of tuples identifying the particular roles that a user has
-            # Stored as tuples, rather than django models, to make it cheaper to construct objects for comparison
-            user._roles = RoleCache(user)
-
-        return user._roles.has_role(self._role_name, self.course_key, self.org)
+        return RoleCache.for_user(user).has_role(self._role_name, self.course_key, self.org)
 
     def add_users(self, *users):
         """
@@ -156,8 +194,7 @@ class RoleBase(AccessRole):
             if user.is_authenticated and user.is_active and not self.has_user(user):
                 entry = CourseAccessRole(user=user, role=self._role_name, course_id=self.course_key, org=self.org)
                 entry.save()
-                if hasattr(user, '_roles'):
-                    del user._roles
+                RoleCache.invalidate(user)
 
     def remove_users(self, *users):
         """
@@ -168,8 +205,7 @@ class RoleBase(AccessRole):
         )
         entries.delete()
         for user in users:
-            if hasattr(user, '_roles'):
-                del user._roles
+            RoleCache.invalidate(user)
 
     def users_with_role(self):
         """
@@ -339,11 +375,7 @@ class UserBasedRole(object):
         if not (self.user.is_authenticated() and self.user.is_active):
             return False
 
-        # pylint: disable=protected-access
-        if not hasattr(self.user, '_roles'):
-            self.user._roles = RoleCache(self.user)
-
-        return self.user._roles.has_role(self.role, course_key, course_key.org)
+        return RoleCache.for_user(self.user).has_role(self.role, course_key, course_key.org)
 
     def add_course(self, *course_keys):
         """
@@ -353,8 +385,7 @@ class UserBasedRole(object):
             for course_key in course_keys:
                 entry = CourseAccessRole(user=self.user, role=self.role, course_id=course_key, org=course_key.org)
                 entry.save()
-            if hasattr(self.user, '_roles'):
-                del self.user._roles
+            RoleCache.invalidate(self.user)
         else:
             raise ValueError("user is not active. Cannot grant access to courses")
 
@@ -364,8 +395,7 @@ class UserBasedRole(object):
         """
         entries = CourseAccessRole.objects.filter(user=self.user, role=self.role, course_id__in=course_keys)
         entries.delete()
-        if hasattr(self.user, '_roles'):
-            del self.user._roles
+        RoleCache.invalidate(self.user)
 
     def courses_with_role(self):
         """
@@ -2,9 +2,12 @@
 Tests of student.roles
 """
 import ddt
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.test.client import RequestFactory
 
 from courseware.tests.factories import UserFactory, StaffFactory, InstructorFactory
+from request_cache.middleware import RequestCache
 from student.tests.factories import AnonymousUserFactory
 
 from student.roles import (
@@ -193,3 +196,19 @@ class RoleCacheTestCase(TestCase):
     def test_empty_cache(self, role, target):
         cache = RoleCache(self.user)
         self.assertFalse(cache.has_role(*target))
+
+    def test_shared_within_request(self):
+        RequestCache().process_request(RequestFactory().get('/'))
+        self.addCleanup(RequestCache.clear_request_cache)
+        cache = RoleCache.for_user(self.user)
+        self.assertIs(RoleCache.for_user(User.objects.get(id=self.user.id)), cache)
+
+        CourseStaffRole(self.IN_KEY).add_users(self.user)
+        new_cache = RoleCache.for_user(User.objects.get(id=self.user.id))
+        self.assertIsNot(new_cache, cache)
+        self.assertTrue(new_cache.has_role('staff', self.IN_KEY, 'edX'))
+
+    def test_not_shared_outside_of_request(self):
+        cache = RoleCache.for_user(self.user)
+        self.assertIs(RoleCache.for_user(self.user), cache)
+        self.assertIsNot(RoleCache.for_user(User.objects.get(id=self.user.id)), cache)
@@ -17,7 +17,7 @@ from django.conf import settings
 from django.contrib.auth.models import User, AnonymousUser
 from django.core.urlresolvers import reverse
 from django.test import TestCase
-from django.test.client import Client
+from django.test.client import Client, RequestFactory
 
 from course_modes.models import CourseMode
 from student.models import (
@@ -30,6 +30,7 @@ from student.views import (
     complete_course_mode_info,
     _get_course_programs
 )
+from request_cache.middleware import RequestCache
 from student.tests.factories import UserFactory, CourseModeFactory
 from util.testing import EventTestMixin
 from util.model_utils import USER_SETTINGS_CHANGED_EVENT_NAME
@@ -779,6 +780,60 @@ class EnrollInCourseTest(EnrollmentEventTestMixin, TestCase):
         self.assert_enrollment_mode_change_event_was_emitted(user, course_id, "audit")
 
 
+class EnrollmentStateCacheTest(TestCase):
+    """Tests the bulk and cached lookups of enrollment states."""
+
+    def setUp(self):
+        super(EnrollmentStateCacheTest, self).setUp()
+        self.user = UserFactory()
+        self.course_keys = [SlashSeparatedCourseKey("edX", "Test{}".format(index), "2013") for index in range(3)]
+        CourseEnrollment.enroll(self.user, self.course_keys[0], "verified")
+        CourseEnrollment.enroll(self.user, self.course_keys[1]).deactivate()
+
+    def start_request(self):
+        """Simulates the start of a new request."""
+        RequestCache().process_request(RequestFactory().get('/'))
+        self.addCleanup(RequestCache.clear_request_cache)
+
+    def test_modes_for_courses(self):
+        with self.assertNumQueries(1):
+            modes = CourseEnrollment.enrollment_modes_for_courses(self.user, self.course_keys)
+        self.assertEqual(modes, {
+            self.course_keys[0]: ("verified", True),
+            self.course_keys[1]: ("honor", False),
+            self.course_keys[2]: (None, None),
+        })
+
+    def test_modes_for_users(self):
+        other_user = UserFactory()
+        with self.assertNumQueries(1):
+            modes = CourseEnrollment.enrollment_modes_for_users([self.user, other_user], self.course_keys[0])
+        self.assertEqual(modes, {self.user.id: ("verified", True), other_user.id: (None, None)})
+
+    def test_request_cache(self):
+        self.start_request()
+        CourseEnrollment.enrollment_modes_for_courses(self.user, self.course_keys)
+        with self.assertNumQueries(0):
+            self.assertTrue(CourseEnrollment.is_enrolled(self.user, self.course_keys[0]))
+            self.assertFalse(CourseEnrollment.is_enrolled(self.user, self.course_keys[1]))
+            self.assertFalse(CourseEnrollment.is_enrolled(self.user, self.course_keys[2]))
+
+        # Enrolling invalidates the cached state.
+        CourseEnrollment.enroll(self.user, self.course_keys[2], "audit")
+        self.assertEqual(CourseEnrollment.enrollment_mode_for_user(self.user, self.course_keys[2]), ("audit", True))
+
+    def test_cache_enrollment_states(self):
+        self.start_request()
+        CourseEnrollment.cache_enrollment_states(CourseEnrollment.enrollments_for_user(self.user))
+        with self.assertNumQueries(0):
+            self.assertTrue(CourseEnrollment.is_enrolled(self.user, self.course_keys[0]))
+
+    def test_no_cache_outside_of_request(self):
+        self.assertTrue(CourseEnrollment.is_enrolled(self.user, self.course_keys[0]))
+        CourseEnrollment.objects.filter(user=self.user, course_id=self.course_keys[0]).update(is_active=False)
+        self.assertFalse(CourseEnrollment.is_enrolled(self.user, self.course_keys[0]))
+
+
 @unittest.skipUnless(settings.ROOT_URLCONF == 'lms.urls', 'Test only valid in lms')
 class ChangeEnrollmentViewTest(ModuleStoreTestCase):
     """Tests the student.views.change_enrollment view"""
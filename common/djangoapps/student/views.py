@@ -538,6 +538,9 @@ def dashboard(request):
     # enrollments, because it could have been a data push snafu.
     course_enrollments = list(get_course_enrollments(user, course_org_filter, org_filter_out_set))
 
+    # The rest of the page checks these enrollments again, course by course.
+    CourseEnrollment.cache_enrollment_states(course_enrollments)
+
     # sort the enrollment pairs by the enrollment date
     course_enrollments.sort(key=lambda x: x.created, reverse=True)
 
@@ -0,0 +1,209 @@
+"""
+Event tracker backend that delivers events to another backend in batches,
+from a background thread.
+
+Sending an event to a database backend adds the latency of a write to the
+request that emitted it. The BatchingBackend instead puts the event in a
+bounded in-process queue, which a background thread drains, delivering the
+events to the wrapped backend with `send_many`, a batch at a time::
+
+  TRACKING_BACKENDS = {
+      'mongo': {
+          'ENGINE': 'track.backends.batching.BatchingBackend',
+          'OPTIONS': {
+              'backend': {
+                  'ENGINE': 'track.backends.mongodb.MongoBackend',
+                  'OPTIONS': {...}
+              },
+              'max_queue_size': 10000,
+              'flush_size': 100,
+              'flush_interval': 1.0,
+              'full_queue_timeout': 0,
+          }
+      }
+  }
+
+When the queue is full, `send` waits up to `full_queue_timeout` seconds for
+room, then drops the event and counts it. The queued events are delivered
+when the process exits.
+"""
+
+from __future__ import absolute_import
+
+import atexit
+from importlib import import_module
+import logging
+import os
+import Queue
+import threading
+import time
+import weakref
+
+from dogapi import dog_stats_api
+from django.db import close_old_connections
+
+from track.backends import BaseBackend
+
+
+log = logging.getLogger(__name__)
+
+# Seconds to wait for the queued events to be delivered when the process exits.
+EXIT_FLUSH_TIMEOUT = 10
+
+# The backends whose queued events are delivered when the process exits.
+_BACKENDS = weakref.WeakSet()
+
+
+def _flush_backends(timeout=EXIT_FLUSH_TIMEOUT):
+    """Wait at most `timeout` seconds in all for the events of every backend to be delivered."""
+    deadline = time.time() + timeout
+    for backend in list(_BACKENDS):
+        backend.flush(max(deadline - time.time(), 0))
+
+
+atexit.register(_flush_backends)
+
+
+class _FlushRequest(object):
+    """A marker in the queue, which is set once the events before it are delivered."""
+    def __init__(self):
+        self.done = threading.Event()
+
+
+class BatchingBackend(BaseBackend):
+    """Event tracker backend that delivers events in batches from a background thread."""
+
+    def __init__(self, backend, max_queue_size=10000, flush_size=100, flush_interval=1.0,
+                 full_queue_timeout=0, **kwargs):
+        """
+        Configure the wrapped backend and the queue.
+
+        :Parameters:
+
+          - `backend`: the configuration of the backend that the events are
+            delivered to, with an `ENGINE` and `OPTIONS`, like in
+            `TRACKING_BACKENDS`
+          - `max_queue_size`: the number of events kept waiting for delivery
+          - `flush_size`: the largest number of events delivered at once
+          - `flush_interval`: the longest time in seconds an event waits for
+            more events to be delivered with
+          - `full_queue_timeout`: the time in seconds `send` waits for room
+            in a full queue before dropping the event
+
+        """
+        super(BatchingBackend, self).__init__(**kwargs)
+
+        # Imported here since the tracker instantiates this backend while it is being imported.
+        tracker = import_module('track.tracker')
+        self.backend = tracker._instantiate_backend_from_name(  # pylint: disable=protected-access
+            backend['ENGINE'], backend.get('OPTIONS', {})
+        )
+
+        self.max_queue_size = max_queue_size
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.full_queue_timeout = full_queue_timeout
+
+        self._lock = threading.Lock()
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        _BACKENDS.add(self)
+
+    def _get_queue(self):
+        """
+        Returns the queue of the current process, starting its delivery thread
+        if needed.
+
+        Threads don't survive forking, so each process starts its own, when it
+        sends its first event.
+        """
+        pid = os.getpid()
+        if self._pid != pid:
+            with self._lock:
+                if self._pid != pid:
+                    self._queue = Queue.Queue(self.max_queue_size)
+                    self._thread = threading.Thread(
+                        target=self._deliver_events, args=(self._queue,), name='track-batching-backend'
+                    )
+                    self._thread.daemon = True
+                    self._thread.start()
+                    self._pid = pid
+        return self._queue
+
+    def send(self, event):
+        """Queue the event for delivery, or drop it if the queue stays full."""
+        try:
+            self._get_queue().put(event, self.full_queue_timeout > 0, self.full_queue_timeout)
+        except Queue.Full:
+            dog_stats_api.increment('track.backends.batching.dropped')
+            log.warning('Event tracker queue is full, dropping %s event', event.get('event_type'))
+
+    def send_many(self, events):
+        """Queue all the events for delivery."""
+        for event in events:
+            self.send(event)
+
+    def flush(self, timeout=None):
+        """
+        Wait until the events queued so far are delivered, or for at most
+        `timeout` seconds.
+        """
+        if self._pid != os.getpid() or not self._thread.is_alive():
+            return
+        deadline = None if timeout is None else time.time() + timeout
+        flush_request = _FlushRequest()
+        try:
+            self._queue.put(flush_request, timeout=timeout)
+        except Queue.Full:
+            return
+        flush_request.done.wait(None if deadline is None else max(deadline - time.time(), 0))
+
+    def _next_batch(self, event_queue):
+        """
+        Returns the next events to deliver, and the flush requests among them.
+
+        Waits for a first event, then for more events until there are
+        `flush_size` of them or `flush_interval` seconds have passed.
+        """
+        events = []
+        flush_requests = []
+        item = event_queue.get()
+        deadline = time.time() + self.flush_interval
+        while True:
+            if isinstance(item, _FlushRequest):
+                # Deliver what was queued before the flush request right away.
+                flush_requests.append(item)
+                break
+            events.append(item)
+            if len(events) >= self.flush_size:
+                break
+            timeout = deadline - time.time()
+            if timeout <= 0:
+                break
+            try:
+                item = event_queue.get(timeout=timeout)
+            except Queue.Empty:
+                break
+        return events, flush_requests
+
+    def _deliver_events(self, event_queue):
+        """Deliver the queued events in batches, forever."""
+        while True:
+            events, flush_requests = self._next_batch(event_queue)
+            if events:
+                self._deliver(events)
+            for flush_request in flush_requests:
+                flush_request.done.set()
+
+    def _deliver(self, events):
+        """Deliver the events to the wrapped backend."""
+        # Like a request, each batch gets a fresh database connection if needed.
+        close_old_connections()
+        dog_stats_api.histogram('track.backends.batching.batch_size', len(events))
+        try:
+            with dog_stats_api.timer('track.backends.batching.deliver'):
+                self.backend.send_many(events)
+        except Exception:  # pylint: disable=broad-except
+            dog_stats_api.increment('track.backends.batching.failed', len(events))
+            log.exception('Error delivering %d events to the event tracker backend', len(events))
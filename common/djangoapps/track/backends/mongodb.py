@@ -88,8 +88,16 @@ class MongoBackend(BaseBackend):
 
     def send(self, event):
         """Insert the event in to the Mongo collection"""
+        self._insert(event)
+
+    def send_many(self, events):
+        """Insert the events in to the Mongo collection with a single bulk insert"""
+        self._insert(events, continue_on_error=True)
+
+    def _insert(self, doc_or_docs, **kwargs):
+        """Insert one or more events in to the Mongo collection"""
         try:
-            self.collection.insert(event, manipulate=False)
+            self.collection.insert(doc_or_docs, manipulate=False, **kwargs)
         except (PyMongoError, BSONError):
             # The event will be lost in case of a connection error or any error
             # that occurs when trying to insert the event into Mongo.
@@ -0,0 +1,104 @@
+from __future__ import absolute_import
+
+import time
+
+from mock import patch
+
+from django.test import TestCase
+
+from track.backends import BaseBackend
+from track.backends.batching import BatchingBackend, _flush_backends
+
+
+class InMemoryBackend(BaseBackend):
+    """Keeps the batches of events it receives."""
+    def __init__(self, **kwargs):
+        super(InMemoryBackend, self).__init__(**kwargs)
+        self.batches = []
+
+    def send(self, event):
+        self.batches.append([event])
+
+    def send_many(self, events):
+        self.batches.append(list(events))
+
+
+class TestBatchingBackend(TestCase):
+    def create_backend(self, **options):
+        backend = BatchingBackend(
+            backend={'ENGINE': 'track.backends.tests.test_batching.InMemoryBackend'},
+            **options
+        )
+        self.addCleanup(backend.flush, 1)
+        return backend
+
+    def test_events_delivered_in_batches(self):
+        backend = self.create_backend(flush_size=2, flush_interval=10)
+        events = [{'test': index} for index in range(5)]
+        for event in events:
+            backend.send(event)
+        backend.flush(5)
+
+        self.assertEqual(backend.backend.batches, [events[0:2], events[2:4], events[4:5]])
+
+    def delivered_events(self, backend):
+        """Returns the events delivered so far, in the order they were delivered."""
+        return [event for batch in backend.backend.batches for event in batch]
+
+    def test_events_delivered_after_interval(self):
+        backend = self.create_backend(flush_size=100, flush_interval=0.01)
+        events = [{'test': 1}, {'test': 2}]
+        for event in events:
+            backend.send(event)
+
+        # Without a flush, the events are delivered once the interval has passed,
+        # in one batch or in two depending on how fast they were queued.
+        deadline = time.time() + 5
+        while len(self.delivered_events(backend)) < len(events) and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.delivered_events(backend), events)
+
+    @patch('track.backends.batching.dog_stats_api')
+    def test_events_dropped_when_queue_full(self, mock_dog_stats_api):
+        backend = self.create_backend(max_queue_size=1)
+        with patch.object(backend, '_deliver_events'):
+            backend.send({'test': 1})
+            backend.send({'test': 2})
+        mock_dog_stats_api.increment.assert_called_once_with('track.backends.batching.dropped')
+        self.assertEqual(backend._queue.qsize(), 1)  # pylint: disable=protected-access
+
+    def test_flush_without_delivery_thread(self):
+        backend = self.create_backend(max_queue_size=1)
+        with patch.object(backend, '_deliver_events'):
+            backend.send({'test': 1})
+        backend._thread.join(5)  # pylint: disable=protected-access
+
+        # Nothing can deliver the full queue, so flushing doesn't wait for it.
+        start = time.time()
+        backend.flush(5)
+        self.assertLess(time.time() - start, 1)
+
+    def test_flush_backends_shares_timeout(self):
+        backends = [self.create_backend(max_queue_size=1) for __ in range(3)]
+        with patch.object(BatchingBackend, 'flush', autospec=True) as mock_flush:
+            _flush_backends(10)
+
+        # Every backend is flushed, within what is left of the same 10 seconds.
+        flushed = [backend for (backend, __), __ in mock_flush.call_args_list]
+        timeouts = [timeout for (__, timeout), __ in mock_flush.call_args_list]
+        for backend in backends:
+            self.assertIn(backend, flushed)
+        self.assertEqual(timeouts, sorted(timeouts, reverse=True))
+        self.assertLessEqual(timeouts[0], 10)
+
+    def test_delivery_errors_are_logged(self):
+        backend = self.create_backend()
+        with patch.object(backend.backend, 'send_many', side_effect=ValueError):
+            with patch('track.backends.batching.log') as mock_log:
+                backend.send({'test': 1})
+                backend.flush(5)
+        self.assertTrue(mock_log.exception.called)
+
+        backend.send({'test': 2})
+        backend.flush(5)
+        self.assertEqual(backend.backend.batches, [[{'test': 2}]])
@@ -1,6 +1,9 @@
 import re
 from django.conf import settings
 
+from capa.safe_exec import SafeExecResultCache
+import request_cache
+
 # We'll make assets named this be importable by Python code in the sandbox.
 PYTHON_LIB_ZIP = "python_lib.zip"
 
@@ -38,3 +41,23 @@ def get_python_lib_zip(contentstore, course_id):
         return zip_lib.data
     else:
         return None
+
+
+def _get_request_safe_exec_cache():
+    """
+    Return the request cache for safe_exec results, or None outside of a request.
+    """
+    if request_cache.get_request() is None:
+        return None
+    return request_cache.get_cache('capa.safe_exec')
+
+
+def get_safe_exec_cache(cache):
+    """
+    Return the cache that capa problems should use for safe_exec results.
+
+    Results are kept for the duration of the request in front of `cache`, so
+    that rendering many problems that run the same code with the same seed
+    reads `cache` once per distinct script, and executes it at most once.
+    """
+    return SafeExecResultCache(cache, _get_request_safe_exec_cache)
@@ -4,8 +4,10 @@ Tests for sandboxing.py in util app
 
 from django.test import TestCase
 from opaque_keys.edx.locator import LibraryLocator
-from util.sandboxing import can_execute_unsafe_code
+from util.sandboxing import can_execute_unsafe_code, get_safe_exec_cache
+from django.test.client import RequestFactory
 from django.test.utils import override_settings
+from request_cache.middleware import RequestCache
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
 
 
@@ -37,3 +39,31 @@ class SandboxingTest(TestCase):
         self.assertFalse(can_execute_unsafe_code(SlashSeparatedCourseKey('edX', 'full', '2012_Fall')))
         self.assertFalse(can_execute_unsafe_code(SlashSeparatedCourseKey('edX', 'full', '2013_Spring')))
         self.assertFalse(can_execute_unsafe_code(LibraryLocator('edX', 'test_bank')))
+
+
+class SafeExecCacheTest(TestCase):
+    """
+    Test the cache of safe_exec results
+    """
+    def setUp(self):
+        super(SafeExecCacheTest, self).setUp()
+        self.addCleanup(RequestCache.clear_request_cache)
+
+    def test_request_cache(self):
+        """
+        Test that results are kept for the request in front of the shared cache
+        """
+        RequestCache().process_request(RequestFactory().get('/'))
+        get_safe_exec_cache(None).set('key', [None, {'a': 1}])
+        self.assertEqual(get_safe_exec_cache(None).get('key'), [None, {'a': 1}])
+
+        RequestCache().process_response(None, None)
+        self.assertIsNone(get_safe_exec_cache(None).get('key'))
+
+    def test_outside_of_request(self):
+        """
+        Test that only the shared cache is used outside of a request
+        """
+        RequestCache.clear_request_cache()
+        get_safe_exec_cache(None).set('key', [None, {'a': 1}])
+        self.assertIsNone(get_safe_exec_cache(None).get('key'))
@@ -2,6 +2,7 @@
 Parser and evaluator for FormulaResponse and NumericalResponse
 
 Uses pyparsing to parse. Main function as of now is evaluator().
+Expressions evaluated many times can be compiled once with compile_expression().
 """
 
 import math
@@ -224,38 +225,263 @@ def evaluator(variables, functions, math_expr, case_sensitive=False):
      python numbers.
     -Unary functions are passed as a dictionary from string to function.
     """
-    # No need to go further.
-    if math_expr.strip() == "":
-        return float('nan')
+    return compile_expression(math_expr, case_sensitive).evaluate(variables, functions)
 
-    # Parse the tree.
-    math_interpreter = ParseAugmenter(math_expr, case_sensitive)
-    math_interpreter.parse_algebra()
 
-    # Get our variables together.
-    all_variables, all_functions = add_defaults(variables, functions, case_sensitive)
+# The most recently compiled expressions, by (math_expr, case_sensitive).
+_COMPILED_EXPRESSIONS = {}
+COMPILED_EXPRESSIONS_MAX_SIZE = 1000
 
-    # ...and check them
-    math_interpreter.check_variables(all_variables, all_functions)
 
-    # Create a recursion to evaluate the tree.
-    if case_sensitive:
-        casify = lambda x: x
-    else:
-        casify = lambda x: x.lower()  # Lowercase for case insens.
-
-    evaluate_actions = {
-        'number': eval_number,
-        'variable': lambda x: all_variables[casify(x[0])],
-        'function': lambda x: all_functions[casify(x[0])](x[1]),
-        'atom': eval_atom,
-        'power': eval_power,
-        'parallel': eval_parallel,
-        'product': eval_product,
-        'sum': eval_sum
-    }
-
-    return math_interpreter.reduce_tree(evaluate_actions)
+def compile_expression(math_expr, case_sensitive=False):
+    """
+    Parse an expression into a CompiledExpression, which evaluates it.
+
+    Compiled expressions are memoized by expression text, so that evaluating
+    an expression again doesn't parse it again.
+    """
+    key = (math_expr, case_sensitive)
+    compiled = _COMPILED_EXPRESSIONS.get(key)
+    if compiled is None:
+        compiled = CompiledExpression(math_expr, case_sensitive)
+        if len(_COMPILED_EXPRESSIONS) >= COMPILED_EXPRESSIONS_MAX_SIZE:
+            _COMPILED_EXPRESSIONS.clear()
+        _COMPILED_EXPRESSIONS[key] = compiled
+    return compiled
+
+
+# The default functions which give the same results for numpy arrays as for
+# each of their items. The others (e.g. `fact`, or `arccot` which branches on
+# the sign of its argument) only work on numbers.
+VECTORIZED_FUNCTIONS = frozenset(
+    func for func in DEFAULT_FUNCTIONS.itervalues()
+    if func not in (math.factorial, functions.arccot)
+)
+
+
+def compile_power(parse_result):
+    """
+    Compile a list of operands and '^' marks into a closure which
+    exponentiates them, right to left, like `eval_power`.
+    """
+    operands = [k for k in parse_result if callable(k)]  # Ignore the '^' marks.
+    if len(operands) == 1:
+        return operands[0]
+
+    def power(variables, functions):
+        """
+        e.g. [ 2, 3, 2 ] -> 2^3^2 = 2^(3^2) -> 512
+        """
+        values = [operand(variables, functions) for operand in reversed(operands)]
+        return reduce(lambda a, b: b ** a, values)
+    return power
+
+
+def compile_parallel(parse_result):
+    """
+    Compile a list of operands and '||' marks into a closure which computes
+    them according to the parallel resistors operator, like `eval_parallel`.
+    """
+    operands = [k for k in parse_result if callable(k)]
+    if len(operands) == 1:
+        return operands[0]
+
+    def parallel(variables, functions):
+        """
+        out = 1 / (1/in1 + 1/in2 + ...)
+        """
+        values = [operand(variables, functions) for operand in operands]
+        if not any(isinstance(value, numpy.ndarray) for value in values):
+            return eval_parallel(values)
+        if any(numpy.any(numpy.equal(value, 0)) for value in values):
+            # Only some of the samples are NaN; let them be evaluated one by one.
+            raise FloatingPointError("zero in parallel resistors operator")
+        return 1. / sum(1. / value for value in values)
+    return parallel
+
+
+def compile_operations(parse_result, initial_value, initial_op, operators):
+    """
+    Compile a list of operands and the operators between them into a
+    closure which applies the operators from left to right, like `eval_sum`
+    and `eval_product`.
+
+    `operators` maps each operator mark to its function; `initial_op` is
+    used until the first mark.
+    """
+    current_op = initial_op
+    operations = []
+    for token in parse_result:
+        if callable(token):
+            operations.append((current_op, token))
+        else:
+            current_op = operators[token]
+
+    def operate(variables, functions):
+        """
+        Apply the operations to the initial value, in order.
+        """
+        result = initial_value
+        for current_op, operand in operations:
+            result = current_op(result, operand(variables, functions))
+        return result
+    return operate
+
+
+class CompiledExpression(object):
+    """
+    A parsed math expression, which can be evaluated many times.
+
+    The parse tree is turned into nested closures once, so that evaluating the
+    expression doesn't walk the parse tree again. The closures work the same
+    on numbers and on numpy arrays, so `evaluate_many` can evaluate the
+    expression for many sets of variables at once.
+    """
+    def __init__(self, math_expr, case_sensitive=False):
+        self.math_expr = math_expr
+        self.case_sensitive = case_sensitive
+        self.math_interpreter = None
+        self.evaluate_tree = None
+
+        # No need to go further.
+        if math_expr.strip() == "":
+            return
+
+        # Parse the tree.
+        self.math_interpreter = ParseAugmenter(math_expr, case_sensitive)
+        self.math_interpreter.parse_algebra()
+
+        # Create a recursion to compile the tree.
+        if case_sensitive:
+            casify = lambda x: x
+        else:
+            casify = lambda x: x.lower()  # Lowercase for case insens.
+
+        def compile_number(parse_result):
+            """
+            Compile a number into a closure which returns it.
+            """
+            number = eval_number(parse_result)
+            return lambda variables, functions: number
+
+        def compile_variable(parse_result):
+            """
+            Compile a variable into a closure which looks it up.
+            """
+            name = casify(parse_result[0])
+            return lambda variables, functions: variables[name]
+
+        def compile_function(parse_result):
+            """
+            Compile a function call into a closure which makes it.
+            """
+            name = casify(parse_result[0])
+            argument = parse_result[1]
+            return lambda variables, functions: functions[name](argument(variables, functions))
+
+        compile_actions = {
+            'number': compile_number,
+            'variable': compile_variable,
+            'function': compile_function,
+            # In the case of parenthesis, ignore them.
+            'atom': lambda x: next(k for k in x if callable(k)),
+            'power': compile_power,
+            'parallel': compile_parallel,
+            'product': lambda x: compile_operations(
+                x, 1.0, operator.mul, {'*': operator.mul, '/': operator.truediv}
+            ),
+            'sum': lambda x: compile_operations(
+                x, 0.0, operator.add, {'+': operator.add, '-': operator.sub}
+            ),
+        }
+        self.evaluate_tree = self.math_interpreter.reduce_tree(compile_actions)
+
+    def evaluate(self, variables, functions):
+        """
+        Evaluate the expression with the given variables and functions, as
+        `evaluator` does.
+        """
+        if self.evaluate_tree is None:
+            return float('nan')
+
+        # Get our variables together.
+        all_variables, all_functions = add_defaults(variables, functions, self.case_sensitive)
+
+        # ...and check them
+        self.math_interpreter.check_variables(all_variables, all_functions)
+
+        return self.evaluate_tree(all_variables, all_functions)
+
+    def evaluate_many(self, variables_list, functions):
+        """
+        Evaluate the expression for each dictionary of variables in
+        `variables_list`, and return the list of results.
+
+        When possible, all the results are computed at once, by evaluating
+        the expression with numpy arrays of the values of the variables.
+        Otherwise, e.g. if some of the values raise errors or the expression
+        uses functions which don't work on arrays, each result is computed by
+        `evaluate`, so the results and errors are those `evaluator` gives.
+        """
+        if self.evaluate_tree is None:
+            return [float('nan')] * len(variables_list)
+
+        results = self._evaluate_vectorized(variables_list, functions)
+        if results is None:
+            results = [self.evaluate(variables, functions) for variables in variables_list]
+        return results
+
+    def _evaluate_vectorized(self, variables_list, functions):
+        """
+        Evaluate the expression for all of `variables_list` at once with
+        numpy arrays, or return None if the results may differ from `evaluate`.
+        """
+        if not variables_list:
+            return None
+
+        if self.case_sensitive:
+            casify = lambda x: x
+        else:
+            casify = lambda x: x.lower()  # Lowercase for case insens.
+
+        all_variables_list = []
+        for variables in variables_list:
+            all_variables, all_functions = add_defaults(variables, functions, self.case_sensitive)
+            try:
+                self.math_interpreter.check_variables(all_variables, all_functions)
+            except UndefinedVariable:
+                return None
+            all_variables_list.append(all_variables)
+
+        if any(all_functions[casify(name)] not in VECTORIZED_FUNCTIONS
+               for name in self.math_interpreter.functions_used):
+            return None
+
+        vectorized_variables = {}
+        for name in set(casify(name) for name in self.math_interpreter.variables_used):
+            values = [all_variables[name] for all_variables in all_variables_list]
+            if all(value is values[0] for value in values):
+                vectorized_variables[name] = values[0]
+            elif all(isinstance(value, float) for value in values):
+                vectorized_variables[name] = numpy.array(values, dtype=float)
+            elif all(isinstance(value, complex) for value in values):
+                vectorized_variables[name] = numpy.array(values, dtype=complex)
+            else:
+                return None
+
+        # Where python would raise an error or numpy would warn, evaluate each
+        # set of variables instead, which raises or warns the same way.
+        with numpy.errstate(divide='raise', over='raise', invalid='raise', under='ignore'):
+            try:
+                results = self.evaluate_tree(vectorized_variables, all_functions)
+            except Exception:  # pylint: disable=broad-except
+                return None
+
+        if numpy.shape(results) == ():
+            return [results] * len(variables_list)
+        if numpy.shape(results) != (len(variables_list),):
+            return None
+        return list(results)
 
 
 class ParseAugmenter(object):
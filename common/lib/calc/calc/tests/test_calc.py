@@ -5,8 +5,16 @@ Unit tests for calc.py
 import unittest
 import numpy
 import calc
+from nose.plugins.skip import SkipTest
 from pyparsing import ParseException
 
+# The dependency below needs to be installed manually from the development.txt file, which doesn't
+# get installed during unit tests!
+try:
+    from code_block_timer import CodeBlockTimer
+except ImportError:
+    CodeBlockTimer = None
+
 # numpy's default behavior when it evaluates a function outside its domain
 # is to raise a warning (not an exception) which is then printed to STDOUT.
 # To prevent this from polluting the output of the tests, configure numpy to
@@ -559,3 +567,100 @@ class EvaluatorTest(unittest.TestCase):
             calc.evaluator({'r1': 5}, {}, "r1+r2")
         with self.assertRaisesRegexp(calc.UndefinedVariable, 'r1 r3'):
             calc.evaluator(variables, {}, "r1*r3", case_sensitive=True)
+
+
+class CompiledExpressionTest(unittest.TestCase):
+    """
+    Test calc.compile_expression and the evaluation of CompiledExpressions,
+    which must give the same results as calc.evaluator.
+    """
+    def setUp(self):
+        super(CompiledExpressionTest, self).setUp()
+        self.variables_list = [{'x': 0.1 * index - 2, 'y': 0.7 * index + 1} for index in range(10)]
+
+    def assert_same_as_evaluator(self, math_expr, variables_list=None, functions=None):
+        """
+        Check that evaluate_many gives the results of evaluator for each set of variables.
+        """
+        variables_list = variables_list or self.variables_list
+        functions = functions or {}
+        results = calc.compile_expression(math_expr).evaluate_many(variables_list, functions)
+        self.assertEqual(len(results), len(variables_list))
+        for variables, result in zip(variables_list, results):
+            expected = calc.evaluator(variables, functions, math_expr)
+            if numpy.isnan(expected):
+                self.assertTrue(numpy.isnan(result))
+            else:
+                self.assertAlmostEqual(result, expected, delta=1e-12 * max(1, abs(expected)))
+
+    def test_memoized(self):
+        self.assertIs(calc.compile_expression('x+y'), calc.compile_expression('x+y'))
+        self.assertIsNot(calc.compile_expression('x+y'), calc.compile_expression('x+y', case_sensitive=True))
+
+    def test_evaluate_many(self):
+        for math_expr in ['x^2 + y', '-x*y/3', 'x || y', '2^3^x', 'e^(i*x)', '5k*x/3m', '3', '(x - y) - 2']:
+            self.assert_same_as_evaluator(math_expr)
+
+    def test_default_functions(self):
+        for fname in sorted(calc.DEFAULT_FUNCTIONS):
+            if fname in ('fact', 'factorial'):
+                continue
+            self.assert_same_as_evaluator('{}(x/3) * y'.format(fname))
+
+    def test_evaluate_many_with_errors(self):
+        # Where one of the samples would raise an error or warn, the samples
+        # are evaluated one by one, so the same errors are raised.
+        variables_list = self.variables_list + [{'x': 0.0, 'y': 1.0}]
+        with self.assertRaises(ZeroDivisionError):
+            calc.compile_expression('1/x').evaluate_many(variables_list, {})
+        self.assert_same_as_evaluator('x || y', variables_list)
+        self.assert_same_as_evaluator('sqrt(x)', variables_list)
+        self.assert_same_as_evaluator('fact(3) * x', variables_list)
+
+        with self.assertRaises(ValueError):
+            calc.compile_expression('fact(x)').evaluate_many(variables_list, {})
+        with self.assertRaisesRegexp(calc.UndefinedVariable, 'z'):
+            calc.compile_expression('x + z').evaluate_many(variables_list, {})
+
+    def test_custom_functions(self):
+        self.assert_same_as_evaluator('f(x)', functions={'f': lambda x: x + 1})
+
+    def test_empty_expression(self):
+        results = calc.compile_expression(' ').evaluate_many(self.variables_list, {})
+        self.assertEqual(len(results), len(self.variables_list))
+        self.assertTrue(all(numpy.isnan(result) for result in results))
+
+
+@unittest.skip("Only run manually.")
+class CompiledExpressionPerformanceTest(unittest.TestCase):
+    """
+    Times evaluator for each sample against evaluate_many for all samples
+    at once, for each default function.
+    """
+    # Use this attribute to skip this test on regular unittest CI runs.
+    perf_test = True
+
+    NUM_SAMPLES = 50
+    NUM_CHECKS = 5
+
+    def test_evaluate_samples(self):
+        if CodeBlockTimer is None:
+            raise SkipTest("CodeBlockTimer undefined.")
+
+        variables_list = [{'x': 0.5 + 0.01 * index, 'y': 1 + 0.02 * index} for index in range(self.NUM_SAMPLES)]
+        for fname in sorted(calc.DEFAULT_FUNCTIONS):
+            if fname in ('fact', 'factorial'):
+                continue
+            math_expr = '{}(x/2) * y^2 + x || y'.format(fname)
+
+            with CodeBlockTimer("{}:{}".format(fname, self.NUM_CHECKS * self.NUM_SAMPLES)):
+                with CodeBlockTimer("evaluator"):
+                    for __ in range(self.NUM_CHECKS):
+                        # Parse each time, as evaluator did before expressions were memoized.
+                        calc.calc._COMPILED_EXPRESSIONS.clear()  # pylint: disable=protected-access
+                        for variables in variables_list:
+                            calc.evaluator(variables, {}, math_expr)
+                            calc.calc._COMPILED_EXPRESSIONS.clear()  # pylint: disable=protected-access
+                with CodeBlockTimer("evaluate_many"):
+                    for __ in range(self.NUM_CHECKS):
+                        calc.compile_expression(math_expr).evaluate_many(variables_list, {})
@@ -15,6 +15,7 @@ This is used by capa_module.
 
 from copy import deepcopy
 from datetime import datetime
+import hashlib
 import logging
 import os.path
 import re
@@ -29,7 +30,7 @@ import capa.customrender as customrender
 import capa.responsetypes as responsetypes
 from capa.util import contextualize_text, convert_files_to_filenames
 import capa.xqueue_interface as xqueue_interface
-from capa.safe_exec import safe_exec
+from capa.safe_exec import safe_exec, hash_code
 
 
 # extra things displayed after "show answers" is pressed
@@ -62,6 +63,63 @@ log = logging.getLogger(__name__)
 # main class for this module
 
 
+class ProblemSkeleton(object):
+    """
+    The part of a LoncapaProblem which doesn't depend on its seed or student
+    state: its XML tree, parsed and with IDs assigned to its responses and
+    their inputs, before any script is run or any response is created.
+
+    Creating the problem again from its skeleton copies the tree rather than
+    parsing and preprocessing the problem XML again.
+    """
+    def __init__(self, problem_text, tree, responses):
+        self.problem_text = problem_text
+        self.tree = deepcopy(tree)
+        # Responses and their inputs are found in copies of the tree by their
+        # position in it.
+        positions = {element: index for index, element in enumerate(tree.iter())}
+        self.response_positions = [
+            (positions[response], [positions[inputfield] for inputfield in inputfields])
+            for response, inputfields in responses
+        ]
+
+    @staticmethod
+    def key_for(problem_text, problem_id):
+        """
+        Returns the key of the skeleton of the given problem.
+        """
+        if isinstance(problem_text, unicode):
+            problem_text = problem_text.encode('utf-8')
+        return hashlib.sha1(problem_id.encode('utf-8') + '\n' + problem_text).hexdigest()
+
+    def copy(self):
+        """
+        Returns a copy of the tree, and a list of (response, inputfields)
+        for each response in it, as returned by _assign_response_ids.
+        """
+        tree = deepcopy(self.tree)
+        elements = list(tree.iter())
+        responses = [
+            (elements[response_position], [elements[position] for position in inputfield_positions])
+            for response_position, inputfield_positions in self.response_positions
+        ]
+        return tree, responses
+
+
+# The skeletons of the most recently created problems, by ProblemSkeleton.key_for.
+_PROBLEM_SKELETONS = {}
+PROBLEM_SKELETONS_MAX_SIZE = 500
+
+
+def _cache_problem_skeleton(key, skeleton):
+    """
+    Stores the skeleton of a problem, for the next instances of the problem.
+    """
+    if len(_PROBLEM_SKELETONS) >= PROBLEM_SKELETONS_MAX_SIZE:
+        _PROBLEM_SKELETONS.clear()
+    _PROBLEM_SKELETONS[key] = skeleton
+
+
 class LoncapaSystem(object):
     """
     An encapsulation of resources needed from the outside.
@@ -156,27 +214,44 @@ class LoncapaProblem(object):
         self.done = state.get('done', False)
         self.input_state = state.get('input_state', {})
 
-        # Convert startouttext and endouttext to proper <text></text>
-        problem_text = re.sub(r"startouttext\s*/", "text", problem_text)
-        problem_text = re.sub(r"endouttext\s*/", "/text", problem_text)
-        self.problem_text = problem_text
+        # The parsed tree doesn't depend on the seed or the student, so it is
+        # reused by the other instances of the same problem.
+        skeleton_key = ProblemSkeleton.key_for(problem_text, self.problem_id)
+        skeleton = _PROBLEM_SKELETONS.get(skeleton_key)
+        if skeleton is not None:
+            self.problem_text = skeleton.problem_text
+            self.tree, responses = skeleton.copy()
+        else:
+            # Convert startouttext and endouttext to proper <text></text>
+            problem_text = re.sub(r"startouttext\s*/", "text", problem_text)
+            problem_text = re.sub(r"endouttext\s*/", "/text", problem_text)
+            self.problem_text = problem_text
+
+            # parse problem XML file into an element tree
+            self.tree = etree.XML(problem_text)
+
+            self.make_xml_compatible(self.tree)
 
-        # parse problem XML file into an element tree
-        self.tree = etree.XML(problem_text)
+            # Included files may change, so problems which include them aren't reused.
+            has_includes = self.tree.find('.//include') is not None
 
-        self.make_xml_compatible(self.tree)
+            # handle any <include file="foo"> tags
+            self._process_includes()
 
-        # handle any <include file="foo"> tags
-        self._process_includes()
+            # add ID's to the responses and their inputs
+            responses = self._assign_response_ids(self.tree)
+
+            if not has_includes:
+                _cache_problem_skeleton(skeleton_key, ProblemSkeleton(self.problem_text, self.tree, responses))
 
         # construct script processor context (eg for customresponse problems)
         self.context = self._extract_context(self.tree)
 
-        # Pre-parse the XML tree: modifies it to add ID's and perform some in-place
-        # transformations.  This also creates the dict (self.responders) of Response
-        # instances for each question in the problem. The dict has keys = xml subtree of
-        # Response, values = Response instance
-        self._preprocess_problem(self.tree)
+        # Pre-parse the XML tree: modifies it to perform some in-place transformations.
+        # This also creates the dict (self.responders) of Response instances for each
+        # question in the problem. The dict has keys = xml subtree of Response,
+        # values = Response instance
+        self._preprocess_problem(self.tree, responses)
 
         if not self.student_answers:  # True when student_answers is an empty dict
             self.set_initial_display()
@@ -693,6 +768,10 @@ class LoncapaProblem(object):
             code = unescape(script.text, XMLESC)
             all_code += code
 
+        # The digest of the script is part of the safe_exec cache key; it is
+        # computed once per problem.
+        self.script_code_digest = hash_code(all_code) if all_code else None
+
         extra_files = []
         if all_code:
             # An asset named python_lib.zip can be imported by Python code.
@@ -711,6 +790,7 @@ class LoncapaProblem(object):
                     cache=self.capa_system.cache,
                     slug=self.problem_id,
                     unsafely=self.capa_system.can_execute_unsafe_code(),
+                    code_digest=self.script_code_digest,
                 )
             except Exception as err:
                 log.exception("Error while execing script code: " + all_code)
@@ -824,19 +904,16 @@ class LoncapaProblem(object):
 
         return tree
 
-    def _preprocess_problem(self, tree):  # private
+    def _assign_response_ids(self, tree):  # private
         """
         Assign IDs to all the responses
         Assign sub-IDs to all entries (textline, schematic, etc.)
-        Annoted correctness and value
         In-place transformation
 
-        Also create capa Response instances for each responsetype and save as self.responders
-
-        Obtain all responder answers and save as self.responder_answers dict (key = response)
+        Returns a list of (response, inputfields) for each response, in order.
         """
+        responses = []
         response_id = 1
-        self.responders = {}
         for response in tree.xpath('//' + "|//".join(responsetypes.registry.registered_tags())):
             response_id_str = self.problem_id + "_" + str(response_id)
             # create and save ID for this response
@@ -857,6 +934,24 @@ class LoncapaProblem(object):
                 entry.attrib['id'] = "%s_%i_%i" % (self.problem_id, response_id, answer_id)
                 answer_id = answer_id + 1
 
+            responses.append((response, inputfields))
+        return responses
+
+    def _preprocess_problem(self, tree, responses=None):  # private
+        """
+        Assign IDs to all the responses, unless `responses` is given by _assign_response_ids
+        Annoted correctness and value
+        In-place transformation
+
+        Also create capa Response instances for each responsetype and save as self.responders
+
+        Obtain all responder answers and save as self.responder_answers dict (key = response)
+        """
+        if responses is None:
+            responses = self._assign_response_ids(tree)
+
+        self.responders = {}
+        for response, inputfields in responses:
             # instantiate capa Response
             responsetype_cls = responsetypes.registry.get_class_for_tag(response.tag)
             responder = responsetype_cls(response, inputfields, self.context, self.capa_system, self.capa_module)
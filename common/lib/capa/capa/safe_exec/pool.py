@@ -0,0 +1,320 @@
+"""
+A pool of warm sandbox workers for safe_exec.
+
+Running code with codejail starts a new sandboxed Python for every execution,
+which then has to import the modules that problems use, like numpy and scipy.
+A SandboxPool instead keeps a few sandboxed Pythons running, with those modules
+already imported, and runs each execution in a child forked from one of them.
+Each execution still gets a fresh namespace, its own temporary directory and
+the codejail resource limits; see pool_worker.py.
+
+This differs from codejail in a few ways:
+
+* An execution runs as the same sandbox user as the worker it was forked
+  from, so it could signal or ptrace the worker and affect the executions
+  that follow. Workers are replaced after `max_executions` executions, and
+  after any execution that didn't succeed. Restricting ptrace to descendants
+  (kernel.yama.ptrace_scope = 1) keeps executions from tracing their worker.
+* The memory limit (VMEM, enforced with RLIMIT_AS) is set after the fork, so
+  it applies to the whole address space of the worker, including all the
+  preloaded modules, whether or not the code uses them. The memory left to
+  the code is not the same as with codejail, so VMEM may need to be adjusted.
+* The worker kills executions that exceed the real-time limit. The pool
+  also kills workers that don't report a result in time.
+
+The pool is disabled unless configure_sandbox_pool is called with a size, and
+is only used when codejail is configured to run Python in a sandbox.
+"""
+import base64
+import errno
+import json
+import logging
+import os
+import select
+import subprocess
+import threading
+import time
+
+from codejail import jail_code
+from codejail.safe_exec import safe_exec as codejail_safe_exec
+from codejail.safe_exec import json_safe, SafeExecException
+
+log = logging.getLogger(__name__)
+
+# We'll need the code from pool_worker.py to start the workers, so read it now.
+pool_worker_py_file = os.path.join(os.path.dirname(__file__), "pool_worker.py")
+POOL_WORKER_PY = open(pool_worker_py_file).read()
+
+# Seconds a worker is given on top of the real-time limit of an execution to
+# report its result, and to import the preloaded modules before its first one.
+RESULT_TIMEOUT = 5
+STARTUP_TIMEOUT = 60
+
+
+class SandboxWorkerError(Exception):
+    """
+    Raised when a sandbox worker fails, rather than the code it runs.
+    """
+    pass
+
+
+class SandboxWorker(object):
+    """
+    A sandboxed Python process that runs executions for a SandboxPool.
+    """
+    def __init__(self, cmdline, preload_modules):
+        self.cmdline = cmdline
+        self.num_executions = 0
+        self._output = ""
+        # The worker gets its own copy of devnull, so ours can be closed now.
+        with open(os.devnull, "w") as devnull:
+            self.process = subprocess.Popen(
+                cmdline + ["-c", POOL_WORKER_PY, json.dumps(preload_modules)],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=devnull,
+                close_fds=True,
+                # Start a new session, so that the worker and the executions
+                # it forks can be killed together.
+                preexec_fn=os.setsid,
+            )
+
+    def execute(self, execution):
+        """
+        Runs the given execution, and returns its result dict, with the
+        status, stdout and stderr of the execution.
+
+        If the execution has a real-time limit and the worker doesn't report
+        a result in time, the worker is killed.
+        """
+        timeout = None
+        realtime = execution["limits"].get("REALTIME")
+        if realtime:
+            timeout = realtime + (RESULT_TIMEOUT if self.num_executions else STARTUP_TIMEOUT)
+        self.num_executions += 1
+        try:
+            self.process.stdin.write(json.dumps(execution) + "\n")
+            self.process.stdin.flush()
+            line = self._read_line(timeout)
+        except (IOError, OSError) as exc:
+            raise SandboxWorkerError(u"Sandbox worker connection failed: {}".format(exc))
+        if line is None:
+            self.kill()
+            raise SandboxWorkerError(u"Sandbox worker didn't report a result within {} seconds".format(timeout))
+        if not line:
+            raise SandboxWorkerError(u"Sandbox worker exited with status {}".format(self.process.poll()))
+        return json.loads(line)
+
+    def _read_line(self, timeout):
+        """
+        Returns the next line written by the worker, "" if it exited, or
+        None if it didn't write one within `timeout` seconds.
+        """
+        deadline = time.time() + timeout if timeout is not None else None
+        stdout_fd = self.process.stdout.fileno()
+        while "\n" not in self._output:
+            remaining = None
+            if deadline is not None:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return None
+            try:
+                readable, __, __ = select.select([stdout_fd], [], [], remaining)
+            except select.error as exc:
+                if exc.args[0] == errno.EINTR:
+                    continue
+                raise
+            if readable:
+                chunk = os.read(stdout_fd, 65536)
+                if not chunk:
+                    return ""
+                self._output += chunk
+        line, self._output = self._output.split("\n", 1)
+        return line
+
+    def kill(self):
+        """
+        Kills the worker and any execution it is running.
+        """
+        # Like codejail's subprocesses, the worker may run as another user
+        # through sudo, so it can't always be killed directly.
+        kill_cmdline = ["pkill", "-9", "-s", str(self.process.pid)]
+        if self.cmdline[0] == "sudo":
+            kill_cmdline.insert(0, "sudo")
+        subprocess.call(kill_cmdline)
+
+    def close(self):
+        """
+        Stops the worker, which exits once its stdin is closed.
+        """
+        try:
+            self.process.stdin.close()
+        except IOError:
+            pass
+
+
+class SandboxPool(object):
+    """
+    A pool of up to `size` SandboxWorkers, which are started when first needed.
+
+    Each worker runs at most `max_executions` executions before it is replaced.
+    """
+    def __init__(self, size, cmdline, preload_modules=(), max_executions=100):
+        self.size = size
+        self.cmdline = cmdline
+        self.preload_modules = list(preload_modules)
+        self.max_executions = max_executions
+        self._idle_workers = []
+        self._num_workers = 0
+        # Notified whenever a worker is released or stopped, so that threads
+        # waiting for a worker can take it, or start a new one in its place.
+        self._changed = threading.Condition()
+
+    def _acquire_worker(self):
+        """
+        Returns an idle worker, starting a new one if the pool isn't full
+        yet, or else waiting for one to be released.
+        """
+        with self._changed:
+            while not self._idle_workers and self._num_workers >= self.size:
+                self._changed.wait()
+            if self._idle_workers:
+                return self._idle_workers.pop()
+            self._num_workers += 1
+        try:
+            return SandboxWorker(self.cmdline, self.preload_modules)
+        except OSError:
+            self._remove_worker()
+            raise
+
+    def _release_worker(self, worker, stop=False):
+        """
+        Returns the worker to the pool, or stops it if `stop` is set.
+        """
+        if stop:
+            worker.close()
+            self._remove_worker()
+        else:
+            with self._changed:
+                self._idle_workers.append(worker)
+                self._changed.notify()
+
+    def _remove_worker(self):
+        """
+        Frees the place of a stopped worker, or of one that couldn't start.
+        """
+        with self._changed:
+            self._num_workers -= 1
+            self._changed.notify()
+
+    def safe_exec(self, code, globals_dict, python_path=None, extra_files=None, slug=None):
+        """
+        Executes code in a sandbox worker, with the same arguments and
+        results as codejail.safe_exec.safe_exec.
+
+        If no worker can run the code, it is run by codejail instead.
+        """
+        extra_files = list(extra_files or ())
+        extra_file_names = set(name for name, __ in extra_files)
+        files = [(name, base64.b64encode(contents)) for name, contents in extra_files]
+        for pydir in python_path or ():
+            pybase = os.path.basename(pydir)
+            if pybase not in extra_file_names:
+                files.extend(_read_files(pydir, pybase))
+
+        execution = {
+            "code": code,
+            "globals": json_safe(globals_dict),
+            "python_path": [os.path.basename(pydir) for pydir in python_path or ()],
+            "files": files,
+            "limits": dict(jail_code.LIMITS),
+        }
+
+        try:
+            worker = self._acquire_worker()
+        except OSError:
+            log.exception("Couldn't start a sandbox worker for %s, running it with codejail", slug)
+            return codejail_safe_exec(
+                code, globals_dict, python_path=python_path, extra_files=extra_files, slug=slug
+            )
+
+        try:
+            result = worker.execute(execution)
+        except SandboxWorkerError:
+            self._release_worker(worker, stop=True)
+            log.exception("Sandbox worker failed for %s, running it with codejail", slug)
+            return codejail_safe_exec(
+                code, globals_dict, python_path=python_path, extra_files=extra_files, slug=slug
+            )
+        # Code that didn't succeed may have tampered with its worker.
+        self._release_worker(
+            worker, stop=result["status"] != 0 or worker.num_executions >= self.max_executions
+        )
+
+        if result["status"] != 0:
+            raise SafeExecException((
+                "Couldn't execute jailed code: stdout: {res[stdout]!r}, "
+                "stderr: {res[stderr]!r} with status code: {res[status]}"
+            ).format(res=result))
+        globals_dict.update(json.loads(result["stdout"]))
+
+    def close(self):
+        """
+        Stops all the idle workers.
+        """
+        with self._changed:
+            idle_workers, self._idle_workers = self._idle_workers, []
+        for worker in idle_workers:
+            self._release_worker(worker, stop=True)
+
+
+def _read_files(path, name):
+    """
+    Returns a list of (name, base64 encoded contents) of the file at path, or
+    of all the files under it if it's a directory, with names relative to name.
+    """
+    if not os.path.isdir(path):
+        with open(path, "rb") as python_file:
+            return [(name, base64.b64encode(python_file.read()))]
+    files = []
+    for dirpath, __, filenames in os.walk(path):
+        for filename in filenames:
+            file_path = os.path.join(dirpath, filename)
+            files.extend(_read_files(file_path, os.path.join(name, os.path.relpath(file_path, path))))
+    return files
+
+
+_POOL_SIZE = 0
+_POOL_MAX_EXECUTIONS = 100
+_POOLS = {}
+
+
+def configure_sandbox_pool(size, max_executions=100):
+    """
+    Sets the number of sandbox workers kept by each process, and how many
+    executions each of them runs before it is replaced. 0 disables the pool.
+    """
+    global _POOL_SIZE, _POOL_MAX_EXECUTIONS  # pylint: disable=global-statement
+    _POOL_SIZE = size
+    _POOL_MAX_EXECUTIONS = max_executions
+    for pool in _POOLS.itervalues():
+        pool.close()
+    _POOLS.clear()
+
+
+def get_sandbox_pool(preload_modules=()):
+    """
+    Returns the SandboxPool of the current process, or None if the pool is
+    disabled or codejail isn't configured to run Python in a sandbox.
+
+    Pools aren't shared with forked processes, whose workers' pipes would
+    be shared with the parent.
+    """
+    if not _POOL_SIZE or not jail_code.is_configured("python"):
+        return None
+    pid = os.getpid()
+    if pid not in _POOLS:
+        _POOLS[pid] = SandboxPool(
+            _POOL_SIZE, jail_code.COMMANDS["python"]["cmdline_start"], preload_modules, _POOL_MAX_EXECUTIONS
+        )
+    return _POOLS[pid]
@@ -0,0 +1,201 @@
+"""
+The worker process of a SandboxPool.
+
+This file isn't imported: its source is run by the sandboxed Python, the same
+way as the code that codejail runs, so it can only use the standard library.
+
+The worker imports the preloaded modules given as its first argument once, then
+reads executions from its stdin, one JSON object per line. Each execution is
+run in a child forked from the worker, with a fresh namespace, its own temporary
+directory and the resource limits of the execution, so nothing it does is seen
+by the worker or by later executions. The result of each execution is written
+to the worker's stdout as one JSON object per line, with the same status,
+stdout and stderr as a codejail execution would have.
+"""
+import base64
+import errno
+import json
+import os
+import resource
+import select
+import shutil
+import signal
+import sys
+import tempfile
+import time
+import traceback
+
+
+class DevNull(object):
+    """
+    Prevents the executed code from printing to stdout.
+    """
+    def write(self, *args, **kwargs):
+        pass
+
+
+def preload(module_names):
+    """
+    Imports the given modules, ignoring the ones that aren't available.
+    """
+    for module_name in module_names:
+        try:
+            __import__(module_name)
+        except Exception:  # pylint: disable=broad-except
+            pass
+
+
+def set_process_limits(limits):
+    """
+    Sets the same resource limits as codejail does for its subprocesses.
+    """
+    resource.setrlimit(resource.RLIMIT_NPROC, (0, 0))
+    if limits.get("CPU"):
+        resource.setrlimit(resource.RLIMIT_CPU, (limits["CPU"], limits["CPU"]))
+    if limits.get("VMEM"):
+        resource.setrlimit(resource.RLIMIT_AS, (limits["VMEM"], limits["VMEM"]))
+    resource.setrlimit(resource.RLIMIT_FSIZE, (limits.get("FSIZE", 0), limits.get("FSIZE", 0)))
+
+
+def jsonable_globals(g_dict):
+    """
+    Returns the globals that can be sent back as JSON, like codejail does.
+    """
+    ok_types = (type(None), int, long, float, str, unicode, list, tuple, dict)
+    bad_keys = ("__builtins__",)
+
+    def jsonable(value):
+        if not isinstance(value, ok_types):
+            return False
+        try:
+            json.dumps(value)
+        except Exception:  # pylint: disable=broad-except
+            return False
+        return True
+
+    return {key: value for key, value in g_dict.iteritems() if jsonable(value) and key not in bad_keys}
+
+
+def run_child(execution, tmpdir, write_fd):
+    """
+    Runs the given execution in the forked child, writing its globals to
+    write_fd. Never returns.
+    """
+    status = 1
+    output = ""
+    child_pid = os.getpid()
+    try:
+        # Put the child and anything it starts in their own process group,
+        # so that they can all be killed together.
+        os.setpgid(0, 0)
+
+        # The worker's stdin and stdout are its connection to the pool.
+        devnull = os.open(os.devnull, os.O_RDWR)
+        os.dup2(devnull, 0)
+        os.dup2(devnull, 1)
+        sys.stdout = DevNull()
+
+        os.chdir(tmpdir)
+        for filename, contents in execution["files"]:
+            dirname = os.path.dirname(filename)
+            if dirname and not os.path.isdir(dirname):
+                os.makedirs(dirname)
+            with open(filename, "wb") as new_file:
+                new_file.write(base64.b64decode(contents))
+        for pydir in execution["python_path"]:
+            sys.path.append(os.path.join(tmpdir, pydir))
+
+        set_process_limits(execution["limits"])
+
+        g_dict = execution["globals"]
+        exec execution["code"] in g_dict  # pylint: disable=exec-used
+        output = json.dumps(jsonable_globals(g_dict))
+        status = 0
+    except BaseException:  # pylint: disable=broad-except
+        output = json.dumps({"stderr": traceback.format_exc()})
+    try:
+        # Only the child itself reports, not any process it forked.
+        while output and os.getpid() == child_pid:
+            written = os.write(write_fd, output)
+            output = output[written:]
+    finally:
+        os._exit(status)  # pylint: disable=protected-access
+
+
+def run_execution(execution):
+    """
+    Runs the given execution in a forked child, and returns its result.
+    """
+    tmpdir = tempfile.mkdtemp(prefix="codejail-")
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        run_child(execution, tmpdir, write_fd)
+    os.close(write_fd)
+
+    realtime = execution["limits"].get("REALTIME")
+    deadline = time.time() + realtime if realtime else None
+    chunks = []
+    killed = False
+    while True:
+        timeout = None
+        if deadline is not None:
+            timeout = deadline - time.time()
+            if timeout <= 0:
+                try:
+                    os.killpg(pid, signal.SIGKILL)
+                except OSError:
+                    os.kill(pid, signal.SIGKILL)
+                killed = True
+                break
+        try:
+            readable, __, __ = select.select([read_fd], [], [], timeout)
+        except select.error as exc:
+            if exc.args[0] == errno.EINTR:
+                continue
+            raise
+        if readable:
+            chunk = os.read(read_fd, 65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    os.close(read_fd)
+    __, wait_status = os.waitpid(pid, 0)
+    shutil.rmtree(tmpdir, ignore_errors=True)
+
+    if os.WIFSIGNALED(wait_status):
+        status = -os.WTERMSIG(wait_status)
+    else:
+        status = os.WEXITSTATUS(wait_status)
+
+    output = "".join(chunks)
+    if status == 0:
+        return {"status": status, "stdout": output, "stderr": ""}
+    stderr = ""
+    if killed:
+        stderr = "Execution exceeded the real time limit of {} seconds.".format(realtime)
+    elif output:
+        try:
+            stderr = json.loads(output)["stderr"]
+        except (ValueError, KeyError):
+            pass
+    return {"status": status, "stdout": "", "stderr": stderr}
+
+
+def main():
+    """
+    Preloads the modules and runs executions until the pool closes stdin.
+    """
+    preload(json.loads(sys.argv[1]))
+    while True:
+        line = sys.stdin.readline()
+        if not line:
+            break
+        result = run_execution(json.loads(line))
+        sys.stdout.write(json.dumps(result) + "\n")
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
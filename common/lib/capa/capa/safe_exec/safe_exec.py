@@ -4,9 +4,11 @@ from codejail.safe_exec import safe_exec as codejail_safe_exec
 from codejail.safe_exec import not_safe_exec as codejail_not_safe_exec
 from codejail.safe_exec import json_safe, SafeExecException
 from . import lazymod
+from .pool import get_sandbox_pool
 from dogapi import dog_stats_api
 
 import hashlib
+import json
 
 # Establish the Python environment for Capa.
 # Capa assumes float-friendly division always.
@@ -46,6 +48,10 @@ for name, modname in ASSUMED_IMPORTS:
 
 LAZY_IMPORTS = "".join(LAZY_IMPORTS)
 
+# The modules that warm sandbox workers import before running any code, so
+# that the lazy imports above are already loaded.
+POOL_PRELOAD_MODULES = ["random", "json"] + [modname for __, modname in ASSUMED_IMPORTS]
+
 
 def update_hash(hasher, obj):
     """
@@ -70,6 +76,65 @@ def update_hash(hasher, obj):
         hasher.update(repr(obj))
 
 
+def hash_code(code):
+    """
+    Returns the digest of `code` that safe_exec uses in its cache keys.
+
+    Callers that run the same code many times can compute it once and pass
+    it to safe_exec as `code_digest`.
+    """
+    return hashlib.md5(repr(code)).hexdigest()
+
+
+class SafeExecResultCache(object):
+    """
+    A two-level cache for safe_exec results.
+
+    Results are kept in a local dict, typically one that is cleared after each
+    request, in front of a shared cache, so that the same code run many times
+    in a request only reads the shared cache once.  Hits and misses at each
+    level are counted in the 'capa.safe_exec.cache' metric.
+
+    `shared_cache` is an object with .get(key) and .set(key, value) methods,
+    or None.  `get_local_cache` is a function that returns the local dict, or
+    None if there is none, as outside of a request.
+    """
+    def __init__(self, shared_cache, get_local_cache):
+        self.shared_cache = shared_cache
+        self.get_local_cache = get_local_cache
+
+    def get(self, key):
+        """
+        Returns the cached result for key, or None.
+        """
+        local_cache = self.get_local_cache()
+        if local_cache is not None and key in local_cache:
+            dog_stats_api.increment('capa.safe_exec.cache', tags=['result:local_hit'])
+            # Results are stored serialized, so that callers can't modify
+            # the results returned to others.
+            return json.loads(local_cache[key])
+
+        value = self.shared_cache.get(key) if self.shared_cache is not None else None
+        if value is None:
+            dog_stats_api.increment('capa.safe_exec.cache', tags=['result:miss'])
+            return None
+
+        dog_stats_api.increment('capa.safe_exec.cache', tags=['result:shared_hit'])
+        if local_cache is not None:
+            local_cache[key] = json.dumps(value)
+        return value
+
+    def set(self, key, value):
+        """
+        Caches the result for key at both levels.
+        """
+        local_cache = self.get_local_cache()
+        if local_cache is not None:
+            local_cache[key] = json.dumps(value)
+        if self.shared_cache is not None:
+            self.shared_cache.set(key, value)
+
+
 @dog_stats_api.timed('capa.safe_exec.time')
 def safe_exec(
     code,
@@ -80,6 +145,7 @@ def safe_exec(
     cache=None,
     slug=None,
     unsafely=False,
+    code_digest=None,
 ):
     """
     Execute python code safely.
@@ -106,12 +172,14 @@ def safe_exec(
 
     If `unsafely` is true, then the code will actually be executed without sandboxing.
 
+    `code_digest` is the result of `hash_code(code)`, if the caller already has it.
+
     """
     # Check the cache for a previous result.
     if cache:
         safe_globals = json_safe(globals_dict)
         md5er = hashlib.md5()
-        md5er.update(repr(code))
+        md5er.update(code_digest or hash_code(code))
         update_hash(md5er, safe_globals)
         key = "safe_exec.%r.%s" % (random_seed, md5er.hexdigest())
         cached = cache.get(key)
@@ -128,8 +196,11 @@ def safe_exec(
     code_prolog = CODE_PROLOG % random_seed
 
     # Decide which code executor to use.
+    sandbox_pool = get_sandbox_pool(POOL_PRELOAD_MODULES)
     if unsafely:
         exec_fn = codejail_not_safe_exec
+    elif sandbox_pool is not None:
+        exec_fn = sandbox_pool.safe_exec
     else:
         exec_fn = codejail_safe_exec
 
@@ -0,0 +1,208 @@
+"""Test pool.py"""
+
+import importlib
+import os.path
+import signal
+import sys
+import textwrap
+import threading
+import unittest
+
+from mock import patch
+from nose.plugins.skip import SkipTest
+
+from capa.safe_exec import safe_exec
+from capa.safe_exec.pool import SandboxPool, SandboxWorker, SandboxWorkerError, configure_sandbox_pool
+from codejail import jail_code
+from codejail.safe_exec import SafeExecException
+
+# The dependency below needs to be installed manually from the development.txt file, which doesn't
+# get installed during unit tests!
+try:
+    from code_block_timer import CodeBlockTimer
+except ImportError:
+    CodeBlockTimer = None
+
+# The safe_exec function hides the module of the same name in capa.safe_exec.
+safe_exec_module = importlib.import_module('capa.safe_exec.safe_exec')
+
+
+class TestSandboxPool(unittest.TestCase):
+    """
+    Tests for SandboxPool, with workers running the current Python unsandboxed.
+    """
+    def setUp(self):
+        super(TestSandboxPool, self).setUp()
+        self.pool = SandboxPool(2, [sys.executable], ["math"])
+        self.addCleanup(self.pool.close)
+
+    def test_set_values(self):
+        g = {'b': 4}
+        self.pool.safe_exec("a = b * 2", g)
+        self.assertEqual(g, {'a': 8, 'b': 4})
+
+    def test_raising_exceptions(self):
+        g = {}
+        with self.assertRaises(SafeExecException) as cm:
+            self.pool.safe_exec("1/0", g)
+        self.assertIn("ZeroDivisionError", cm.exception.message)
+
+    def test_fresh_namespace(self):
+        g = {}
+        self.pool.safe_exec("import math\nmath.leaked = 1\nleaked = 1", g)
+
+        g = {}
+        self.pool.safe_exec("import math\nmodule_leaked = hasattr(math, 'leaked')\nleaked = 'leaked' in globals()", g)
+        self.assertEqual(g, {'module_leaked': False, 'leaked': False})
+
+    def test_python_lib(self):
+        pylib = os.path.dirname(__file__) + "/test_files/pylib"
+        g = {}
+        self.pool.safe_exec("import constant; a = constant.THE_CONST", g, python_path=[pylib])
+        self.assertEqual(g['a'], 23)
+
+    def test_extra_files(self):
+        g = {}
+        self.pool.safe_exec("import extra; a = extra.VALUE", g, extra_files=[("extra.py", "VALUE = 17\n")])
+        self.assertEqual(g['a'], 17)
+
+    def test_realtime_limit(self):
+        g = {}
+        with patch.dict(jail_code.LIMITS, {"REALTIME": 1}):
+            with self.assertRaises(SafeExecException) as cm:
+                self.pool.safe_exec("while True: pass", g)
+        self.assertIn("real time limit", cm.exception.message)
+
+        # The pool keeps running executions after one was killed.
+        self.pool.safe_exec("a = 1", g)
+        self.assertEqual(g['a'], 1)
+
+    def test_workers_are_reused(self):
+        with patch('capa.safe_exec.pool.SandboxWorker', wraps=SandboxWorker) as mock_worker:
+            for value in range(5):
+                g = {}
+                self.pool.safe_exec("a = {}".format(value), g)
+                self.assertEqual(g['a'], value)
+        self.assertEqual(mock_worker.call_count, 1)
+
+    def test_workers_are_replaced(self):
+        pool = SandboxPool(1, [sys.executable], max_executions=2)
+        self.addCleanup(pool.close)
+        with patch('capa.safe_exec.pool.SandboxWorker', wraps=SandboxWorker) as mock_worker:
+            for value in range(5):
+                g = {}
+                pool.safe_exec("a = {}".format(value), g)
+                self.assertEqual(g['a'], value)
+        self.assertEqual(mock_worker.call_count, 3)
+
+    def test_worker_is_replaced_after_error(self):
+        with patch('capa.safe_exec.pool.SandboxWorker', wraps=SandboxWorker) as mock_worker:
+            with self.assertRaises(SafeExecException):
+                self.pool.safe_exec("1/0", {})
+            g = {}
+            self.pool.safe_exec("a = 1", g)
+        self.assertEqual(g['a'], 1)
+        self.assertEqual(mock_worker.call_count, 2)
+
+    @patch('capa.safe_exec.pool.STARTUP_TIMEOUT', 0)
+    def test_unresponsive_worker_is_killed(self):
+        # A worker that never reports a result.
+        worker = SandboxWorker(["sh", "-c", "sleep 60"], [])
+        execution = {"code": "", "globals": {}, "python_path": [], "files": [], "limits": {"REALTIME": 1}}
+        with self.assertRaises(SandboxWorkerError):
+            worker.execute(execution)
+        self.assertEqual(worker.process.wait(), -signal.SIGKILL)
+
+    @patch('capa.safe_exec.pool.codejail_safe_exec')
+    def test_failed_worker_falls_back_to_codejail(self, mock_codejail_safe_exec):
+        g = {}
+        with patch.object(SandboxWorker, 'execute', side_effect=SandboxWorkerError):
+            self.pool.safe_exec("a = 1", g, slug="test")
+        mock_codejail_safe_exec.assert_called_once_with("a = 1", g, python_path=None, extra_files=[], slug="test")
+        self.assertEqual(self.pool._num_workers, 0)  # pylint: disable=protected-access
+
+    @patch('capa.safe_exec.pool.SandboxWorker')
+    def test_waiting_for_failed_worker(self, mock_worker):
+        # pylint: disable=protected-access
+        pool = SandboxPool(1, [sys.executable])
+        worker = pool._acquire_worker()
+
+        # The pool is full, so this waits for the worker to be released.
+        acquired = []
+        waiter = threading.Thread(target=lambda: acquired.append(pool._acquire_worker()))
+        waiter.start()
+        waiter.join(0.1)
+        self.assertTrue(waiter.is_alive())
+
+        # Once the worker fails, the waiter starts a new one in its place.
+        pool._release_worker(worker, stop=True)
+        waiter.join(5)
+        self.assertFalse(waiter.is_alive())
+        self.assertEqual(len(acquired), 1)
+        self.assertEqual(mock_worker.call_count, 2)
+        self.assertEqual(pool._num_workers, 1)
+
+
+class TestSafeExecWithPool(unittest.TestCase):
+    """
+    Test that safe_exec uses the pool once it is configured.
+    """
+    def setUp(self):
+        super(TestSafeExecWithPool, self).setUp()
+        # Can't run sandboxed workers if CodeJail isn't configured for python.
+        if not jail_code.is_configured("python"):
+            raise SkipTest
+        configure_sandbox_pool(1)
+        self.addCleanup(configure_sandbox_pool, 0)
+
+    def test_assumed_imports(self):
+        g = {}
+        with patch.object(safe_exec_module, 'codejail_safe_exec') as mock_codejail_safe_exec:
+            safe_exec("a = int(math.pi)", g, random_seed=17)
+        self.assertFalse(mock_codejail_safe_exec.called)
+        self.assertEqual(g['a'], 3)
+
+
+@unittest.skip("Only run manually.")
+class SandboxPoolPerformanceTest(unittest.TestCase):
+    """
+    Times sandboxed executions of code that uses numpy, with and without a
+    SandboxPool.
+    """
+    # Use this attribute to skip this test on regular unittest CI runs.
+    perf_test = True
+
+    NUM_EXECUTIONS = 50
+
+    CODE = textwrap.dedent("""\
+        a = numpy.array([[3, 1], [1, 2]])
+        b = numpy.array([9, 8])
+        x = [float(value) for value in numpy.linalg.solve(a, b)]
+        """)
+
+    def run_executions(self):
+        """
+        Runs the code NUM_EXECUTIONS times with safe_exec.
+        """
+        for index in range(self.NUM_EXECUTIONS):
+            g = {}
+            safe_exec(self.CODE, g, random_seed=index)
+            self.assertEqual(g['x'], [2.0, 3.0])
+
+    def test_executions(self):
+        if CodeBlockTimer is None:
+            raise SkipTest("CodeBlockTimer undefined.")
+        if not jail_code.is_configured("python"):
+            raise SkipTest
+
+        with CodeBlockTimer("safe_exec:{}".format(self.NUM_EXECUTIONS)):
+            with CodeBlockTimer("codejail"):
+                self.run_executions()
+            configure_sandbox_pool(1)
+            try:
+                # Start the worker before timing.
+                safe_exec(self.CODE, {})
+                with CodeBlockTimer("pool:{}".format(",".join(safe_exec_module.POOL_PRELOAD_MODULES))):
+                    self.run_executions()
+            finally:
+                configure_sandbox_pool(0)
@@ -1,18 +1,23 @@
 """Test safe_exec.py"""
 
 import hashlib
+import importlib
 import os
 import os.path
 import random
 import textwrap
 import unittest
 
+from mock import patch
 from nose.plugins.skip import SkipTest
 
-from capa.safe_exec import safe_exec, update_hash
+from capa.safe_exec import safe_exec, update_hash, hash_code, SafeExecResultCache
 from codejail.safe_exec import SafeExecException
 from codejail.jail_code import is_configured
 
+# The safe_exec function hides the module of the same name in capa.safe_exec.
+safe_exec_module = importlib.import_module('capa.safe_exec.safe_exec')
+
 
 class TestSafeExec(unittest.TestCase):
     def test_set_values(self):
@@ -177,6 +182,78 @@ class TestSafeExecCaching(unittest.TestCase):
                 self.fail("Tried executing code with non-ASCII unicode: {0}".format(code))
 
 
+class TestSafeExecResultCache(unittest.TestCase):
+    """Test the two-level SafeExecResultCache."""
+
+    def setUp(self):
+        super(TestSafeExecResultCache, self).setUp()
+        self.local_cache = {}
+        self.shared_cache = {}
+        self.cache = SafeExecResultCache(DictCache(self.shared_cache), lambda: self.local_cache)
+
+    def test_identical_executions_run_once(self):
+        code = "a = random.randint(0, 999)"
+        with patch.object(safe_exec_module, 'codejail_safe_exec') as mock_exec:
+            mock_exec.side_effect = lambda code, g, **kwargs: g.update({'a': 17})
+            for __ in range(20):
+                g = {'seed': 5}
+                safe_exec(code, g, random_seed=5, cache=self.cache, code_digest=hash_code(code))
+                self.assertEqual(g['a'], 17)
+        self.assertEqual(mock_exec.call_count, 1)
+        self.assertEqual(len(self.local_cache), 1)
+        self.assertEqual(len(self.shared_cache), 1)
+
+    def test_code_digest(self):
+        g = {}
+        safe_exec("a = 17", g, cache=self.cache)
+        cache_key = self.shared_cache.keys()[0]
+
+        self.local_cache.clear()
+        self.shared_cache.clear()
+        safe_exec("a = 17", g, cache=self.cache, code_digest=hash_code("a = 17"))
+        self.assertEqual(self.shared_cache.keys(), [cache_key])
+
+    def test_shared_hit_fills_local_cache(self):
+        safe_exec("a = 17", {}, cache=self.cache)
+        self.local_cache.clear()
+
+        g = {}
+        with patch.object(safe_exec_module, 'codejail_safe_exec') as mock_exec:
+            safe_exec("a = 17", g, cache=self.cache)
+        self.assertFalse(mock_exec.called)
+        self.assertEqual(g['a'], 17)
+        self.assertEqual(len(self.local_cache), 1)
+
+    def test_local_results_are_copies(self):
+        g = {}
+        safe_exec("a = [1, 2]", g, cache=self.cache)
+        g['a'].append(3)
+
+        g = {}
+        safe_exec("a = [1, 2]", g, cache=self.cache)
+        g['a'].append(4)
+
+        g = {}
+        safe_exec("a = [1, 2]", g, cache=self.cache)
+        self.assertEqual(g['a'], [1, 2])
+
+    def test_no_local_cache(self):
+        cache = SafeExecResultCache(DictCache(self.shared_cache), lambda: None)
+        g = {}
+        safe_exec("a = 17", g, cache=cache)
+        safe_exec("a = 17", g, cache=cache)
+        self.assertEqual(g['a'], 17)
+        self.assertEqual(len(self.shared_cache), 1)
+
+    def test_no_shared_cache(self):
+        cache = SafeExecResultCache(None, lambda: self.local_cache)
+        g = {}
+        safe_exec("a = 17", g, cache=cache)
+        safe_exec("a = 17", g, cache=cache)
+        self.assertEqual(g['a'], 17)
+        self.assertEqual(len(self.local_cache), 1)
+
+
 class TestUpdateHash(unittest.TestCase):
     """Test the safe_exec.update_hash function to be sure it canonicalizes properly."""
 
@@ -0,0 +1,92 @@
+"""Tests the reuse of parsed problems by LoncapaProblem."""
+
+import textwrap
+import unittest
+
+from mock import patch
+
+from . import test_capa_system, new_loncapa_problem
+import capa.capa_problem as capa_problem
+
+
+class ProblemSkeletonTest(unittest.TestCase):
+    """Tests that new instances of a problem are created from its skeleton."""
+
+    xml_str = textwrap.dedent("""
+        <problem>
+        <script type="loncapa/python">
+        correct = str(seed % 3)
+        </script>
+        <multiplechoiceresponse>
+          <choicegroup type="MultipleChoice" shuffle="true">
+            <choice correct="false">Apple</choice>
+            <choice correct="false">Banana</choice>
+            <choice correct="true">Donut</choice>
+          </choicegroup>
+        </multiplechoiceresponse>
+        <stringresponse answer="$correct">
+          <textline size="20"/>
+        </stringresponse>
+        <solution><p>The seed mod 3.</p></solution>
+        </problem>
+    """)
+
+    def setUp(self):
+        super(ProblemSkeletonTest, self).setUp()
+        capa_problem._PROBLEM_SKELETONS.clear()  # pylint: disable=protected-access
+        self.addCleanup(capa_problem._PROBLEM_SKELETONS.clear)  # pylint: disable=protected-access
+        self.system = test_capa_system()
+
+    def new_problem(self, seed, xml_str=None):
+        """Returns a new instance of the problem with the given seed."""
+        return new_loncapa_problem(xml_str or self.xml_str, capa_system=self.system, seed=seed)
+
+    def count_parses(self):
+        """Counts the problems which are parsed and preprocessed, rather than copied."""
+        return patch.object(
+            capa_problem.LoncapaProblem,
+            'make_xml_compatible',
+            autospec=True,
+            side_effect=capa_problem.LoncapaProblem.make_xml_compatible,
+        )
+
+    def test_problem_is_parsed_once(self):
+        with self.count_parses() as mock_parse:
+            for seed in range(5):
+                self.new_problem(seed)
+        self.assertEqual(mock_parse.call_count, 1)
+
+    def test_same_as_parsed_problem(self):
+        self.new_problem(0)
+        for seed in range(5):
+            # Copied from the skeleton of the previous problem.
+            problem = self.new_problem(seed)
+            capa_problem._PROBLEM_SKELETONS.clear()  # pylint: disable=protected-access
+            parsed_problem = self.new_problem(seed)
+            self.assertEqual(problem.get_html(), parsed_problem.get_html())
+            self.assertEqual(problem.get_question_answers(), parsed_problem.get_question_answers())
+            self.assertEqual(
+                sorted(response.get('id') for response in problem.responders),
+                sorted(response.get('id') for response in parsed_problem.responders),
+            )
+
+    def test_instances_are_independent(self):
+        problem = self.new_problem(1)
+        problem.tree.set('data-changed', 'true')
+        self.assertIsNone(self.new_problem(1).tree.get('data-changed'))
+
+        # The answers depend on the seed of each instance, not the first one.
+        answers = self.new_problem(4).get_question_answers()
+        self.assertIn('1', answers.values())
+
+    def test_problems_with_includes_are_not_reused(self):
+        xml_str = textwrap.dedent("""
+            <problem>
+            <include file="test_files/does_not_exist.xml"/>
+            <stringresponse answer="hello"><textline/></stringresponse>
+            </problem>
+        """)
+        with self.count_parses() as mock_parse:
+            self.new_problem(1, xml_str)
+            self.new_problem(1, xml_str)
+        self.assertEqual(mock_parse.call_count, 2)
@@ -157,6 +157,12 @@ class StaticContent(object):
     def stream_data(self):
         yield self._data
 
+    def stream_data_in_range(self, first_byte, last_byte):
+        """
+        Stream the data between first_byte and last_byte (included)
+        """
+        yield self._data[first_byte:last_byte + 1]
+
     @staticmethod
     def serialize_asset_key_with_slash(asset_key):
         """
@@ -177,6 +183,13 @@ class StaticContentStream(StaticContent):
                                                   length=length, locked=locked)
         self._stream = stream
 
+    @property
+    def chunk_size(self):
+        """
+        The size of the chunks in which the underlying stream is stored.
+        """
+        return getattr(self._stream, 'chunk_size', STREAM_DATA_CHUNK_SIZE)
+
     def stream_data(self):
         while True:
             chunk = self._stream.read(STREAM_DATA_CHUNK_SIZE)
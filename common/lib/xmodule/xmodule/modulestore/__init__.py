@@ -3,6 +3,7 @@ This module provides an abstraction for working with XModuleDescriptors
 that are stored in a database an accessible using their Location as an identifier
 """
 
+import copy
 import logging
 import re
 import json
@@ -464,6 +465,16 @@ class BlockData(object):
             classname=self.__class__.__name__,
         )  # pylint: disable=bad-continuation
 
+    def copy(self):
+        """
+        Return a copy of this BlockData whose fields and edit info can be
+        changed without changing those of this one.
+        """
+        block_data = copy.copy(self)
+        block_data.fields = dict(self.fields)
+        block_data.edit_info = copy.copy(self.edit_info)
+        return block_data
+
     def __eq__(self, block_data):
         """
         Two BlockData objects are equal iff all their attributes are equal.
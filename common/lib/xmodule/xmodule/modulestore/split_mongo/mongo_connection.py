@@ -8,6 +8,8 @@ import zlib
 import pymongo
 import pytz
 import re
+import threading
+from collections import OrderedDict
 from contextlib import contextmanager
 from time import time
 
@@ -15,6 +17,7 @@ from time import time
 from pymongo.errors import DuplicateKeyError  # pylint: disable=unused-import
 
 try:
+    from django.conf import settings
     from django.core.cache import caches, InvalidCacheBackendError
     DJANGO_AVAILABLE = True
 except ImportError:
@@ -223,6 +226,104 @@ def structure_to_mongo(structure, course_context=None):
         return new_structure
 
 
+def _copy_structure(structure):
+    """
+    Return a copy of the structure whose blocks can be changed without
+    changing those of `structure`.
+    """
+    new_structure = dict(structure)
+    new_structure['blocks'] = {
+        block_key: block.copy() for block_key, block in structure['blocks'].iteritems()
+    }
+    return new_structure
+
+
+class StructureLRUCache(object):
+    """
+    A bounded, in-process cache of deserialized course structures, which
+    evicts the least recently used structures first.
+
+    The size of the cache is accounted for by the number of blocks in the
+    cached structures, rather than by the number of structures, since
+    course sizes vary by orders of magnitude.
+
+    Callers change the blocks of the structures they load (e.g. split merges
+    definition fields into them and caches their subtree edit info), so
+    structures are copied when they are cached and when they are returned,
+    to keep those changes within the request that made them.
+    """
+    def __init__(self, max_blocks):
+        self.max_blocks = max_blocks
+        self.num_blocks = 0
+        self._structures = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Return the structure cached for `key` and mark it as the most
+        recently used one, or None if it isn't cached.
+        """
+        with self._lock:
+            structure = self._structures.pop(key, None)
+            if structure is not None:
+                self._structures[key] = structure
+        return None if structure is None else _copy_structure(structure)
+
+    def set(self, key, structure):
+        """
+        Cache `structure` for `key`, evicting the least recently used
+        structures as needed to stay within `max_blocks`. Structures larger
+        than the whole cache are not cached.
+
+        Returns the number of evicted structures.
+        """
+        size = len(structure['blocks'])
+        if size > self.max_blocks:
+            return 0
+
+        structure = _copy_structure(structure)
+        num_evicted = 0
+        with self._lock:
+            previous = self._structures.pop(key, None)
+            if previous is not None:
+                self.num_blocks -= len(previous['blocks'])
+            self._structures[key] = structure
+            self.num_blocks += size
+
+            while self.num_blocks > self.max_blocks:
+                __, evicted = self._structures.popitem(last=False)
+                self.num_blocks -= len(evicted['blocks'])
+                num_evicted += 1
+        return num_evicted
+
+    def clear(self):
+        """
+        Remove all structures from the cache.
+        """
+        with self._lock:
+            self._structures.clear()
+            self.num_blocks = 0
+
+
+_STRUCTURE_LRU_CACHE = None
+
+
+def get_structure_lru_cache():
+    """
+    Return the process-wide :class:`StructureLRUCache`, sized by the
+    COURSE_STRUCTURE_LRU_CACHE_MAX_BLOCKS django setting, or None if that
+    setting is unset or 0.
+    """
+    global _STRUCTURE_LRU_CACHE  # pylint: disable=global-statement
+
+    max_blocks = getattr(settings, 'COURSE_STRUCTURE_LRU_CACHE_MAX_BLOCKS', 0) if DJANGO_AVAILABLE else 0
+    if not max_blocks:
+        return None
+    if _STRUCTURE_LRU_CACHE is None or _STRUCTURE_LRU_CACHE.max_blocks != max_blocks:
+        _STRUCTURE_LRU_CACHE = StructureLRUCache(max_blocks)
+    return _STRUCTURE_LRU_CACHE
+
+
 class CourseStructureCache(object):
     """
     Wrapper around django cache object to cache course structure objects.
@@ -230,6 +331,11 @@ class CourseStructureCache(object):
 
     If the 'course_structure_cache' doesn't exist, then don't do anything for
     for set and get.
+
+    Since structures are immutable and keyed by their version id, already
+    deserialized structures are also kept in an in-process
+    :class:`StructureLRUCache` in front of the django cache, if one is
+    configured (see :func:`get_structure_lru_cache`).
     """
     def __init__(self):
         self.cache = None
@@ -238,14 +344,22 @@ class CourseStructureCache(object):
                 self.cache = get_cache('course_structure_cache')
             except InvalidCacheBackendError:
                 pass
+        self.lru_cache = get_structure_lru_cache()
 
     def get(self, key, course_context=None):
         """Pull the compressed, pickled struct data from cache and deserialize."""
-        if self.cache is None:
+        if self.cache is None and self.lru_cache is None:
             return None
 
         with TIMER.timer("CourseStructureCache.get", course_context) as tagger:
-            compressed_pickled_data = self.cache.get(key)
+            if self.lru_cache is not None:
+                structure = self.lru_cache.get(key)
+                tagger.tag(from_lru_cache=str(structure is not None).lower())
+                if structure is not None:
+                    tagger.tag(from_cache='true')
+                    return structure
+
+            compressed_pickled_data = self.cache.get(key) if self.cache is not None else None
             tagger.tag(from_cache=str(compressed_pickled_data is not None).lower())
 
             if compressed_pickled_data is None:
@@ -258,14 +372,34 @@ class CourseStructureCache(object):
             pickled_data = zlib.decompress(compressed_pickled_data)
             tagger.measure('uncompressed_size', len(pickled_data))
 
-            return pickle.loads(pickled_data)
+            structure = pickle.loads(pickled_data)
+            self._set_in_lru_cache(key, structure, tagger)
+            return structure
+
+    def _set_in_lru_cache(self, key, structure, tagger):
+        """
+        Add `structure` to the in-process cache, if there's one, and record
+        any evictions with `tagger`.
+        """
+        if self.lru_cache is None:
+            return
+
+        num_evicted = self.lru_cache.set(key, structure)
+        tagger.measure('lru_cache_blocks', self.lru_cache.num_blocks)
+        if num_evicted:
+            tagger.measure('lru_cache_evictions', num_evicted)
+            tagger.tag(lru_cache_evicted='true')
 
     def set(self, key, structure, course_context=None):
         """Given a structure, will pickle, compress, and write to cache."""
-        if self.cache is None:
+        if self.cache is None and self.lru_cache is None:
             return None
 
         with TIMER.timer("CourseStructureCache.set", course_context) as tagger:
+            self._set_in_lru_cache(key, structure, tagger)
+            if self.cache is None:
+                return None
+
             pickled_data = pickle.dumps(structure, pickle.HIGHEST_PROTOCOL)
             tagger.measure('uncompressed_size', len(pickled_data))
 
@@ -82,6 +82,7 @@ from ..exceptions import ItemNotFoundError
 from .caching_descriptor_system import CachingDescriptorSystem
 from xmodule.modulestore.split_mongo.mongo_connection import MongoConnection, DuplicateKeyError
 from xmodule.modulestore.split_mongo import BlockKey, CourseEnvelope
+from xmodule.modulestore.split_mongo.structure_index import get_structure_index, is_indexable
 from xmodule.error_module import ErrorDescriptor
 from collections import defaultdict
 from types import NoneType
@@ -736,14 +737,22 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
                 definitions = {definition['_id']: definition
                                for definition in descendent_definitions}
 
-                for block in new_module_data.itervalues():
+                for block_key, block in new_module_data.items():
                     if block.definition in definitions:
                         definition = definitions[block.definition]
+                        # Load the definition into a copy of the block, so that the
+                        # blocks of the structure, which its indexes are built from,
+                        # only hold their settings.
+                        block = new_module_data[block_key] = block.copy()
                         # convert_fields gets done later in the runtime's xblock_from_json
                         block.fields.update(definition.get('fields'))
                         block.definition_loaded = True
 
-            system.module_data.update(new_module_data)
+            for block_key, block in new_module_data.iteritems():
+                # Don't replace blocks whose definition was already loaded.
+                cached_block = system.module_data.get(block_key)
+                if cached_block is None or not cached_block.definition_loaded:
+                    system.module_data[block_key] = block
             return system.module_data
 
     @contract(course_entry=CourseEnvelope, block_keys="list(BlockKey)", depth="int | None")
@@ -1105,24 +1114,25 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
 
         if settings is None:
             settings = {}
+        if 'category' in qualifiers:
+            qualifiers['block_type'] = qualifiers.pop('category')
+
+        blocks = course.structure['blocks']
         if 'name' in qualifiers:
             # odd case where we don't search just confirm
             block_name = qualifiers.pop('name')
             block_ids = []
-            for block_id, block in course.structure['blocks'].iteritems():
-                if block_name == block_id.id and _block_matches_all(block):
+            for block_id in self._get_block_keys_to_match(course_locator, course.structure, qualifiers, settings):
+                if self._value_matches(block_id.id, block_name) and _block_matches_all(blocks[block_id]):
                     block_ids.append(block_id)
 
             return self._load_items(course, block_ids, **kwargs)
 
-        if 'category' in qualifiers:
-            qualifiers['block_type'] = qualifiers.pop('category')
-
         # don't expect caller to know that children are in fields
         if 'children' in qualifiers:
             settings['children'] = qualifiers.pop('children')
-        for block_id, value in course.structure['blocks'].iteritems():
-            if _block_matches_all(value):
+        for block_id in self._get_block_keys_to_match(course_locator, course.structure, qualifiers, settings):
+            if _block_matches_all(blocks[block_id]):
                 items.append(block_id)
 
         if len(items) > 0:
@@ -1130,6 +1140,50 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         else:
             return []
 
+    def _get_block_keys_to_match(self, course_key, structure, qualifiers, settings):
+        """
+        Returns the keys of the blocks of the structure which may match the
+        `block_type` qualifier and the settings of `get_items`.
+
+        The keys are looked up in the indexes of the structure, for the most
+        selective criteria compared for equality, unless the structure is
+        being edited in a bulk operation, or no criteria can be looked up.
+        """
+        blocks = structure['blocks']
+        index = self._get_structure_index(course_key, structure)
+        if index is None:
+            return blocks.keys()
+
+        block_keys = None
+        if 'block_type' in qualifiers and is_indexable(qualifiers['block_type']):
+            block_keys = index.blocks_of_type(blocks, qualifiers['block_type'])
+        for field_name, criteria in settings.iteritems():
+            if is_indexable(criteria):
+                field_block_keys = index.blocks_with_field(blocks, field_name, criteria)
+                if block_keys is None or len(field_block_keys) < len(block_keys):
+                    block_keys = field_block_keys
+        return blocks.keys() if block_keys is None else block_keys
+
+    def _get_structure_index(self, course_key, structure):
+        """
+        Returns the StructureIndex of the structure, or None if the structure
+        is being edited in the current bulk operation, and thus can't be
+        indexed.
+        """
+        bulk_write_record = self._get_bulk_ops_record(course_key)
+        if bulk_write_record.active and structure['_id'] not in bulk_write_record.structures_in_db:
+            return None
+        return get_structure_index(structure['_id'])
+
+    def _get_parents(self, block_key, course):
+        """
+        Returns the keys of the parents of the block in the structure of the course.
+        """
+        index = self._get_structure_index(course.course_key, course.structure)
+        if index is None:
+            return self._get_parents_from_structure(block_key, course.structure)
+        return index.parents_of(course.structure['blocks'], block_key)
+
     def has_path_to_root(self, block_key, course):
         """
         Check recursively if an xblock has a path to the course root
@@ -1139,6 +1193,9 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
 
         :return Bool: whether or not component has path to the root
         """
+        index = self._get_structure_index(course.course_key, course.structure)
+        if index is not None:
+            return block_key in index.blocks_reachable_from_root(course.structure['blocks'])
 
         xblock_parents = self._get_parents_from_structure(block_key, course.structure)
         if len(xblock_parents) == 0 and block_key.type in ["course", "library"]:
@@ -1160,7 +1217,7 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             raise ItemNotFoundError(locator)
 
         course = self._lookup_course(locator.course_key)
-        all_parent_ids = self._get_parents_from_structure(BlockKey.from_usage_key(locator), course.structure)
+        all_parent_ids = self._get_parents(BlockKey.from_usage_key(locator), course)
 
         # Check and verify the found parent_ids are not orphans; Remove parent which has no valid path
         # to the course root
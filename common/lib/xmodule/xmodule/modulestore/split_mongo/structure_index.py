@@ -0,0 +1,164 @@
+"""
+Secondary indexes of the blocks of split course structures.
+
+`get_items` matches its qualifiers against every block of a structure, and
+`get_parent_location` searches the parents of a block among all of them.
+Since a structure saved in the database never changes, the blocks of a given
+block type, or with a given value of a settings field (like the `children`
+of parents), and the blocks with a path to the root, can be indexed once per
+structure version.
+"""
+from collections import defaultdict, OrderedDict
+import re
+import threading
+
+
+# The number of structure versions whose indexes are kept in the process.
+MAX_INDEXED_STRUCTURES = 100
+
+
+def is_indexable(criteria):
+    """
+    Returns whether the blocks matching `criteria`, a qualifier of
+    `get_items`, can be looked up in an index: only plain values compared for
+    equality can.
+    """
+    if isinstance(criteria, (dict, list, re._pattern_type)) or callable(criteria):  # pylint: disable=protected-access
+        return False
+    try:
+        hash(criteria)
+    except TypeError:
+        return False
+    return True
+
+
+def _indexable_values(value):
+    """
+    Yields the values under which a field value is indexed: the value itself,
+    or the values of its elements if it is a list, since a list matches any
+    criteria one of its elements matches.
+    """
+    if isinstance(value, list):
+        for element in value:
+            for element_value in _indexable_values(element):
+                yield element_value
+    else:
+        try:
+            hash(value)
+        except TypeError:
+            return
+        yield value
+
+
+class StructureIndex(object):
+    """
+    The indexes of the blocks of a structure version, built the first time
+    they are used.
+
+    The indexes only hold block keys, so their lookups take the blocks of
+    the structure, which must be those of the same version.
+    """
+    def __init__(self):
+        self._by_block_type = None
+        self._by_field = {}
+        self._reachable_from_root = None
+
+    def blocks_of_type(self, blocks, block_type):
+        """
+        Returns the keys of the blocks whose block_type is `block_type`.
+        """
+        if self._by_block_type is None:
+            by_block_type = defaultdict(list)
+            for block_key, block in blocks.iteritems():
+                by_block_type[block.block_type].append(block_key)
+            self._by_block_type = dict(by_block_type)
+        return self._by_block_type.get(block_type, [])
+
+    def blocks_with_field(self, blocks, field_name, value):
+        """
+        Returns the keys of the blocks whose settings field `field_name` is
+        `value`, or a list containing it.
+        """
+        by_value = self._by_field.get(field_name)
+        if by_value is None:
+            by_value = defaultdict(list)
+            for block_key, block in blocks.iteritems():
+                if field_name not in block.fields:
+                    continue
+                for field_value in _indexable_values(block.fields[field_name]):
+                    block_keys = by_value[field_value]
+                    if not block_keys or block_keys[-1] != block_key:
+                        block_keys.append(block_key)
+            by_value = self._by_field[field_name] = dict(by_value)
+        return by_value.get(value, [])
+
+    def parents_of(self, blocks, block_key):
+        """
+        Returns the keys of the blocks which have the block as a child.
+        """
+        return self.blocks_with_field(blocks, 'children', block_key)
+
+    def blocks_reachable_from_root(self, blocks):
+        """
+        Returns the set of the keys of the blocks which have a path to the root
+        of the course or library, including the root.
+        """
+        if self._reachable_from_root is None:
+            roots = [
+                block_key for block_key in blocks
+                if block_key.type in ('course', 'library') and not self.parents_of(blocks, block_key)
+            ]
+            reachable = set(roots)
+            stack = list(roots)
+            while stack:
+                block = blocks.get(stack.pop())
+                if block is None:
+                    continue
+                for child_key in block.fields.get('children', []):
+                    if child_key not in reachable:
+                        reachable.add(child_key)
+                        stack.append(child_key)
+            self._reachable_from_root = frozenset(reachable)
+        return self._reachable_from_root
+
+
+class StructureIndexCache(object):
+    """
+    The indexes of the most recently used structure versions, by version id.
+    """
+    def __init__(self, max_structures=MAX_INDEXED_STRUCTURES):
+        self.max_structures = max_structures
+        self._indexes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, version_guid):
+        """
+        Returns the index of the structure version, creating it if needed,
+        and marks it as the most recently used one.
+        """
+        with self._lock:
+            index = self._indexes.pop(version_guid, None)
+            if index is None:
+                index = StructureIndex()
+                if len(self._indexes) >= self.max_structures:
+                    self._indexes.popitem(last=False)
+            self._indexes[version_guid] = index
+            return index
+
+    def clear(self):
+        """
+        Forgets all the indexes.
+        """
+        with self._lock:
+            self._indexes.clear()
+
+
+_STRUCTURE_INDEX_CACHE = StructureIndexCache()
+
+
+def get_structure_index(version_guid):
+    """
+    Returns the index of the structure version, which must be saved in the
+    database, and thus can't change anymore.
+    """
+    return _STRUCTURE_INDEX_CACHE.get(version_guid)
@@ -436,6 +436,20 @@ class TestMixedModuleStore(CommonMixedModuleStoreSetup):
                 revision=ModuleStoreEnum.RevisionOption.draft_preferred
             )
 
+    @ddt.data(ModuleStoreEnum.Type.mongo, ModuleStoreEnum.Type.split)
+    def test_get_items_by_names(self, default_ms):
+        self.initdb(default_ms)
+        self._create_block_hierarchy()
+
+        modules = self.store.get_items(
+            self.course.id,
+            qualifiers={'category': 'problem', 'name': {'$in': ['Problem_x1a_1', 'Problem_y1a_2', 'HTML_x1a_1']}}
+        )
+        self.assertEqual(
+            sorted(module.location.block_id for module in modules),
+            ['Problem_x1a_1', 'Problem_y1a_2']
+        )
+
     # draft: get draft, get ancestors up to course (2-6), compute inheritance
     #    sends: update problem and then each ancestor up to course (edit info)
     # split: active_versions, definitions (calculator field), structures
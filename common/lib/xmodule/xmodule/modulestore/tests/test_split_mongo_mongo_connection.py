@@ -1,7 +1,8 @@
 """ Test the behavior of split_mongo/MongoConnection """
 import unittest
 from mock import patch
-from xmodule.modulestore.split_mongo.mongo_connection import MongoConnection
+from xmodule.modulestore import BlockData
+from xmodule.modulestore.split_mongo.mongo_connection import MongoConnection, StructureLRUCache
 from xmodule.exceptions import HeartbeatFailure
 
 
@@ -17,3 +18,70 @@ class TestHeartbeatFailureException(unittest.TestCase):
 
             with self.assertRaises(HeartbeatFailure):
                 useless_conn.heartbeat()
+
+
+class TestStructureLRUCache(unittest.TestCase):
+    """ Test the in-process cache of course structures """
+    def structure(self, num_blocks):
+        """ Return a fake structure with the given number of blocks. """
+        return {'blocks': {index: BlockData(fields={'index': index}) for index in range(num_blocks)}}
+
+    def test_get_and_set(self):
+        cache = StructureLRUCache(max_blocks=10)
+        structure = self.structure(3)
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.set('a', structure), 0)
+        self.assertEqual(cache.get('a'), structure)
+        self.assertEqual(cache.num_blocks, 3)
+
+        # Replacing a structure does not count its blocks twice.
+        cache.set('a', structure)
+        self.assertEqual(cache.num_blocks, 3)
+
+    def test_evicts_least_recently_used(self):
+        cache = StructureLRUCache(max_blocks=10)
+        cache.set('a', self.structure(4))
+        cache.set('b', self.structure(4))
+        # Using 'a' makes 'b' the least recently used structure.
+        cache.get('a')
+
+        self.assertEqual(cache.set('c', self.structure(4)), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('a'))
+        self.assertIsNotNone(cache.get('c'))
+        self.assertEqual(cache.num_blocks, 8)
+
+        # Evict as many structures as needed to make room.
+        self.assertEqual(cache.set('d', self.structure(9)), 2)
+        self.assertEqual(cache.num_blocks, 9)
+
+    def test_structures_are_copied(self):
+        cache = StructureLRUCache(max_blocks=10)
+        structure = self.structure(2)
+        cache.set('a', structure)
+        structure['blocks'][0].fields['data'] = 'set'
+
+        cached_structure = cache.get('a')
+        self.assertNotIn('data', cached_structure['blocks'][0].fields)
+        cached_structure['blocks'][1].fields['data'] = 'get'
+        cached_structure['blocks'][1].definition_loaded = True
+        cached_structure['blocks'][1].edit_info._subtree_edited_by = 'get'  # pylint: disable=protected-access
+
+        block = cache.get('a')['blocks'][1]
+        self.assertEqual(block.fields, {'index': 1})
+        self.assertFalse(block.definition_loaded)
+        self.assertIsNone(block.edit_info._subtree_edited_by)  # pylint: disable=protected-access
+
+    def test_structure_larger_than_cache(self):
+        cache = StructureLRUCache(max_blocks=10)
+        cache.set('a', self.structure(4))
+        self.assertEqual(cache.set('b', self.structure(11)), 0)
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('a'))
+
+    def test_clear(self):
+        cache = StructureLRUCache(max_blocks=10)
+        cache.set('a', self.structure(4))
+        cache.clear()
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.num_blocks, 0)
@@ -0,0 +1,225 @@
+"""
+Tests for the indexes of split course structures used by get_items and
+get_parent_location.
+"""
+import re
+import unittest
+
+from mock import patch
+from nose.plugins.skip import SkipTest
+
+from xmodule.modulestore import BlockData
+from xmodule.modulestore.split_mongo import BlockKey
+from xmodule.modulestore.split_mongo.split import SplitMongoModuleStore
+from xmodule.modulestore.split_mongo.structure_index import StructureIndex, StructureIndexCache, is_indexable
+from xmodule.modulestore.tests.factories import CourseFactory
+from xmodule.modulestore.tests.utils import MixedSplitTestCase
+
+# The dependency below needs to be installed manually from the development.txt file, which doesn't
+# get installed during unit tests!
+try:
+    from code_block_timer import CodeBlockTimer
+except ImportError:
+    CodeBlockTimer = None
+
+
+class TestStructureIndex(unittest.TestCase):
+    """ Test the lookups of the indexes of a structure """
+    def setUp(self):
+        super(TestStructureIndex, self).setUp()
+        self.blocks = {
+            BlockKey('chapter', 'chapter'): BlockData(
+                block_type='chapter',
+                fields={'children': [BlockKey('problem', 'one'), BlockKey('problem', 'two')]},
+            ),
+            BlockKey('problem', 'one'): BlockData(block_type='problem', fields={'weight': 1, 'tags': ['a', 'a']}),
+            BlockKey('problem', 'two'): BlockData(block_type='problem', fields={'weight': 2, 'tags': [['b'], {}]}),
+        }
+        self.index = StructureIndex()
+
+    def test_blocks_of_type(self):
+        self.assertEqual(
+            sorted(self.index.blocks_of_type(self.blocks, 'problem')),
+            [BlockKey('problem', 'one'), BlockKey('problem', 'two')]
+        )
+        self.assertEqual(self.index.blocks_of_type(self.blocks, 'html'), [])
+
+    def test_blocks_with_field(self):
+        self.assertEqual(self.index.blocks_with_field(self.blocks, 'weight', 2), [BlockKey('problem', 'two')])
+        self.assertEqual(self.index.blocks_with_field(self.blocks, 'weight', 3), [])
+        self.assertEqual(self.index.blocks_with_field(self.blocks, 'display_name', 'one'), [])
+
+    def test_blocks_with_list_field(self):
+        self.assertEqual(
+            self.index.blocks_with_field(self.blocks, 'children', BlockKey('problem', 'two')),
+            [BlockKey('chapter', 'chapter')]
+        )
+        self.assertEqual(self.index.blocks_with_field(self.blocks, 'tags', 'a'), [BlockKey('problem', 'one')])
+        self.assertEqual(self.index.blocks_with_field(self.blocks, 'tags', 'b'), [BlockKey('problem', 'two')])
+
+    def test_parents_of(self):
+        self.assertEqual(
+            self.index.parents_of(self.blocks, BlockKey('problem', 'one')),
+            [BlockKey('chapter', 'chapter')]
+        )
+        self.assertEqual(self.index.parents_of(self.blocks, BlockKey('chapter', 'chapter')), [])
+
+    def test_blocks_reachable_from_root(self):
+        self.blocks[BlockKey('course', 'course')] = BlockData(
+            block_type='course',
+            fields={'children': [BlockKey('chapter', 'chapter')]},
+        )
+        self.blocks[BlockKey('vertical', 'orphan')] = BlockData(
+            block_type='vertical',
+            fields={'children': [BlockKey('problem', 'two'), BlockKey('html', 'orphan')]},
+        )
+        self.blocks[BlockKey('html', 'orphan')] = BlockData(block_type='html')
+        self.assertEqual(
+            self.index.blocks_reachable_from_root(self.blocks),
+            {
+                BlockKey('course', 'course'),
+                BlockKey('chapter', 'chapter'),
+                BlockKey('problem', 'one'),
+                BlockKey('problem', 'two'),
+            }
+        )
+
+    def test_is_indexable(self):
+        self.assertTrue(is_indexable('problem'))
+        self.assertTrue(is_indexable(BlockKey('problem', 'one')))
+        self.assertFalse(is_indexable(re.compile('prob')))
+        self.assertFalse(is_indexable({'$in': ['problem']}))
+        self.assertFalse(is_indexable(lambda value: True))
+        self.assertFalse(is_indexable(['problem']))
+
+    def test_cache_evicts_least_recently_used(self):
+        cache = StructureIndexCache(max_structures=2)
+        index_a = cache.get('a')
+        index_b = cache.get('b')
+        self.assertIs(cache.get('a'), index_a)
+        cache.get('c')
+        self.assertIs(cache.get('a'), index_a)
+        self.assertIsNot(cache.get('b'), index_b)
+
+
+class TestSplitGetItemsWithIndexes(MixedSplitTestCase):
+    """ Test that get_items and get_parent_location find the same items with the indexes of the structures """
+    def setUp(self):
+        super(TestSplitGetItemsWithIndexes, self).setUp()
+        self.course = CourseFactory.create(modulestore=self.store)
+        self.chapter = self.make_block('chapter', self.course)
+        self.problem = self.make_block('problem', self.chapter, display_name='Problem')
+        self.html = self.make_block('html', self.chapter, display_name='Text')
+
+    def get_item_names(self, **kwargs):
+        """ Returns the sorted names of the items get_items finds in the course """
+        return sorted(item.location.block_id for item in self.store.get_items(self.course.id, **kwargs))
+
+    def test_get_items(self):
+        self.assertEqual(self.get_item_names(qualifiers={'category': 'problem'}), [self.problem.location.block_id])
+        self.assertEqual(self.get_item_names(settings={'display_name': 'Text'}), [self.html.location.block_id])
+        self.assertEqual(
+            self.get_item_names(qualifiers={'category': re.compile('^(problem|html)$')}),
+            sorted([self.problem.location.block_id, self.html.location.block_id])
+        )
+        self.assertEqual(
+            self.get_item_names(qualifiers={'children': BlockKey.from_usage_key(self.problem.location)}),
+            [self.chapter.location.block_id]
+        )
+
+    def test_get_items_after_edits(self):
+        self.get_item_names(qualifiers={'category': 'problem'})
+        problem = self.make_block('problem', self.chapter)
+        self.assertEqual(
+            self.get_item_names(qualifiers={'category': 'problem'}),
+            sorted([self.problem.location.block_id, problem.location.block_id])
+        )
+
+    def test_get_items_in_bulk_operation(self):
+        with self.store.bulk_operations(self.course.id):
+            self.get_item_names(qualifiers={'category': 'problem'})
+            problem = self.make_block('problem', self.chapter)
+            self.assertEqual(
+                self.get_item_names(qualifiers={'category': 'problem'}),
+                sorted([self.problem.location.block_id, problem.location.block_id])
+            )
+
+    def test_get_parent_location(self):
+        self.assertEqual(self.store.get_parent_location(self.problem.location), self.chapter.location)
+        self.assertEqual(self.store.get_parent_location(self.chapter.location), self.course.location)
+        self.assertIsNone(self.store.get_parent_location(self.course.location))
+
+    def test_get_parent_location_of_orphan(self):
+        orphan = self.store.create_item(self.user_id, self.course.id, 'vertical')
+        problem = self.store.create_child(self.user_id, orphan.location, 'problem')
+        self.assertIsNone(self.store.get_parent_location(orphan.location))
+        self.assertIsNone(self.store.get_parent_location(problem.location))
+
+        # Adopting the orphan gives its child a path to the root.
+        self.chapter = self.store.get_item(self.chapter.location)
+        self.chapter.children.append(orphan.location)
+        self.store.update_item(self.chapter, self.user_id)
+        self.assertEqual(self.store.get_parent_location(problem.location), orphan.location)
+
+
+@unittest.skip("Only run manually.")
+class SplitGetItemsPerformanceTest(MixedSplitTestCase):
+    """
+    Times get_items and get_parent_location on a large course, scanning all
+    its blocks and using the indexes of its structure.
+    """
+    # Use this attribute to skip this test on regular unittest CI runs.
+    perf_test = True
+
+    NUM_VERTICALS = 500
+    NUM_CALLS = 100
+
+    def setUp(self):
+        super(SplitGetItemsPerformanceTest, self).setUp()
+        if CodeBlockTimer is None:
+            raise SkipTest("CodeBlockTimer undefined.")
+        self.course = CourseFactory.create(modulestore=self.store)
+        with self.store.bulk_operations(self.course.id):
+            chapter = self.store.create_child(self.user_id, self.course.location, 'chapter')
+            self.problem_locations = []
+            for __ in range(self.NUM_VERTICALS):
+                vertical = self.store.create_child(self.user_id, chapter.location, 'vertical')
+                for category in ('html', 'problem', 'video'):
+                    block = self.store.create_child(self.user_id, vertical.location, category)
+                    if category == 'problem':
+                        self.problem_locations.append(block.location)
+            self.store.create_child(self.user_id, chapter.location, 'discussion')
+
+    def get_discussions(self):
+        """
+        Calls get_items for the discussion of the course NUM_CALLS times.
+        """
+        for __ in range(self.NUM_CALLS):
+            self.assertEqual(len(self.store.get_items(self.course.id, qualifiers={'category': 'discussion'})), 1)
+
+    def test_get_items(self):
+        with CodeBlockTimer("get_items:{}".format(self.NUM_CALLS)):
+            with patch.object(
+                SplitMongoModuleStore,
+                '_get_block_keys_to_match',
+                lambda self, course_key, structure, qualifiers, settings: structure['blocks'].keys()
+            ):
+                with CodeBlockTimer("scan"):
+                    self.get_discussions()
+            with CodeBlockTimer("indexes"):
+                self.get_discussions()
+
+    def get_parents(self):
+        """
+        Calls get_parent_location for NUM_CALLS problems.
+        """
+        for location in self.problem_locations[:self.NUM_CALLS]:
+            self.assertIsNotNone(self.store.get_parent_location(location))
+
+    def test_get_parent_location(self):
+        with CodeBlockTimer("get_parent_location:{}".format(self.NUM_CALLS)):
+            with patch.object(SplitMongoModuleStore, '_get_structure_index', return_value=None):
+                with CodeBlockTimer("scan"):
+                    self.get_parents()
+            with CodeBlockTimer("indexes"):
+                self.get_parents()
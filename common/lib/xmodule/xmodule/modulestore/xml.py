@@ -799,7 +799,7 @@ class XMLModuleStore(ModuleStoreReadBase):
         def _block_matches_all(mod_loc, module):
             if category and mod_loc.category != category:
                 return False
-            if name and mod_loc.name != name:
+            if name and not self._value_matches(mod_loc.name, name):
                 return False
             return all(
                 self._block_matches(module, fields or {})
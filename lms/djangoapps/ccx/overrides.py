@@ -9,7 +9,7 @@ from django.db import transaction, IntegrityError
 
 import request_cache
 
-from courseware.field_overrides import FieldOverrideProvider
+from courseware.field_overrides import FieldOverrideProvider, clear_override_indexes
 from opaque_keys.edx.keys import CourseKey, UsageKey
 from ccx_keys.locator import CCXLocator, CCXBlockUsageLocator
 
@@ -49,6 +49,15 @@ class CustomCoursesForEdxOverrideProvider(FieldOverrideProvider):
             return get_override_for_ccx(ccx, block, name, default)
         return default
 
+    def overridden_fields(self, course_key):
+        """
+        Return the names of the fields overridden by the ccx of the course.
+        """
+        ccx = get_current_ccx(course_key)
+        if not ccx:
+            return set()
+        return set(name for block_overrides in _get_overrides_for_ccx(ccx).itervalues() for name in block_overrides)
+
     @classmethod
     def enabled_for(cls, course):
         """CCX field overrides are enabled per-course
@@ -159,6 +168,7 @@ def override_field_for_ccx(ccx, block, name, value):
 
     _get_overrides_for_ccx(ccx).setdefault(block.location, {})[name] = value_json
     _get_overrides_for_ccx(ccx).setdefault(block.location, {})[name + "_instance"] = override
+    clear_override_indexes()
 
 
 def clear_override_for_ccx(ccx, block, name):
@@ -175,6 +185,7 @@ def clear_override_for_ccx(ccx, block, name):
             field=name).delete()
 
         clear_ccx_field_info_from_ccx_map(ccx, block, name)
+        clear_override_indexes()
 
     except CcxFieldOverride.DoesNotExist:
         pass
@@ -201,3 +212,12 @@ def bulk_delete_ccx_override_fields(ccx, ids):
     ids = list(set(ids))
     if ids:
         CcxFieldOverride.objects.filter(ccx=ccx, id__in=ids).delete()
+        for block_overrides in _get_overrides_for_ccx(ccx).itervalues():
+            deleted_fields = [
+                name[:-len("_id")] for name, value in block_overrides.items()
+                if name.endswith("_id") and value in ids
+            ]
+            for name in deleted_fields:
+                for key in (name, name + "_id", name + "_instance"):
+                    block_overrides.pop(key, None)
+        clear_override_indexes()
@@ -5,6 +5,7 @@ Performance tests for field overrides.
 import ddt
 import itertools
 import mock
+import unittest
 from nose.plugins.skip import SkipTest
 
 from courseware.views import progress
@@ -27,8 +28,16 @@ from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase, \
 from xmodule.modulestore.tests.factories import check_mongo_calls_range, CourseFactory, check_sum_of_calls
 from xmodule.modulestore.tests.utils import ProceduralCourseTestMixin
 from ccx_keys.locator import CCXLocator
+from lms.djangoapps.ccx.overrides import override_field_for_ccx
 from lms.djangoapps.ccx.tests.factories import CcxFactory
 
+# The dependency below needs to be installed manually from the development.txt file, which doesn't
+# get installed during unit tests!
+try:
+    from code_block_timer import CodeBlockTimer
+except ImportError:
+    CodeBlockTimer = None
+
 
 @attr('shard_1')
 @mock.patch.dict(
@@ -262,3 +271,64 @@ class TestFieldOverrideSplitPerformance(FieldOverridePerformanceTestCase):
         ('ccx', 2, False, True): (135, 19, 54),
         ('ccx', 3, False, True): (480, 84, 215),
     }
+
+
+@unittest.skip("Only run manually.")
+@mock.patch.dict(
+    'django.conf.settings.FEATURES',
+    {
+        'ENABLE_XBLOCK_VIEW_ENDPOINT': True,
+        'ENABLE_MAX_SCORE_CACHE': False,
+    }
+)
+@override_settings(FIELD_OVERRIDE_PROVIDERS=('ccx.overrides.CustomCoursesForEdxOverrideProvider',))
+class OverrideIndexPerformanceTest(ProceduralCourseTestMixin, ModuleStoreTestCase):
+    """
+    Times rendering the progress page of a ccx, with due dates overridden on
+    its chapters, with and without the override index.
+    """
+    # Use this attribute to skip this test on regular unittest CI runs.
+    perf_test = True
+
+    MODULESTORE = TEST_DATA_SPLIT_MODULESTORE
+    COURSE_WIDTH = 4
+    NUM_RENDERS = 5
+
+    def setUp(self):
+        super(OverrideIndexPerformanceTest, self).setUp()
+        if CodeBlockTimer is None:
+            raise SkipTest("CodeBlockTimer undefined.")
+        self.student = UserFactory.create()
+        self.course = CourseFactory.create(graded=True, start=datetime.now(UTC), enable_ccx=True)
+        self.populate_course(self.COURSE_WIDTH)
+        self.ccx = CcxFactory.create(course_id=self.course.id)
+        for chapter_key in self.populated_usage_keys['chapter']:
+            override_field_for_ccx(self.ccx, modulestore().get_item(chapter_key), 'due', datetime.now(UTC))
+        self.ccx_key = CCXLocator.from_course_locator(self.course.id, self.ccx.id)
+        CourseEnrollment.enroll(self.student, self.ccx_key)
+        OverrideFieldData.provider_classes = None
+        self.addCleanup(setattr, OverrideFieldData, 'provider_classes', None)
+
+    def render_progress(self):
+        """
+        Renders the progress page NUM_RENDERS times, each time in a new request.
+        """
+        for __ in range(self.NUM_RENDERS):
+            request = RequestFactory().get("foo")
+            request.user = self.student
+            RequestCache().process_request(request)
+            MakoMiddleware().process_request(request)
+            with self.settings(MODULESTORE_BRANCH='published-only'):
+                progress(request, course_id=unicode(self.ccx_key), student_id=self.student.id)
+            RequestCache.clear_request_cache()
+
+    def test_render_time(self):
+        # Warm up the modulestore and template caches.
+        self.render_progress()
+
+        with CodeBlockTimer("ccx_progress:{}".format(self.NUM_RENDERS)):
+            with mock.patch.object(OverrideFieldData, '_get_override_index', return_value=None):
+                with CodeBlockTimer("without_override_index"):
+                    self.render_progress()
+            with CodeBlockTimer("with_override_index"):
+                self.render_progress()
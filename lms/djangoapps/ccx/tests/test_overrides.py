@@ -18,7 +18,11 @@ from xmodule.modulestore.tests.django_utils import (
 from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
 
 from lms.djangoapps.ccx.models import CustomCourseForEdX
-from lms.djangoapps.ccx.overrides import override_field_for_ccx
+from lms.djangoapps.ccx.overrides import (
+    bulk_delete_ccx_override_fields,
+    get_override_for_ccx,
+    override_field_for_ccx,
+)
 
 from lms.djangoapps.ccx.tests.test_views import flatten, iter_blocks
 
@@ -160,3 +164,15 @@ class TestFieldOverrides(ModuleStoreTestCase):
         override_field_for_ccx(self.ccx, chapter, 'due', ccx_due)
         vertical = chapter.get_children()[0].get_children()[0]
         self.assertEqual(vertical.due, ccx_due)
+
+    def test_bulk_delete_updates_cached_overrides(self):
+        """
+        Test that overrides deleted in bulk aren't served from the cache.
+        """
+        ccx_start = datetime.datetime(2014, 12, 25, 00, 00, tzinfo=pytz.UTC)
+        chapter = self.ccx.course.get_children()[0]
+        override_field_for_ccx(self.ccx, chapter, 'start', ccx_start)
+        override_id = get_override_for_ccx(self.ccx, chapter, 'start_id')
+        bulk_delete_ccx_override_fields(self.ccx, [override_id])
+        self.assertIsNone(get_override_for_ccx(self.ccx, chapter, 'start'))
+        self.assertIsNone(get_override_for_ccx(self.ccx, chapter, 'start_id'))
@@ -0,0 +1,42 @@
+"""
+Table of Contents Transformer implementation.
+"""
+from openedx.core.lib.block_cache.transformer import BlockStructureTransformer
+
+
+class TableOfContentsTransformer(BlockStructureTransformer):
+    """
+    A transformer that collects the fields of the chapters and sections
+    shown in the courseware navigation, so that the table of contents can
+    be built from the block structure without instantiating XModules.
+
+    It doesn't change the block structure; the access transformers remove
+    the blocks that the user can't see.
+    """
+    VERSION = 1
+
+    # The xBlock fields read by courseware.module_render.toc_for_course.
+    TOC_FIELDS = ('display_name', 'hide_from_toc', 'format', 'due', 'graded', 'is_time_limited')
+
+    @classmethod
+    def name(cls):
+        """
+        Unique identifier for the transformer's class;
+        same identifier used in setup.py.
+        """
+        return "table_of_contents"
+
+    @classmethod
+    def collect(cls, block_structure):
+        """
+        Collects any information that's necessary to execute this
+        transformer's transform method.
+        """
+        block_structure.request_xblock_fields(*cls.TOC_FIELDS)
+
+    def transform(self, usage_info, block_structure):
+        """
+        Mutates block_structure based on the given usage_info.
+        """
+        # The collected fields are read as is.
+        pass
@@ -39,12 +39,8 @@ from student import auth
 from student.models import CourseEnrollmentAllowed
 from student.roles import (
     CourseBetaTesterRole,
-    CourseInstructorRole,
-    CourseStaffRole,
     GlobalStaff,
     SupportStaffRole,
-    OrgInstructorRole,
-    OrgStaffRole,
 )
 from util.milestones_helpers import (
     get_pre_requisite_courses_not_completed,
@@ -61,7 +57,7 @@ from courseware.access_response import (
     VisibilityError,
 )
 from courseware.access_utils import (
-    adjust_start_date, check_start_date, debug, ACCESS_GRANTED, ACCESS_DENIED,
+    adjust_start_date, check_start_date, debug, get_course_permissions, ACCESS_GRANTED, ACCESS_DENIED,
     in_preview_mode
 )
 
@@ -724,20 +720,12 @@ def _has_access_to_course(user, access_level, course_key):
         debug("Deny: unknown access level")
         return ACCESS_DENIED
 
-    staff_access = (
-        CourseStaffRole(course_key).has_user(user) or
-        OrgStaffRole(course_key.org).has_user(user)
-    )
-    if staff_access and access_level == 'staff':
+    permissions = get_course_permissions(user, course_key)
+    if access_level == 'staff' and permissions.has_staff_role:
         debug("Allow: user has course staff access")
         return ACCESS_GRANTED
 
-    instructor_access = (
-        CourseInstructorRole(course_key).has_user(user) or
-        OrgInstructorRole(course_key.org).has_user(user)
-    )
-
-    if instructor_access and access_level in ('staff', 'instructor'):
+    if permissions.has_instructor_role and access_level in ('staff', 'instructor'):
         debug("Allow: user has course instructor access")
         return ACCESS_GRANTED
 
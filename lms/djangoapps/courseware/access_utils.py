@@ -7,7 +7,19 @@ from datetime import datetime, timedelta
 from django.conf import settings
 from django.utils.timezone import UTC
 from logging import getLogger
-from student.roles import CourseBetaTesterRole
+
+from lazy import lazy
+
+import dogstats_wrapper as dog_stats_api
+import request_cache
+from student.roles import (
+    CourseBetaTesterRole,
+    CourseInstructorRole,
+    CourseStaffRole,
+    OrgInstructorRole,
+    OrgStaffRole,
+    RoleCache,
+)
 from courseware.masquerade import is_masquerading_as_student
 from courseware.access_response import AccessResponse, StartDateError
 from xmodule.util.django import get_current_request_hostname
@@ -19,6 +31,9 @@ log = getLogger(__name__)
 ACCESS_GRANTED = AccessResponse(True)
 ACCESS_DENIED = AccessResponse(False)
 
+# The name of the request cache of the CoursePermissions of the users, by (user id, course key).
+COURSE_PERMISSIONS_CACHE_NAME = u"courseware.access_utils.course_permissions"
+
 
 def debug(*args, **kwargs):
     """
@@ -29,6 +44,84 @@ def debug(*args, **kwargs):
         log.debug(*args, **kwargs)
 
 
+class CoursePermissions(object):
+    """
+    The course roles of a user, each resolved once when it is first needed.
+
+    Masquerading and preview mode aren't part of the permissions, since they
+    can change during a request; callers check them for each decision.
+    """
+    def __init__(self, user, course_key):
+        self.user = user
+        self.course_key = course_key
+        self.role_cache = self._get_role_cache(user)
+
+    @staticmethod
+    def _get_role_cache(user):
+        """
+        Returns the RoleCache of the user, or None if the user can't have roles.
+        """
+        if user.is_authenticated() and user.is_active:
+            return RoleCache.for_user(user)
+        return None
+
+    def is_current(self, user):
+        """
+        Returns whether the roles of the user haven't changed since these
+        permissions were resolved.
+        """
+        return self._get_role_cache(user) is self.role_cache
+
+    @lazy
+    def has_staff_role(self):
+        """
+        Whether the user is on the course or organization staff.
+        """
+        return (
+            CourseStaffRole(self.course_key).has_user(self.user) or
+            OrgStaffRole(self.course_key.org).has_user(self.user)
+        )
+
+    @lazy
+    def has_instructor_role(self):
+        """
+        Whether the user is a course or organization instructor.
+        """
+        return (
+            CourseInstructorRole(self.course_key).has_user(self.user) or
+            OrgInstructorRole(self.course_key.org).has_user(self.user)
+        )
+
+    @lazy
+    def is_beta_tester(self):
+        """
+        Whether the user is a beta tester of the course.
+        """
+        return CourseBetaTesterRole(self.course_key).has_user(self.user)
+
+
+def get_course_permissions(user, course_key):
+    """
+    Returns the CoursePermissions of the user in the course.
+
+    Within a request, the permissions are resolved once per user and course,
+    and resolved again only if the roles of the user change.
+    """
+    if request_cache.get_request() is None:
+        return CoursePermissions(user, course_key)
+
+    cache = request_cache.get_cache(COURSE_PERMISSIONS_CACHE_NAME)
+    cache_key = (user.id, unicode(course_key))
+    permissions = cache.get(cache_key)
+    if permissions is not None and permissions.is_current(user):
+        dog_stats_api.increment('courseware.access.course_permissions', tags=[u'result:cached'])
+        return permissions
+
+    dog_stats_api.increment('courseware.access.course_permissions', tags=[u'result:resolved'])
+    permissions = cache[cache_key] = CoursePermissions(user, course_key)
+    return permissions
+
+
 def adjust_start_date(user, days_early_for_beta, start, course_key):
     """
     If user is in a beta test group, adjust the start date by the appropriate number of
@@ -41,7 +134,7 @@ def adjust_start_date(user, days_early_for_beta, start, course_key):
         # bail early if no beta testing is set up
         return start
 
-    if CourseBetaTesterRole(course_key).has_user(user):
+    if get_course_permissions(user, course_key).is_beta_tester:
         debug("Adjust start time: user in beta role for %s", course_key)
         delta = timedelta(days_early_for_beta)
         effective = start - delta
@@ -2,7 +2,10 @@
 django admin pages for courseware model
 '''
 
-from courseware.models import StudentModule, OfflineComputedGrade, OfflineComputedGradeLog
+from config_models.admin import ConfigurationModelAdmin
+from courseware.models import (
+    StudentModule, OfflineComputedGrade, OfflineComputedGradeLog, PersistentSubsectionGradesConfiguration
+)
 from ratelimitbackend import admin
 
 admin.site.register(StudentModule)
@@ -10,3 +13,5 @@ admin.site.register(StudentModule)
 admin.site.register(OfflineComputedGrade)
 
 admin.site.register(OfflineComputedGradeLog)
+
+admin.site.register(PersistentSubsectionGradesConfiguration, ConfigurationModelAdmin)
@@ -19,12 +19,14 @@ import threading
 from abc import ABCMeta, abstractmethod
 from contextlib import contextmanager
 from django.conf import settings
+from lazy import lazy
 from request_cache.middleware import RequestCache
 from xblock.field_data import FieldData
 from xmodule.modulestore.inheritance import InheritanceMixin
 
 NOTSET = object()
 ENABLED_OVERRIDE_PROVIDERS_KEY = "courseware.field_overrides.enabled_providers.{course_id}"
+OVERRIDE_INDEXES_CACHE_NAME = "courseware.field_overrides.override_indexes"
 
 
 def resolve_dotted(name):
@@ -71,21 +73,24 @@ class OverrideFieldData(FieldData):
         any performance impact of this feature if no override providers are
         configured.
         """
-        if cls.provider_classes is None:
-            cls.provider_classes = tuple(
-                (resolve_dotted(name) for name in
-                 settings.FIELD_OVERRIDE_PROVIDERS))
-
         enabled_providers = cls._providers_for_course(course)
         if enabled_providers:
             # TODO: we might not actually want to return here.  Might be better
             # to check for instance.providers after the instance is built. This
             # would allow for the case where we have registered providers but
             # none are enabled for the provided course
-            return cls(user, wrapped, enabled_providers)
+            return cls(user, wrapped, enabled_providers, course)
 
         return wrapped
 
+    @classmethod
+    def overrides_enabled_for(cls, course):
+        """
+        Returns whether any override provider is enabled for the course, in
+        which case `wrap` overrides the field data of its blocks.
+        """
+        return bool(cls._providers_for_course(course))
+
     @classmethod
     def _providers_for_course(cls, course):
         """
@@ -96,6 +101,11 @@ class OverrideFieldData(FieldData):
         Arguments:
             course: The course XBlock
         """
+        if cls.provider_classes is None:
+            cls.provider_classes = tuple(
+                (resolve_dotted(name) for name in
+                 settings.FIELD_OVERRIDE_PROVIDERS))
+
         request_cache = RequestCache.get_request_cache()
         if course is None:
             cache_key = ENABLED_OVERRIDE_PROVIDERS_KEY.format(course_id='None')
@@ -110,20 +120,48 @@ class OverrideFieldData(FieldData):
 
         return enabled_providers
 
-    def __init__(self, user, fallback, providers):
+    def __init__(self, user, fallback, providers, course=None):
         self.fallback = fallback
         self.providers = tuple(provider(user) for provider in providers)
+        self.override_index = self._get_override_index(user, course, self.providers)
+
+    @classmethod
+    def _get_override_index(cls, user, course, providers):
+        """
+        Returns the OverrideIndex shared by the blocks of the course for the
+        user during the current request, or None outside of a request, or if
+        there is no course.
+        """
+        if course is None or not providers or RequestCache.get_current_request() is None:
+            return None
+        indexes = RequestCache.get_request_cache(OVERRIDE_INDEXES_CACHE_NAME)
+        cache_key = (getattr(user, 'id', None), unicode(course.id))
+        if cache_key not in indexes:
+            indexes[cache_key] = OverrideIndex(providers, course.id)
+        return indexes[cache_key]
 
     def get_override(self, block, name):
         """
         Checks for an override for the field identified by `name` in `block`.
         Returns the overridden value or `NOTSET` if no override is found.
         """
-        if not overrides_disabled():
-            for provider in self.providers:
-                value = provider.get(block, name, NOTSET)
-                if value is not NOTSET:
-                    return value
+        if overrides_disabled():
+            return NOTSET
+        if self.override_index is not None and hasattr(block, 'location'):
+            return self.override_index.get_override(block, name)
+        return _get_provider_override(self.providers, block, name)
+
+    def get_inherited_override(self, block, name):
+        """
+        Returns the override of the inheritable field identified by `name` on
+        the closest ancestor of `block` that has one, or `NOTSET`.
+        """
+        if self.override_index is not None and hasattr(block, 'location'):
+            return self.override_index.get_inherited_override(block, name)
+        for ancestor in _lineage(block):
+            value = self.get_override(ancestor, name)
+            if value is not NOTSET:
+                return value
         return NOTSET
 
     def get(self, block, name):
@@ -147,11 +185,9 @@ class OverrideFieldData(FieldData):
             # If this is an inheritable field and an override is set above,
             # then we want to return False here, so the field_data uses the
             # override and not the original value for this block.
-            inheritable = InheritanceMixin.fields.keys()
-            if name in inheritable:
-                for ancestor in _lineage(block):
-                    if self.get_override(ancestor, name) is not NOTSET:
-                        return False
+            if name in InheritanceMixin.fields and not overrides_disabled():
+                if self.get_inherited_override(block, name) is not NOTSET:
+                    return False
 
         return has is not NOTSET or self.fallback.has(block, name)
 
@@ -162,15 +198,119 @@ class OverrideFieldData(FieldData):
         # The `default` method is overloaded by the field storage system to
         # also handle inheritance.
         if self.providers and not overrides_disabled():
-            inheritable = InheritanceMixin.fields.keys()
-            if name in inheritable:
-                for ancestor in _lineage(block):
-                    value = self.get_override(ancestor, name)
-                    if value is not NOTSET:
-                        return value
+            if name in InheritanceMixin.fields:
+                value = self.get_inherited_override(block, name)
+                if value is not NOTSET:
+                    return value
         return self.fallback.default(block, name)
 
 
+class OverrideIndex(object):
+    """
+    The overrides of the blocks of a course for a user, resolved once for each
+    block and field, including the overrides that blocks inherit from their
+    ancestors.
+
+    The index also knows which fields the providers can override at all, if
+    they all tell, so that the other fields aren't looked up.
+
+    The overrides are kept for the current request, which must clear them
+    with `clear_override_indexes` if it changes overrides.
+    """
+    def __init__(self, providers, course_key):
+        self.providers = providers
+        self.course_key = course_key
+        self._overrides = {}
+        self._inherited_overrides = {}
+
+    def clear(self):
+        """
+        Forgets the overrides resolved so far, and the fields that may be overridden.
+        """
+        self._overrides.clear()
+        self._inherited_overrides.clear()
+        self.__dict__.pop('overridden_fields', None)
+
+    @lazy
+    def overridden_fields(self):
+        """
+        The names of the fields that the providers may override in the course,
+        or None if some provider can't tell.
+        """
+        fields = set()
+        for provider in self.providers:
+            provider_fields = provider.overridden_fields(self.course_key)
+            if provider_fields is None:
+                return None
+            fields.update(provider_fields)
+        return fields
+
+    def _may_be_overridden(self, name):
+        """
+        Returns whether the field identified by `name` may have overrides.
+        """
+        return self.overridden_fields is None or name in self.overridden_fields
+
+    def get_override(self, block, name):
+        """
+        Returns the override of the field identified by `name` in `block`, or `NOTSET`.
+        """
+        if not self._may_be_overridden(name):
+            return NOTSET
+        cache_key = (block.location, name)
+        if cache_key not in self._overrides:
+            self._overrides[cache_key] = _get_provider_override(self.providers, block, name)
+        return self._overrides[cache_key]
+
+    def get_inherited_override(self, block, name):
+        """
+        Returns the override of the field identified by `name` on the closest
+        ancestor of `block` that has one, or `NOTSET`.
+
+        The result is kept for each ancestor visited, so the siblings and
+        descendants of `block` find it without walking up the tree again.
+        """
+        if not self._may_be_overridden(name):
+            return NOTSET
+        value = NOTSET
+        visited = []
+        for ancestor in _lineage(block):
+            cache_key = (ancestor.location, name)
+            if cache_key in self._inherited_overrides:
+                value = self._inherited_overrides[cache_key]
+                break
+            visited.append(cache_key)
+            value = self.get_override(ancestor, name)
+            if value is not NOTSET:
+                break
+        for cache_key in visited:
+            self._inherited_overrides[cache_key] = value
+        return value
+
+
+def clear_override_indexes():
+    """
+    Forgets the overrides resolved during the current request, after they changed.
+
+    The indexes are cleared in place, since the `OverrideFieldData` of blocks
+    already loaded during the request keep using them.
+    """
+    for index in RequestCache.get_request_cache(OVERRIDE_INDEXES_CACHE_NAME).itervalues():
+        index.clear()
+
+
+def _get_provider_override(providers, block, name):
+    """
+    Asks the providers in turn for an override for the field identified by
+    `name` in `block`. Returns the first overridden value or `NOTSET`.
+    """
+    for provider in providers:
+        value = provider.get(block, name, NOTSET)
+        if value is not NOTSET:
+            return value
+    return NOTSET
+
+
 class _OverridesDisabled(threading.local):
     """
     A thread local used to manage state of overrides being disabled or not.
@@ -236,6 +376,17 @@ class FieldOverrideProvider(object):
         """
         return False
 
+    def overridden_fields(self, course_key):  # pylint: disable=unused-argument
+        """
+        Return the names of the fields this provider may override for the
+        user in the course with the given `course_key`, or None if the
+        provider can't tell without looking at each block.
+
+        Fields that no provider overrides are not looked up in the override
+        index, so implementations may return more fields, but never fewer.
+        """
+        return None
+
 
 def _lineage(block):
     """
@@ -2,19 +2,24 @@
 from __future__ import division
 from collections import defaultdict
 from functools import partial
+from itertools import islice
 import json
 import random
 import logging
 
 from contextlib import contextmanager
+from datetime import datetime, timedelta
 from django.conf import settings
 from django.test.client import RequestFactory
 from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from pytz import UTC
 
 import dogstats_wrapper as dog_stats_api
 
 from courseware import courses
 from courseware.access import has_access
+from courseware.field_overrides import OverrideFieldData
 from courseware.model_data import FieldDataCache, ScoresClient
 from student.models import anonymous_id_for_user
 from util.db import outer_atomic
@@ -23,10 +28,16 @@ from xmodule import graders
 from xmodule.graders import Score
 from xmodule.modulestore.django import modulestore
 from xmodule.modulestore.exceptions import ItemNotFoundError
-from .models import StudentModule
+from .models import (
+    PersistentSubsectionGradesConfiguration,
+    StudentModule,
+    StudentScoreVersion,
+    StudentSubsectionGrade,
+    SubsectionGradeLocation,
+)
 from .module_render import get_module_for_descriptor
 from opaque_keys import InvalidKeyError
-from opaque_keys.edx.keys import CourseKey
+from opaque_keys.edx.keys import CourseKey, UsageKey
 from openedx.core.djangoapps.signals.signals import GRADES_UPDATED
 
 
@@ -127,6 +138,265 @@ class MaxScoresCache(object):
         return max_score
 
 
+class _StudentGradingData(object):
+    """
+    The per-student data needed to grade subsections from scratch.
+
+    Any of these may be supplied up front (e.g. by a batch grader). The rest
+    are only loaded the first time they are used, so a student whose
+    subsection grades are all stored never has to load them. They are used
+    while grading a section, inside its atomic block.
+    """
+    def __init__(self, student, course, field_data_cache=None, scores_client=None,
+                 submissions_scores=None, max_scores_cache=None):
+        self.student = student
+        self.course = course
+        self._field_data_cache = field_data_cache
+        self._scores_client = scores_client
+        self._submissions_scores = submissions_scores
+        self._max_scores_cache = max_scores_cache
+        # A max_scores_cache that was handed to us may be shared with other
+        # students, so the caller is responsible for pushing it.
+        self._owns_max_scores_cache = max_scores_cache is None
+
+    @property
+    def field_data_cache(self):
+        """The FieldDataCache used to instantiate modules for this student."""
+        if self._field_data_cache is None:
+            self._field_data_cache = field_data_cache_for_grading(self.course, self.student)
+        return self._field_data_cache
+
+    @property
+    def scores_client(self):
+        """A fetched ScoresClient for this student."""
+        if self._scores_client is None:
+            self._scores_client = ScoresClient.from_field_data_cache(self.field_data_cache)
+        return self._scores_client
+
+    @property
+    def submissions_scores(self):
+        """
+        Dict of item_ids -> (earned, possible) point tuples. This *only* grabs
+        scores that were registered with the submissions API, which for the
+        moment means only openassessment (edx-ora2)
+        """
+        if self._submissions_scores is None:
+            # We need to import this here to avoid a circular dependency of the form:
+            # XBlock --> submissions --> Django Rest Framework error strings -->
+            # Django translation --> ... --> courseware --> submissions
+            from submissions import api as sub_api  # installed from the edx-submissions repository
+
+            self._submissions_scores = sub_api.get_scores(
+                self.course.id.to_deprecated_string(),
+                anonymous_id_for_user(self.student, self.course.id)
+            )
+        return self._submissions_scores
+
+    @property
+    def max_scores_cache(self):
+        """The MaxScoresCache for the course."""
+        if self._max_scores_cache is None:
+            self._max_scores_cache = MaxScoresCache.create_for_course(self.course)
+
+            # For the moment, we have to get scorable_locations from field_data_cache
+            # and not from scores_client, because scores_client is ignorant of things
+            # in the submissions API. As a further refactoring step, submissions should
+            # be hidden behind the ScoresClient.
+            self._max_scores_cache.fetch_from_remote(self.field_data_cache.scorable_locations)
+        return self._max_scores_cache
+
+    def push_max_scores(self):
+        """Push max score updates to the remote cache, if we own the cache."""
+        if self._owns_max_scores_cache and self._max_scores_cache is not None:
+            self._max_scores_cache.push_to_remote()
+
+
+class SubsectionGradeStore(object):
+    """
+    Read and write access to a student's persisted subsection grades in a course.
+
+    Stored grades are only used while they are not stale, were computed
+    against the current version of the course content, no module of the
+    subsection became available since and they were stored after
+    `stored_since`, see PersistentSubsectionGradesConfiguration.stored_since.
+    Rows are marked stale by the score change receivers in `courseware.models`.
+    """
+    def __init__(self, student, course, stored_since):
+        self.student = student
+        self.course = course
+        self.stored_since = stored_since
+        self.course_version = course_version_for_grading(course)
+        # Read before any score, so that save() can tell whether a score
+        # changed while the grades were computed.
+        self.score_version = StudentScoreVersion.get_version(student.id, course.id)
+        self._rows = {
+            row.usage_key.map_into_course(course.id): row
+            for row in StudentSubsectionGrade.objects.filter(user=student, course_id=course.id)
+        }
+        self._dirty_rows = []
+        self._scored_locations = {}
+        self._storable_sections = {}
+
+    def can_store(self, section):
+        """
+        Return whether the grade of an entry of the course's
+        grading_context['graded_sections'] can be stored, see
+        `_is_storable_section`.
+        """
+        location = section['section_descriptor'].location
+        if location not in self._storable_sections:
+            self._storable_sections[location] = _is_storable_section(self.course, section)
+        return self._storable_sections[location]
+
+    def get(self, location, section_name):
+        """
+        Return a (graded_total, scores) tuple for the subsection at `location`,
+        as returned by `_grade_section`, or None if there is no usable stored
+        grade.
+        """
+        row = self._rows.get(location)
+        if row is None or row.stale or row.course_version != self.course_version:
+            return None
+        if row.valid_until is not None and row.valid_until <= datetime.now(UTC):
+            return None
+        if row.modified < self.stored_since:
+            return None
+
+        graded_total = Score(row.earned, row.possible, True, section_name, None)
+        scores = [
+            Score(
+                earned, possible, graded, display_name,
+                UsageKey.from_string(module_id).map_into_course(self.course.id)
+            )
+            for earned, possible, graded, display_name, module_id in json.loads(row.raw_scores)
+        ]
+        return graded_total, scores
+
+    def set(self, section, graded_total, scores):
+        """
+        Record a freshly computed grade for an entry of the course's
+        grading_context['graded_sections']. Call save() to persist it.
+        """
+        location = section['section_descriptor'].location
+        row = self._rows.get(location)
+        if row is None:
+            row = StudentSubsectionGrade(user=self.student, course_id=self.course.id, usage_key=location)
+            self._rows[location] = row
+
+        row.course_version = self.course_version
+        row.valid_until = _next_start_date(section['xmoduledescriptors'], datetime.now(UTC))
+        row.earned = graded_total.earned
+        row.possible = graded_total.possible
+        row.raw_scores = json.dumps([
+            (score.earned, score.possible, score.graded, score.section, unicode(score.module_id))
+            for score in scores
+        ])
+        row.stale = False
+        self._dirty_rows.append(row)
+        self._scored_locations[location] = [descriptor.location for descriptor in section['xmoduledescriptors']]
+
+    def save(self):
+        """
+        Persist every grade recorded with set(), unless a score of the
+        student changed since the store was created, in which case the
+        grades may have been computed from the previous scores.
+        """
+        if not self._dirty_rows:
+            return
+
+        # The locations are recorded first, so that any later score change
+        # finds the rows saved below.
+        with outer_atomic():
+            SubsectionGradeLocation.add_locations(self.course.id, self._scored_locations)
+
+        with outer_atomic():
+            # Locking the score version makes concurrent score changes wait
+            # until the rows are saved, or the rows wait for their commit.
+            score_version, __ = StudentScoreVersion.objects.select_for_update().get_or_create(
+                user=self.student, course_id=self.course.id
+            )
+            if score_version.version != self.score_version:
+                log.info(
+                    u"Subsection grades for user %s in %s were not stored, since a score changed",
+                    self.student.id,
+                    self.course.id,
+                )
+            else:
+                for row in self._dirty_rows:
+                    try:
+                        with transaction.atomic():
+                            row.save()
+                    except IntegrityError:
+                        # Another process stored this subsection first; its grade
+                        # is just as good as ours.
+                        log.info(
+                            u"Subsection grade for user %s at %s was stored concurrently",
+                            self.student.id,
+                            row.usage_key,
+                        )
+        self._dirty_rows = []
+        self._scored_locations = {}
+
+
+def _is_storable_section(course, section):
+    """
+    Return whether the grade of an entry of the course's
+    grading_context['graded_sections'] only depends on the scores of the
+    student and the start dates of its modules, so that it can be stored.
+
+    It doesn't when some of its modules are always recalculated, are
+    restricted to groups of users (e.g. content groups of cohorts), or are
+    picked for each user (e.g. by split tests or randomized content).
+    """
+    if any(descriptor.always_recalculate_grades for descriptor in section['xmoduledescriptors']):
+        return False
+
+    section_descriptor = section['section_descriptor']
+    if section_descriptor.merged_group_access:
+        return False
+
+    def possibly_scored(usage_key):
+        """Whether the block can have a score or children"""
+        return usage_key.block_type in course.block_types_affecting_grading
+
+    descriptors = [section_descriptor]
+    while descriptors:
+        descriptor = descriptors.pop()
+        if descriptor.group_access or descriptor.has_dynamic_children():
+            return False
+        descriptors.extend(descriptor.get_children(usage_key_filter=possibly_scored))
+    return True
+
+
+def _next_start_date(descriptors, now):
+    """
+    Return the first date after `now` when one of the `descriptors` becomes
+    available to students or beta testers, or None.
+    """
+    start_dates = []
+    for descriptor in descriptors:
+        if descriptor.start is None:
+            continue
+        start_dates.append(descriptor.start)
+        if descriptor.days_early_for_beta is not None:
+            start_dates.append(descriptor.start - timedelta(days=descriptor.days_early_for_beta))
+    future_dates = [start for start in start_dates if start > now]
+    return min(future_dates) if future_dates else None
+
+
+def course_version_for_grading(course):
+    """
+    Return a string identifying the published content version of `course`.
+
+    Like the MaxScoresCache prefix, this changes whenever anything in the
+    course is published, which invalidates grades computed before that.
+    """
+    if course.subtree_edited_on is None:
+        # check for subtree_edited_on because old XML courses doesn't have this attribute
+        return u""
+    return course.subtree_edited_on.isoformat()
+
+
 class ProgressSummary(object):
     """
     Wrapper class for the computation of a user's scores across a course.
@@ -302,6 +572,14 @@ def grade(student, request, course, keep_raw_scores=False, field_data_cache=None
     Also sends a signal to update the minimum grade requirement status.
     """
     grade_summary = _grade(student, request, course, keep_raw_scores, field_data_cache, scores_client)
+    _send_grades_updated(student, course, grade_summary)
+    return grade_summary
+
+
+def _send_grades_updated(student, course, grade_summary):
+    """
+    Send the GRADES_UPDATED signal for a freshly computed grade_summary.
+    """
     responses = GRADES_UPDATED.send_robust(
         sender=None,
         username=student.username,
@@ -313,10 +591,9 @@ def grade(student, request, course, keep_raw_scores=False, field_data_cache=None
     for receiver, response in responses:
         log.info('Signal fired when student grade is calculated. Receiver: %s. Response: %s', receiver, response)
 
-    return grade_summary
-
 
-def _grade(student, request, course, keep_raw_scores, field_data_cache, scores_client):
+def _grade(student, request, course, keep_raw_scores, field_data_cache, scores_client,
+           submissions_scores=None, max_scores_cache=None):
     """
     Unwrapped version of "grade"
 
@@ -336,33 +613,32 @@ def _grade(student, request, course, keep_raw_scores, field_data_cache, scores_c
       for every graded module
 
     More information on the format is in the docstring for CourseGrader.
-    """
-    with outer_atomic():
-        if field_data_cache is None:
-            field_data_cache = field_data_cache_for_grading(course, student)
-        if scores_client is None:
-            scores_client = ScoresClient.from_field_data_cache(field_data_cache)
 
-    # Dict of item_ids -> (earned, possible) point tuples. This *only* grabs
-    # scores that were registered with the submissions API, which for the moment
-    # means only openassessment (edx-ora2)
-    # We need to import this here to avoid a circular dependency of the form:
-    # XBlock --> submissions --> Django Rest Framework error strings -->
-    # Django translation --> ... --> courseware --> submissions
-    from submissions import api as sub_api  # installed from the edx-submissions repository
+    Batch graders (see `iterate_grades_for`) pass in a prefetched
+    `scores_client`, `submissions_scores` and shared `max_scores_cache`. In
+    that case the FieldDataCache is only built if a module actually has to be
+    instantiated for this student.
 
-    with outer_atomic():
-        submissions_scores = sub_api.get_scores(
-            course.id.to_deprecated_string(),
-            anonymous_id_for_user(student, course.id)
-        )
-        max_scores_cache = MaxScoresCache.create_for_course(course)
+    If PersistentSubsectionGradesConfiguration is enabled, and no field
+    overrides are enabled for the course, the grades of the subsections that
+    can be stored are read from the SubsectionGradeStore, and only those with
+    a missing or stale stored grade are recomputed.
+    """
+    grading_data = _StudentGradingData(
+        student, course, field_data_cache, scores_client, submissions_scores, max_scores_cache
+    )
 
-        # For the moment, we have to get scorable_locations from field_data_cache
-        # and not from scores_client, because scores_client is ignorant of things
-        # in the submissions API. As a further refactoring step, submissions should
-        # be hidden behind the ScoresClient.
-        max_scores_cache.fetch_from_remote(field_data_cache.scorable_locations)
+    subsection_grades = None
+    stored_since = PersistentSubsectionGradesConfiguration.stored_since()
+    if (
+            stored_since is not None and
+            not settings.GENERATE_PROFILE_SCORES and
+            # Field overrides (e.g. of CCX or individual due dates) can change
+            # what the student sees without changing the course version.
+            not OverrideFieldData.overrides_enabled_for(course)
+    ):
+        with outer_atomic():
+            subsection_grades = SubsectionGradeStore(student, course, stored_since)
 
     grading_context = course.grading_context
     raw_scores = []
@@ -382,83 +658,21 @@ def _grade(student, request, course, keep_raw_scores, field_data_cache, scores_c
                 # TODO This block is causing extra savepoints to be fired that are empty because no queries are executed
                 # during the loop. When refactoring this code please keep this outer_atomic call in mind and ensure we
                 # are not making unnecessary database queries.
-                should_grade_section = any(
-                    descriptor.always_recalculate_grades for descriptor in section['xmoduledescriptors']
-                )
+                store_grade = subsection_grades is not None and subsection_grades.can_store(section)
 
-                # If there are no problems that always have to be regraded, check to
-                # see if any of our locations are in the scores from the submissions
-                # API. If scores exist, we have to calculate grades for this section.
-                if not should_grade_section:
-                    should_grade_section = any(
-                        descriptor.location.to_deprecated_string() in submissions_scores
-                        for descriptor in section['xmoduledescriptors']
-                    )
+                stored_grade = None
+                if store_grade:
+                    stored_grade = subsection_grades.get(section_descriptor.location, section_name)
 
-                if not should_grade_section:
-                    should_grade_section = any(
-                        descriptor.location in scores_client
-                        for descriptor in section['xmoduledescriptors']
-                    )
-
-                # If we haven't seen a single problem in the section, we don't have
-                # to grade it at all! We can assume 0%
-                if should_grade_section:
-                    scores = []
-
-                    def create_module(descriptor):
-                        '''creates an XModule instance given a descriptor'''
-                        # TODO: We need the request to pass into here. If we could forego that, our arguments
-                        # would be simpler
-                        return get_module_for_descriptor(
-                            student, request, descriptor, field_data_cache, course.id, course=course
-                        )
-
-                    descendants = yield_dynamic_descriptor_descendants(section_descriptor, student.id, create_module)
-                    for module_descriptor in descendants:
-                        user_access = has_access(
-                            student, 'load', module_descriptor, module_descriptor.location.course_key
-                        )
-                        if not user_access:
-                            continue
-
-                        (correct, total) = get_score(
-                            student,
-                            module_descriptor,
-                            create_module,
-                            scores_client,
-                            submissions_scores,
-                            max_scores_cache,
-                        )
-                        if correct is None and total is None:
-                            continue
-
-                        if settings.GENERATE_PROFILE_SCORES:    # for debugging!
-                            if total > 1:
-                                correct = random.randrange(max(total - 2, 1), total + 1)
-                            else:
-                                correct = total
-
-                        graded = module_descriptor.graded
-                        if not total > 0:
-                            # We simply cannot grade a problem that is 12/0, because we might need it as a percentage
-                            graded = False
-
-                        scores.append(
-                            Score(
-                                correct,
-                                total,
-                                graded,
-                                module_descriptor.display_name_with_default,
-                                module_descriptor.location
-                            )
-                        )
-
-                    __, graded_total = graders.aggregate_scores(scores, section_name)
-                    if keep_raw_scores:
-                        raw_scores += scores
+                if stored_grade is not None:
+                    graded_total, scores = stored_grade
                 else:
-                    graded_total = Score(0.0, 1.0, True, section_name, None)
+                    graded_total, scores = _grade_section(student, request, course, section, grading_data)
+                    if store_grade:
+                        subsection_grades.set(section, graded_total, scores)
+
+                if keep_raw_scores:
+                    raw_scores += scores
 
                 #Add the graded total to totaled_scores
                 if graded_total.possible > 0:
@@ -488,11 +702,105 @@ def _grade(student, request, course, keep_raw_scores, field_data_cache, scores_c
             # so grader can be double-checked
             grade_summary['raw_scores'] = raw_scores
 
-        max_scores_cache.push_to_remote()
+        grading_data.push_max_scores()
+
+    if subsection_grades is not None:
+        subsection_grades.save()
 
     return grade_summary
 
 
+def _grade_section(student, request, course, section, grading_data):
+    """
+    Compute the grade for one entry of `course.grading_context['graded_sections']`.
+
+    Returns a tuple of (graded_total, scores), where graded_total is the
+    aggregate graded Score of the section and scores is the list of Scores for
+    every scored module in it.
+    """
+    section_descriptor = section['section_descriptor']
+    section_name = section_descriptor.display_name_with_default
+    scores_client = grading_data.scores_client
+    submissions_scores = grading_data.submissions_scores
+
+    should_grade_section = any(
+        descriptor.always_recalculate_grades for descriptor in section['xmoduledescriptors']
+    )
+
+    # If there are no problems that always have to be regraded, check to
+    # see if any of our locations are in the scores from the submissions
+    # API. If scores exist, we have to calculate grades for this section.
+    if not should_grade_section:
+        should_grade_section = any(
+            descriptor.location.to_deprecated_string() in submissions_scores
+            for descriptor in section['xmoduledescriptors']
+        )
+
+    if not should_grade_section:
+        should_grade_section = any(
+            descriptor.location in scores_client
+            for descriptor in section['xmoduledescriptors']
+        )
+
+    # If we haven't seen a single problem in the section, we don't have
+    # to grade it at all! We can assume 0%
+    if not should_grade_section:
+        return Score(0.0, 1.0, True, section_name, None), []
+
+    scores = []
+
+    def create_module(descriptor):
+        '''creates an XModule instance given a descriptor'''
+        # TODO: We need the request to pass into here. If we could forego that, our arguments
+        # would be simpler
+        return get_module_for_descriptor(
+            student, request, descriptor, grading_data.field_data_cache, course.id, course=course
+        )
+
+    descendants = yield_dynamic_descriptor_descendants(section_descriptor, student.id, create_module)
+    for module_descriptor in descendants:
+        user_access = has_access(
+            student, 'load', module_descriptor, module_descriptor.location.course_key
+        )
+        if not user_access:
+            continue
+
+        (correct, total) = get_score(
+            student,
+            module_descriptor,
+            create_module,
+            scores_client,
+            submissions_scores,
+            grading_data.max_scores_cache,
+        )
+        if correct is None and total is None:
+            continue
+
+        if settings.GENERATE_PROFILE_SCORES:    # for debugging!
+            if total > 1:
+                correct = random.randrange(max(total - 2, 1), total + 1)
+            else:
+                correct = total
+
+        graded = module_descriptor.graded
+        if not total > 0:
+            # We simply cannot grade a problem that is 12/0, because we might need it as a percentage
+            graded = False
+
+        scores.append(
+            Score(
+                correct,
+                total,
+                graded,
+                module_descriptor.display_name_with_default,
+                module_descriptor.location
+            )
+        )
+
+    __, graded_total = graders.aggregate_scores(scores, section_name)
+    return graded_total, scores
+
+
 def grade_for_percentage(grade_cutoffs, percentage):
     """
     Returns a letter grade as defined in grading_policy (e.g. 'A' 'B' 'C' for 6.002x) or None.
@@ -752,7 +1060,7 @@ def get_score(user, problem_descriptor, module_creator, scores_client, submissio
     return weighted_score(correct, total, problem_descriptor.weight)
 
 
-def iterate_grades_for(course_or_id, students, keep_raw_scores=False):
+def iterate_grades_for(course_or_id, students, keep_raw_scores=False, batch_size=None):
     """Given a course_id and an iterable of students (User), yield a tuple of:
 
     (student, gradeset, err_msg) for every student enrolled in the course.
@@ -769,12 +1077,22 @@ def iterate_grades_for(course_or_id, students, keep_raw_scores=False):
     - grade_breakdown : A breakdown of the major components that
         make up the final grade. (For display)
     - raw_scores: contains scores for every graded module
+
+    If `batch_size` is given, students are graded in chunks of that size: the
+    course's scorable locations and max scores are loaded once, and the
+    StudentModule scores of each chunk are read with a single query. The
+    gradesets are the same as those returned by `grade()`.
     """
     if isinstance(course_or_id, (basestring, CourseKey)):
         course = courses.get_course_by_id(course_or_id)
     else:
         course = course_or_id
 
+    if batch_size:
+        for result in _iterate_grades_in_batches(course, students, keep_raw_scores, batch_size):
+            yield result
+        return
+
     for student in students:
         with dog_stats_api.timer('lms.grades.iterate_grades_for', tags=[u'action:{}'.format(course.id)]):
             try:
@@ -799,6 +1117,96 @@ def iterate_grades_for(course_or_id, students, keep_raw_scores=False):
                 yield student, {}, exc.message
 
 
+def _iterate_grades_in_batches(course, students, keep_raw_scores, batch_size):
+    """
+    Batched implementation of `iterate_grades_for`.
+    """
+    with outer_atomic():
+        scorable_locations = scorable_locations_for_grading(course)
+        max_scores_cache = MaxScoresCache.create_for_course(course)
+        max_scores_cache.fetch_from_remote(scorable_locations)
+
+    students = iter(students)
+    while True:
+        students_chunk = list(islice(students, batch_size))
+        if not students_chunk:
+            break
+
+        with dog_stats_api.timer('lms.grades.iterate_grades_for.batch', tags=[u'action:{}'.format(course.id)]):
+            with outer_atomic():
+                scores_clients = ScoresClient.create_for_users(
+                    course.id, [student.id for student in students_chunk], scorable_locations
+                )
+                submissions_scores = _submissions_scores_for_students(course.id, students_chunk)
+
+        for student in students_chunk:
+            with dog_stats_api.timer('lms.grades.iterate_grades_for', tags=[u'action:{}'.format(course.id)]):
+                try:
+                    request = _get_mock_request(student)
+                    # See iterate_grades_for for why the session is needed.
+                    request.session = {}
+                    gradeset = _grade(
+                        student,
+                        request,
+                        course,
+                        keep_raw_scores,
+                        None,
+                        scores_clients[student.id],
+                        submissions_scores=submissions_scores.get(student.id, {}),
+                        max_scores_cache=max_scores_cache,
+                    )
+                    _send_grades_updated(student, course, gradeset)
+                    yield student, gradeset, ""
+                except Exception as exc:  # pylint: disable=broad-except
+                    log.exception(
+                        'Cannot grade student %s (%s) in course %s because of exception: %s',
+                        student.username,
+                        student.id,
+                        course.id,
+                        exc.message
+                    )
+                    yield student, {}, exc.message
+
+    max_scores_cache.push_to_remote()
+
+
+def scorable_locations_for_grading(course):
+    """
+    Return the set of locations in `course` that can carry a score.
+
+    This is the same set that `field_data_cache_for_grading` collects in
+    `FieldDataCache.scorable_locations`, but it is not tied to any user, so it
+    can be computed once and shared when grading many students.
+    """
+    block_types_affecting_grading = course.block_types_affecting_grading
+    scorable_locations = set()
+    stack = [course]
+    with modulestore().bulk_operations(course.id):
+        while stack:
+            descriptor = stack.pop()
+            if descriptor.has_score and descriptor_affects_grading(block_types_affecting_grading, descriptor):
+                scorable_locations.add(descriptor.location)
+            stack.extend(descriptor.get_children() + descriptor.get_required_module_descriptors())
+    return scorable_locations
+
+
+def _submissions_scores_for_students(course_key, students):
+    """
+    Return a dict of user id to the scores returned by `sub_api.get_scores`
+    for that user.
+
+    The submissions API has no call to read the scores of many students at
+    once, so this makes one call per student.
+    """
+    # Imported here for the same circular dependency reasons as in _grade.
+    from submissions import api as sub_api  # installed from the edx-submissions repository
+
+    return {
+        student.id: sub_api.get_scores(course_key.to_deprecated_string(), anonymous_id_for_user(student, course_key))
+        for student in students
+    }
+
+
 def _get_mock_request(student):
     """
     Make a fake request because grading code expects to be able to look at
@@ -86,6 +86,30 @@ def _all_block_types(descriptors, aside_types):
     return block_types
 
 
+def _get_child_descriptors(descriptor, depth, descriptor_filter):
+    """
+    Return a list of all child descriptors down to the specified depth
+    that match the descriptor filter. Includes `descriptor`
+
+    descriptor: The parent to search inside
+    depth: The number of levels to descend, or None for infinite depth
+    descriptor_filter(descriptor): A function that returns True
+        if descriptor should be included in the results
+    """
+    if descriptor_filter(descriptor):
+        descriptors = [descriptor]
+    else:
+        descriptors = []
+
+    if depth is None or depth > 0:
+        new_depth = depth - 1 if depth is not None else depth
+
+        for child in descriptor.get_children() + descriptor.get_required_module_descriptors():
+            descriptors.extend(_get_child_descriptors(child, new_depth, descriptor_filter))
+
+    return descriptors
+
+
 class DjangoKeyValueStore(KeyValueStore):
     """
     This KeyValueStore will read and write data in the following scopes to django models
@@ -372,6 +396,30 @@ class UserStateCache(object):
         for user_state in block_field_state:
             self._cache[user_state.block_key] = user_state.state
 
+    @classmethod
+    def cache_fields_for_users(cls, user_state_caches, xblocks, aside_types):
+        """
+        Load all fields for the supplied ``xblocks`` and ``aside_types`` into
+        each of ``user_state_caches``, with a few queries for all of their users.
+
+        Arguments:
+            user_state_caches (list of :class:`UserStateCache`): The caches to load,
+                one for each user.
+            xblocks (list of :class:`XBlock`): XBlocks to cache fields for.
+            aside_types (list of str): Aside types to cache fields for.
+        """
+        caches_by_username = {cache.user.username: cache for cache in user_state_caches}
+        if not caches_by_username:
+            return
+
+        block_field_state = DjangoXBlockUserStateClient().get_many_for_users(
+            [cache.user for cache in user_state_caches],
+            _all_usage_keys(xblocks, aside_types),
+        )
+        for user_state in block_field_state:
+            user_state_cache = caches_by_username[user_state.username]
+            user_state_cache._cache[user_state.block_key] = user_state.state  # pylint: disable=protected-access
+
     @contract(kvs_key=DjangoKeyValueStore.Key)
     def set(self, kvs_key, value):
         """
@@ -733,11 +781,18 @@ class FieldDataCache(object):
         """
         if self.user.is_authenticated():
             self.scorable_locations.update(desc.location for desc in descriptors if desc.has_score)
-            for scope, fields in self._fields_to_cache(descriptors).items():
-                if scope not in self.cache:
-                    continue
+            self._cache_fields(descriptors, self._fields_to_cache(descriptors))
+
+    def _cache_fields(self, descriptors, fields_by_scope):
+        """
+        Load the fields in `fields_by_scope`, a map of scopes to fields, for
+        `descriptors` into the caches of those scopes.
+        """
+        for scope, fields in fields_by_scope.items():
+            if scope not in self.cache:
+                continue
 
-                self.cache[scope].cache_fields(fields, descriptors, self.asides)
+            self.cache[scope].cache_fields(fields, descriptors, self.asides)
 
     def add_descriptor_descendents(self, descriptor, depth=None, descriptor_filter=lambda descriptor: True):
         """
@@ -751,31 +806,8 @@ class FieldDataCache(object):
                 should be cached
         """
 
-        def get_child_descriptors(descriptor, depth, descriptor_filter):
-            """
-            Return a list of all child descriptors down to the specified depth
-            that match the descriptor filter. Includes `descriptor`
-
-            descriptor: The parent to search inside
-            depth: The number of levels to descend, or None for infinite depth
-            descriptor_filter(descriptor): A function that returns True
-                if descriptor should be included in the results
-            """
-            if descriptor_filter(descriptor):
-                descriptors = [descriptor]
-            else:
-                descriptors = []
-
-            if depth is None or depth > 0:
-                new_depth = depth - 1 if depth is not None else depth
-
-                for child in descriptor.get_children() + descriptor.get_required_module_descriptors():
-                    descriptors.extend(get_child_descriptors(child, new_depth, descriptor_filter))
-
-            return descriptors
-
         with modulestore().bulk_operations(descriptor.location.course_key):
-            descriptors = get_child_descriptors(descriptor, depth, descriptor_filter)
+            descriptors = _get_child_descriptors(descriptor, depth, descriptor_filter)
 
         self.add_descriptors_to_cache(descriptors)
 
@@ -797,6 +829,59 @@ class FieldDataCache(object):
         cache.add_descriptor_descendents(descriptor, depth, descriptor_filter)
         return cache
 
+    @classmethod
+    def cache_for_users(cls, course_id, users, descriptors, depth=None, asides=None):
+        """
+        Return a dict mapping the id of each of ``users`` to a FieldDataCache for
+        ``descriptors`` and their descendants, as returned by
+        :meth:`cache_for_descriptor_descendents` for each user.
+
+        Rather than being loaded for each user, Scope.user_state data is loaded
+        for all of the users with a few chunked queries, and Scope.user_state_summary
+        data, which doesn't depend on the user, is loaded once and shared by the
+        caches. Callers should pass in reasonably sized chunks of users.
+
+        course_id: the course in the context of which we want StudentModules.
+        users: the django users for whom to load modules.
+        descriptors: a list of XModuleDescriptors
+        depth is the number of levels of descendant modules to load StudentModules for, in addition to
+            the supplied descriptors. If depth is None, load all descendant StudentModules
+        """
+        field_data_caches = {user.id: cls([], course_id, user, asides=asides) for user in users}
+        authenticated_caches = [
+            field_data_cache for field_data_cache in field_data_caches.values()
+            if field_data_cache.user.is_authenticated()
+        ]
+        if not authenticated_caches:
+            return field_data_caches
+
+        all_descriptors = []
+        with modulestore().bulk_operations(course_id):
+            for descriptor in descriptors:
+                all_descriptors.extend(_get_child_descriptors(descriptor, depth, lambda descriptor: True))
+
+        fields_by_scope = authenticated_caches[0]._fields_to_cache(all_descriptors)  # pylint: disable=protected-access
+        user_fields_by_scope = {
+            scope: fields for scope, fields in fields_by_scope.items()
+            if scope not in (Scope.user_state, Scope.user_state_summary)
+        }
+        user_state_summary_cache = UserStateSummaryCache(course_id)
+        for field_data_cache in authenticated_caches:
+            field_data_cache.scorable_locations.update(desc.location for desc in all_descriptors if desc.has_score)
+            field_data_cache.cache[Scope.user_state_summary] = user_state_summary_cache
+            field_data_cache._cache_fields(all_descriptors, user_fields_by_scope)  # pylint: disable=protected-access
+
+        if Scope.user_state in fields_by_scope:
+            UserStateCache.cache_fields_for_users(
+                [field_data_cache.cache[Scope.user_state] for field_data_cache in authenticated_caches],
+                all_descriptors,
+                asides,
+            )
+        if Scope.user_state_summary in fields_by_scope:
+            user_state_summary_cache.cache_fields(fields_by_scope[Scope.user_state_summary], all_descriptors, asides)
+
+        return field_data_caches
+
     def _fields_to_cache(self, descriptors):
         """
         Returns a map of scopes to fields in that scope that should be cached
@@ -989,6 +1074,41 @@ class ScoresClient(object):
         client.fetch_scores(fd_cache.scorable_locations)
         return client
 
+    @classmethod
+    def create_for_users(cls, course_key, user_ids, locations):
+        """
+        Create fetched ScoresClients for several users in the same course.
+
+        All of the StudentModule scores for `user_ids` are read with a single
+        query, so callers should pass in reasonably sized chunks of users.
+
+        Returns a dict mapping each user id to its ScoresClient.
+        """
+        locations = set(locations)
+        clients = {}
+        for user_id in user_ids:
+            client = cls(course_key, user_id)
+            client._has_fetched = True  # pylint: disable=protected-access
+            clients[user_id] = client
+
+        if not clients:
+            return clients
+
+        scores_qset = StudentModule.objects.filter(
+            student_id__in=clients.keys(),
+            course_id=course_key,
+        )
+        for user_id, location, correct, total in scores_qset.values_list(
+                'student_id', 'module_state_key', 'grade', 'max_grade'
+        ):
+            usage_key = UsageKey.from_string(location).map_into_course(course_key)
+            # Only keep the same locations that fetch_scores() would have
+            # been asked for.
+            if usage_key in locations:
+                client = clients[user_id]
+                client._locations_to_scores[usage_key] = cls.Score(correct, total)  # pylint: disable=protected-access
+        return clients
+
 
 # @contract(user_id=int, usage_key=UsageKey, score="number|None", max_score="number|None")
 def set_score(user_id, usage_key, score, max_score):
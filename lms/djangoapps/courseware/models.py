@@ -14,14 +14,19 @@ ASSUMPTIONS: modules have unique IDs, even across different module_types
 """
 import logging
 import itertools
+from datetime import timedelta
 
 from django.contrib.auth.models import User
 from django.conf import settings
-from django.db import models
-from django.db.models.signals import post_save
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver, Signal
 
+from config_models.models import ConfigurationModel
 from model_utils.models import TimeStampedModel
+from opaque_keys import InvalidKeyError
+from opaque_keys.edx.keys import CourseKey, UsageKey
 from student.models import user_by_anonymous_id
 from submissions.models import score_set, score_reset
 
@@ -313,6 +318,185 @@ class StudentFieldOverride(TimeStampedModel):
     value = models.TextField(default='null')
 
 
+class PersistentSubsectionGradesConfiguration(ConfigurationModel):
+    """
+    Enables storing the grades of the subsections of students, so that only
+    the ones whose scores changed are recomputed; see StudentSubsectionGrade.
+    """
+    class Meta(ConfigurationModel.Meta):
+        app_label = "courseware"
+
+    @classmethod
+    def stored_since(cls):
+        """
+        Returns the time since when the stored grades are kept up to date, or
+        None if storing grades is disabled.
+
+        While storing grades is disabled, score changes don't mark the stored
+        grades stale, so only the grades stored after it was enabled again can
+        be used. Processes may still see the previous configuration for up to
+        `cache_timeout` seconds after it changed.
+        """
+        configuration = cls.current()
+        if not configuration.enabled:
+            return None
+        return configuration.change_date + timedelta(seconds=cls.cache_timeout)
+
+
+class StudentSubsectionGrade(models.Model):
+    """
+    Stores a user's computed grade for one graded subsection of a course, so
+    that grading can read it back instead of re-scoring every problem in it.
+
+    A row is only trusted while it is not `stale`, its `course_version`
+    matches the currently published course content, `valid_until` has not
+    passed and it was `modified` since storing grades was enabled. Rows are
+    marked stale when a score changes for any location of the subsection
+    listed in SubsectionGradeLocation.
+    """
+    objects = ChunkingManager()
+
+    class Meta(object):
+        app_label = "courseware"
+        unique_together = (('user', 'course_id', 'usage_key'),)
+
+    user = models.ForeignKey(User, db_index=True)
+    course_id = CourseKeyField(max_length=255, db_index=True)
+    # The subsection (sequential) that was graded
+    usage_key = LocationKeyField(max_length=255)
+
+    # The version of the course content the grade was computed against
+    course_version = models.CharField(max_length=255, blank=True)
+
+    # When a module of the subsection that was not yet available to the user
+    # becomes available, which changes the grade
+    valid_until = models.DateTimeField(null=True)
+
+    # The aggregate graded score of the subsection
+    earned = models.FloatField()
+    possible = models.FloatField()
+
+    # JSON list of [earned, possible, graded, display_name, location] for
+    # every scored module in the subsection
+    raw_scores = models.TextField(default='[]')
+
+    stale = models.BooleanField(default=False)
+    modified = models.DateTimeField(auto_now=True)
+
+    @classmethod
+    def mark_stale(cls, user_id, course_key, usage_key):
+        """
+        Mark the stored subsection grades of `user_id` that depend on
+        `usage_key` as stale.
+
+        The score version of the user is bumped first, so that grades being
+        computed concurrently from the previous scores are not stored.
+        """
+        StudentScoreVersion.bump(user_id, course_key)
+        subsection_keys = list(SubsectionGradeLocation.objects.filter(
+            course_id=course_key,
+            location=usage_key.map_into_course(course_key),
+        ).values_list('subsection_key', flat=True))
+        if subsection_keys:
+            cls.objects.filter(
+                user_id=user_id,
+                course_id=course_key,
+                usage_key__in=subsection_keys,
+            ).update(stale=True)
+
+    def __unicode__(self):
+        return u"[StudentSubsectionGrade] {}: {} = {}/{}{}".format(
+            self.user_id, self.usage_key, self.earned, self.possible, u" (stale)" if self.stale else u""
+        )
+
+
+class SubsectionGradeLocation(models.Model):
+    """
+    Lists the locations whose scores count towards the grade of a graded
+    subsection, so that the stored grades depending on a score can be found
+    when it changes.
+
+    Locations are only ever added, for every version of the course that is
+    graded: a location that was moved out of the subsection just marks its
+    grades stale needlessly.
+    """
+    class Meta(object):
+        app_label = "courseware"
+        unique_together = (('course_id', 'location', 'subsection_key'),)
+
+    course_id = CourseKeyField(max_length=255)
+    location = LocationKeyField(max_length=255)
+    subsection_key = LocationKeyField(max_length=255)
+
+    @classmethod
+    def add_locations(cls, course_key, locations_by_subsection):
+        """
+        Record the locations of `locations_by_subsection`, a dict of the
+        scored locations of subsections by subsection key, which are not
+        recorded yet.
+        """
+        recorded = set(
+            (subsection_key.map_into_course(course_key), location.map_into_course(course_key))
+            for subsection_key, location in cls.objects.filter(
+                course_id=course_key,
+                subsection_key__in=locations_by_subsection.keys(),
+            ).values_list('subsection_key', 'location')
+        )
+        new_rows = [
+            cls(course_id=course_key, location=location, subsection_key=subsection_key)
+            for subsection_key, locations in locations_by_subsection.iteritems()
+            for location in set(locations)
+            if (subsection_key, location) not in recorded
+        ]
+        if new_rows:
+            try:
+                with transaction.atomic():
+                    cls.objects.bulk_create(new_rows)
+            except IntegrityError:
+                # Another process recorded some of them first.
+                for row in new_rows:
+                    cls.objects.get_or_create(
+                        course_id=course_key, location=row.location, subsection_key=row.subsection_key
+                    )
+
+
+class StudentScoreVersion(models.Model):
+    """
+    Counts the score changes of a user in a course.
+
+    Stored subsection grades are only saved if no score of the user changed
+    while they were computed; see `StudentSubsectionGrade.mark_stale`.
+    """
+    class Meta(object):
+        app_label = "courseware"
+        unique_together = (('user', 'course_id'),)
+
+    user = models.ForeignKey(User)
+    course_id = CourseKeyField(max_length=255)
+    version = models.PositiveIntegerField(default=0)
+
+    @classmethod
+    def get_version(cls, user_id, course_key):
+        """
+        Return the current score version of the user in the course.
+        """
+        versions = cls.objects.filter(user_id=user_id, course_id=course_key).values_list('version', flat=True)
+        return versions[0] if versions else 0
+
+    @classmethod
+    def bump(cls, user_id, course_key):
+        """
+        Record a score change of the user in the course.
+        """
+        if cls.objects.filter(user_id=user_id, course_id=course_key).update(version=F('version') + 1):
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(user_id=user_id, course_id=course_key, version=1)
+        except IntegrityError:
+            cls.objects.filter(user_id=user_id, course_id=course_key).update(version=F('version') + 1)
+
+
 # Signal that indicates that a user's score for a problem has been updated.
 # This signal is generated when a scoring event occurs either within the core
 # platform or in the Submissions module. Note that this signal will be triggered
@@ -409,3 +593,31 @@ def submissions_score_reset_handler(sender, **kwargs):  # pylint: disable=unused
             u"Failed to process score_reset signal from Submissions API. "
             "user: %s, course_id: %s, usage_id: %s", user, course_id, usage_id
         )
+
+
+@receiver(SCORE_CHANGED)
+def score_changed_subsection_grades_handler(sender, **kwargs):  # pylint: disable=unused-argument
+    """
+    Mark any stored subsection grades that include the changed score as stale.
+    See the definition of SCORE_CHANGED for the expected kwargs.
+    """
+    if not PersistentSubsectionGradesConfiguration.is_enabled():
+        return
+    try:
+        course_key = CourseKey.from_string(kwargs['course_id'])
+        usage_key = UsageKey.from_string(kwargs['usage_id'])
+    except (KeyError, InvalidKeyError):
+        log.exception(u"Could not invalidate subsection grades for SCORE_CHANGED: %s", kwargs)
+        return
+    StudentSubsectionGrade.mark_stale(kwargs.get('user_id'), course_key, usage_key)
+
+
+@receiver(post_delete, sender=StudentModule)
+def student_module_deleted_subsection_grades_handler(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Deleting student state (e.g. from the instructor dashboard) removes its
+    score, so mark the stored subsection grades that include it as stale.
+    """
+    if not PersistentSubsectionGradesConfiguration.is_enabled():
+        return
+    StudentSubsectionGrade.mark_stale(instance.student_id, instance.course_id, instance.module_state_key)
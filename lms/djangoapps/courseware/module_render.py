@@ -42,6 +42,8 @@ from courseware.entrance_exams import (
 )
 from edxmako.shortcuts import render_to_string
 from eventtracking import tracker
+from lms.djangoapps.course_blocks.api import get_course_blocks, COURSE_BLOCK_ACCESS_TRANSFORMERS
+from lms.djangoapps.course_blocks.transformers.table_of_contents import TableOfContentsTransformer
 from lms.djangoapps.lms_xblock.field_data import LmsFieldData
 from lms.djangoapps.lms_xblock.runtime import LmsModuleSystem, unquote_slashes, quote_slashes
 from lms.djangoapps.lms_xblock.models import XBlockAsidesConfig
@@ -64,6 +66,7 @@ from xblock_django.user_service import DjangoXBlockUserService
 from xblock.exceptions import NoSuchHandlerError, NoSuchViewError
 from xblock.reference.plugins import FSService
 from xblock.runtime import KvsFieldData
+from xmodule import course_metadata_utils
 from xmodule.contentstore.django import contentstore
 from xmodule.error_module import ErrorDescriptor, NonStaffErrorDescriptor
 from xmodule.exceptions import NotFoundError, ProcessingError
@@ -74,7 +77,7 @@ from xmodule.x_module import XModuleDescriptor
 from xmodule.mixin import wrap_with_license
 from util.json_request import JsonResponse
 from util.model_utils import slugify
-from util.sandboxing import can_execute_unsafe_code, get_python_lib_zip
+from util.sandboxing import can_execute_unsafe_code, get_python_lib_zip, get_safe_exec_cache
 from util import milestones_helpers
 from lms.djangoapps.verify_student.services import ReverificationService
 
@@ -143,17 +146,24 @@ def toc_for_course(user, request, course, active_chapter, active_section, field_
     None if this is not the case.
 
     field_data_cache must include data from the course module and 2 levels of its descendents
+
+    When the ENABLE_COURSE_BLOCKS_NAVIGATION feature is enabled, the chapters
+    and sections are read from the user's cached course blocks instead, unless
+    field overrides are enabled for the course.
     '''
 
     with modulestore().bulk_operations(course.id):
-        course_module = get_module_for_descriptor(
-            user, request, course, field_data_cache, course.id, course=course
-        )
-        if course_module is None:
+        if _use_course_blocks_navigation(course):
+            chapters = _toc_chapters_from_course_blocks(user, course)
+        else:
+            course_module = get_module_for_descriptor(
+                user, request, course, field_data_cache, course.id, course=course
+            )
+            chapters = course_module.get_display_items() if course_module is not None else None
+        if chapters is None:
             return None
 
         toc_chapters = list()
-        chapters = course_module.get_display_items()
 
         # See if the course is gated by one or more content milestones
         required_content = milestones_helpers.get_required_content(course, user)
@@ -255,6 +265,65 @@ def toc_for_course(user, request, course, active_chapter, active_section, field_
         return toc_chapters
 
 
+def _use_course_blocks_navigation(course):
+    """
+    Returns whether the table of contents of the course is built from its
+    course blocks.
+
+    The course blocks don't include field overrides, such as CCX or individual
+    due dates, so the XModules are used when overrides are enabled.
+    """
+    return (
+        settings.FEATURES.get('ENABLE_COURSE_BLOCKS_NAVIGATION', False) and
+        not OverrideFieldData.overrides_enabled_for(course)
+    )
+
+
+def _toc_chapters_from_course_blocks(user, course):
+    """
+    Returns the chapters of the course that the user can access, read from
+    the user's course blocks, or None if the user can't access the course.
+    """
+    course_usage_key = modulestore().make_course_usage_key(course.id)
+    course_blocks = get_course_blocks(
+        user,
+        course_usage_key,
+        transformers=COURSE_BLOCK_ACCESS_TRANSFORMERS + [TableOfContentsTransformer()],
+    )
+    if not course_blocks.has_block(course_usage_key):
+        return None
+    return _CourseBlocksTocItem(course_blocks, course_usage_key).get_display_items()
+
+
+class _CourseBlocksTocItem(object):
+    """
+    A chapter or section of the table of contents, read from the course
+    blocks, with the same attributes as its XModule.
+    """
+    def __init__(self, course_blocks, usage_key):
+        self.course_blocks = course_blocks
+        self.location = usage_key
+        self.url_name = usage_key.block_id
+        for field_name in TableOfContentsTransformer.TOC_FIELDS:
+            setattr(self, field_name, course_blocks.get_xblock_field(usage_key, field_name))
+
+    @property
+    def display_name_with_default(self):
+        """
+        Returns the display name of the block, like XModuleMixin does.
+        """
+        return course_metadata_utils.display_name_with_default(self)
+
+    def get_display_items(self):
+        """
+        Returns the children of the block that the user can access.
+        """
+        return [
+            _CourseBlocksTocItem(self.course_blocks, child_key)
+            for child_key in self.course_blocks.get_children(self.location)
+        ]
+
+
 def get_module(user, request, usage_key, field_data_cache,
                position=None, log_if_not_found=True, wrap_xmodule_display=True,
                grade_bucket_type=None, depth=0,
@@ -700,7 +769,7 @@ def get_module_system_for_user(user, student_data,  # TODO  # pylint: disable=to
         publish=publish,
         anonymous_student_id=anonymous_student_id,
         course_id=course_id,
-        cache=cache,
+        cache=get_safe_exec_cache(cache),
         can_execute_unsafe_code=(lambda: can_execute_unsafe_code(course_id)),
         get_python_lib_zip=(lambda: get_python_lib_zip(contentstore, course_id)),
         # TODO: When we merge the descriptor and module systems, we can stop reaching into the mixologist (cpennington)
@@ -22,6 +22,10 @@ class SelfPacedDateOverrideProvider(FieldOverrideProvider):
             return None
         return default
 
+    def overridden_fields(self, course_key):  # pylint: disable=unused-argument
+        """Only the due and start dates are overridden."""
+        return {'due', 'start'}
+
     @classmethod
     def enabled_for(cls, course):
         """This provider is enabled for self-paced courses only."""
@@ -4,10 +4,16 @@ by the individual due dates feature.
 """
 import json
 
-from .field_overrides import FieldOverrideProvider
+import request_cache
+
+from .field_overrides import FieldOverrideProvider, NOTSET, clear_override_indexes
 from .models import StudentFieldOverride
 
 
+# The name of the request cache of the overrides of the users in the courses.
+COURSE_OVERRIDES_CACHE_NAME = 'courseware.student_field_overrides'
+
+
 class IndividualStudentOverrideProvider(FieldOverrideProvider):
     """
     A concrete implementation of
@@ -17,6 +23,20 @@ class IndividualStudentOverrideProvider(FieldOverrideProvider):
     def get(self, block, name, default):
         return get_override_for_user(self.user, block, name, default)
 
+    def overridden_fields(self, course_key):
+        """
+        Return the names of the fields overridden for the user in the course.
+        """
+        course_overrides = _get_course_overrides_for_user(self.user, course_key)
+        if course_overrides is not None:
+            return set(name for block_overrides in course_overrides.itervalues() for name in block_overrides)
+        return set(
+            StudentFieldOverride.objects.filter(
+                course_id=course_key,
+                student_id=self.user.id,
+            ).values_list('field', flat=True).distinct()
+        )
+
     @classmethod
     def enabled_for(cls, course):
         """This simple override provider is always enabled"""
@@ -29,6 +49,13 @@ def get_override_for_user(user, block, name, default=None):
     specify the block and the name of the field.  If the field is not
     overridden for the given user, returns `default`.
     """
+    course_overrides = _get_course_overrides_for_user(user, block.runtime.course_id)
+    if course_overrides is not None:
+        block_overrides = course_overrides.get(_location_key(block.location), {})
+        if name not in block_overrides:
+            return default
+        return block.fields[name].from_json(block_overrides[name])
+
     if not hasattr(block, '_student_overrides'):
         block._student_overrides = {}  # pylint: disable=protected-access
     overrides = block._student_overrides.get(user.id)  # pylint: disable=protected-access
@@ -38,6 +65,54 @@ def get_override_for_user(user, block, name, default=None):
     return overrides.get(name, default)
 
 
+def _location_key(location):
+    """
+    Returns the location as it is stored in a StudentFieldOverride.
+    """
+    return StudentFieldOverride._meta.get_field('location').get_prep_value(location)  # pylint: disable=protected-access
+
+
+def _get_course_overrides_for_user(user, course_id):
+    """
+    Returns all of the individual student overrides of the user in the course,
+    as a dictionary of JSON field values keyed by stored location and field
+    name, or None outside of a request.
+
+    The overrides are loaded with a single query, once per request.
+    """
+    if request_cache.get_request() is None:
+        return None
+    cache = request_cache.get_cache(COURSE_OVERRIDES_CACHE_NAME)
+    cache_key = (user.id, unicode(course_id))
+    if cache_key not in cache:
+        course_overrides = {}
+        query = StudentFieldOverride.objects.filter(course_id=course_id, student_id=user.id)
+        for override in query:
+            block_overrides = course_overrides.setdefault(_location_key(override.location), {})
+            block_overrides[override.field] = json.loads(override.value)
+        cache[cache_key] = course_overrides
+    return cache[cache_key]
+
+
+def _update_course_overrides_for_user(user, block, name, value_json=NOTSET):
+    """
+    Keeps the overrides cached for the request consistent after the override
+    of `name` in `block` is set to `value_json`, or cleared if it is NOTSET.
+    """
+    if hasattr(block, '_student_overrides'):
+        block._student_overrides.pop(user.id, None)  # pylint: disable=protected-access
+    course_overrides = request_cache.get_cache(COURSE_OVERRIDES_CACHE_NAME).get(
+        (user.id, unicode(block.runtime.course_id))
+    )
+    if course_overrides is not None:
+        block_overrides = course_overrides.setdefault(_location_key(block.location), {})
+        if value_json is NOTSET:
+            block_overrides.pop(name, None)
+        else:
+            block_overrides[name] = value_json
+    clear_override_indexes()
+
+
 def _get_overrides_for_user(user, block):
     """
     Gets all of the individual student overrides for given user and block.
@@ -68,8 +143,10 @@ def override_field_for_user(user, block, name, value):
         student_id=user.id,
         field=name)
     field = block.fields[name]
-    override.value = json.dumps(field.to_json(value))
+    value_json = field.to_json(value)
+    override.value = json.dumps(value_json)
     override.save()
+    _update_course_overrides_for_user(user, block, name, value_json)
 
 
 def clear_override_for_user(user, block, name):
@@ -85,5 +162,6 @@ def clear_override_for_user(user, block, name):
             student_id=user.id,
             location=block.location,
             field=name).delete()
+        _update_course_overrides_for_user(user, block, name)
     except StudentFieldOverride.DoesNotExist:
         pass
@@ -7,7 +7,9 @@ import ddt
 import itertools
 import pytz
 
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.test.client import RequestFactory
 from django.core.urlresolvers import reverse
 from mock import Mock, patch
 from nose.plugins.attrib import attr
@@ -28,6 +30,8 @@ from courseware.tests.factories import (
 )
 from courseware.tests.helpers import LoginEnrollmentTestCase
 from openedx.core.djangoapps.content.course_overviews.models import CourseOverview
+from request_cache.middleware import RequestCache
+from student.roles import CourseStaffRole
 from student.tests.factories import (
     AnonymousUserFactory,
     CourseEnrollmentAllowedFactory,
@@ -580,6 +584,55 @@ class UserRoleTestCase(TestCase):
         )
 
 
+@attr('shard_1')
+class CoursePermissionsCacheTestCase(TestCase):
+    """
+    Tests that course permissions are resolved once per request.
+    """
+    def setUp(self):
+        super(CoursePermissionsCacheTestCase, self).setUp()
+        self.course_key = SlashSeparatedCourseKey('edX', 'toy', '2012_Fall')
+        self.other_course_key = SlashSeparatedCourseKey('edX', 'toy', '2013_Spring')
+        self.student = UserFactory()
+        self.course_staff = StaffFactory(course_key=self.course_key)
+        RequestCache().process_request(RequestFactory().get('/'))
+        self.addCleanup(RequestCache.clear_request_cache)
+
+    def test_roles_loaded_once_per_request(self):
+        with self.assertNumQueries(1):
+            for __ in range(3):
+                self.assertTrue(access._has_access_to_course(self.course_staff, 'staff', self.course_key))
+                self.assertFalse(access._has_access_to_course(self.course_staff, 'instructor', self.course_key))
+                self.assertFalse(access._has_access_to_course(self.course_staff, 'staff', self.other_course_key))
+
+    def test_roles_shared_by_user_objects(self):
+        self.assertFalse(access._has_access_to_course(self.student, 'staff', self.course_key))
+        same_student = User.objects.get(id=self.student.id)
+        with self.assertNumQueries(0):
+            self.assertFalse(access._has_access_to_course(same_student, 'staff', self.course_key))
+
+    def test_role_changes_are_seen(self):
+        self.assertFalse(access._has_access_to_course(self.student, 'staff', self.course_key))
+        CourseStaffRole(self.course_key).add_users(self.student)
+        self.assertTrue(access._has_access_to_course(self.student, 'staff', self.course_key))
+        CourseStaffRole(self.course_key).remove_users(self.student)
+        self.assertFalse(access._has_access_to_course(self.student, 'staff', self.course_key))
+
+    def test_masquerade_checked_per_decision(self):
+        self.assertTrue(access._has_access_to_course(self.course_staff, 'staff', self.course_key))
+        self.course_staff.masquerade_settings = {
+            self.course_key: CourseMasquerade(self.course_key, role='student')
+        }
+        self.assertFalse(access._has_access_to_course(self.course_staff, 'staff', self.course_key))
+
+    def test_outside_of_request(self):
+        RequestCache.clear_request_cache()
+        self.assertTrue(access._has_access_to_course(self.course_staff, 'staff', self.course_key))
+        same_staff = User.objects.get(id=self.course_staff.id)
+        with self.assertNumQueries(1):
+            self.assertTrue(access._has_access_to_course(same_staff, 'staff', self.course_key))
+
+
 @ddt.ddt
 class CourseOverviewAccessTestCase(ModuleStoreTestCase):
     """
@@ -1,17 +1,25 @@
 """
 Tests for `field_overrides` module.
 """
+import datetime
 import unittest
+from mock import patch
 from nose.plugins.attrib import attr
+from pytz import UTC
 
+from django.test.client import RequestFactory
 from django.test.utils import override_settings
+from request_cache.middleware import RequestCache
+from student.tests.factories import UserFactory
 from xblock.field_data import DictFieldData
-from xmodule.modulestore.tests.factories import CourseFactory
+from xmodule.modulestore.django import modulestore
+from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
 from xmodule.modulestore.tests.django_utils import (
     ModuleStoreTestCase,
 )
 
 from ..field_overrides import (
+    clear_override_indexes,
     disable_overrides,
     FieldOverrideProvider,
     OverrideFieldData,
@@ -95,6 +103,90 @@ class OverrideFieldDataTests(ModuleStoreTestCase):
         self.assertIsInstance(data, DictFieldData)
 
 
+@attr('shard_1')
+class OverrideIndexTests(ModuleStoreTestCase):
+    """
+    Tests for the overrides indexed by `OverrideFieldData` during a request.
+    """
+
+    def setUp(self):
+        super(OverrideIndexTests, self).setUp()
+        self.user = UserFactory()
+        self.course = CourseFactory.create()
+        chapter = ItemFactory.create(parent=self.course, category='chapter')
+        sequential = ItemFactory.create(parent=chapter, category='sequential')
+        self.verticals = [
+            modulestore().get_item(ItemFactory.create(parent=sequential, category='vertical').location)
+            for __ in range(2)
+        ]
+        RequestCache().process_request(RequestFactory().get('/'))
+        self.addCleanup(RequestCache.clear_request_cache)
+
+    def make_one(self):
+        """
+        Factory method.
+        """
+        return OverrideFieldData(self.user, DictFieldData({}), [DueDateOverrideProvider], self.course)
+
+    def count_provider_calls(self):
+        """
+        Counts the calls to `DueDateOverrideProvider.get`.
+        """
+        return patch.object(
+            DueDateOverrideProvider, 'get', autospec=True, side_effect=DueDateOverrideProvider.get
+        )
+
+    def test_inherited_override_resolved_once(self):
+        with self.count_provider_calls() as mock_get:
+            for vertical in self.verticals:
+                self.assertEqual(self.make_one().default(vertical, 'due'), DueDateOverrideProvider.DUE)
+                self.assertFalse(self.make_one().has(vertical, 'due'))
+        # The sequential and the chapter are asked once, then the verticals themselves.
+        self.assertEqual(mock_get.call_count, 4)
+
+    def test_fields_without_overrides_not_looked_up(self):
+        with self.count_provider_calls() as mock_get:
+            data = self.make_one()
+            self.assertFalse(data.has(self.verticals[0], 'graded'))
+            with self.assertRaises(KeyError):
+                data.default(self.verticals[0], 'graded')
+        self.assertFalse(mock_get.called)
+
+    def test_clear_override_indexes(self):
+        data = self.make_one()
+        self.assertEqual(data.default(self.verticals[0], 'due'), DueDateOverrideProvider.DUE)
+        new_due = datetime.datetime(2016, 1, 1, tzinfo=UTC)
+        with patch.object(DueDateOverrideProvider, 'DUE', new_due):
+            self.assertEqual(self.make_one().default(self.verticals[0], 'due'), DueDateOverrideProvider.DUE)
+            clear_override_indexes()
+            self.assertEqual(self.make_one().default(self.verticals[0], 'due'), new_due)
+            # Field data created before the overrides changed sees them too.
+            self.assertEqual(data.default(self.verticals[1], 'due'), new_due)
+            self.assertEqual(data.default(self.verticals[0], 'due'), new_due)
+
+    def test_clear_override_indexes_newly_overridden_field(self):
+        data = self.make_one()
+        self.assertFalse(data.has(self.verticals[0], 'graded'))
+        with patch.object(DueDateOverrideProvider, 'overridden_fields', return_value={'due', 'graded'}):
+            with patch.object(DueDateOverrideProvider, 'get', return_value=True):
+                clear_override_indexes()
+                self.assertTrue(data.has(self.verticals[0], 'graded'))
+
+    def test_overrides_disabled(self):
+        data = self.make_one()
+        with disable_overrides():
+            self.assertFalse(data.has(self.verticals[0], 'due'))
+            with self.assertRaises(KeyError):
+                data.default(self.verticals[0], 'due')
+        self.assertEqual(data.default(self.verticals[0], 'due'), DueDateOverrideProvider.DUE)
+
+    def test_no_index_outside_of_request(self):
+        RequestCache.clear_request_cache()
+        data = self.make_one()
+        self.assertIsNone(data.override_index)
+        self.assertEqual(data.default(self.verticals[0], 'due'), DueDateOverrideProvider.DUE)
+
+
 @attr('shard_1')
 class ResolveDottedTests(unittest.TestCase):
     """
@@ -134,6 +226,25 @@ class TestOverrideProvider(FieldOverrideProvider):
         return True
 
 
+class DueDateOverrideProvider(FieldOverrideProvider):
+    """
+    A `FieldOverrideProvider` which overrides the due date of chapters.
+    """
+    DUE = datetime.datetime(2015, 1, 1, tzinfo=UTC)
+
+    def get(self, block, name, default):
+        if name == 'due' and block.location.category == 'chapter':
+            return self.DUE
+        return default
+
+    def overridden_fields(self, course_key):
+        return {'due'}
+
+    @classmethod
+    def enabled_for(cls, course):
+        return True
+
+
 def inject_field_overrides(blocks, course, user):
     """
     Apparently the test harness doesn't use LmsFieldStorage, and I'm
@@ -1,21 +1,51 @@
 """
 Test grade calculation.
 """
+from datetime import datetime, timedelta
+import unittest
+
 from django.http import Http404
 from django.test import TestCase
 from django.test.client import RequestFactory
 
 from mock import patch, MagicMock
 from nose.plugins.attrib import attr
+from nose.plugins.skip import SkipTest
+from pytz import UTC
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
 from opaque_keys.edx.locator import CourseLocator, BlockUsageLocator
 
-from courseware.grades import field_data_cache_for_grading, grade, iterate_grades_for, MaxScoresCache, ProgressSummary
+from courseware import grades
+from courseware.field_overrides import OverrideFieldData
+from courseware.grades import (
+    _next_start_date,
+    field_data_cache_for_grading,
+    grade,
+    iterate_grades_for,
+    MaxScoresCache,
+    ProgressSummary,
+    scorable_locations_for_grading,
+)
+from courseware.model_data import set_score
+from courseware.models import (
+    SCORE_CHANGED,
+    PersistentSubsectionGradesConfiguration,
+    StudentModule,
+    StudentScoreVersion,
+    StudentSubsectionGrade,
+)
 from student.tests.factories import UserFactory
 from student.models import CourseEnrollment
 from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 
+# The dependency below needs to be installed manually from the development.txt file, which doesn't
+# get installed during unit tests!
+try:
+    from code_block_timer import CodeBlockTimer
+except ImportError:
+    CodeBlockTimer = None
+
 
 def _grade_with_errors(student, request, course, keep_raw_scores=False):
     """This fake grade method will throw exceptions for student3 and
@@ -128,6 +158,253 @@ class TestGradeIteration(ModuleStoreTestCase):
         return students_to_gradesets, students_to_errors
 
 
+class GradedCourseMixin(object):
+    """
+    Helpers for building a course with graded homework sections and problems.
+    """
+    def create_graded_course(self, num_sections, problems_per_section):
+        """
+        Create self.course with `num_sections` graded homework sections, each
+        holding `problems_per_section` problems, and store the sections and
+        problems in self.sections and self.problems.
+        """
+        self.course = CourseFactory.create()
+        self.course.grading_policy = {
+            "GRADER": [{
+                "type": "Homework",
+                "min_count": 1,
+                "drop_count": 0,
+                "short_label": "HW",
+                "weight": 1.0,
+            }],
+            "GRADE_CUTOFFS": {'A': .9, 'B': .33},
+        }
+        self.course = self.update_course(self.course, self.user.id)
+        chapter = ItemFactory.create(category='chapter', parent=self.course)
+        self.sections = []
+        self.problems = []
+        for __ in xrange(num_sections):
+            section = ItemFactory.create(
+                category='sequential',
+                parent=chapter,
+                metadata={'graded': True, 'format': 'Homework'},
+            )
+            self.sections.append(section)
+            vertical = ItemFactory.create(category='vertical', parent=section)
+            for __ in xrange(problems_per_section):
+                self.problems.append(ItemFactory.create(category='problem', parent=vertical))
+        self.course = self.store.get_course(self.course.id)
+
+    def score_students(self, students):
+        """
+        Give each student a different score on a different subset of problems.
+        """
+        for index, student in enumerate(students):
+            CourseEnrollment.enroll(student, self.course.id)
+            for problem in self.problems[index % 2::index + 1]:
+                set_score(student.id, problem.location, index % 3, 2)
+
+
+@attr('shard_1')
+class TestBatchedGradeIteration(GradedCourseMixin, ModuleStoreTestCase):
+    """
+    Test that batched grade iteration matches per-student grading.
+    """
+    def setUp(self):
+        super(TestBatchedGradeIteration, self).setUp()
+        self.create_graded_course(num_sections=3, problems_per_section=3)
+        self.students = [UserFactory.create() for __ in xrange(5)]
+        self.score_students(self.students)
+
+    def _gradesets(self, **kwargs):
+        """Return a dict of student to gradeset from iterate_grades_for."""
+        gradesets = {}
+        for student, gradeset, err_msg in iterate_grades_for(self.course, self.students, **kwargs):
+            self.assertEqual(err_msg, "")
+            gradesets[student] = gradeset
+        return gradesets
+
+    def test_batched_grades_match(self):
+        expected = self._gradesets(keep_raw_scores=True)
+        self.assertTrue(any(gradeset['percent'] > 0 for gradeset in expected.values()))
+        for batch_size in (1, 2, 10):
+            self.assertEqual(self._gradesets(keep_raw_scores=True, batch_size=batch_size), expected)
+
+    def test_batched_empty_student_list(self):
+        self.assertEqual(list(iterate_grades_for(self.course, [], batch_size=2)), [])
+
+    def test_scorable_locations(self):
+        fd_cache = field_data_cache_for_grading(self.course, self.students[0])
+        self.assertEqual(scorable_locations_for_grading(self.course), fd_cache.scorable_locations)
+
+
+@attr('shard_1')
+# Trust the grades stored right after the configuration was enabled.
+@patch.object(PersistentSubsectionGradesConfiguration, 'cache_timeout', 0)
+class TestPersistentSubsectionGrades(GradedCourseMixin, ModuleStoreTestCase):
+    """
+    Test that subsection grades are stored and only recomputed when stale.
+    """
+    def setUp(self):
+        super(TestPersistentSubsectionGrades, self).setUp()
+        PersistentSubsectionGradesConfiguration(enabled=True).save()
+        self.create_graded_course(num_sections=2, problems_per_section=2)
+        self.student = UserFactory.create()
+        CourseEnrollment.enroll(self.student, self.course.id)
+        self.request = RequestFactory().get('/')
+        self.request.user = self.student
+        self.request.session = {}
+        set_score(self.student.id, self.problems[0].location, 2, 2)
+        for problem in self.problems[1:]:
+            set_score(self.student.id, problem.location, 0, 2)
+
+    def _percent(self):
+        """Grade the student and return the percent."""
+        return grade(self.student, self.request, self.course)['percent']
+
+    def test_grades_are_stored(self):
+        self.assertEqual(self._percent(), 0.25)
+        self.assertEqual(
+            StudentSubsectionGrade.objects.filter(user=self.student, course_id=self.course.id).count(), 2
+        )
+
+    def test_stored_grades_are_read(self):
+        self._percent()
+        # Changing the score without notifying anyone leaves the stored
+        # grade in place.
+        set_score(self.student.id, self.problems[0].location, 0, 2)
+        self.assertEqual(self._percent(), 0.25)
+
+    def _change_score(self, problem, earned):
+        """Set the score of the student for the problem and send SCORE_CHANGED."""
+        set_score(self.student.id, problem.location, earned, 2)
+        SCORE_CHANGED.send(
+            sender=None,
+            points_possible=2,
+            points_earned=earned,
+            user_id=self.student.id,
+            course_id=unicode(self.course.id),
+            usage_id=unicode(problem.location),
+        )
+
+    def test_score_changed_marks_stale(self):
+        self._percent()
+        self._change_score(self.problems[2], 2)
+        stale = StudentSubsectionGrade.objects.filter(user=self.student, stale=True)
+        self.assertEqual([row.usage_key for row in stale], [self.sections[1].location])
+        self.assertEqual(self._percent(), 0.5)
+        self.assertFalse(StudentSubsectionGrade.objects.filter(user=self.student, stale=True).exists())
+
+    def test_deleted_state_marks_stale(self):
+        self._percent()
+        StudentModule.objects.filter(student=self.student, module_state_key=self.problems[0].location).delete()
+        self.assertEqual(StudentSubsectionGrade.objects.filter(user=self.student, stale=True).count(), 1)
+
+    def test_disabled(self):
+        PersistentSubsectionGradesConfiguration(enabled=False).save()
+        self.assertEqual(self._percent(), 0.25)
+        self.assertFalse(StudentSubsectionGrade.objects.filter(user=self.student).exists())
+
+    def test_disabled_does_not_mark_stale(self):
+        self._percent()
+        score_version = StudentScoreVersion.get_version(self.student.id, self.course.id)
+        PersistentSubsectionGradesConfiguration(enabled=False).save()
+        self._change_score(self.problems[2], 2)
+        self.assertFalse(StudentSubsectionGrade.objects.filter(user=self.student, stale=True).exists())
+        self.assertEqual(StudentScoreVersion.get_version(self.student.id, self.course.id), score_version)
+
+    def test_grades_stored_before_enabled_are_recomputed(self):
+        self._percent()
+        PersistentSubsectionGradesConfiguration(enabled=False).save()
+        self._change_score(self.problems[2], 2)
+        PersistentSubsectionGradesConfiguration(enabled=True).save()
+        self.assertEqual(self._percent(), 0.5)
+
+    def test_grades_stored_before_cache_timeout_are_recomputed(self):
+        self._percent()
+        set_score(self.student.id, self.problems[0].location, 0, 2)
+        with patch.object(PersistentSubsectionGradesConfiguration, 'cache_timeout', 600):
+            self.assertEqual(self._percent(), 0.0)
+
+    def test_new_course_version_is_ignored(self):
+        self._percent()
+        set_score(self.student.id, self.problems[0].location, 0, 2)
+        StudentSubsectionGrade.objects.update(course_version='outdated')
+        self.assertEqual(self._percent(), 0.0)
+
+    def test_score_changed_while_grading(self):
+        grade_section = grades._grade_section  # pylint: disable=protected-access
+
+        def grade_section_and_change_score(*args):
+            """Change a score once the section was graded from the previous one"""
+            result = grade_section(*args)
+            self._change_score(self.problems[0], 0)
+            return result
+
+        with patch('courseware.grades._grade_section', side_effect=grade_section_and_change_score):
+            self.assertEqual(self._percent(), 0.25)
+        self.assertFalse(StudentSubsectionGrade.objects.filter(user=self.student).exists())
+        self.assertEqual(StudentScoreVersion.get_version(self.student.id, self.course.id), 2)
+        self.assertEqual(self._percent(), 0.0)
+
+    def test_expired_grade_is_recomputed(self):
+        self._percent()
+        set_score(self.student.id, self.problems[0].location, 0, 2)
+        StudentSubsectionGrade.objects.update(valid_until=datetime.now(UTC) - timedelta(days=1))
+        self.assertEqual(self._percent(), 0.0)
+
+    def _add_problem(self, section, **kwargs):
+        """Add a problem with the given fields to the section, and reload the course."""
+        vertical = self.store.get_item(section.location).get_children()[0]
+        ItemFactory.create(category='problem', parent=vertical, **kwargs)
+        self.course = self.store.get_course(self.course.id)
+
+    def test_future_start_date(self):
+        start = datetime.now(UTC).replace(microsecond=0) + timedelta(days=7)
+        self._add_problem(self.sections[1], start=start)
+        self._percent()
+        self.assertEqual(
+            StudentSubsectionGrade.objects.get(user=self.student, usage_key=self.sections[1].location).valid_until,
+            start
+        )
+
+    def test_group_access_is_not_stored(self):
+        self._add_problem(self.sections[0], group_access={0: [0]})
+        self._percent()
+        self.assertEqual(
+            [row.usage_key for row in StudentSubsectionGrade.objects.filter(user=self.student)],
+            [self.sections[1].location]
+        )
+
+    def test_field_overrides_are_not_stored(self):
+        with patch.object(OverrideFieldData, 'overrides_enabled_for', return_value=True):
+            self.assertEqual(self._percent(), 0.25)
+        self.assertFalse(StudentSubsectionGrade.objects.filter(user=self.student).exists())
+
+
+class TestNextStartDate(unittest.TestCase):
+    """
+    Tests for the date when a stored subsection grade expires.
+    """
+    def setUp(self):
+        super(TestNextStartDate, self).setUp()
+        self.now = datetime(2016, 1, 1, tzinfo=UTC)
+
+    def test_started(self):
+        descriptor = MagicMock(start=self.now - timedelta(days=1), days_early_for_beta=None)
+        self.assertIsNone(_next_start_date([descriptor], self.now))
+
+    def test_first_future_start(self):
+        descriptors = [
+            MagicMock(start=self.now + timedelta(days=days), days_early_for_beta=None) for days in (5, 2, -1)
+        ]
+        self.assertEqual(_next_start_date(descriptors, self.now), self.now + timedelta(days=2))
+
+    def test_beta_testers(self):
+        descriptor = MagicMock(start=self.now + timedelta(days=5), days_early_for_beta=3)
+        self.assertEqual(_next_start_date([descriptor], self.now), self.now + timedelta(days=2))
+
+
 class TestMaxScoresCache(ModuleStoreTestCase):
     """
     Tests for the MaxScoresCache
@@ -318,3 +595,40 @@ class TestProgressSummary(TestCase):
         earned, possible = self.progress_summary.score_for_module(self.loc_m)
         self.assertEqual(earned, 0)
         self.assertEqual(possible, 0)
+
+
+@unittest.skip("Only run manually.")
+class GradeIterationPerformanceTest(GradedCourseMixin, ModuleStoreTestCase):
+    """
+    Times per-student and batched grade iteration on a generated course.
+    """
+    # Use this attribute to skip this test on regular unittest CI runs.
+    perf_test = True
+
+    NUM_SECTIONS = 10
+    PROBLEMS_PER_SECTION = 10
+    NUM_STUDENTS = 200
+    BATCH_SIZE = 100
+
+    def setUp(self):
+        super(GradeIterationPerformanceTest, self).setUp()
+        if CodeBlockTimer is None:
+            raise SkipTest("CodeBlockTimer undefined.")
+        self.create_graded_course(self.NUM_SECTIONS, self.PROBLEMS_PER_SECTION)
+        self.students = [UserFactory.create() for __ in xrange(self.NUM_STUDENTS)]
+        self.score_students(self.students)
+
+    def _grade(self, **kwargs):
+        """Grade every student and return their gradesets by user id."""
+        return {
+            student.id: gradeset
+            for student, gradeset, __ in iterate_grades_for(self.course, self.students, **kwargs)
+        }
+
+    def test_grading_throughput(self):
+        with CodeBlockTimer("iterate_grades_for:{}".format(self.NUM_STUDENTS)):
+            with CodeBlockTimer("per_student"):
+                per_student_gradesets = self._grade()
+            with CodeBlockTimer("batched:{}".format(self.BATCH_SIZE)):
+                batched_gradesets = self._grade(batch_size=self.BATCH_SIZE)
+        self.assertEqual(per_student_gradesets, batched_gradesets)
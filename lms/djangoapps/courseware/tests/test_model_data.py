@@ -415,3 +415,40 @@ class TestStudentInfoStorage(OtherUserFailureTestMixin, StorageTestBase, TestCas
     storage_class = XModuleStudentInfoField
     other_key_factory = partial(DjangoKeyValueStore.Key, Scope.user_info, 2, 'mock_problem')  # user_id=2, not 1
     existing_field_name = "existing_field"
+
+
+@attr('shard_1')
+@patch('courseware.model_data.modulestore', Mock())
+class TestFieldDataCacheForUsers(TestCase):
+    """Tests for loading the FieldDataCaches of several users together"""
+    def setUp(self):
+        super(TestFieldDataCacheForUsers, self).setUp()
+        self.users = [UserFactory.create() for __ in range(3)]
+        for index, user in enumerate(self.users[:2]):
+            StudentModuleFactory(student=user, state=json.dumps({'a_field': 'value_{}'.format(index)}))
+        self.descriptor = mock_descriptor([mock_field(Scope.user_state, 'a_field')])
+
+    def user_state_key(self, user):
+        """Returns the key of a_field of the given user"""
+        return DjangoKeyValueStore.Key(Scope.user_state, user.id, location('usage_id'), 'a_field')
+
+    def test_user_state_is_loaded_in_one_query(self):
+        with self.assertNumQueries(1):
+            field_data_caches = FieldDataCache.cache_for_users(course_id, self.users, [self.descriptor], depth=0)
+        self.assertEqual(set(field_data_caches), set(user.id for user in self.users))
+
+        with self.assertNumQueries(0):
+            for index, user in enumerate(self.users[:2]):
+                kvs = DjangoKeyValueStore(field_data_caches[user.id])
+                self.assertEqual(kvs.get(self.user_state_key(user)), 'value_{}'.format(index))
+            kvs = DjangoKeyValueStore(field_data_caches[self.users[2].id])
+            self.assertFalse(kvs.has(self.user_state_key(self.users[2])))
+
+    def test_same_as_single_user_caches(self):
+        field_data_caches = FieldDataCache.cache_for_users(course_id, self.users, [self.descriptor], depth=0)
+        for user in self.users:
+            field_data_cache = FieldDataCache([self.descriptor], course_id, user)
+            key = self.user_state_key(user)
+            self.assertEqual(field_data_caches[user.id].has(key), field_data_cache.has(key))
+            if field_data_cache.has(key):
+                self.assertEqual(field_data_caches[user.id].get(key), field_data_cache.get(key))
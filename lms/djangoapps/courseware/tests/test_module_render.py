@@ -701,6 +701,23 @@ class TestTOC(ModuleStoreTestCase):
             for toc_section in expected:
                 self.assertIn(toc_section, actual)
 
+    @ddt.data((ModuleStoreEnum.Type.mongo, 3, 0), (ModuleStoreEnum.Type.split, 6, 0))
+    @ddt.unpack
+    def test_toc_from_course_blocks(self, default_ms, setup_finds, setup_sends):
+        with self.store.default_store(default_ms):
+            self.setup_request_and_course(setup_finds, setup_sends)
+            expected = render.toc_for_course(
+                self.request.user, self.request, self.toy_course, self.chapter, 'Welcome', self.field_data_cache
+            )
+            with patch.dict('django.conf.settings.FEATURES', {'ENABLE_COURSE_BLOCKS_NAVIGATION': True}):
+                with patch('courseware.module_render.get_module_for_descriptor') as mock_get_module:
+                    actual = render.toc_for_course(
+                        self.request.user, self.request, self.toy_course, self.chapter, 'Welcome',
+                        self.field_data_cache
+                    )
+            self.assertFalse(mock_get_module.called)
+            self.assertEqual(actual, expected)
+
 
 @attr('shard_1')
 @ddt.ddt
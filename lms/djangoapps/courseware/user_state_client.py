@@ -15,7 +15,7 @@ except ImportError:
 import dogstats_wrapper as dog_stats_api
 from django.contrib.auth.models import User
 from xblock.fields import Scope, ScopeBase
-from courseware.models import StudentModule, StudentModuleHistory
+from courseware.models import StudentModule, StudentModuleHistory, chunks
 from edx_user_state_client.interface import XBlockUserStateClient, XBlockUserState
 
 
@@ -42,6 +42,9 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
     # Use this sample rate for DataDog events.
     API_DATADOG_SAMPLE_RATE = 0.1
 
+    # The number of users, and of blocks, in each query of get_many_for_users.
+    MULTI_USER_CHUNK_SIZE = 250
+
     class ServiceUnavailable(XBlockUserStateClient.ServiceUnavailable):
         """
         This error is raised if the service backing this client is currently unavailable.
@@ -95,6 +98,38 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
                 usage_key = student_module.module_state_key.map_into_course(student_module.course_id)
                 yield (student_module, usage_key)
 
+    def _get_student_modules_for_users(self, user_ids, block_keys):
+        """
+        Retrieve the :class:`~StudentModule`s for the supplied ``user_ids`` and ``block_keys``.
+
+        The users and the blocks are both queried in chunks, so that no query
+        has more than ``2 * MULTI_USER_CHUNK_SIZE`` parameters.
+
+        Arguments:
+            user_ids (list of int): The ids of the users to load `StudentModule`s for.
+            block_keys (list of :class:`~UsageKey`): The set of XBlocks to load data for.
+        """
+        course_key_func = attrgetter('course_key')
+        by_course = itertools.groupby(
+            sorted(block_keys, key=course_key_func),
+            course_key_func,
+        )
+
+        for course_key, usage_keys in by_course:
+            usage_keys = list(usage_keys)
+            for user_ids_chunk in chunks(user_ids, self.MULTI_USER_CHUNK_SIZE):
+                query = StudentModule.objects.chunked_filter(
+                    'module_state_key__in',
+                    usage_keys,
+                    student_id__in=user_ids_chunk,
+                    course_id=course_key,
+                    chunk_size=self.MULTI_USER_CHUNK_SIZE,
+                )
+
+                for student_module in query:
+                    usage_key = student_module.module_state_key.map_into_course(student_module.course_id)
+                    yield (student_module, usage_key)
+
     def _ddog_increment(self, evt_time, evt_name):
         """
         DataDog increment method.
@@ -169,6 +204,51 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
         self._ddog_histogram(evt_time, 'get_many.blks_out', block_count)
         self._ddog_histogram(evt_time, 'get_many.response_time', (finish_time - evt_time) * 1000)
 
+    def get_many_for_users(self, users, block_keys, scope=Scope.user_state, fields=None):
+        """
+        Retrieve the stored XBlock state of several users for the specified XBlock usages.
+
+        This reads the state of all of the users with a few queries, rather than
+        with queries for each user like :meth:`get_many`.
+
+        Arguments:
+            users (list of :class:`~User`): The users whose state should be retrieved
+            block_keys ([UsageKey]): A list of UsageKeys identifying which xblock states to load.
+            scope (Scope): The scope to load data from
+            fields: A list of field values to retrieve. If None, retrieve all stored fields.
+
+        Yields:
+            XBlockUserState tuples for each of the users' state for the UsageKeys in block_keys.
+            field_state is a dict mapping field names to values.
+        """
+        if scope != Scope.user_state:
+            raise ValueError("Only Scope.user_state is supported, not {}".format(scope))
+
+        usernames = {user.id: user.username for user in users}
+        evt_time = time()
+
+        self._ddog_histogram(evt_time, 'get_many_for_users.users_requested', len(usernames))
+        self._ddog_histogram(evt_time, 'get_many_for_users.blks_requested', len(block_keys))
+
+        for module, usage_key in self._get_student_modules_for_users(usernames.keys(), block_keys):
+            if module.state is None:
+                continue
+
+            state = json.loads(module.state)
+
+            # If the state is the empty dict, then it has been deleted, and so
+            # conformant UserStateClients should treat it as if it doesn't exist.
+            if state == {}:
+                continue
+
+            if fields is not None:
+                state = {
+                    field: state[field]
+                    for field in fields
+                    if field in state
+                }
+            yield XBlockUserState(usernames[module.student_id], usage_key, state, module.modified, scope)
+
     def set_many(self, username, block_keys_to_state, scope=Scope.user_state):
         """
         Set fields for a particular XBlock.
@@ -26,7 +26,7 @@ from django_comment_common.models import (
 from lms.lib.comment_client.comment import Comment
 from lms.lib.comment_client.thread import Thread
 from lms.lib.comment_client.user import User as CommentClientUser
-from lms.lib.comment_client.utils import CommentClientRequestError
+from lms.lib.comment_client.utils import CommentClientRequestError, start_request
 from openedx.core.djangoapps.course_groups.cohorts import get_cohort_names
 
 
@@ -35,6 +35,10 @@ def get_context(course, request, thread=None):
     Returns a context appropriate for use with ThreadSerializer or
     (if thread is provided) CommentSerializer.
     """
+    requester = request.user
+    # Retrieve the requester from the comments service while querying the roles.
+    cc_requester = CommentClientUser.from_django_user(requester)
+    cc_requester_request = start_request(cc_requester.retrieve)
     # TODO: cache staff_user_ids and ta_user_ids if we need to improve perf
     staff_user_ids = {
         user.id
@@ -49,15 +53,15 @@ def get_context(course, request, thread=None):
         for role in Role.objects.filter(name=FORUM_ROLE_COMMUNITY_TA, course_id=course.id)
         for user in role.users.all()
     }
-    requester = request.user
-    cc_requester = CommentClientUser.from_django_user(requester).retrieve()
+    # For now, the only groups are cohorts
+    group_ids_to_names = get_cohort_names(course)
+    cc_requester_request.get()
     cc_requester["course_id"] = course.id
     return {
         "course": course,
         "request": request,
         "thread": thread,
-        # For now, the only groups are cohorts
-        "group_ids_to_names": get_cohort_names(course),
+        "group_ids_to_names": group_ids_to_names,
         "is_requester_privileged": requester.id in staff_user_ids or requester.id in ta_user_ids,
         "staff_user_ids": staff_user_ids,
         "ta_user_ids": ta_user_ids,
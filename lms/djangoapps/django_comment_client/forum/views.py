@@ -193,12 +193,14 @@ def inline_discussion(request, course_key, discussion_id):
 
     course = get_course_with_access(request.user, 'load', course_key, check_if_enrolled=True)
     cc_user = cc.User.from_django_user(request.user)
-    user_info = cc_user.to_dict()
+    # Retrieve the user from the comments service while getting the threads.
+    user_info_request = cc.utils.start_request(cc_user.to_dict)
 
     try:
         threads, query_params = get_threads(request, course, discussion_id, per_page=INLINE_THREADS_PER_PAGE)
     except ValueError:
         return HttpResponseBadRequest("Invalid group_id")
+    user_info = user_info_request.get()
 
     with newrelic.agent.FunctionTrace(nr_transaction, "get_metadata_for_threads"):
         annotated_content_info = utils.get_metadata_for_threads(course_key, threads, request.user, user_info)
@@ -230,7 +232,8 @@ def forum_form_discussion(request, course_key):
     course_settings = make_course_settings(course, request.user)
 
     user = cc.User.from_django_user(request.user)
-    user_info = user.to_dict()
+    # Retrieve the user from the comments service while getting the threads.
+    user_info_request = cc.utils.start_request(user.to_dict)
 
     try:
         unsafethreads, query_params = get_threads(request, course)   # This might process a search query
@@ -241,6 +244,7 @@ def forum_form_discussion(request, course_key):
         return render_to_response('discussion/maintenance.html', {})
     except ValueError:
         return HttpResponseBadRequest("Invalid group_id")
+    user_info = user_info_request.get()
 
     with newrelic.agent.FunctionTrace(nr_transaction, "get_metadata_for_threads"):
         annotated_content_info = utils.get_metadata_for_threads(course_key, threads, request.user, user_info)
@@ -304,7 +308,8 @@ def single_thread(request, course_key, discussion_id, thread_id):
     course = get_course_with_access(request.user, 'load', course_key, check_if_enrolled=True)
     course_settings = make_course_settings(course, request.user)
     cc_user = cc.User.from_django_user(request.user)
-    user_info = cc_user.to_dict()
+    # Retrieve the user from the comments service while retrieving the thread.
+    user_info_request = cc.utils.start_request(cc_user.to_dict)
     is_moderator = has_permission(request.user, "see_all_cohorts", course_key)
 
     # Currently, the front end always loads responses via AJAX, even for this
@@ -321,6 +326,7 @@ def single_thread(request, course_key, discussion_id, thread_id):
         if e.status_code == 404:
             raise Http404
         raise
+    user_info = user_info_request.get()
 
     # Verify that the student has access to this thread if belongs to a course discussion module
     thread_context = getattr(thread, "context", "course")
@@ -430,10 +436,12 @@ def user_profile(request, course_key, user_id):
         else:
             profiled_user = cc.User(id=user_id, course_id=course_key)
 
+        # Retrieve the requesting user from the comments service while getting the threads.
+        user_info_request = cc.utils.start_request(cc.User.from_django_user(request.user).to_dict)
         threads, page, num_pages = profiled_user.active_threads(query_params)
         query_params['page'] = page
         query_params['num_pages'] = num_pages
-        user_info = cc.User.from_django_user(request.user).to_dict()
+        user_info = user_info_request.get()
 
         with newrelic.agent.FunctionTrace(nr_transaction, "get_metadata_for_threads"):
             annotated_content_info = utils.get_metadata_for_threads(course_key, threads, request.user, user_info)
@@ -511,10 +519,12 @@ def followed_threads(request, course_key, user_id):
         if group_id is not None:
             query_params['group_id'] = group_id
 
+        # Retrieve the requesting user from the comments service while getting the threads.
+        user_info_request = cc.utils.start_request(cc.User.from_django_user(request.user).to_dict)
         threads, page, num_pages = profiled_user.subscribed_threads(query_params)
         query_params['page'] = page
         query_params['num_pages'] = num_pages
-        user_info = cc.User.from_django_user(request.user).to_dict()
+        user_info = user_info_request.get()
 
         with newrelic.agent.FunctionTrace(nr_transaction, "get_metadata_for_threads"):
             annotated_content_info = utils.get_metadata_for_threads(course_key, threads, request.user, user_info)
@@ -0,0 +1,251 @@
+"""
+Tests for the way the comments service client sends its requests.
+"""
+from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+import json
+import threading
+import time
+import unittest
+
+from django.test import SimpleTestCase
+from django.test.utils import override_settings
+from django.utils import translation
+import mock
+from nose.plugins.skip import SkipTest
+import requests
+
+from lms.lib.comment_client import utils
+
+# The dependency below needs to be installed manually from the development.txt file, which doesn't
+# get installed during unit tests!
+try:
+    from code_block_timer import CodeBlockTimer
+except ImportError:
+    CodeBlockTimer = None
+
+URL = 'http://localhost:4567/api/v1/users/1'
+
+
+class CoalescedRequestTestCase(unittest.TestCase):
+    """
+    Tests that identical concurrent GET requests of a request are sent once.
+    """
+    def setUp(self):
+        super(CoalescedRequestTestCase, self).setUp()
+        self.release = threading.Event()
+        patcher = mock.patch('lms.lib.comment_client.utils.send_request', side_effect=self.send_request)
+        self.mock_send_request = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.release.set)
+        self.results = []
+        # The GET requests being sent for the request of the test.
+        self.in_flight_requests = {}
+
+    def send_request(self, method, url, **kwargs):  # pylint: disable=unused-argument
+        """ Waits to be released for a GET, then returns a response for the user """
+        if method == 'get':
+            self.release.wait(5)
+        return mock.Mock(status_code=200, text='{"id": "1"}', json=lambda: {"id": "1"})
+
+    def start_thread(self, args, in_flight_requests=None):
+        """
+        Starts performing the request with the given arguments from a new
+        thread, like `start_request` does for the request of the test.
+        """
+        if in_flight_requests is None:
+            in_flight_requests = self.in_flight_requests
+        thread = threading.Thread(target=lambda: self.results.append(
+            utils._call_in_request_context(  # pylint: disable=protected-access
+                'en', in_flight_requests, utils.perform_request, args, {}
+            )
+        ))
+        thread.start()
+        return thread
+
+    def wait_for(self, condition):
+        """ Waits up to 5 seconds for the condition to be true """
+        deadline = time.time() + 5
+        while not condition() and time.time() < deadline:
+            time.sleep(0.01)
+
+    def perform_requests(self, requests_args, expected_calls, in_flight_requests_list=None):
+        """
+        Performs the requests concurrently, and waits until the expected
+        number of requests is sent or coalesced before releasing them.
+        """
+        with mock.patch('lms.lib.comment_client.utils.dog_stats_api.increment') as mock_increment:
+            threads = [
+                self.start_thread(args, in_flight_requests_list[index] if in_flight_requests_list else None)
+                for index, args in enumerate(requests_args)
+            ]
+            self.wait_for(lambda: self.mock_send_request.call_count + len([
+                args for args, __ in mock_increment.call_args_list if args[0] == 'comment_client.request.coalesced'
+            ]) >= len(threads))
+            self.release.set()
+            for thread in threads:
+                thread.join(5)
+        self.assertEqual(self.mock_send_request.call_count, expected_calls)
+
+    def test_identical_gets_are_coalesced(self):
+        self.perform_requests([('get', URL, {'course_id': 'a'})] * 3, 1)
+        self.assertEqual(self.results, [{"id": "1"}] * 3)
+
+    def test_different_gets_are_sent(self):
+        self.perform_requests([('get', URL, {'course_id': 'a'}), ('get', URL, {'course_id': 'b'})], 2)
+
+    def test_gets_of_different_requests_are_sent(self):
+        self.perform_requests([('get', URL, {'course_id': 'a'})] * 2, 2, [{}, {}])
+
+    def test_gets_outside_of_request_are_sent(self):
+        self.perform_requests([('get', URL, {'course_id': 'a'})] * 2, 2, [None, None])
+
+    def test_writes_are_sent(self):
+        self.perform_requests([('put', URL, {'username': 'a'})] * 2, 2)
+
+    def test_get_after_write_is_sent(self):
+        with mock.patch('lms.lib.comment_client.utils.dog_stats_api.increment') as mock_increment:
+            first_get = self.start_thread(('get', URL, {'course_id': 'a'}))
+            self.wait_for(lambda: self.mock_send_request.call_count == 1)
+            utils._call_in_request_context(  # pylint: disable=protected-access
+                'en', self.in_flight_requests, utils.perform_request, ('put', URL, {'username': 'a'}), {}
+            )
+
+            # The GET after the write doesn't share the response read before it.
+            second_get = self.start_thread(('get', URL, {'course_id': 'a'}))
+            self.wait_for(lambda: self.mock_send_request.call_count == 3)
+            self.release.set()
+            first_get.join(5)
+            second_get.join(5)
+        self.assertEqual(self.mock_send_request.call_count, 3)
+        self.assertNotIn(
+            'comment_client.request.coalesced', [args[0] for args, __ in mock_increment.call_args_list]
+        )
+        self.assertFalse(self.in_flight_requests)
+
+    def test_error_is_shared(self):
+        self.mock_send_request.side_effect = requests.exceptions.Timeout
+        threads = [self.start_thread(('get', URL, {'course_id': 'a'})) for __ in range(2)]
+        for thread in threads:
+            thread.join(5)
+        self.assertFalse(self.in_flight_requests)
+
+
+@override_settings(COMMENTS_SERVICE_MAX_CONCURRENT_REQUESTS=2)
+class StartRequestTestCase(SimpleTestCase):
+    """
+    Tests that the functions started with start_request run concurrently.
+    """
+    def test_concurrent_functions(self):
+        started = threading.Event()
+
+        def wait_for_start():
+            """ Returns whether the other function started in the meantime """
+            return started.wait(5)
+
+        waiting_request = utils.start_request(wait_for_start)
+        utils.start_request(started.set).get()
+        self.assertTrue(waiting_request.get())
+
+    def test_language(self):
+        with translation.override('eo'):
+            self.assertEqual(utils.start_request(translation.get_language).get(), 'eo')
+
+    def test_error(self):
+        with mock.patch('lms.lib.comment_client.utils.send_request', side_effect=requests.exceptions.Timeout):
+            request = utils.start_request(utils.perform_request, 'get', URL)
+            with self.assertRaises(requests.exceptions.Timeout):
+                request.get()
+
+    def test_nested_functions(self):
+        # Functions started from the pool are called right away, rather than
+        # waiting for a thread of the full pool.
+        def start_nested_requests():
+            """ Starts more functions than there are threads """
+            return [utils.start_request(lambda value=value: value).get() for value in range(3)]
+
+        requests_started = [utils.start_request(start_nested_requests) for __ in range(2)]
+        self.assertEqual([request.get() for request in requests_started], [[0, 1, 2]] * 2)
+
+    @override_settings(COMMENTS_SERVICE_MAX_CONCURRENT_REQUESTS=0)
+    def test_without_pool(self):
+        with mock.patch('lms.lib.comment_client.utils.ThreadPool') as mock_pool:
+            self.assertEqual(utils.start_request(lambda: threading.current_thread()).get(), threading.current_thread())
+        self.assertFalse(mock_pool.called)
+
+
+class StubCommentServiceHandler(BaseHTTPRequestHandler):
+    """
+    Answers every GET request with the same user and a session cookie,
+    keeping the connection alive.
+    """
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """ Sends the user """
+        response = json.dumps({'username': 'user', 'external_id': '1'})
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Set-Cookie', 'sessionid=1; Path=/')
+        self.send_header('Content-Length', str(len(response)))
+        self.end_headers()
+        self.wfile.write(response)
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        pass
+
+
+def start_stub_comment_service(test_case):
+    """
+    Starts a stub comments service for the test case, and returns the url of
+    its user.
+    """
+    server = HTTPServer(('127.0.0.1', 0), StubCommentServiceHandler)
+    test_case.addCleanup(server.server_close)
+    test_case.addCleanup(server.shutdown)
+    server_thread = threading.Thread(target=server.serve_forever)
+    server_thread.daemon = True
+    server_thread.start()
+    return 'http://127.0.0.1:{}/api/v1/users/1'.format(server.server_port)
+
+
+class SessionTestCase(unittest.TestCase):
+    """
+    Tests the session shared by the requests to the comments service.
+    """
+    def test_cookies_are_not_kept(self):
+        url = start_stub_comment_service(self)
+        utils.perform_request('get', url)
+        self.assertEqual(len(utils.get_session().cookies), 0)
+
+
+@unittest.skip("Only run manually.")
+class PooledSessionPerformanceTest(unittest.TestCase):
+    """
+    Times requests to a local stub of the comments service, with a new
+    connection for each request and with the pooled session.
+    """
+    # Use this attribute to skip this test on regular unittest CI runs.
+    perf_test = True
+
+    NUM_REQUESTS = 1000
+
+    def setUp(self):
+        super(PooledSessionPerformanceTest, self).setUp()
+        if CodeBlockTimer is None:
+            raise SkipTest("CodeBlockTimer undefined.")
+        self.url = start_stub_comment_service(self)
+
+    def run_requests(self):
+        """
+        Sends NUM_REQUESTS requests with perform_request.
+        """
+        for __ in range(self.NUM_REQUESTS):
+            utils.perform_request('get', self.url, {'complete': True})
+
+    def test_requests(self):
+        with CodeBlockTimer("perform_request:{}".format(self.NUM_REQUESTS)):
+            with mock.patch('lms.lib.comment_client.utils.send_request', side_effect=requests.request):
+                with CodeBlockTimer("new_connections"):
+                    self.run_requests()
+            with CodeBlockTimer("pooled_session"):
+                self.run_requests()
@@ -22,6 +22,7 @@ from openedx.core.djangoapps.course_groups.tests.helpers import config_course_co
 from student.tests.factories import UserFactory, AdminFactory, CourseEnrollmentFactory
 from openedx.core.djangoapps.content.course_structures.models import CourseStructure
 from openedx.core.djangoapps.util.testing import ContentGroupTestCase
+from request_cache.middleware import RequestCache
 from student.roles import CourseStaffRole
 from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase, TEST_DATA_MIXED_TOY_MODULESTORE
@@ -255,6 +256,36 @@ class CachedDiscussionIdMapTestCase(ModuleStoreTestCase):
         CourseStructure.objects.all().delete()
         self.verify_discussion_metadata()
 
+    def test_discussion_id_map_is_decoded_once(self):
+        RequestCache().process_request(RequestFactory().get('/'))
+        self.addCleanup(RequestCache.clear_request_cache)
+        # Check the modification time of the course structure, then decode it.
+        with self.assertNumQueries(2):
+            utils.get_cached_discussion_key(self.course, 'test_discussion_id')
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                utils.get_cached_discussion_key(self.course, 'test_discussion_id_2'), self.discussion2.location
+            )
+
+        # Later requests only check the modification time.
+        RequestCache.clear_request_cache()
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                utils.get_cached_discussion_key(self.course, 'test_discussion_id'), self.discussion.location
+            )
+
+    def test_changed_discussion_id_map(self):
+        utils.get_cached_discussion_key(self.course, 'test_discussion_id')
+        structure = CourseStructure.objects.get(course_id=self.course.id)
+        structure.discussion_id_map_json = json.dumps({'test_discussion_id': unicode(self.discussion2.location)})
+        structure.save()
+        self.assertEqual(utils.get_cached_discussion_key(self.course, 'test_discussion_id'), self.discussion2.location)
+
+    def test_discussion_modules_are_loaded_at_once(self):
+        with mock.patch.object(modulestore(), 'get_item') as mock_get_item:
+            self.verify_discussion_metadata()
+        self.assertFalse(mock_get_item.called)
+
     def test_get_missing_discussion_id_map_from_cache(self):
         metadata = utils.get_cached_discussion_id_map(self.course, ['bogus_id'], self.user)
         self.assertEqual(metadata, {})
@@ -337,7 +368,9 @@ class CategoryMapTestCase(CategoryMapTestMixin, ModuleStoreTestCase):
             **kwargs
         )
 
-    def assert_category_map_equals(self, expected, cohorted_if_in_list=False, exclude_unstarted=True):  # pylint: disable=arguments-differ
+    def assert_category_map_equals(  # pylint: disable=arguments-differ
+            self, expected, cohorted_if_in_list=False, exclude_unstarted=True
+    ):
         """
         Asserts the expected map with the map returned by get_discussion_category_map method.
         """
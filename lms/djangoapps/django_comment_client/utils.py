@@ -161,13 +161,10 @@ def get_cached_discussion_key(course, discussion_id):
     map is cached but does not contain discussion_id, returns None. If the discussion id map is not cached for course,
     raises a DiscussionIdMapIsNotCached exception.
     """
-    try:
-        cached_mapping = CourseStructure.objects.get(course_id=course.id).discussion_id_map
-        if not cached_mapping:
-            raise DiscussionIdMapIsNotCached()
-        return cached_mapping.get(discussion_id)
-    except CourseStructure.DoesNotExist:
+    cached_mapping = CourseStructure.discussion_id_map_for_course(course.id)
+    if not cached_mapping:
         raise DiscussionIdMapIsNotCached()
+    return cached_mapping.get(discussion_id)
 
 
 def get_cached_discussion_id_map(course, discussion_ids, user):
@@ -176,19 +173,23 @@ def get_cached_discussion_id_map(course, discussion_ids, user):
     user. If not, returns the result of get_discussion_id_map
     """
     try:
-        entries = []
-        for discussion_id in discussion_ids:
-            key = get_cached_discussion_key(course, discussion_id)
-            if not key:
-                continue
-            module = modulestore().get_item(key)
-            if not (has_required_keys(module) and has_access(user, 'load', module, course.id)):
-                continue
-            entries.append(get_discussion_id_map_entry(module))
-        return dict(entries)
+        keys = [get_cached_discussion_key(course, discussion_id) for discussion_id in set(discussion_ids)]
     except DiscussionIdMapIsNotCached:
         return get_discussion_id_map(course, user)
 
+    # Load all the discussion modules at once.
+    block_ids = [key.block_id for key in keys if key]
+    if not block_ids:
+        return {}
+    modules = modulestore().get_items(
+        course.id,
+        qualifiers={'category': 'discussion', 'name': {'$in': block_ids}}
+    )
+    return dict(
+        get_discussion_id_map_entry(module) for module in modules
+        if has_required_keys(module) and has_access(user, 'load', module, course.id)
+    )
+
 
 def get_discussion_id_map(course, user):
     """
@@ -8,11 +8,13 @@ import json
 import unittest
 
 from django.utils.timezone import utc
+from django.test.client import RequestFactory
 from django.test.utils import override_settings
 from nose.plugins.attrib import attr
 
 from courseware.field_overrides import OverrideFieldData
 from lms.djangoapps.ccx.tests.test_overrides import inject_field_overrides
+from request_cache.middleware import RequestCache
 from student.tests.factories import UserFactory
 from xmodule.fields import Date
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase, SharedModuleStoreTestCase
@@ -262,6 +264,34 @@ class TestSetDueDateExtension(ModuleStoreTestCase):
         tools.set_due_date_extension(self.course, self.week1, self.user, None)
         self.assertEqual(self.week1.due, self.due)
 
+    def test_extensions_loaded_once_per_request(self):
+        extended = datetime.datetime(2013, 12, 25, 0, 0, tzinfo=utc)
+        tools.set_due_date_extension(self.course, self.week1, self.user, extended)
+        tools.set_due_date_extension(self.course, self.week2, self.user, extended)
+        self._clear_field_data_cache()
+
+        RequestCache().process_request(RequestFactory().get('/'))
+        self.addCleanup(RequestCache.clear_request_cache)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.week1.due, extended)
+            self.assertEqual(self.week2.due, extended)
+            self.assertEqual(self.homework.due, extended)
+            self.assertEqual(self.assignment.due, extended)
+
+    def test_extensions_changed_during_request(self):
+        RequestCache().process_request(RequestFactory().get('/'))
+        self.addCleanup(RequestCache.clear_request_cache)
+        self.assertEqual(self.week1.due, self.due)
+
+        extended = datetime.datetime(2013, 12, 25, 0, 0, tzinfo=utc)
+        tools.set_due_date_extension(self.course, self.week1, self.user, extended)
+        self._clear_field_data_cache()
+        self.assertEqual(self.week1.due, extended)
+
+        tools.set_due_date_extension(self.course, self.week1, self.user, None)
+        self._clear_field_data_cache()
+        self.assertEqual(self.week1.due, self.due)
+
 
 @attr('shard_1')
 class TestDataDumps(ModuleStoreTestCase):
@@ -19,6 +19,7 @@ import csv
 import json
 import hashlib
 import os.path
+import tempfile
 import urllib
 
 from boto.s3.connection import S3Connection
@@ -179,9 +180,9 @@ class InstructorTask(models.Model):
 class ReportStore(object):
     """
     Simple abstraction layer that can fetch and store CSV files for reports
-    download. Should probably refactor later to create a ReportFile object that
-    can simply be appended to for the sake of memory efficiency, rather than
-    passing in the whole dataset. Doing that for now just because it's simpler.
+    download. `store_rows()` consumes its rows lazily and writes them out as
+    they come, so callers can pass a generator instead of building the whole
+    dataset in memory.
     """
     @classmethod
     def from_config(cls, config_name):
@@ -204,6 +205,23 @@ class ReportStore(object):
         for row in rows:
             yield [unicode(item).encode('utf-8') for item in row]
 
+    def _get_unicode_rows(self, csv_file):
+        """
+        Read the utf-8 encoded CSV in `csv_file` and yield its rows as lists
+        of unicode strings.
+        """
+        for row in csv.reader(csv_file):
+            yield [item.decode('utf-8') for item in row]
+
+    @staticmethod
+    def is_report_filename(filename):
+        """
+        Return whether `filename` is a finished report, as opposed to one of
+        the partial files that sharded reports are assembled from (which are
+        stored under a "parts/" prefix).
+        """
+        return '/' not in filename
+
 
 class S3ReportStore(ReportStore):
     """
@@ -217,6 +235,9 @@ class S3ReportStore(ReportStore):
     conventions on where files are stored to know what to display. Clients using
     this class can name the final file whatever they want.
     """
+    # S3 requires all parts of a multipart upload but the last to be at least 5MB.
+    multipart_chunk_size = 5 * 1024 * 1024
+
     def __init__(self, bucket_name, root_path):
         self.root_path = root_path
 
@@ -298,9 +319,13 @@ class S3ReportStore(ReportStore):
 
     def store_rows(self, course_id, filename, rows):
         """
-        Given a `course_id`, `filename`, and `rows` (each row is an iterable of
-        strings), create a buffer that is a gzip'd csv file, and then `store()`
-        that buffer.
+        Given a `course_id`, `filename`, and `rows` (an iterable of rows, each
+        of which is an iterable of strings), write a gzip'd csv file.
+
+        Rows are compressed as they are read from `rows`. Small files are
+        uploaded with a single `store()`; once the compressed data reaches
+        `multipart_chunk_size`, it is sent as a multipart upload instead, one
+        chunk at a time, so that only a single chunk is ever held in memory.
 
         Even though we store it in gzip format, browsers will transparently
         download and decompress it. Filenames should end in `.csv`, not `.gz`.
@@ -308,10 +333,72 @@ class S3ReportStore(ReportStore):
         output_buffer = StringIO()
         gzip_file = GzipFile(fileobj=output_buffer, mode="wb")
         csvwriter = csv.writer(gzip_file)
-        csvwriter.writerows(self._get_utf8_encoded_rows(rows))
-        gzip_file.close()
+        multipart_upload = None
+        num_parts = 0
+        try:
+            for row in self._get_utf8_encoded_rows(rows):
+                csvwriter.writerow(row)
+                if output_buffer.tell() >= self.multipart_chunk_size:
+                    if multipart_upload is None:
+                        multipart_upload = self._initiate_multipart_upload(course_id, filename)
+                    num_parts += 1
+                    self._upload_part(multipart_upload, num_parts, output_buffer)
+            gzip_file.close()
+
+            if multipart_upload is None:
+                self.store(course_id, filename, output_buffer)
+            else:
+                num_parts += 1
+                self._upload_part(multipart_upload, num_parts, output_buffer)
+                multipart_upload.complete_upload()
+        except Exception:
+            if multipart_upload is not None:
+                multipart_upload.cancel_upload()
+            raise
+
+    def _initiate_multipart_upload(self, course_id, filename):
+        """
+        Start a multipart upload of a gzip'd csv file named `filename`.
+        """
+        key = self.key_for(course_id, filename)
+        return self.bucket.initiate_multipart_upload(
+            key.key,
+            headers={
+                "Content-Encoding": "gzip",
+                "Content-Type": "text/csv",
+            }
+        )
 
-        self.store(course_id, filename, output_buffer)
+    def _upload_part(self, multipart_upload, part_num, output_buffer):
+        """
+        Upload the contents of `output_buffer` as part `part_num` of
+        `multipart_upload`, and empty the buffer.
+        """
+        multipart_upload.upload_part_from_file(StringIO(output_buffer.getvalue()), part_num=part_num)
+        output_buffer.seek(0)
+        output_buffer.truncate()
+
+    def iter_rows(self, course_id, filename):
+        """
+        Yield the rows of a CSV previously stored with `store_rows()`, as lists
+        of unicode strings. The file is spooled to a local temporary file
+        rather than read into memory.
+        """
+        key = self.key_for(course_id, filename)
+        with tempfile.TemporaryFile() as local_file:
+            key.get_contents_to_file(local_file)
+            local_file.seek(0)
+            gzip_file = GzipFile(fileobj=local_file, mode="rb")
+            for row in self._get_unicode_rows(gzip_file):
+                yield row
+
+    def exists(self, course_id, filename):
+        """Return whether `filename` has been stored for `course_id`."""
+        return self.key_for(course_id, filename).exists()
+
+    def delete(self, course_id, filename):
+        """Delete the stored file `filename` for `course_id`."""
+        self.key_for(course_id, filename).delete()
 
     def links_for(self, course_id):
         """
@@ -319,9 +406,13 @@ class S3ReportStore(ReportStore):
         can be plugged straight into an href
         """
         course_dir = self.key_for(course_id, '')
+        keys = [
+            key for key in self.bucket.list(prefix=course_dir.key)
+            if self.is_report_filename(key.key[len(course_dir.key):])
+        ]
         return [
             (key.key.split("/")[-1], key.generate_url(expires_in=300))
-            for key in sorted(self.bucket.list(prefix=course_dir.key), reverse=True, key=lambda k: k.last_modified)
+            for key in sorted(keys, reverse=True, key=lambda k: k.last_modified)
         ]
 
 
@@ -372,21 +463,53 @@ class LocalFSReportStore(ReportStore):
         full_path = self.path_to(course_id, filename)
         directory = os.path.dirname(full_path)
         if not os.path.exists(directory):
-            os.mkdir(directory)
+            os.makedirs(directory)
 
         with open(full_path, "wb") as f:
             f.write(buff.getvalue())
 
     def store_rows(self, course_id, filename, rows):
         """
-        Given a course_id, filename, and rows (each row is an iterable of strings),
-        write this data out.
+        Given a course_id, filename, and rows (an iterable of rows, each of
+        which is an iterable of strings), write this data out.
+
+        Rows are written to disk as they are read from `rows`. They go to a
+        temporary file that is only moved into place once complete, so that
+        `links_for()` never lists a partially written report.
         """
-        output_buffer = StringIO()
-        csvwriter = csv.writer(output_buffer)
-        csvwriter.writerows(self._get_utf8_encoded_rows(rows))
+        full_path = self.path_to(course_id, filename)
+        temp_path = self.path_to(course_id, os.path.join('tmp', filename))
+        for directory in (os.path.dirname(full_path), os.path.dirname(temp_path)):
+            if not os.path.exists(directory):
+                os.makedirs(directory)
+
+        try:
+            with open(temp_path, "wb") as csv_file:
+                csvwriter = csv.writer(csv_file)
+                for row in self._get_utf8_encoded_rows(rows):
+                    csvwriter.writerow(row)
+            os.rename(temp_path, full_path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def iter_rows(self, course_id, filename):
+        """
+        Yield the rows of a CSV previously stored with `store_rows()`, as lists
+        of unicode strings.
+        """
+        with open(self.path_to(course_id, filename), "rb") as csv_file:
+            for row in self._get_unicode_rows(csv_file):
+                yield row
+
+    def exists(self, course_id, filename):
+        """Return whether `filename` has been stored for `course_id`."""
+        return os.path.isfile(self.path_to(course_id, filename))
 
-        self.store(course_id, filename, output_buffer)
+    def delete(self, course_id, filename):
+        """Delete the stored file `filename` for `course_id`."""
+        os.remove(self.path_to(course_id, filename))
 
     def links_for(self, course_id):
         """
@@ -399,7 +522,11 @@ class LocalFSReportStore(ReportStore):
         course_dir = self.path_to(course_id, '')
         if not os.path.exists(course_dir):
             return []
-        files = [(filename, os.path.join(course_dir, filename)) for filename in os.listdir(course_dir)]
+        files = [
+            (filename, os.path.join(course_dir, filename))
+            for filename in os.listdir(course_dir)
+            if os.path.isfile(os.path.join(course_dir, filename))
+        ]
         files.sort(key=lambda (filename, full_path): os.path.getmtime(full_path), reverse=True)
 
         return [
@@ -37,6 +37,7 @@ from instructor_task.tasks_helper import (
     upload_problem_responses_csv,
     upload_grades_csv,
     upload_problem_grade_report,
+    upload_grade_report_part,
     upload_students_csv,
     cohort_students_and_upload,
     upload_enrollment_report,
@@ -78,7 +79,7 @@ def rescore_problem(entry_id, xmodule_instance_args):
         """Filter that matches problems which are marked as being done"""
         return modules_to_update.filter(state__contains='"done": true')
 
-    visit_fcn = partial(perform_module_state_update, update_fcn, filter_fcn)
+    visit_fcn = partial(perform_module_state_update, update_fcn, filter_fcn, preload_field_data=True)
     return run_main_task(entry_id, visit_fcn, action_name)
 
 
@@ -175,6 +176,17 @@ def calculate_grades_csv(entry_id, xmodule_instance_args):
     return run_main_task(entry_id, task_fn, action_name)
 
 
+@task(routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)
+def generate_grade_report_part(entry_id, report_name, part_index, student_ids, start_time, subtask_status_dict):
+    """
+    Grade one shard of the students of a grade report, for grade reports that
+    are split into subtasks (see settings.GRADES_DOWNLOAD_STUDENTS_PER_TASK).
+    """
+    return upload_grade_report_part(
+        entry_id, report_name, part_index, student_ids, start_time, subtask_status_dict
+    )
+
+
 @task(base=BaseInstructorTask, routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)
 def calculate_problem_grade_report(entry_id, xmodule_instance_args):
     """
@@ -9,14 +9,16 @@ from collections import OrderedDict
 from datetime import datetime
 from django.conf import settings
 from eventtracking import tracker
-from itertools import chain
+from itertools import chain, count
 from time import time
 import unicodecsv
 import logging
+import traceback
 
 from celery import Task, current_task
-from celery.states import SUCCESS, FAILURE
+from celery.states import SUCCESS, FAILURE, READY_STATES
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.core.files.storage import DefaultStorage
 from django.db import transaction, reset_queries
 from django.db.models import Q
@@ -47,7 +49,7 @@ from certificates.models import (
 from certificates.api import generate_user_certificates
 from courseware.courses import get_course_by_id, get_problems_in_section
 from courseware.grades import iterate_grades_for
-from courseware.models import StudentModule
+from courseware.models import StudentModule, chunks
 from courseware.model_data import DjangoKeyValueStore, FieldDataCache
 from courseware.module_render import get_module_for_descriptor_internal
 from instructor_analytics.basic import (
@@ -78,6 +80,8 @@ FILTERED_OUT_ROLES = ['staff', 'instructor', 'finance_admin', 'sales_admin']
 UPDATE_STATUS_SUCCEEDED = 'succeeded'
 UPDATE_STATUS_FAILED = 'failed'
 UPDATE_STATUS_SKIPPED = 'skipped'
+# number of StudentModules whose field data perform_module_state_update preloads together
+MODULE_STATE_UPDATE_CHUNK_SIZE = 100
 
 # The setting name used for events when "settings" (account settings, preferences, profile information) change.
 REPORT_REQUESTED_EVENT_NAME = u'edx.instructor.report.requested'
@@ -178,6 +182,14 @@ class UpdateProblemModuleStateError(Exception):
     pass
 
 
+class GradeReportError(Exception):
+    """
+    Error signaling that a grade report split into subtasks could not be
+    produced.
+    """
+    pass
+
+
 def _get_current_task():
     """
     Stub to make it easier to test without actually running Celery.
@@ -297,7 +309,8 @@ def run_main_task(entry_id, task_fcn, action_name):
     return task_progress
 
 
-def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, task_input, action_name):
+def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, task_input, action_name,
+                                preload_field_data=False):
     """
     Performs generic update by visiting StudentModule instances with the update_fcn provided.
 
@@ -315,6 +328,11 @@ def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, ta
     the update is successful; False indicates the update on the particular student module failed.
     A raised exception indicates a fatal condition -- that no other student modules should be considered.
 
+    If `preload_field_data` is True, the StudentModules are visited in chunks, and the field data of
+    the students of each chunk is loaded with a few queries for the whole chunk rather than for each
+    StudentModule.  The FieldDataCache of the student is then passed to the `update_fcn` as its
+    `field_data_cache` keyword argument.
+
     The return value is a dict containing the task's results, with the following keys:
 
           'attempted': number of attempts made
@@ -375,23 +393,35 @@ def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, ta
     task_progress = TaskProgress(action_name, modules_to_update.count(), start_time)
     task_progress.update_task_state()
 
-    for module_to_update in modules_to_update:
-        task_progress.attempted += 1
-        module_descriptor = problems[unicode(module_to_update.module_state_key)]
-        # There is no try here:  if there's an error, we let it throw, and the task will
-        # be marked as FAILED, with a stack trace.
-        with dog_stats_api.timer('instructor_tasks.module.time.step', tags=[u'action:{name}'.format(name=action_name)]):
-            update_status = update_fcn(module_descriptor, module_to_update)
-            if update_status == UPDATE_STATUS_SUCCEEDED:
-                # If the update_fcn returns true, then it performed some kind of work.
-                # Logging of failures is left to the update_fcn itself.
-                task_progress.succeeded += 1
-            elif update_status == UPDATE_STATUS_FAILED:
-                task_progress.failed += 1
-            elif update_status == UPDATE_STATUS_SKIPPED:
-                task_progress.skipped += 1
-            else:
-                raise UpdateProblemModuleStateError("Unexpected update_status returned: {}".format(update_status))
+    modules_to_update = modules_to_update.select_related('student')
+    action_tags = [u'action:{name}'.format(name=action_name)]
+    for modules_chunk in chunks(modules_to_update, MODULE_STATE_UPDATE_CHUNK_SIZE):
+        field_data_caches = {}
+        if preload_field_data:
+            students = {module.student_id: module.student for module in modules_chunk}
+            with dog_stats_api.timer('instructor_tasks.module.time.preload', tags=action_tags):
+                field_data_caches = FieldDataCache.cache_for_users(course_id, students.values(), problems.values())
+
+        for module_to_update in modules_chunk:
+            task_progress.attempted += 1
+            module_descriptor = problems[unicode(module_to_update.module_state_key)]
+            update_kwargs = {}
+            if preload_field_data:
+                update_kwargs['field_data_cache'] = field_data_caches[module_to_update.student_id]
+            # There is no try here:  if there's an error, we let it throw, and the task will
+            # be marked as FAILED, with a stack trace.
+            with dog_stats_api.timer('instructor_tasks.module.time.step', tags=action_tags):
+                update_status = update_fcn(module_descriptor, module_to_update, **update_kwargs)
+                if update_status == UPDATE_STATUS_SUCCEEDED:
+                    # If the update_fcn returns true, then it performed some kind of work.
+                    # Logging of failures is left to the update_fcn itself.
+                    task_progress.succeeded += 1
+                elif update_status == UPDATE_STATUS_FAILED:
+                    task_progress.failed += 1
+                elif update_status == UPDATE_STATUS_SKIPPED:
+                    task_progress.skipped += 1
+                else:
+                    raise UpdateProblemModuleStateError("Unexpected update_status returned: {}".format(update_status))
 
     return task_progress.update_task_state()
 
@@ -423,16 +453,19 @@ def _get_track_function_for_task(student, xmodule_instance_args=None, source_pag
 
 
 def _get_module_instance_for_task(course_id, student, module_descriptor, xmodule_instance_args=None,
-                                  grade_bucket_type=None, course=None):
+                                  grade_bucket_type=None, course=None, field_data_cache=None):
     """
     Fetches a StudentModule instance for a given `course_id`, `student` object, and `module_descriptor`.
 
     `xmodule_instance_args` is used to provide information for creating a track function and an XQueue callback.
     These are passed, along with `grade_bucket_type`, to get_module_for_descriptor_internal, which sidesteps
     the need for a Request object when instantiating an xmodule instance.
+
+    If `field_data_cache` is None, the field data of the student is loaded for the `module_descriptor`.
     """
     # reconstitute the problem's corresponding XModule:
-    field_data_cache = FieldDataCache.cache_for_descriptor_descendents(course_id, student, module_descriptor)
+    if field_data_cache is None:
+        field_data_cache = FieldDataCache.cache_for_descriptor_descendents(course_id, student, module_descriptor)
     student_data = KvsFieldData(DjangoKeyValueStore(field_data_cache))
 
     # get request-related tracking information from args passthrough, and supplement with task-specific
@@ -469,11 +502,14 @@ def _get_module_instance_for_task(course_id, student, module_descriptor, xmodule
 
 
 @outer_atomic
-def rescore_problem_module_state(xmodule_instance_args, module_descriptor, student_module):
+def rescore_problem_module_state(xmodule_instance_args, module_descriptor, student_module, field_data_cache=None):
     '''
     Takes an XModule descriptor and a corresponding StudentModule object, and
     performs rescoring on the student's problem submission.
 
+    If `field_data_cache` is given, it is used as the field data of the student
+    rather than loading it from the database.
+
     Throws exceptions if the rescoring is fatal and should be aborted if in a loop.
     In particular, raises UpdateProblemModuleStateError if module fails to instantiate,
     or if the module doesn't support rescoring.
@@ -497,7 +533,8 @@ def rescore_problem_module_state(xmodule_instance_args, module_descriptor, stude
             module_descriptor,
             xmodule_instance_args,
             grade_bucket_type='rescore',
-            course=course
+            course=course,
+            field_data_cache=field_data_cache,
         )
 
         if instance is None:
@@ -610,6 +647,8 @@ def upload_csv_to_report_store(rows, csv_name, course_id, timestamp, config_name
                 [row1_colum1, row1_colum2, ...],
                 ...
             ]
+            This can be any iterable, such as a generator; the rows are
+            written to the report store as they are read from it.
         csv_name: Name of the resulting CSV
         course_id: ID of the course
     """
@@ -656,7 +695,125 @@ def upload_exec_summary_to_store(data_dict, report_name, course_id, generated_at
     tracker.emit(REPORT_REQUESTED_EVENT_NAME, {"report_type": report_name})
 
 
-def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name):  # pylint: disable=too-many-statements
+class GradeReportBuilder(object):
+    """
+    Builds the rows of the grades CSV for a course.
+
+    This is shared by the single-task report and by the subtasks that each
+    grade one range of students when the report is sharded.
+    """
+    report_name = 'grade_report'
+
+    def __init__(self, course_id):
+        self.course_id = course_id
+        self.course = get_course_by_id(course_id)
+        self.course_is_cohorted = is_course_cohorted(self.course.id)
+        self.teams_enabled = self.course.teams_enabled
+        self.cohorts_header = ['Cohort Name'] if self.course_is_cohorted else []
+        self.teams_header = ['Team Name'] if self.teams_enabled else []
+
+        self.experiment_partitions = get_split_user_partitions(self.course.user_partitions)
+        self.group_configs_header = [
+            u'Experiment Group ({})'.format(partition.name) for partition in self.experiment_partitions
+        ]
+
+        self.certificate_info_header = ['Certificate Eligible', 'Certificate Delivered', 'Certificate Type']
+        certificate_whitelist = CertificateWhitelist.objects.filter(course_id=course_id, whitelist=True)
+        self.whitelisted_user_ids = [entry.user_id for entry in certificate_whitelist]
+
+        # The section labels, which are only known once a student was graded.
+        self.section_labels = None
+
+    def header_row(self):
+        """
+        Return the header row of the report, or None if no student has been
+        graded successfully yet.
+        """
+        if self.section_labels is None:
+            return None
+        return (
+            ["id", "email", "username", "grade"] + self.section_labels + self.cohorts_header +
+            self.group_configs_header + self.teams_header +
+            ['Enrollment Track', 'Verification Status'] + self.certificate_info_header
+        )
+
+    def error_header_row(self):
+        """Return the header row of the error report."""
+        return ["id", "username", "error_msg"]
+
+    def iter_rows(self, students):
+        """
+        Grade `students` and yield a (student, row, error_row) tuple for each
+        of them. Exactly one of row and error_row is None.
+        """
+        for student, gradeset, err_msg in iterate_grades_for(
+                self.course_id, students, batch_size=settings.GRADES_DOWNLOAD_BATCH_SIZE
+        ):
+            if gradeset:
+                # We were able to successfully grade this student for this course.
+                yield student, self._row_for(student, gradeset), None
+            else:
+                # An empty gradeset means we failed to grade a student.
+                yield student, None, [student.id, student.username, err_msg]
+
+    def _row_for(self, student, gradeset):
+        """Return the report row for a successfully graded student."""
+        course_id = self.course_id
+        if self.section_labels is None:
+            self.section_labels = [section['label'] for section in gradeset[u'section_breakdown']]
+
+        percents = {
+            section['label']: section.get('percent', 0.0)
+            for section in gradeset[u'section_breakdown']
+            if 'label' in section
+        }
+
+        cohorts_group_name = []
+        if self.course_is_cohorted:
+            group = get_cohort(student, course_id, assign=False)
+            cohorts_group_name.append(group.name if group else '')
+
+        group_configs_group_names = []
+        for partition in self.experiment_partitions:
+            group = LmsPartitionService(student, course_id).get_group(partition, assign=False)
+            group_configs_group_names.append(group.name if group else '')
+
+        team_name = []
+        if self.teams_enabled:
+            try:
+                membership = CourseTeamMembership.objects.get(user=student, team__course_id=course_id)
+                team_name.append(membership.team.name)
+            except CourseTeamMembership.DoesNotExist:
+                team_name.append('')
+
+        enrollment_mode = CourseEnrollment.enrollment_mode_for_user(student, course_id)[0]
+        verification_status = SoftwareSecurePhotoVerification.verification_status_for_user(
+            student,
+            course_id,
+            enrollment_mode
+        )
+        certificate_info = certificate_info_for_user(
+            student,
+            course_id,
+            gradeset['grade'],
+            student.id in self.whitelisted_user_ids
+        )
+
+        # Not everybody has the same gradable items. If the item is not
+        # found in the user's gradeset, just assume it's a 0. The aggregated
+        # grades for their sections and overall course will be calculated
+        # without regard for the item they didn't have access to, so it's
+        # possible for a student to have a 0.0 show up in their row but
+        # still have 100% for the course.
+        row_percents = [percents.get(label, 0.0) for label in self.section_labels]
+        return (
+            [student.id, student.email, student.username, gradeset['percent']] +
+            row_percents + cohorts_group_name + group_configs_group_names + team_name +
+            [enrollment_mode] + [verification_status] + certificate_info
+        )
+
+
+def upload_grades_csv(_xmodule_instance_args, entry_id, course_id, _task_input, action_name):
     """
     For a given `course_id`, generate a grades CSV file for all students that
     are enrolled, and store using a `ReportStore`. Once created, the files can
@@ -665,12 +822,15 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
     buffered, so we'll never write part of a CSV file to S3 -- i.e. any files
     that are visible in ReportStore will be complete ones.
 
-    As we start to add more CSV downloads, it will probably be worthwhile to
-    make a more general CSVDoc class instead of building out the rows like we
-    do here.
+    If settings.GRADES_DOWNLOAD_STUDENTS_PER_TASK is set, the students are
+    instead split into subtasks of that size, each of which stores a partial
+    CSV, and the last subtask to finish merges them into the final report.
     """
     start_time = time()
     start_date = datetime.now(UTC)
+    if _is_grade_report_sharded(entry_id, course_id):
+        return queue_grade_report_subtasks(entry_id, course_id, action_name, GradeReportBuilder, start_time)
+
     status_interval = 100
     enrolled_students = CourseEnrollment.objects.users_enrolled_in(course_id)
     task_progress = TaskProgress(action_name, enrolled_students.count(), start_time)
@@ -678,33 +838,20 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
     fmt = u'Task: {task_id}, InstructorTask ID: {entry_id}, Course: {course_id}, Input: {task_input}'
     task_info_string = fmt.format(
         task_id=_xmodule_instance_args.get('task_id') if _xmodule_instance_args is not None else None,
-        entry_id=_entry_id,
+        entry_id=entry_id,
         course_id=course_id,
         task_input=_task_input
     )
     TASK_LOG.info(u'%s, Task type: %s, Starting task execution', task_info_string, action_name)
 
-    course = get_course_by_id(course_id)
-    course_is_cohorted = is_course_cohorted(course.id)
-    teams_enabled = course.teams_enabled
-    cohorts_header = ['Cohort Name'] if course_is_cohorted else []
-    teams_header = ['Team Name'] if teams_enabled else []
-
-    experiment_partitions = get_split_user_partitions(course.user_partitions)
-    group_configs_header = [u'Experiment Group ({})'.format(partition.name) for partition in experiment_partitions]
-
-    certificate_info_header = ['Certificate Eligible', 'Certificate Delivered', 'Certificate Type']
-    certificate_whitelist = CertificateWhitelist.objects.filter(course_id=course_id, whitelist=True)
-    whitelisted_user_ids = [entry.user_id for entry in certificate_whitelist]
+    report = GradeReportBuilder(course_id)
 
-    # Loop over all our students and build our CSV lists in memory
-    header = None
-    rows = []
-    err_rows = [["id", "username", "error_msg"]]
+    # The grade rows are streamed to the report store as students are graded;
+    # only the (rare) error rows are kept in memory.
+    err_rows = [report.error_header_row()]
     current_step = {'step': 'Calculating Grades'}
 
     total_enrolled_students = enrolled_students.count()
-    student_counter = 0
     TASK_LOG.info(
         u'%s, Task type: %s, Current step: %s, Starting grade calculation for total students: %s',
         task_info_string,
@@ -713,106 +860,54 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
 
         total_enrolled_students
     )
-    for student, gradeset, err_msg in iterate_grades_for(course_id, enrolled_students):
-        # Periodically update task status (this is a cache write)
-        if task_progress.attempted % status_interval == 0:
-            task_progress.update_task_state(extra_meta=current_step)
-        task_progress.attempted += 1
-
-        # Now add a log entry after each student is graded to get a sense
-        # of the task's progress
-        student_counter += 1
-        TASK_LOG.info(
-            u'%s, Task type: %s, Current step: %s, Grade calculation in-progress for students: %s/%s',
-            task_info_string,
-            action_name,
-            current_step,
-            student_counter,
-            total_enrolled_students
-        )
-
-        if gradeset:
-            # We were able to successfully grade this student for this course.
-            task_progress.succeeded += 1
-            if not header:
-                header = [section['label'] for section in gradeset[u'section_breakdown']]
-                rows.append(
-                    ["id", "email", "username", "grade"] + header + cohorts_header +
-                    group_configs_header + teams_header +
-                    ['Enrollment Track', 'Verification Status'] + certificate_info_header
-                )
-
-            percents = {
-                section['label']: section.get('percent', 0.0)
-                for section in gradeset[u'section_breakdown']
-                if 'label' in section
-            }
-
-            cohorts_group_name = []
-            if course_is_cohorted:
-                group = get_cohort(student, course_id, assign=False)
-                cohorts_group_name.append(group.name if group else '')
 
-            group_configs_group_names = []
-            for partition in experiment_partitions:
-                group = LmsPartitionService(student, course_id).get_group(partition, assign=False)
-                group_configs_group_names.append(group.name if group else '')
+    def _graded_rows():
+        """
+        Grade the enrolled students and yield the rows of the report,
+        starting with its header, as they are computed.
+        """
+        for __, row, err_row in report.iter_rows(enrolled_students):
+            # Periodically update task status (this is a cache write)
+            if task_progress.attempted % status_interval == 0:
+                task_progress.update_task_state(extra_meta=current_step)
+            task_progress.attempted += 1
 
-            team_name = []
-            if teams_enabled:
-                try:
-                    membership = CourseTeamMembership.objects.get(user=student, team__course_id=course_id)
-                    team_name.append(membership.team.name)
-                except CourseTeamMembership.DoesNotExist:
-                    team_name.append('')
-
-            enrollment_mode = CourseEnrollment.enrollment_mode_for_user(student, course_id)[0]
-            verification_status = SoftwareSecurePhotoVerification.verification_status_for_user(
-                student,
-                course_id,
-                enrollment_mode
-            )
-            certificate_info = certificate_info_for_user(
-                student,
-                course_id,
-                gradeset['grade'],
-                student.id in whitelisted_user_ids
+            # Now add a log entry after each student is graded to get a sense
+            # of the task's progress
+            TASK_LOG.info(
+                u'%s, Task type: %s, Current step: %s, Grade calculation in-progress for students: %s/%s',
+                task_info_string,
+                action_name,
+                current_step,
+                task_progress.attempted,
+                total_enrolled_students
             )
 
-            # Not everybody has the same gradable items. If the item is not
-            # found in the user's gradeset, just assume it's a 0. The aggregated
-            # grades for their sections and overall course will be calculated
-            # without regard for the item they didn't have access to, so it's
-            # possible for a student to have a 0.0 show up in their row but
-            # still have 100% for the course.
-            row_percents = [percents.get(label, 0.0) for label in header]
-            rows.append(
-                [student.id, student.email, student.username, gradeset['percent']] +
-                row_percents + cohorts_group_name + group_configs_group_names + team_name +
-                [enrollment_mode] + [verification_status] + certificate_info
-            )
-        else:
-            # An empty gradeset means we failed to grade a student.
-            task_progress.failed += 1
-            err_rows.append([student.id, student.username, err_msg])
+            if row is not None:
+                task_progress.succeeded += 1
+                if task_progress.succeeded == 1:
+                    yield report.header_row()
+                yield row
+            else:
+                task_progress.failed += 1
+                err_rows.append(err_row)
+
+    # Perform the actual upload, which grades the students as it goes.
+    upload_csv_to_report_store(_graded_rows(), 'grade_report', course_id, start_date)
 
     TASK_LOG.info(
         u'%s, Task type: %s, Current step: %s, Grade calculation completed for students: %s/%s',
         task_info_string,
         action_name,
         current_step,
-        student_counter,
+        task_progress.attempted,
         total_enrolled_students
     )
 
-    # By this point, we've got the rows we're going to stuff into our CSV files.
     current_step = {'step': 'Uploading CSVs'}
     task_progress.update_task_state(extra_meta=current_step)
     TASK_LOG.info(u'%s, Task type: %s, Current step: %s', task_info_string, action_name, current_step)
 
-    # Perform the actual upload
-    upload_csv_to_report_store(rows, 'grade_report', course_id, start_date)
-
     # If there are any error rows (don't count the header), write them out as well
     if len(err_rows) > 1:
         upload_csv_to_report_store(err_rows, 'grade_report_err', course_id, start_date)
@@ -906,10 +1001,80 @@ def upload_problem_responses_csv(_xmodule_instance_args, _entry_id, course_id, t
     return task_progress.update_task_state(extra_meta=current_step)
 
 
-def upload_problem_grade_report(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name):
+class ProblemGradeReportBuilder(object):
+    """
+    Builds the rows of the problem grade CSV for a course.
+
+    Raises CourseStructure.DoesNotExist if the course structure has not been
+    generated yet, since the problem columns are read from it.
+    """
+    report_name = 'problem_grade_report'
+
+    def __init__(self, course_id):
+        self.course_id = course_id
+
+        # This struct encapsulates both the display names of each static item in the
+        # header row as values as well as the django User field names of those items
+        # as the keys.  It is structured in this way to keep the values related.
+        self.static_header = OrderedDict([('id', 'Student ID'), ('email', 'Email'), ('username', 'Username')])
+
+        course_structure = CourseStructure.objects.get(course_id=course_id)
+        self.problems = _order_problems(course_structure.ordered_blocks)
+
+    def header_row(self):
+        """Return the header row of the report."""
+        return (
+            list(self.static_header.values()) + ['Final Grade'] +
+            list(chain.from_iterable(self.problems.values()))
+        )
+
+    def error_header_row(self):
+        """Return the header row of the error report."""
+        return list(self.static_header.values()) + ['error_msg']
+
+    def iter_rows(self, students):
+        """
+        Grade `students` and yield a (student, row, error_row) tuple for each
+        of them. Exactly one of row and error_row is None.
+        """
+        for student, gradeset, err_msg in iterate_grades_for(
+                self.course_id, students, keep_raw_scores=True, batch_size=settings.GRADES_DOWNLOAD_BATCH_SIZE
+        ):
+            student_fields = [getattr(student, field_name) for field_name in self.static_header]
+
+            if 'percent' not in gradeset or 'raw_scores' not in gradeset:
+                # There was an error grading this student.
+                # Generally there will be a non-empty err_msg, but that is not always the case.
+                if not err_msg:
+                    err_msg = u"Unknown error"
+                yield student, None, student_fields + [err_msg]
+                continue
+
+            final_grade = gradeset['percent']
+            # Only consider graded problems
+            problem_scores = {unicode(score.module_id): score for score in gradeset['raw_scores'] if score.graded}
+            earned_possible_values = list()
+            for problem_id in self.problems:
+                try:
+                    problem_score = problem_scores[problem_id]
+                    earned_possible_values.append([problem_score.earned, problem_score.possible])
+                except KeyError:
+                    # The student has not been graded on this problem.  For example,
+                    # iterate_grades_for skips problems that students have never
+                    # seen in order to speed up report generation.  It could also be
+                    # the case that the student does not have access to it (e.g. A/B
+                    # test or cohorted courseware).
+                    earned_possible_values.append(['N/A', 'N/A'])
+            yield student, student_fields + [final_grade] + list(chain.from_iterable(earned_possible_values)), None
+
+
+def upload_problem_grade_report(_xmodule_instance_args, entry_id, course_id, _task_input, action_name):
     """
     Generate a CSV containing all students' problem grades within a given
     `course_id`.
+
+    As with `upload_grades_csv`, the work is split into subtasks if
+    settings.GRADES_DOWNLOAD_STUDENTS_PER_TASK is set.
     """
     start_time = time()
     start_date = datetime.now(UTC)
@@ -917,62 +1082,44 @@ def upload_problem_grade_report(_xmodule_instance_args, _entry_id, course_id, _t
     enrolled_students = CourseEnrollment.objects.users_enrolled_in(course_id)
     task_progress = TaskProgress(action_name, enrolled_students.count(), start_time)
 
-    # This struct encapsulates both the display names of each static item in the
-    # header row as values as well as the django User field names of those items
-    # as the keys.  It is structured in this way to keep the values related.
-    header_row = OrderedDict([('id', 'Student ID'), ('email', 'Email'), ('username', 'Username')])
-
     try:
-        course_structure = CourseStructure.objects.get(course_id=course_id)
-        blocks = course_structure.ordered_blocks
-        problems = _order_problems(blocks)
+        report = ProblemGradeReportBuilder(course_id)
     except CourseStructure.DoesNotExist:
         return task_progress.update_task_state(
             extra_meta={'step': 'Generating course structure. Please refresh and try again.'}
         )
 
-    # Just generate the static fields for now.
-    rows = [list(header_row.values()) + ['Final Grade'] + list(chain.from_iterable(problems.values()))]
-    error_rows = [list(header_row.values()) + ['error_msg']]
+    if _is_grade_report_sharded(entry_id, course_id):
+        return queue_grade_report_subtasks(entry_id, course_id, action_name, ProblemGradeReportBuilder, start_time)
+
+    error_rows = [report.error_header_row()]
     current_step = {'step': 'Calculating Grades'}
 
-    for student, gradeset, err_msg in iterate_grades_for(course_id, enrolled_students, keep_raw_scores=True):
-        student_fields = [getattr(student, field_name) for field_name in header_row]
-        task_progress.attempted += 1
+    def _graded_rows():
+        """
+        Grade the enrolled students and yield the rows of successfully graded
+        students as they are computed.
+        """
+        for __, row, error_row in report.iter_rows(enrolled_students):
+            task_progress.attempted += 1
 
-        if 'percent' not in gradeset or 'raw_scores' not in gradeset:
-            # There was an error grading this student.
-            # Generally there will be a non-empty err_msg, but that is not always the case.
-            if not err_msg:
-                err_msg = u"Unknown error"
-            error_rows.append(student_fields + [err_msg])
-            task_progress.failed += 1
-            continue
+            if row is None:
+                error_rows.append(error_row)
+                task_progress.failed += 1
+                continue
 
-        final_grade = gradeset['percent']
-        # Only consider graded problems
-        problem_scores = {unicode(score.module_id): score for score in gradeset['raw_scores'] if score.graded}
-        earned_possible_values = list()
-        for problem_id in problems:
-            try:
-                problem_score = problem_scores[problem_id]
-                earned_possible_values.append([problem_score.earned, problem_score.possible])
-            except KeyError:
-                # The student has not been graded on this problem.  For example,
-                # iterate_grades_for skips problems that students have never
-                # seen in order to speed up report generation.  It could also be
-                # the case that the student does not have access to it (e.g. A/B
-                # test or cohorted courseware).
-                earned_possible_values.append(['N/A', 'N/A'])
-        rows.append(student_fields + [final_grade] + list(chain.from_iterable(earned_possible_values)))
-
-        task_progress.succeeded += 1
-        if task_progress.attempted % status_interval == 0:
-            task_progress.update_task_state(extra_meta=current_step)
+            task_progress.succeeded += 1
+            if task_progress.attempted % status_interval == 0:
+                task_progress.update_task_state(extra_meta=current_step)
+            yield row
 
     # Perform the upload if any students have been successfully graded
-    if len(rows) > 1:
-        upload_csv_to_report_store(rows, 'problem_grade_report', course_id, start_date)
+    rows = _graded_rows()
+    first_row = next(rows, None)
+    if first_row is not None:
+        upload_csv_to_report_store(
+            chain([report.header_row(), first_row], rows), 'problem_grade_report', course_id, start_date
+        )
     # If there are any error rows, write them out as well
     if len(error_rows) > 1:
         upload_csv_to_report_store(error_rows, 'problem_grade_report_err', course_id, start_date)
@@ -980,6 +1127,228 @@ def upload_problem_grade_report(_xmodule_instance_args, _entry_id, course_id, _t
     return task_progress.update_task_state(extra_meta={'step': 'Uploading CSV'})
 
 
+GRADE_REPORT_BUILDERS = {
+    builder.report_name: builder for builder in (GradeReportBuilder, ProblemGradeReportBuilder)
+}
+
+
+def _grade_report_parts_prefix(entry):
+    """
+    Return the ReportStore prefix under which the subtasks of `entry` store
+    their partial reports.
+    """
+    return u'parts/{}'.format(entry.task_id)
+
+
+def _grade_report_part_name(entry, report_name, part_index):
+    """
+    Return the ReportStore filename of one subtask's partial report.
+    `report_name` includes the `_err` suffix for error reports.
+    """
+    return u'{}/{}_{:05d}.csv'.format(_grade_report_parts_prefix(entry), report_name, part_index)
+
+
+def _is_grade_report_sharded(entry_id, course_id):
+    """
+    Returns whether the grade report of InstructorTask `entry_id` is split
+    between subtasks.
+
+    A course without enrolled students has no subtasks to queue, and would
+    never complete its entry, so its empty report is generated right away.
+    """
+    return (
+        entry_id is not None and
+        bool(settings.GRADES_DOWNLOAD_STUDENTS_PER_TASK) and
+        CourseEnrollment.objects.users_enrolled_in(course_id).exists()
+    )
+
+
+def queue_grade_report_subtasks(entry_id, course_id, action_name, builder_class, start_time):
+    """
+    Split the grading of all enrolled students between subtasks of
+    settings.GRADES_DOWNLOAD_STUDENTS_PER_TASK students each.
+
+    Each subtask stores the rows it computed as a partial report, and the
+    last one to finish merges the parts into the final report (see
+    `upload_grade_report_part`).  Returns the progress dict of the parent task.
+    """
+    # Import here to avoid circular imports between this module and tasks.py.
+    from instructor_task.subtasks import queue_subtasks_for_query
+    from instructor_task.tasks import generate_grade_report_part
+
+    entry = InstructorTask.objects.get(pk=entry_id)
+    # If the task was retried after the subtasks were queued, don't queue them again.
+    if len(entry.subtasks) > 0 and len(entry.task_output) > 0:
+        TASK_LOG.info(u"Task %s: grade report subtasks already queued for entry %s", entry.task_id, entry_id)
+        return json.loads(entry.task_output)
+
+    enrolled_students = CourseEnrollment.objects.users_enrolled_in(course_id).order_by('pk')
+    total_num_students = enrolled_students.count()
+    part_counter = count()
+
+    def _create_grade_report_subtask(to_list, subtask_status):
+        """Creates a subtask to grade the students in `to_list`."""
+        return generate_grade_report_part.subtask(
+            (
+                entry_id,
+                builder_class.report_name,
+                next(part_counter),
+                [item['pk'] for item in to_list],
+                start_time,
+                subtask_status.to_dict(),
+            ),
+            task_id=subtask_status.task_id,
+            routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY,
+        )
+
+    progress = queue_subtasks_for_query(
+        entry,
+        action_name,
+        _create_grade_report_subtask,
+        [enrolled_students],
+        [],
+        settings.GRADES_DOWNLOAD_STUDENTS_PER_TASK,
+        total_num_students,
+    )
+    return progress
+
+
+def upload_grade_report_part(entry_id, report_name, part_index, student_ids, start_time, subtask_status_dict):
+    """
+    Grade the students in `student_ids` and store their rows as part
+    `part_index` of the report of InstructorTask `entry_id`.
+
+    Once all subtasks of the entry have completed, the parts are merged into
+    the final report.
+    """
+    # Import here to avoid circular imports between this module and subtasks.py.
+    from instructor_task.subtasks import (
+        SubtaskStatus, DuplicateTaskException, check_subtask_is_valid, update_subtask_status,
+    )
+
+    current_task_id = _get_current_task().request.id
+    subtask_status = SubtaskStatus.from_dict(subtask_status_dict)
+    try:
+        check_subtask_is_valid(entry_id, current_task_id, subtask_status)
+    except DuplicateTaskException:
+        TASK_LOG.exception(u"Task %s: skipping duplicate grade report subtask for entry %s", current_task_id, entry_id)
+        return subtask_status.to_dict()
+
+    entry = InstructorTask.objects.get(pk=entry_id)
+    course_id = entry.course_id
+    report_store = ReportStore.from_config('GRADES_DOWNLOAD')
+    succeeded = failed = 0
+    try:
+        report = GRADE_REPORT_BUILDERS[report_name](course_id)
+        students = User.objects.filter(pk__in=student_ids).order_by('pk')
+        rows, error_rows = [], []
+        for __, row, error_row in report.iter_rows(students):
+            if row is not None:
+                rows.append(row)
+                succeeded += 1
+            else:
+                error_rows.append(error_row)
+                failed += 1
+
+        # Every part has its own header, since the header of the grade report
+        # depends on the graded students; the merge only keeps the first one.
+        if rows:
+            rows.insert(0, report.header_row())
+            report_store.store_rows(course_id, _grade_report_part_name(entry, report_name, part_index), rows)
+        if error_rows:
+            error_rows.insert(0, report.error_header_row())
+            report_store.store_rows(
+                course_id, _grade_report_part_name(entry, report_name + '_err', part_index), error_rows
+            )
+        subtask_status.increment(succeeded=succeeded, failed=failed, state=SUCCESS)
+    except Exception:  # pylint: disable=broad-except
+        TASK_LOG.exception(u"Task %s: error generating grade report part %s", current_task_id, part_index)
+        subtask_status.increment(failed=len(student_ids) - succeeded, state=FAILURE)
+
+    # The entry is only marked as done once the parts are merged.
+    update_subtask_status(entry_id, current_task_id, subtask_status, complete_entry=False)
+    _merge_grade_report_parts_if_complete(entry_id, report_name, start_time)
+    return subtask_status.to_dict()
+
+
+def _merged_part_rows(report_store, course_id, part_names):
+    """
+    Yield the rows of the stored parts `part_names` in order, keeping only
+    the header of the first part.
+    """
+    for index, part_name in enumerate(part_names):
+        part_rows = report_store.iter_rows(course_id, part_name)
+        if index > 0:
+            next(part_rows, None)
+        for row in part_rows:
+            yield row
+
+
+def _stored_part_names(report_store, entry, report_name, num_parts):
+    """
+    Return the names of the parts of the report that were stored, in order:
+    parts are only stored if the subtask had rows to write.
+    """
+    part_names = [_grade_report_part_name(entry, report_name, part_index) for part_index in range(num_parts)]
+    return [part_name for part_name in part_names if report_store.exists(entry.course_id, part_name)]
+
+
+def _merge_grade_report_parts_if_complete(entry_id, report_name, start_time):
+    """
+    If all subtasks of InstructorTask `entry_id` have completed, merge their
+    partial reports into the final report, delete the parts and mark the
+    entry as done.
+
+    If a subtask failed, the students it graded would be missing from the
+    report, so no report is stored and the entry is marked as failed.
+    """
+    entry = InstructorTask.objects.get(pk=entry_id)
+    subtask_dict = json.loads(entry.subtasks)
+    if subtask_dict.get('succeeded', 0) + subtask_dict.get('failed', 0) < subtask_dict.get('total', 0):
+        return
+
+    # Only one of the subtasks finishing at the same time gets to merge.
+    lock_key = u'grade-report-merge-{}'.format(entry.task_id)
+    if not cache.add(lock_key, True, 60 * 60):
+        return
+
+    exception = traceback_string = None
+    try:
+        # A subtask retried after the merge must not merge again.
+        entry = InstructorTask.objects.get(pk=entry_id)
+        if entry.task_state in READY_STATES:
+            return
+
+        course_id = entry.course_id
+        timestamp = datetime.fromtimestamp(start_time, UTC)
+        report_store = ReportStore.from_config('GRADES_DOWNLOAD')
+        for name in (report_name, report_name + '_err'):
+            part_names = _stored_part_names(report_store, entry, name, subtask_dict['total'])
+            if part_names and not subtask_dict['failed']:
+                upload_csv_to_report_store(
+                    _merged_part_rows(report_store, course_id, part_names), name, course_id, timestamp
+                )
+            for part_name in part_names:
+                report_store.delete(course_id, part_name)
+
+        if subtask_dict['failed']:
+            exception = GradeReportError(
+                u"{failed} of the {total} parts of the report could not be generated".format(**subtask_dict)
+            )
+    except Exception as exc:  # pylint: disable=broad-except
+        TASK_LOG.exception(u"Task %s: error merging the parts of the %s", entry.task_id, report_name)
+        exception, traceback_string = exc, traceback.format_exc()
+    finally:
+        cache.delete(lock_key)
+
+    if exception is not None:
+        entry.task_output = InstructorTask.create_output_for_failure(exception, traceback_string)
+        entry.task_state = FAILURE
+    else:
+        entry.task_state = SUCCESS
+    entry.save_now()
+
+
 def upload_students_csv(_xmodule_instance_args, _entry_id, course_id, task_input, action_name):
     """
     For a given `course_id`, generate a CSV file containing profile
@@ -1034,13 +1403,10 @@ def upload_enrollment_report(_xmodule_instance_args, _entry_id, course_id, _task
     )
     TASK_LOG.info(u'%s, Task type: %s, Starting task execution', task_info_string, action_name)
 
-    # Loop over all our students and build our CSV lists in memory
-    rows = []
-    header = None
+    # The rows are streamed to the report store one student at a time.
     current_step = {'step': 'Gathering Profile Information'}
     enrollment_report_provider = PaidCourseEnrollmentReportProvider()
     total_students = students_in_course.count()
-    student_counter = 0
     TASK_LOG.info(
         u'%s, Task type: %s, Current step: %s, generating detailed enrollment report for total students: %s',
         task_info_string,
@@ -1049,86 +1415,93 @@ def upload_enrollment_report(_xmodule_instance_args, _entry_id, course_id, _task
         total_students
     )
 
-    for student in students_in_course:
-        # Periodically update task status (this is a cache write)
-        if task_progress.attempted % status_interval == 0:
-            task_progress.update_task_state(extra_meta=current_step)
-        task_progress.attempted += 1
+    def _enrollment_rows():
+        """
+        Yield the rows of the report, starting with its header, one student
+        at a time.
+        """
+        header = None
+        for student in students_in_course.iterator():
+            # Periodically update task status (this is a cache write)
+            if task_progress.attempted % status_interval == 0:
+                task_progress.update_task_state(extra_meta=current_step)
+            task_progress.attempted += 1
 
-        # Now add a log entry after certain intervals to get a hint that task is in progress
-        student_counter += 1
-        if student_counter % 100 == 0:
-            TASK_LOG.info(
-                u'%s, Task type: %s, Current step: %s, gathering enrollment profile for students in progress: %s/%s',
-                task_info_string,
-                action_name,
-                current_step,
-                student_counter,
-                total_students
-            )
+            # Now add a log entry after certain intervals to get a hint that task is in progress
+            if task_progress.attempted % 100 == 0:
+                TASK_LOG.info(
+                    u'%s, Task type: %s, Current step: %s, '
+                    u'gathering enrollment profile for students in progress: %s/%s',
+                    task_info_string,
+                    action_name,
+                    current_step,
+                    task_progress.attempted,
+                    total_students
+                )
 
-        user_data = enrollment_report_provider.get_user_profile(student.id)
-        course_enrollment_data = enrollment_report_provider.get_enrollment_info(student, course_id)
-        payment_data = enrollment_report_provider.get_payment_info(student, course_id)
-
-        # display name map for the column headers
-        enrollment_report_headers = {
-            'User ID': _('User ID'),
-            'Username': _('Username'),
-            'Full Name': _('Full Name'),
-            'First Name': _('First Name'),
-            'Last Name': _('Last Name'),
-            'Company Name': _('Company Name'),
-            'Title': _('Title'),
-            'Language': _('Language'),
-            'Year of Birth': _('Year of Birth'),
-            'Gender': _('Gender'),
-            'Level of Education': _('Level of Education'),
-            'Mailing Address': _('Mailing Address'),
-            'Goals': _('Goals'),
-            'City': _('City'),
-            'Country': _('Country'),
-            'Enrollment Date': _('Enrollment Date'),
-            'Currently Enrolled': _('Currently Enrolled'),
-            'Enrollment Source': _('Enrollment Source'),
-            'Manual (Un)Enrollment Reason': _('Manual (Un)Enrollment Reason'),
-            'Enrollment Role': _('Enrollment Role'),
-            'List Price': _('List Price'),
-            'Payment Amount': _('Payment Amount'),
-            'Coupon Codes Used': _('Coupon Codes Used'),
-            'Registration Code Used': _('Registration Code Used'),
-            'Payment Status': _('Payment Status'),
-            'Transaction Reference Number': _('Transaction Reference Number')
-        }
+            user_data = enrollment_report_provider.get_user_profile(student.id)
+            course_enrollment_data = enrollment_report_provider.get_enrollment_info(student, course_id)
+            payment_data = enrollment_report_provider.get_payment_info(student, course_id)
+
+            # display name map for the column headers
+            enrollment_report_headers = {
+                'User ID': _('User ID'),
+                'Username': _('Username'),
+                'Full Name': _('Full Name'),
+                'First Name': _('First Name'),
+                'Last Name': _('Last Name'),
+                'Company Name': _('Company Name'),
+                'Title': _('Title'),
+                'Language': _('Language'),
+                'Year of Birth': _('Year of Birth'),
+                'Gender': _('Gender'),
+                'Level of Education': _('Level of Education'),
+                'Mailing Address': _('Mailing Address'),
+                'Goals': _('Goals'),
+                'City': _('City'),
+                'Country': _('Country'),
+                'Enrollment Date': _('Enrollment Date'),
+                'Currently Enrolled': _('Currently Enrolled'),
+                'Enrollment Source': _('Enrollment Source'),
+                'Manual (Un)Enrollment Reason': _('Manual (Un)Enrollment Reason'),
+                'Enrollment Role': _('Enrollment Role'),
+                'List Price': _('List Price'),
+                'Payment Amount': _('Payment Amount'),
+                'Coupon Codes Used': _('Coupon Codes Used'),
+                'Registration Code Used': _('Registration Code Used'),
+                'Payment Status': _('Payment Status'),
+                'Transaction Reference Number': _('Transaction Reference Number')
+            }
 
-        if not header:
-            header = user_data.keys() + course_enrollment_data.keys() + payment_data.keys()
-            display_headers = []
-            for header_element in header:
-                # translate header into a localizable display string
-                display_headers.append(enrollment_report_headers.get(header_element, header_element))
-            rows.append(display_headers)
+            if not header:
+                header = user_data.keys() + course_enrollment_data.keys() + payment_data.keys()
+                display_headers = []
+                for header_element in header:
+                    # translate header into a localizable display string
+                    display_headers.append(enrollment_report_headers.get(header_element, header_element))
+                yield display_headers
 
-        rows.append(user_data.values() + course_enrollment_data.values() + payment_data.values())
-        task_progress.succeeded += 1
+            task_progress.succeeded += 1
+            yield user_data.values() + course_enrollment_data.values() + payment_data.values()
+
+    # Perform the actual upload, which gathers the profiles as it goes.
+    upload_csv_to_report_store(
+        _enrollment_rows(), 'enrollment_report', course_id, start_date, config_name='FINANCIAL_REPORTS'
+    )
 
     TASK_LOG.info(
         u'%s, Task type: %s, Current step: %s, Detailed enrollment report generated for students: %s/%s',
         task_info_string,
         action_name,
         current_step,
-        student_counter,
+        task_progress.attempted,
         total_students
     )
 
-    # By this point, we've got the rows we're going to stuff into our CSV files.
     current_step = {'step': 'Uploading CSVs'}
     task_progress.update_task_state(extra_meta=current_step)
     TASK_LOG.info(u'%s, Task type: %s, Current step: %s', task_info_string, action_name, current_step)
 
-    # Perform the actual upload
-    upload_csv_to_report_store(rows, 'enrollment_report', course_id, start_date, config_name='FINANCIAL_REPORTS')
-
     # One last update before we close out...
     TASK_LOG.info(u'%s, Task type: %s, Finalizing detailed enrollment task', task_info_string, action_name)
     return task_progress.update_task_state(extra_meta=current_step)
@@ -3,7 +3,9 @@ Tests for instructor_task/models.py.
 """
 
 from cStringIO import StringIO
+from gzip import GzipFile
 import mock
+import os
 import time
 from datetime import datetime
 from unittest import TestCase
@@ -43,6 +45,28 @@ class MockBucket(object):
         """ Expected method on a Bucket object. """
         return self.keys
 
+    def initiate_multipart_upload(self, key_name, headers):  # pylint: disable=unused-argument
+        """ Expected method on a Bucket object. """
+        self.multipart_upload = MockMultiPartUpload(key_name)
+        return self.multipart_upload
+
+
+class MockMultiPartUpload(object):
+    """ Mocking a boto S3 MultiPartUpload object. """
+    def __init__(self, key_name):
+        self.key_name = key_name
+        self.parts = []
+        self.completed = False
+
+    def upload_part_from_file(self, fp, part_num):
+        """ Expected method on a MultiPartUpload object. """
+        assert part_num == len(self.parts) + 1
+        self.parts.append(fp.read())
+
+    def complete_upload(self):
+        """ Expected method on a MultiPartUpload object. """
+        self.completed = True
+
 
 class MockS3Connection(object):
     """ Mocking a boto S3 Connection """
@@ -93,6 +117,49 @@ class LocalFSReportStoreTestCase(ReportStoreTestMixin, TestReportMixin, TestCase
         """ Create and return a LocalFSReportStore. """
         return LocalFSReportStore.from_config(config_name='GRADES_DOWNLOAD')
 
+    def test_iter_rows(self):
+        """
+        Test that rows stored with store_rows() can be read back with iter_rows().
+        """
+        report_store = self.create_report_store()
+        rows = [[u'id', u'name'], [u'1', u'ni\xf1o']]
+        report_store.store_rows(self.course_id, 'report.csv', rows)
+        self.assertEqual(list(report_store.iter_rows(self.course_id, 'report.csv')), rows)
+
+        self.assertTrue(report_store.exists(self.course_id, 'report.csv'))
+        report_store.delete(self.course_id, 'report.csv')
+        self.assertFalse(report_store.exists(self.course_id, 'report.csv'))
+
+    def test_store_rows_streams_to_disk(self):
+        """
+        Test that store_rows() writes rows out as they are generated rather
+        than collecting them in memory, and only publishes the complete file.
+        """
+        report_store = self.create_report_store()
+        temp_path = report_store.path_to(self.course_id, os.path.join('tmp', 'report.csv'))
+
+        def rows():
+            """ Generate rows, checking that earlier ones were already written. """
+            for index in range(1000):
+                if index == 900:
+                    self.assertGreater(os.path.getsize(temp_path), 0)
+                    self.assertEqual(report_store.links_for(self.course_id), [])
+                yield [index, u'x' * 1000]
+
+        report_store.store_rows(self.course_id, 'report.csv', rows())
+        self.assertEqual(len(list(report_store.iter_rows(self.course_id, 'report.csv'))), 1000)
+        self.assertEqual([link[0] for link in report_store.links_for(self.course_id)], ['report.csv'])
+
+    def test_links_for_ignores_parts(self):
+        """
+        Test that the partial files of sharded reports are not listed.
+        """
+        report_store = self.create_report_store()
+        report_store.store(self.course_id, 'parts/task_id/report_00000.csv', StringIO())
+        report_store.store(self.course_id, 'report.csv', StringIO())
+
+        self.assertEqual([link[0] for link in report_store.links_for(self.course_id)], ['report.csv'])
+
 
 @mock.patch('instructor_task.models.S3Connection', new=MockS3Connection)
 @mock.patch('instructor_task.models.Key', new=MockKey)
@@ -105,3 +172,31 @@ class S3ReportStoreTestCase(ReportStoreTestMixin, TestReportMixin, TestCase):
     def create_report_store(self):
         """ Create and return a S3ReportStore. """
         return S3ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+
+    def test_store_rows_multipart(self):
+        """
+        Test that large reports are uploaded in parts as they are generated.
+        """
+        report_store = self.create_report_store()
+        report_store.multipart_chunk_size = 16 * 1024
+        rows = [[index, os.urandom(256).encode('hex')] for index in range(2000)]
+        report_store.store_rows(self.course_id, 'report.csv', iter(rows))
+
+        multipart_upload = report_store.bucket.multipart_upload
+        self.assertTrue(multipart_upload.completed)
+        self.assertGreater(len(multipart_upload.parts), 10)
+        # No part is much larger than the chunk size, whatever the report size.
+        total_size = sum(len(part) for part in multipart_upload.parts)
+        self.assertLess(max(len(part) for part in multipart_upload.parts), total_size / 10)
+
+        contents = GzipFile(fileobj=StringIO(''.join(multipart_upload.parts))).read()
+        self.assertEqual(contents.splitlines()[-1], '1999,{}'.format(rows[-1][1]))
+
+    def test_store_rows_small(self):
+        """
+        Test that small reports are stored in a single request.
+        """
+        report_store = self.create_report_store()
+        report_store.store_rows(self.course_id, 'report.csv', iter([['a', 'b'], ['c', 'd']]))
+        self.assertFalse(hasattr(report_store.bucket, 'multipart_upload'))
+        self.assertEqual(len(report_store.bucket.keys), 1)
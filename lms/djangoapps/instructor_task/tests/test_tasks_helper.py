@@ -6,12 +6,16 @@ Unit tests for LMS instructor-initiated background tasks helper functions.
 Tests that CSV grade report generation works with unicode emails.
 
 """
+from celery.states import SUCCESS, FAILURE
 import ddt
 from mock import Mock, patch
 import tempfile
 import json
+from time import time
+from uuid import uuid4
 from openedx.core.djangoapps.course_groups import cohorts
 import unicodecsv
+from django.core.cache import cache
 from django.core.urlresolvers import reverse
 from django.test.utils import override_settings
 
@@ -19,6 +23,7 @@ from capa.tests.response_xml_factory import MultipleChoiceResponseXMLFactory
 from certificates.models import CertificateStatuses, GeneratedCertificate
 from certificates.tests.factories import GeneratedCertificateFactory, CertificateWhitelistFactory
 from course_modes.models import CourseMode
+from courseware.grades import iterate_grades_for
 from courseware.tests.factories import InstructorFactory
 from instructor_task.tests.test_base import InstructorTaskCourseTestCase, TestReportMixin, InstructorTaskModuleTestCase
 from openedx.core.djangoapps.course_groups.models import CourseUserGroupPartitionGroup, CohortMembership
@@ -32,12 +37,15 @@ from student.models import CourseEnrollment, CourseEnrollmentAllowed, ManualEnro
 from lms.djangoapps.verify_student.tests.factories import SoftwareSecurePhotoVerificationFactory
 from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
 from xmodule.partitions.partitions import Group, UserPartition
-from instructor_task.models import ReportStore
+from instructor_task.models import InstructorTask, ReportStore, PROGRESS
+from instructor_task.subtasks import SubtaskStatus, initialize_subtask_info
+from instructor_task.tests.factories import InstructorTaskFactory
 from survey.models import SurveyForm, SurveyAnswer
 from instructor_task.tasks_helper import (
     cohort_students_and_upload,
     upload_problem_responses_csv,
     upload_grades_csv,
+    upload_grade_report_part,
     upload_problem_grade_report,
     upload_students_csv,
     upload_may_enroll_csv,
@@ -327,6 +335,158 @@ class TestTeamGradeReport(InstructorGradeReportTestCase):
         self._verify_cell_data_for_user(self.student2.username, self.course.id, 'Team Name', team2.name)
 
 
+@override_settings(GRADES_DOWNLOAD_STUDENTS_PER_TASK=2)
+class TestShardedGradeReport(InstructorGradeReportTestCase):
+    """
+    Test that grade reports can be split into subtasks which each grade a
+    range of students.
+    """
+    def setUp(self):
+        super(TestShardedGradeReport, self).setUp()
+        self.course = CourseFactory.create()
+        self.students = [
+            self.create_student(u'student{}'.format(index), u'student{}@example.com'.format(index))
+            for index in range(5)
+        ]
+        self.entry = InstructorTaskFactory.create(
+            course_id=self.course.id, task_type='grade_course', task_id=str(uuid4())
+        )
+
+    def test_subtasks_are_queued(self):
+        with patch('instructor_task.tasks.generate_grade_report_part.subtask') as mock_subtask:
+            upload_grades_csv(None, self.entry.id, self.course.id, None, 'graded')
+
+        self.assertEqual(mock_subtask.call_count, 3)
+        queued_student_ids = []
+        for part_index, call in enumerate(mock_subtask.call_args_list):
+            args = call[0][0]
+            self.assertEqual(args[:3], (self.entry.id, 'grade_report', part_index))
+            queued_student_ids.extend(args[3])
+        self.assertEqual(sorted(queued_student_ids), sorted(student.id for student in self.students))
+        self.assertEqual(json.loads(InstructorTask.objects.get(pk=self.entry.id).subtasks)['total'], 3)
+
+    def test_course_without_students(self):
+        course = CourseFactory.create()
+        with patch('instructor_task.tasks.generate_grade_report_part.subtask') as mock_subtask:
+            with patch('instructor_task.tasks_helper._get_current_task'):
+                result = upload_grades_csv(None, self.entry.id, course.id, None, 'graded')
+
+        # The empty report is generated without subtasks, which would never complete the entry.
+        self.assertFalse(mock_subtask.called)
+        self.assertDictContainsSubset({'attempted': 0, 'succeeded': 0, 'failed': 0}, result)
+        self.assertEqual(InstructorTask.objects.get(pk=self.entry.id).subtasks, '')
+        report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+        self.assertEqual(len(report_store.links_for(course.id)), 1)
+
+    def _run_parts(self, student_id_chunks):
+        """
+        Run one grade report subtask for each chunk of student ids, in
+        reverse order to check that the parts are merged by index.
+        """
+        subtask_ids = [str(uuid4()) for __ in student_id_chunks]
+        initialize_subtask_info(self.entry, 'graded', len(self.students), subtask_ids)
+        start_time = time()
+        for part_index in reversed(range(len(student_id_chunks))):
+            with patch('instructor_task.tasks_helper._get_current_task') as mock_current_task:
+                mock_current_task.return_value.request.id = subtask_ids[part_index]
+                upload_grade_report_part(
+                    self.entry.id,
+                    'grade_report',
+                    part_index,
+                    student_id_chunks[part_index],
+                    start_time,
+                    SubtaskStatus.create(subtask_ids[part_index]).to_dict(),
+                )
+
+    def test_parts_are_merged(self):
+        student_ids = [student.id for student in self.students]
+        self._run_parts([student_ids[0:2], student_ids[2:4], student_ids[4:]])
+
+        report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+        links = report_store.links_for(self.course.id)
+        self.assertEqual(len(links), 1)
+        self.assertIn('grade_report', links[0][0])
+        self.verify_rows_in_csv(
+            [{'id': unicode(student.id), 'username': student.username} for student in self.students],
+            ignore_other_columns=True,
+        )
+
+        entry = InstructorTask.objects.get(pk=self.entry.id)
+        self.assertEqual(entry.task_state, SUCCESS)
+        subtasks = json.loads(entry.subtasks)
+        self.assertEqual(subtasks['succeeded'], 3)
+        self.assertEqual(subtasks['failed'], 0)
+
+    @override_settings(GRADES_DOWNLOAD_BATCH_SIZE=2)
+    def test_students_are_graded_in_batches(self):
+        student_ids = [student.id for student in self.students]
+        with patch('instructor_task.tasks_helper.iterate_grades_for', wraps=iterate_grades_for) as mock_iterate:
+            self._run_parts([student_ids[0:3], student_ids[3:]])
+
+        self.assertEqual([call[1]['batch_size'] for call in mock_iterate.call_args_list], [2, 2])
+        self.verify_rows_in_csv(
+            [{'id': unicode(student.id), 'username': student.username} for student in self.students],
+            ignore_other_columns=True,
+        )
+
+    @patch('instructor_task.tasks_helper.upload_csv_to_report_store')
+    def test_entry_is_done_after_merge(self, mock_upload):
+        def check_entry_in_progress(*args):  # pylint: disable=unused-argument
+            """The entry is not done while the report is being stored"""
+            self.assertEqual(InstructorTask.objects.get(pk=self.entry.id).task_state, PROGRESS)
+        mock_upload.side_effect = check_entry_in_progress
+
+        student_ids = [student.id for student in self.students]
+        self._run_parts([student_ids[0:3], student_ids[3:]])
+        self.assertTrue(mock_upload.called)
+        self.assertEqual(InstructorTask.objects.get(pk=self.entry.id).task_state, SUCCESS)
+
+    @patch('instructor_task.tasks_helper.upload_csv_to_report_store', side_effect=IOError('Cannot store report'))
+    def test_merge_error(self, __):
+        student_ids = [student.id for student in self.students]
+        self._run_parts([student_ids[0:3], student_ids[3:]])
+
+        entry = InstructorTask.objects.get(pk=self.entry.id)
+        self.assertEqual(entry.task_state, FAILURE)
+        self.assertEqual(json.loads(entry.task_output)['message'], 'Cannot store report')
+        # The merge lock is released.
+        self.assertTrue(cache.add(u'grade-report-merge-{}'.format(self.entry.task_id), True))
+
+    def test_failed_part(self):
+        student_ids = [student.id for student in self.students]
+        with patch('instructor_task.tasks_helper.GradeReportBuilder.iter_rows') as mock_iter_rows:
+            mock_iter_rows.side_effect = [ValueError('Cannot grade part'), mock_iter_rows.return_value]
+            self._run_parts([student_ids[0:3], student_ids[3:]])
+
+        # The students of the failed part would be missing from the report.
+        report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+        self.assertEqual(report_store.links_for(self.course.id), [])
+        entry = InstructorTask.objects.get(pk=self.entry.id)
+        self.assertEqual(entry.task_state, FAILURE)
+        self.assertEqual(
+            json.loads(entry.task_output)['message'], '1 of the 2 parts of the report could not be generated'
+        )
+
+    @patch('instructor_task.tasks_helper.iterate_grades_for')
+    def test_failed_students_are_merged(self, mock_iterate_grades_for):
+        mock_iterate_grades_for.side_effect = lambda course_id, students, **kwargs: [
+            (student, {}, 'Cannot grade student') for student in students
+        ]
+        student_ids = [student.id for student in self.students]
+        self._run_parts([student_ids[0:3], student_ids[3:]])
+
+        report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+        links = report_store.links_for(self.course.id)
+        self.assertEqual(len(links), 1)
+        self.assertIn('grade_report_err', links[0][0])
+        self.verify_rows_in_csv(
+            [
+                {'id': unicode(student.id), 'username': student.username, 'error_msg': 'Cannot grade student'}
+                for student in self.students
+            ]
+        )
+
+
 class TestProblemResponsesReport(TestReportMixin, InstructorTaskCourseTestCase):
     """
     Tests that generation of CSV files listing student answers to a
@@ -395,6 +395,9 @@ FEATURES = {
     # Enable the max score cache to speed up grading
     'ENABLE_MAX_SCORE_CACHE': True,
 
+    # Build the courseware navigation from the cached course blocks, rather than from XModules
+    'ENABLE_COURSE_BLOCKS_NAVIGATION': False,
+
     # Enable LTI Provider feature.
     'ENABLE_LTI_PROVIDER': False,
 }
@@ -766,6 +769,17 @@ MODULESTORE = {
     }
 }
 
+# Maximum total number of blocks of the deserialized split course structures
+# kept in each process, in front of the 'course_structure_cache' cache.
+# 0 disables the in-process cache.
+COURSE_STRUCTURE_LRU_CACHE_MAX_BLOCKS = 0
+
+# Local directory in which the contentserver caches the chunks of assets that
+# are too large for memcached, and the maximum total size of those chunks in
+# bytes. Chunk caching is disabled if the directory is None.
+STATIC_CONTENT_CHUNK_CACHE_DIR = None
+STATIC_CONTENT_CHUNK_CACHE_MAX_SIZE = 2 * 1024 * 1024 * 1024
+
 #################### Python sandbox ############################################
 
 CODE_JAIL = {
@@ -779,6 +793,13 @@ CODE_JAIL = {
         # How many CPU seconds can jailed code use?
         'CPU': 1,
     },
+
+    # How many warm sandbox workers each process keeps to run capa problem
+    # code, instead of starting a new sandboxed Python for every execution.
+    # 0 disables the pool.
+    'pool_size': 0,
+    # How many executions each sandbox worker runs before it is replaced.
+    'pool_max_executions': 100,
 }
 
 # Some courses are allowed to run unsafe code. This is a list of regexes, one
@@ -2173,6 +2194,14 @@ GRADES_DOWNLOAD = {
     'ROOT_PATH': '/tmp/edx-s3/grades',
 }
 
+# Number of students graded by each subtask of a grade report. None means the
+# whole report is generated by a single task.
+GRADES_DOWNLOAD_STUDENTS_PER_TASK = None
+
+# Number of students whose scores are read together when generating a grade
+# report, see courseware.grades.iterate_grades_for.
+GRADES_DOWNLOAD_BATCH_SIZE = 100
+
 FINANCIAL_REPORTS = {
     'STORAGE_TYPE': 'localfs',
     'BUCKET': 'edx-financial-reports',
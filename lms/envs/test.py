@@ -240,6 +240,10 @@ CACHES = {
 # Dummy secret key for dev
 SECRET_KEY = '85920908f28904ed733fe576320db18cabd7b6cd'
 
+# Send the requests to the comments service in order, since the tests check
+# the last request sent.
+COMMENTS_SERVICE_MAX_CONCURRENT_REQUESTS = 0
+
 # hide ratelimit warnings while running tests
 filterwarnings('ignore', message='No request passed to the backend, unable to rate-limit')
 
@@ -1,14 +1,43 @@
 from contextlib import contextmanager
+import cookielib
 import dogstats_wrapper as dog_stats_api
+import json
 import logging
+from multiprocessing.pool import ThreadPool
+import os
 import requests
+from requests.adapters import HTTPAdapter
+import threading
 from django.conf import settings
 from time import time
 from uuid import uuid4
+from django.utils import translation
 from django.utils.translation import get_language
+import request_cache
 
 log = logging.getLogger(__name__)
 
+# The pooled session of the current process, and its process id.
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+# The name of the request cache of the GET requests being sent for the
+# current request, by key, whose responses are shared with identical requests
+# made in the meantime.
+IN_FLIGHT_REQUESTS_CACHE_NAME = 'comment_client.in_flight_requests'
+_in_flight_requests_lock = threading.Lock()
+
+# The threads of the current process which send requests started with
+# `start_request`, and its process id.
+_request_pool = None
+_request_pool_pid = None
+_request_pool_lock = threading.Lock()
+_request_pool_thread = threading.local()
+
+# Rejects every cookie, since the session is shared by the requests of all users.
+_NO_COOKIES_POLICY = cookielib.DefaultCookiePolicy(allowed_domains=[])
+
 
 def strip_none(dic):
     return dict([(k, v) for k, v in dic.iteritems() if v is not None])
@@ -50,6 +79,206 @@ def request_timer(request_id, method, url, tags=None):
     )
 
 
+def get_session():
+    """
+    Returns the HTTP session of the current process to the comments service,
+    which keeps its connections alive in a pool.
+
+    The size of the pool is set by COMMENTS_SERVICE_POOL_MAXSIZE. Connections
+    aren't shared with forked processes, which get their own session.
+    """
+    global _session, _session_pid  # pylint: disable=global-statement
+    pid = os.getpid()
+    if _session_pid != pid:
+        with _session_lock:
+            if _session_pid != pid:
+                session = requests.Session()
+                session.cookies.set_policy(_NO_COOKIES_POLICY)
+                adapter = HTTPAdapter(pool_maxsize=getattr(settings, "COMMENTS_SERVICE_POOL_MAXSIZE", 10))
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                _session = session
+                _session_pid = pid
+    return _session
+
+
+def send_request(method, url, **kwargs):
+    """
+    Sends a request to the comments service with the pooled session, taking
+    the same arguments as `requests.request`, and returns its response.
+
+    Counts whether the request used a new or a kept-alive connection.
+    """
+    session = get_session()
+    pool = session.get_adapter(url).get_connection(url)
+    num_connections = pool.num_connections
+    response = session.request(method, url, **kwargs)
+    # Approximate with concurrent requests to the same pool.
+    connection = 'new' if pool.num_connections > num_connections else 'reused'
+    dog_stats_api.increment('comment_client.request.connection', tags=[u'connection:{}'.format(connection)])
+    return response
+
+
+class _InFlightRequest(object):
+    """
+    A GET request being sent, whose response is shared with identical requests.
+    """
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+
+
+def _get_in_flight_requests():
+    """
+    Returns the GET requests being sent for the current request, by key, or
+    None outside of a request, where GET requests aren't coalesced.
+
+    The functions called by `start_request` share the GET requests of the
+    request that started them.
+    """
+    in_flight_requests = getattr(_request_pool_thread, 'in_flight_requests', None)
+    if in_flight_requests is None and request_cache.get_request() is not None:
+        in_flight_requests = request_cache.get_cache(IN_FLIGHT_REQUESTS_CACHE_NAME)
+    return in_flight_requests
+
+
+def _forget_in_flight_requests():
+    """
+    Stops sharing the responses of the GET requests being sent for the current
+    request, which may have been read before a write.
+    """
+    in_flight_requests = _get_in_flight_requests()
+    if in_flight_requests:
+        with _in_flight_requests_lock:
+            in_flight_requests.clear()
+
+
+def send_coalesced_request(method, url, data=None, params=None, headers=None, timeout=None, metric_tags=None):
+    """
+    Sends a GET request like `send_request`, unless an identical one is being
+    sent by another thread for the current request, in which case that
+    request's response is returned.
+    """
+    in_flight_requests = _get_in_flight_requests()
+    if in_flight_requests is None:
+        return send_request(method, url, data=data, params=params, headers=headers, timeout=timeout)
+
+    key = json.dumps(
+        [url, {name: value for name, value in params.iteritems() if name != 'request_id'}, headers],
+        sort_keys=True,
+        default=unicode
+    )
+    with _in_flight_requests_lock:
+        in_flight_request = in_flight_requests.get(key)
+        is_sender = in_flight_request is None
+        if is_sender:
+            in_flight_request = in_flight_requests[key] = _InFlightRequest()
+
+    if not is_sender:
+        dog_stats_api.increment('comment_client.request.coalesced', tags=metric_tags)
+        in_flight_request.done.wait()
+        if in_flight_request.error is not None:
+            raise in_flight_request.error  # pylint: disable=raising-bad-type
+        return in_flight_request.response
+
+    try:
+        response = send_request(method, url, data=data, params=params, headers=headers, timeout=timeout)
+        # Read the content before sharing the response between threads.
+        response.content  # pylint: disable=pointless-statement
+        in_flight_request.response = response
+        return response
+    except Exception as error:
+        in_flight_request.error = error
+        raise
+    finally:
+        with _in_flight_requests_lock:
+            if in_flight_requests.get(key) is in_flight_request:
+                del in_flight_requests[key]
+        in_flight_request.done.set()
+
+
+class _FinishedRequest(object):
+    """
+    The result of a function called by `start_request` in the calling thread.
+    """
+    def __init__(self, function, args, kwargs):
+        self.value = None
+        self.error = None
+        try:
+            self.value = function(*args, **kwargs)
+        except Exception as error:  # pylint: disable=broad-except
+            self.error = error
+
+    def get(self):
+        """ Returns the value of the function, or raises its exception """
+        if self.error is not None:
+            raise self.error  # pylint: disable=raising-bad-type
+        return self.value
+
+
+def _get_request_pool():
+    """
+    Returns the pool of threads of the current process which send requests to
+    the comments service, or None if requests are sent one after another.
+
+    The number of threads is set by COMMENTS_SERVICE_MAX_CONCURRENT_REQUESTS.
+    Threads don't survive forking, so each process starts its own pool.
+    """
+    global _request_pool, _request_pool_pid  # pylint: disable=global-statement
+    size = getattr(settings, "COMMENTS_SERVICE_MAX_CONCURRENT_REQUESTS", 4)
+    if size <= 0:
+        return None
+    pid = os.getpid()
+    if _request_pool_pid != pid:
+        with _request_pool_lock:
+            if _request_pool_pid != pid:
+                _request_pool = ThreadPool(size, initializer=_init_request_pool_thread)
+                _request_pool_pid = pid
+    return _request_pool
+
+
+def _init_request_pool_thread():
+    """ Marks the current thread as a thread of the request pool """
+    _request_pool_thread.active = True
+
+
+def _call_in_request_context(language, in_flight_requests, function, args, kwargs):
+    """
+    Calls the function with the language and the GET requests being sent of
+    the thread which started it.
+    """
+    _request_pool_thread.in_flight_requests = in_flight_requests
+    try:
+        with translation.override(language):
+            return function(*args, **kwargs)
+    finally:
+        _request_pool_thread.in_flight_requests = None
+
+
+def start_request(function, *args, **kwargs):
+    """
+    Starts calling the function, which sends requests to the comments
+    service, from a pool of threads, so that independent requests are sent
+    concurrently.
+
+    Returns an object whose `get` method waits for the function and returns
+    its value, or raises its exception.
+
+    The function only sees the active language of the calling thread, and
+    shares its GET requests being sent, but not its other thread-local state
+    like the database transaction or the tracker context, so it should do
+    nothing but send requests. It is called right
+    away from the threads of the pool, to avoid waiting on a full pool.
+    """
+    pool = None if getattr(_request_pool_thread, 'active', False) else _get_request_pool()
+    if pool is None:
+        return _FinishedRequest(function, args, kwargs)
+    return pool.apply_async(
+        _call_in_request_context, (get_language(), _get_in_flight_requests(), function, args, kwargs)
+    )
+
+
 def perform_request(method, url, data_or_params=None, raw=False,
                     metric_action=None, metric_tags=None, paged_results=False):
 
@@ -76,14 +305,27 @@ def perform_request(method, url, data_or_params=None, raw=False,
         data = None
         params = merge_dict(data_or_params, request_id_dict)
     with request_timer(request_id, method, url, metric_tags):
-        response = requests.request(
-            method,
-            url,
-            data=data,
-            params=params,
-            headers=headers,
-            timeout=5
-        )
+        if method == 'get':
+            response = send_coalesced_request(
+                method,
+                url,
+                data=data,
+                params=params,
+                headers=headers,
+                timeout=5,
+                metric_tags=list(metric_tags)
+            )
+        else:
+            # Later GET requests must not share the responses of those sent before the write.
+            _forget_in_flight_requests()
+            response = send_request(
+                method,
+                url,
+                data=data,
+                params=params,
+                headers=headers,
+                timeout=5
+            )
 
     metric_tags.append(u'status_code:{}'.format(response.status_code))
     if response.status_code > 200:
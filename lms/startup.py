@@ -37,6 +37,8 @@ def run():
 
     add_mimetypes()
 
+    configure_sandbox_pool()
+
     if settings.FEATURES.get('USE_CUSTOM_THEME', False):
         enable_stanford_theme()
 
@@ -68,6 +70,17 @@ def run():
     xmodule.x_module.descriptor_global_local_resource_url = lms_xblock.runtime.local_resource_url
 
 
+def configure_sandbox_pool():
+    """
+    Configure the pool of warm sandbox workers that run capa problem code.
+    """
+    from capa.safe_exec import configure_sandbox_pool as configure_capa_sandbox_pool
+
+    configure_capa_sandbox_pool(
+        settings.CODE_JAIL.get('pool_size', 0), settings.CODE_JAIL.get('pool_max_executions', 100)
+    )
+
+
 def add_mimetypes():
     """
     Add extra mimetypes. Used in xblock_resource.
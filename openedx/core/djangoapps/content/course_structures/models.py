@@ -3,16 +3,68 @@ Django ORM model specifications for the Course Structures sub-application
 """
 import json
 import logging
+import threading
 
 from collections import OrderedDict
 from model_utils.models import TimeStampedModel
 
+import request_cache
 from util.models import CompressedTextField
 from xmodule_django.models import CourseKeyField, UsageKey
 
 
 logger = logging.getLogger(__name__)  # pylint: disable=invalid-name
 
+# The name of the request cache of the discussion id maps, by course key.
+DISCUSSION_ID_MAP_CACHE_NAME = u"course_structures.discussion_id_map"
+
+# The number of courses whose discussion id maps are kept decoded in a process.
+MAX_DISCUSSION_ID_MAPS = 100
+
+
+class DiscussionIdMapCache(object):
+    """
+    The discussion id maps of the most recently used courses, with the
+    modification time of the CourseStructure they were decoded from, by
+    course key.
+    """
+    def __init__(self, max_courses=MAX_DISCUSSION_ID_MAPS):
+        self.max_courses = max_courses
+        self._maps = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, course_key):
+        """
+        Returns a (modified, id_map) tuple for the course, or None, and marks
+        it as the most recently used one.
+        """
+        with self._lock:
+            modified_and_map = self._maps.pop(course_key, None)
+            if modified_and_map is not None:
+                self._maps[course_key] = modified_and_map
+            return modified_and_map
+
+    def set(self, course_key, modified, id_map):
+        """
+        Keeps the id map of the course, forgetting the least recently used
+        one if there are too many.
+        """
+        with self._lock:
+            self._maps.pop(course_key, None)
+            if len(self._maps) >= self.max_courses:
+                self._maps.popitem(last=False)
+            self._maps[course_key] = (modified, id_map)
+
+    def remove(self, course_key):
+        """
+        Forgets the id map of the course.
+        """
+        with self._lock:
+            self._maps.pop(course_key, None)
+
+
+_DISCUSSION_ID_MAPS = DiscussionIdMapCache()
+
 
 class CourseStructure(TimeStampedModel):
     """
@@ -66,6 +118,40 @@ class CourseStructure(TimeStampedModel):
             return result
         return None
 
+    @classmethod
+    def discussion_id_map_for_course(cls, course_key):
+        """
+        Returns the discussion id map of the course, like `discussion_id_map`,
+        or None if the course has no CourseStructure or no map.
+
+        The maps of the MAX_DISCUSSION_ID_MAPS most recently used courses are
+        kept decoded in the process, and decoded again only once the
+        CourseStructure is modified, which is checked once per request.
+        """
+        if request_cache.get_request() is None:
+            cache = {}
+        else:
+            cache = request_cache.get_cache(DISCUSSION_ID_MAP_CACHE_NAME)
+        if course_key in cache:
+            return cache[course_key]
+
+        modified = cls.objects.filter(course_id=course_key).values_list('modified', flat=True).first()
+        modified_and_map = _DISCUSSION_ID_MAPS.get(course_key)
+        if modified is None:
+            id_map = None
+        elif modified_and_map is not None and modified_and_map[0] == modified:
+            id_map = modified_and_map[1]
+        else:
+            try:
+                structure = cls.objects.get(course_id=course_key)
+            except cls.DoesNotExist:
+                id_map = None
+            else:
+                id_map = structure.discussion_id_map
+                _DISCUSSION_ID_MAPS.set(course_key, structure.modified, id_map)
+        cache[course_key] = id_map
+        return id_map
+
     def _traverse_tree(self, block, unordered_structure, ordered_blocks, parent=None):
         """
         Traverses the tree and fills in the ordered_blocks OrderedDict with the blocks in
@@ -81,3 +167,13 @@ class CourseStructure(TimeStampedModel):
 
         for child_node in cur_block['children']:
             self._traverse_tree(child_node, unordered_structure, ordered_blocks, parent=block)
+
+
+def clear_discussion_id_map(course_key):
+    """
+    Forgets the discussion id map of the course decoded in this process and
+    request.
+    """
+    _DISCUSSION_ID_MAPS.remove(course_key)
+    if request_cache.get_request() is not None:
+        request_cache.get_cache(DISCUSSION_ID_MAP_CACHE_NAME).pop(course_key, None)
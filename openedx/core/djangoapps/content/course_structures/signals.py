@@ -1,11 +1,12 @@
 """
 Django Signals classes and functions for the Course Structure application
 """
+from django.db.models.signals import post_save
 from django.dispatch.dispatcher import receiver
 
 from xmodule.modulestore.django import SignalHandler
 
-from .models import CourseStructure
+from .models import CourseStructure, clear_discussion_id_map
 
 
 @receiver(SignalHandler.course_published)
@@ -27,3 +28,12 @@ def listen_for_course_publish(sender, course_key, **kwargs):  # pylint: disable=
     # Note: The countdown=0 kwarg is set to to ensure the method below does not attempt to access the course
     # before the signal emitter has finished all operations. This is also necessary to ensure all tests pass.
     update_course_structure.apply_async([unicode(course_key)], countdown=0)
+
+
+@receiver(post_save, sender=CourseStructure)
+def listen_for_course_structure_save(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Forgets the decoded discussion id map of the course when its structure is
+    saved, like when the course is published.
+    """
+    clear_discussion_id_map(instance.course_id)
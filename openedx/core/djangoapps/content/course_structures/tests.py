@@ -2,12 +2,14 @@
 Course Structure Content sub-application test cases
 """
 import json
+from unittest import TestCase
 
+from opaque_keys.edx.locator import CourseLocator
 from xmodule_django.models import UsageKey
 from xmodule.modulestore.django import SignalHandler
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
-from openedx.core.djangoapps.content.course_structures.models import CourseStructure
+from openedx.core.djangoapps.content.course_structures.models import CourseStructure, DiscussionIdMapCache
 from openedx.core.djangoapps.content.course_structures.signals import listen_for_course_publish
 from openedx.core.djangoapps.content.course_structures.tasks import _generate_course_structure, update_course_structure
 
@@ -235,3 +237,27 @@ class CourseStructureTaskTests(ModuleStoreTestCase):
             [unicode(value) for value in structure.discussion_id_map.values()],
             expected_structure['discussion_id_map'].values()
         )
+
+
+class DiscussionIdMapCacheTests(TestCase):
+    """
+    Tests for the discussion id maps kept decoded in a process.
+    """
+    def test_least_recently_used_map_is_forgotten(self):
+        cache = DiscussionIdMapCache(max_courses=2)
+        course_keys = [CourseLocator('TestX', 'TS101', 'T{}'.format(index)) for index in range(3)]
+        cache.set(course_keys[0], 'modified0', {})
+        cache.set(course_keys[1], 'modified1', {})
+        cache.get(course_keys[0])
+        cache.set(course_keys[2], 'modified2', {})
+
+        self.assertEqual(cache.get(course_keys[0]), ('modified0', {}))
+        self.assertIsNone(cache.get(course_keys[1]))
+        self.assertEqual(cache.get(course_keys[2]), ('modified2', {}))
+
+    def test_remove(self):
+        cache = DiscussionIdMapCache()
+        course_key = CourseLocator('TestX', 'TS101', 'T1')
+        cache.set(course_key, 'modified', {})
+        cache.remove(course_key)
+        self.assertIsNone(cache.get(course_key))
@@ -4,9 +4,9 @@ Module for factory class for BlockStructure objects.
 # pylint: disable=protected-access
 from logging import getLogger
 
-from openedx.core.lib.cache_utils import zpickle, zunpickle
-
-from .block_structure import BlockStructureBlockData, BlockStructureModulestoreData
+from .block_structure import BlockStructureModulestoreData
+from .block_structure_serializer import BlockStructureSerializer
+from .exceptions import BlockStructureSerializationError
 
 
 logger = getLogger(__name__)  # pylint: disable=C0103
@@ -67,8 +67,8 @@ class BlockStructureFactory(object):
     @classmethod
     def serialize_to_cache(cls, block_structure, cache):
         """
-        Store a compressed and pickled serialization of the given
-        block structure into the given cache.
+        Store a serialization of the given block structure into the
+        given cache, in the format of BlockStructureSerializer.
 
         The key in the cache is 'root.key.<root_block_usage_key>'.
         The data stored in the cache includes the structure's
@@ -82,20 +82,15 @@ class BlockStructureFactory(object):
                 cache into which cacheable data of the block structure
                 is to be serialized.
         """
-        data_to_cache = (
-            block_structure._block_relations,
-            block_structure._transformer_data,
-            block_structure._block_data_map
-        )
-        zp_data_to_cache = zpickle(data_to_cache)
+        data_to_cache = BlockStructureSerializer.serialize(block_structure)
         cache.set(
             cls._encode_root_cache_key(block_structure.root_block_usage_key),
-            zp_data_to_cache
+            data_to_cache
         )
         logger.debug(
             "Wrote BlockStructure %s to cache, size: %s",
             block_structure.root_block_usage_key,
-            len(zp_data_to_cache),
+            len(data_to_cache),
         )
 
     @classmethod
@@ -118,20 +113,21 @@ class BlockStructureFactory(object):
 
             transformers ([BlockStructureTransformer]) - A list of
                 transformers for which the block structure will be
-                transformed.
+                transformed. Only the cached data of these transformers
+                is deserialized.
 
         Returns:
             BlockStructure - The deserialized block structure starting
             at root_block_usage_key, if found in the cache.
 
-            NoneType - If the root_block_usage_key is not found in the cache
-            or if the cached data is outdated for one or more of the
-            given transformers.
+            NoneType - If the root_block_usage_key is not found in the cache,
+            if the cached data is in an outdated format, or if the cached
+            data is outdated for one or more of the given transformers.
         """
 
         # Find root_block_usage_key in the cache.
-        zp_data_from_cache = cache.get(cls._encode_root_cache_key(root_block_usage_key))
-        if not zp_data_from_cache:
+        data_from_cache = cache.get(cls._encode_root_cache_key(root_block_usage_key))
+        if not data_from_cache:
             logger.debug(
                 "BlockStructure %r not found in the cache.",
                 root_block_usage_key,
@@ -141,15 +137,23 @@ class BlockStructureFactory(object):
             logger.debug(
                 "Read BlockStructure %r from cache, size: %s",
                 root_block_usage_key,
-                len(zp_data_from_cache),
+                len(data_from_cache),
             )
 
         # Deserialize and construct the block structure.
-        block_relations, transformer_data, block_data_map = zunpickle(zp_data_from_cache)
-        block_structure = BlockStructureBlockData(root_block_usage_key)
-        block_structure._block_relations = block_relations
-        block_structure._transformer_data = transformer_data
-        block_structure._block_data_map = block_data_map
+        try:
+            block_structure = BlockStructureSerializer.deserialize(
+                root_block_usage_key,
+                data_from_cache,
+                [transformer.name() for transformer in transformers],
+            )
+        except BlockStructureSerializationError as exc:
+            logger.info(
+                "Cached BlockStructure %r could not be deserialized: %s",
+                root_block_usage_key,
+                exc.message,
+            )
+            return None
 
         # Verify that the cached data for all the given transformers are
         # for their latest versions.
@@ -0,0 +1,318 @@
+"""
+Module for the binary serialization format of BlockStructure cache entries.
+
+A serialized block structure consists of a fixed header followed by a table
+of independently compressed sections:
+
+    header: magic (3 bytes), format version (1 byte), number of sections (2 bytes)
+    section table: for each section, its name length (2 bytes), offset and
+        length (4 bytes each) within the data that follows the table,
+        followed by its utf-8 encoded name
+    sections:
+        'keys' - The usage keys of all the blocks. A block is referred to
+            by its index in this list in all the other sections.
+        'relations' - The children and parents of all the blocks, stored as
+            integer-indexed adjacency arrays.
+        'xblock_fields' - The collected xBlock fields of all the blocks.
+        'transformer:<name>' - For each transformer, its non-block-specific
+            data and its data for each block.
+
+Since every transformer's data is in its own section, a reader only needs to
+decompress the data of the transformers it is going to run.
+"""
+# pylint: disable=protected-access
+from array import array
+import struct
+import sys
+import zlib
+
+from openedx.core.lib.cache_utils import zpickle, zunpickle
+
+from .block_structure import BlockStructureBlockData, _BlockData
+from .exceptions import BlockStructureSerializationError
+
+
+class BlockStructureSerializer(object):
+    """
+    Serializes block structures to, and deserializes them from, the binary
+    format described in this module's docstring.
+    """
+    # Update FORMAT_VERSION whenever the format changes, so that entries
+    # written in an older format are treated as cache misses.
+    FORMAT_MAGIC = 'BSC'
+    FORMAT_VERSION = 1
+
+    KEYS_SECTION = 'keys'
+    RELATIONS_SECTION = 'relations'
+    XBLOCK_FIELDS_SECTION = 'xblock_fields'
+    TRANSFORMER_SECTION_PREFIX = 'transformer:'
+
+    _HEADER = struct.Struct('!3sBH')
+    _SECTION_ENTRY = struct.Struct('!HII')
+
+    # Adjacency arrays are stored as little-endian unsigned 32-bit integers.
+    _ARRAY_TYPECODE = 'I' if array('I').itemsize == 4 else 'L'
+
+    @classmethod
+    def serialize(cls, block_structure):
+        """
+        Returns the serialization of the given block structure, as a
+        string of bytes.
+
+        Only the data of blocks that are in the structure is kept.
+
+        Arguments:
+            block_structure (BlockStructureBlockData) - The block
+                structure to serialize.
+        """
+        block_keys = list(block_structure._block_relations.iterkeys())
+        block_indices = {block_key: index for index, block_key in enumerate(block_keys)}
+
+        sections = [
+            (cls.KEYS_SECTION, zpickle(block_keys)),
+            (cls.RELATIONS_SECTION, cls._serialize_relations(block_structure, block_keys, block_indices)),
+            (cls.XBLOCK_FIELDS_SECTION, cls._serialize_xblock_fields(block_structure, block_keys)),
+        ]
+        for transformer_name in cls._transformer_names(block_structure):
+            sections.append((
+                cls.TRANSFORMER_SECTION_PREFIX + transformer_name,
+                cls._serialize_transformer_data(block_structure, block_keys, transformer_name),
+            ))
+
+        return cls._pack_sections(sections)
+
+    @classmethod
+    def deserialize(cls, root_block_usage_key, data, transformer_names=None):
+        """
+        Returns the block structure serialized in the given data.
+
+        Arguments:
+            root_block_usage_key (UsageKey) - The usage_key for the root
+                of the serialized block structure.
+
+            data (str) - The serialization returned by serialize.
+
+            transformer_names ([string]) - The names of the transformers
+                whose data is to be loaded. The data of any other
+                transformer is skipped. If None, the data of all
+                transformers is loaded.
+
+        Raises:
+            BlockStructureSerializationError - If the data is not in
+                the current version of the format.
+        """
+        sections = cls._unpack_sections(data)
+        try:
+            block_keys = zunpickle(sections[cls.KEYS_SECTION])
+            block_structure = BlockStructureBlockData(root_block_usage_key)
+            cls._deserialize_relations(block_structure, block_keys, sections[cls.RELATIONS_SECTION])
+            cls._deserialize_xblock_fields(block_structure, block_keys, sections[cls.XBLOCK_FIELDS_SECTION])
+
+            if transformer_names is None:
+                transformer_names = [
+                    name[len(cls.TRANSFORMER_SECTION_PREFIX):]
+                    for name in sections if name.startswith(cls.TRANSFORMER_SECTION_PREFIX)
+                ]
+            for transformer_name in transformer_names:
+                section = sections.get(cls.TRANSFORMER_SECTION_PREFIX + transformer_name)
+                if section is not None:
+                    cls._deserialize_transformer_data(block_structure, block_keys, transformer_name, section)
+        except (KeyError, IndexError, ValueError, zlib.error) as exc:
+            raise BlockStructureSerializationError('Invalid serialized block structure: {}'.format(exc))
+
+        return block_structure
+
+    #--- Sections ---#
+
+    @classmethod
+    def _pack_sections(cls, sections):
+        """
+        Returns the header, section table and contents of the given
+        list of (name, data) sections, as a string of bytes.
+        """
+        table = []
+        offset = 0
+        for name, section_data in sections:
+            encoded_name = name.encode('utf-8')
+            table.append(cls._SECTION_ENTRY.pack(len(encoded_name), offset, len(section_data)) + encoded_name)
+            offset += len(section_data)
+
+        return ''.join(
+            [cls._HEADER.pack(cls.FORMAT_MAGIC, cls.FORMAT_VERSION, len(sections))] +
+            table +
+            [section_data for __, section_data in sections]
+        )
+
+    @classmethod
+    def _unpack_sections(cls, data):
+        """
+        Returns a dict mapping the name of each section in the given
+        serialization to its (still compressed) data.
+        """
+        if len(data) < cls._HEADER.size:
+            raise BlockStructureSerializationError('Serialized block structure is truncated.')
+        magic, version, num_sections = cls._HEADER.unpack_from(data)
+        if magic != cls.FORMAT_MAGIC or version != cls.FORMAT_VERSION:
+            raise BlockStructureSerializationError(
+                'Unsupported block structure format: {!r}, version {}.'.format(magic, version)
+            )
+
+        entries = []
+        position = cls._HEADER.size
+        try:
+            for __ in xrange(num_sections):
+                name_length, offset, length = cls._SECTION_ENTRY.unpack_from(data, position)
+                position += cls._SECTION_ENTRY.size
+                name = data[position:position + name_length].decode('utf-8')
+                position += name_length
+                entries.append((name, offset, length))
+        except (struct.error, UnicodeDecodeError) as exc:
+            raise BlockStructureSerializationError('Invalid block structure section table: {}'.format(exc))
+
+        # Buffers avoid copying the sections that are never read.
+        return {name: buffer(data, position + offset, length) for name, offset, length in entries}
+
+    @classmethod
+    def _transformer_names(cls, block_structure):
+        """
+        Returns the names of all the transformers that have data in the
+        given block structure.
+        """
+        transformer_names = set(block_structure._transformer_data)
+        for block_data in block_structure._block_data_map.itervalues():
+            transformer_names.update(block_data.transformer_data)
+        return sorted(transformer_names)
+
+    #--- Relations ---#
+
+    @classmethod
+    def _serialize_relations(cls, block_structure, block_keys, block_indices):
+        """
+        Returns the compressed adjacency arrays of the given block
+        structure's relations.
+
+        The children (and then the parents) of all blocks are stored as
+        an array of offsets, where the relatives of block i are found
+        between offsets[i] and offsets[i + 1], followed by the array of
+        the relatives' block indices.
+        """
+        arrays = []
+        for relatives_attr in ('children', 'parents'):
+            offsets = array(cls._ARRAY_TYPECODE, [0])
+            relatives = array(cls._ARRAY_TYPECODE)
+            for block_key in block_keys:
+                relatives.extend(
+                    block_indices[relative]
+                    for relative in getattr(block_structure._block_relations[block_key], relatives_attr)
+                )
+                offsets.append(len(relatives))
+            arrays.extend([offsets, relatives])
+
+        header = array(cls._ARRAY_TYPECODE, [len(block_keys)] + [len(arr) for arr in arrays])
+        return zlib.compress(''.join(cls._array_to_string(arr) for arr in [header] + arrays))
+
+    @classmethod
+    def _deserialize_relations(cls, block_structure, block_keys, section):
+        """
+        Sets the relations of the given block structure from the
+        compressed adjacency arrays in the given section.
+        """
+        values = cls._string_to_array(zlib.decompress(section))
+        num_blocks = values[0]
+        if num_blocks != len(block_keys):
+            raise ValueError('Relations are for {} blocks, not {}.'.format(num_blocks, len(block_keys)))
+
+        array_lengths = values[1:5]
+        position = 5
+        arrays = []
+        for length in array_lengths:
+            arrays.append(values[position:position + length])
+            position += length
+        child_offsets, children, parent_offsets, parents = arrays
+
+        for index, block_key in enumerate(block_keys):
+            relations = block_structure._block_relations[block_key]
+            relations.children = [
+                block_keys[child] for child in children[child_offsets[index]:child_offsets[index + 1]]
+            ]
+            relations.parents = [
+                block_keys[parent] for parent in parents[parent_offsets[index]:parent_offsets[index + 1]]
+            ]
+
+    @classmethod
+    def _array_to_string(cls, arr):
+        """
+        Returns the little-endian byte string of the given array.
+        """
+        if sys.byteorder != 'little':
+            arr = array(arr.typecode, arr)
+            arr.byteswap()
+        return arr.tostring()
+
+    @classmethod
+    def _string_to_array(cls, data):
+        """
+        Returns the array stored in the given little-endian byte string.
+        """
+        arr = array(cls._ARRAY_TYPECODE)
+        arr.fromstring(data)
+        if sys.byteorder != 'little':
+            arr.byteswap()
+        return arr
+
+    #--- Block data ---#
+
+    @classmethod
+    def _serialize_xblock_fields(cls, block_structure, block_keys):
+        """
+        Returns the compressed xBlock fields of all the blocks, as a list
+        aligned with block_keys. Blocks without any collected data are
+        stored as None.
+        """
+        block_data_map = block_structure._block_data_map
+        return zpickle([
+            block_data_map[block_key].xblock_fields if block_key in block_data_map else None
+            for block_key in block_keys
+        ])
+
+    @classmethod
+    def _deserialize_xblock_fields(cls, block_structure, block_keys, section):
+        """
+        Sets the xBlock fields of the given block structure's blocks from
+        the given section.
+        """
+        for block_key, xblock_fields in zip(block_keys, zunpickle(section)):
+            if xblock_fields is not None:
+                block_data = _BlockData()
+                block_data.xblock_fields = xblock_fields
+                block_structure._block_data_map[block_key] = block_data
+
+    @classmethod
+    def _serialize_transformer_data(cls, block_structure, block_keys, transformer_name):
+        """
+        Returns the compressed data of the given transformer: its
+        non-block-specific data and a list of (block index, data) pairs
+        for the blocks it has data for.
+        """
+        block_data_map = block_structure._block_data_map
+        block_transformer_data = []
+        for index, block_key in enumerate(block_keys):
+            block_data = block_data_map.get(block_key)
+            if block_data is not None and transformer_name in block_data.transformer_data:
+                block_transformer_data.append((index, block_data.transformer_data[transformer_name]))
+
+        return zpickle((
+            block_structure._transformer_data.get(transformer_name, {}),
+            block_transformer_data,
+        ))
+
+    @classmethod
+    def _deserialize_transformer_data(cls, block_structure, block_keys, transformer_name, section):
+        """
+        Sets the data of the given transformer in the given block
+        structure from the given section.
+        """
+        transformer_data, block_transformer_data = zunpickle(section)
+        block_structure._transformer_data[transformer_name] = transformer_data
+        for index, data in block_transformer_data:
+            block_structure._block_data_map[block_keys[index]].transformer_data[transformer_name] = data
@@ -8,3 +8,10 @@ class TransformerException(Exception):
     Exception class for Transformer related errors.
     """
     pass
+
+
+class BlockStructureSerializationError(Exception):
+    """
+    Exception class for block structure data that cannot be deserialized.
+    """
+    pass
@@ -5,6 +5,8 @@ Tests for block_structure_factory.py
 from mock import patch
 from unittest import TestCase
 
+from openedx.core.lib.cache_utils import zpickle
+
 from ..block_structure_factory import BlockStructureFactory
 from .test_utils import (
     MockCache, MockModulestoreFactory, MockTransformer, ChildrenMapTestMixin
@@ -94,6 +96,27 @@ class TestBlockStructureFactory(TestCase, ChildrenMapTestMixin):
         self.assert_block_structure(from_cache_block_structure, self.children_map)
         self.assertEquals(self.modulestore.get_items_call_count, 0)
 
+    def test_outdated_cache_format(self):
+        cache = MockCache()
+        self.add_transformers()
+
+        # cache entries written with the previous zpickle serialization are ignored
+        cache.set(
+            BlockStructureFactory._encode_root_cache_key(0),
+            zpickle((
+                self.block_structure._block_relations,
+                self.block_structure._transformer_data,
+                self.block_structure._block_data_map,
+            ))
+        )
+        self.assertIsNone(
+            BlockStructureFactory.create_from_cache(
+                root_block_usage_key=0,
+                cache=cache,
+                transformers=self.transformers,
+            )
+        )
+
     def test_remove_from_cache(self):
         cache = MockCache()
 
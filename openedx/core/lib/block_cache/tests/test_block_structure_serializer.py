@@ -0,0 +1,182 @@
+"""
+Tests for block_structure_serializer.py
+"""
+# pylint: disable=protected-access
+import ddt
+import logging
+from mock import patch
+from nose.plugins.skip import SkipTest
+from unittest import TestCase, skip
+
+from opaque_keys.edx.locator import CourseLocator
+
+from openedx.core.lib.cache_utils import zpickle, zunpickle
+
+from ..block_structure import BlockStructureModulestoreData
+from ..block_structure_serializer import BlockStructureSerializer
+from ..exceptions import BlockStructureSerializationError
+from .test_utils import MockTransformer, ChildrenMapTestMixin
+
+# The dependency below needs to be installed manually from the development.txt file, which doesn't
+# get installed during unit tests!
+try:
+    from code_block_timer import CodeBlockTimer
+except ImportError:
+    CodeBlockTimer = None
+
+log = logging.getLogger(__name__)
+
+
+class OtherMockTransformer(MockTransformer):
+    """
+    A second mock transformer, whose data is stored in its own section.
+    """
+    VERSION = 2
+
+
+@ddt.ddt
+class TestBlockStructureSerializer(TestCase, ChildrenMapTestMixin):
+    """
+    Tests for BlockStructureSerializer
+    """
+    def create_collected_block_structure(self, children_map):
+        """
+        Returns a block structure for the given children_map with
+        collected xBlock fields and transformer data.
+        """
+        block_structure = self.create_block_structure(BlockStructureModulestoreData, children_map)
+        for transformer in (MockTransformer, OtherMockTransformer):
+            block_structure._add_transformer(transformer)
+            block_structure.set_transformer_data(transformer, 'course_data', transformer.name())
+        for block_key in range(len(children_map)):
+            block_structure._block_data_map[block_key].xblock_fields['display_name'] = u'Block {}'.format(block_key)
+            block_structure.set_transformer_block_field(block_key, MockTransformer, 'index', block_key)
+            if block_key % 2:
+                block_structure.set_transformer_block_field(block_key, OtherMockTransformer, 'odd', True)
+        return block_structure
+
+    @ddt.data(
+        ChildrenMapTestMixin.SIMPLE_CHILDREN_MAP,
+        ChildrenMapTestMixin.LINEAR_CHILDREN_MAP,
+        ChildrenMapTestMixin.DAG_CHILDREN_MAP,
+    )
+    def test_round_trip(self, children_map):
+        block_structure = self.create_collected_block_structure(children_map)
+
+        data = BlockStructureSerializer.serialize(block_structure)
+        deserialized = BlockStructureSerializer.deserialize(0, data)
+
+        self.assert_block_structure(deserialized, children_map)
+        for block_key in range(len(children_map)):
+            self.assertEquals(deserialized.get_children(block_key), block_structure.get_children(block_key))
+            self.assertEquals(deserialized.get_parents(block_key), block_structure.get_parents(block_key))
+            self.assertEquals(deserialized.get_xblock_field(block_key, 'display_name'), u'Block {}'.format(block_key))
+            self.assertEquals(
+                deserialized.get_transformer_block_data(block_key, MockTransformer),
+                block_structure.get_transformer_block_data(block_key, MockTransformer),
+            )
+            self.assertEquals(
+                deserialized.get_transformer_block_data(block_key, OtherMockTransformer),
+                block_structure.get_transformer_block_data(block_key, OtherMockTransformer),
+            )
+        for transformer in (MockTransformer, OtherMockTransformer):
+            self.assertEquals(deserialized._get_transformer_data_version(transformer), transformer.VERSION)
+            self.assertEquals(deserialized.get_transformer_data(transformer, 'course_data'), transformer.name())
+
+    def test_requested_transformers_only(self):
+        block_structure = self.create_collected_block_structure(self.SIMPLE_CHILDREN_MAP)
+
+        data = BlockStructureSerializer.serialize(block_structure)
+        deserialized = BlockStructureSerializer.deserialize(0, data, [MockTransformer.name()])
+
+        self.assertEquals(deserialized._get_transformer_data_version(MockTransformer), MockTransformer.VERSION)
+        self.assertEquals(deserialized.get_transformer_block_field(3, MockTransformer, 'index'), 3)
+        self.assertEquals(deserialized._get_transformer_data_version(OtherMockTransformer), 0)
+        self.assertEquals(deserialized.get_transformer_block_data(1, OtherMockTransformer), {})
+
+    def test_empty_block_data(self):
+        block_structure = self.create_block_structure(BlockStructureModulestoreData, self.SIMPLE_CHILDREN_MAP)
+
+        deserialized = BlockStructureSerializer.deserialize(0, BlockStructureSerializer.serialize(block_structure))
+
+        self.assert_block_structure(deserialized, self.SIMPLE_CHILDREN_MAP)
+        self.assertIsNone(deserialized.get_xblock_field(0, 'display_name'))
+
+    @ddt.data(
+        '',
+        'BSC',
+        zpickle(('relations', 'transformer data', 'block data')),
+    )
+    def test_invalid_data(self, data):
+        with self.assertRaises(BlockStructureSerializationError):
+            BlockStructureSerializer.deserialize(0, data)
+
+    def test_outdated_format_version(self):
+        block_structure = self.create_collected_block_structure(self.SIMPLE_CHILDREN_MAP)
+        data = BlockStructureSerializer.serialize(block_structure)
+
+        with patch.object(BlockStructureSerializer, 'FORMAT_VERSION', BlockStructureSerializer.FORMAT_VERSION + 1):
+            with self.assertRaises(BlockStructureSerializationError):
+                BlockStructureSerializer.deserialize(0, data)
+
+
+@skip("Only run manually.")
+class BlockStructureSerializerPerformanceTest(TestCase):
+    """
+    Compares the size and speed of BlockStructureSerializer with the zpickle
+    serialization it replaced, for courses of increasing size.
+    """
+    # Use this attribute to skip this test on regular unittest CI runs.
+    perf_test = True
+
+    NUM_ITERATIONS = 5
+
+    def create_course_structure(self, num_blocks):
+        """
+        Returns a block structure with num_blocks blocks, shaped like a
+        course with 10 blocks per unit, 10 units per sequential, and so on.
+        """
+        course_key = CourseLocator('org', 'course', 'run')
+        block_keys = [course_key.make_usage_key('course', 'course')] + [
+            course_key.make_usage_key('problem', 'block_{}'.format(index)) for index in range(1, num_blocks)
+        ]
+        block_structure = BlockStructureModulestoreData(block_keys[0])
+        for transformer in (MockTransformer, OtherMockTransformer):
+            block_structure._add_transformer(transformer)
+        for index, block_key in enumerate(block_keys):
+            if index:
+                block_structure._add_relation(block_keys[(index - 1) // 10], block_key)
+            block_structure._block_data_map[block_key].xblock_fields.update({
+                'display_name': u'Block {}'.format(index), 'graded': bool(index % 2), 'weight': 1.0,
+            })
+            block_structure.set_transformer_block_field(block_key, MockTransformer, 'visible_to_staff_only', False)
+            block_structure.set_transformer_block_field(block_key, OtherMockTransformer, 'group_access', {})
+        return block_structure
+
+    def test_serialization(self):
+        if CodeBlockTimer is None:
+            raise SkipTest("CodeBlockTimer undefined.")
+
+        for num_blocks in (1000, 10000, 50000):
+            block_structure = self.create_course_structure(num_blocks)
+            root_key = block_structure.root_block_usage_key
+            with CodeBlockTimer("BlockStructureSerialization:{}".format(num_blocks)):
+                for __ in range(self.NUM_ITERATIONS):
+                    with CodeBlockTimer("zpickle_dump"):
+                        zpickled = zpickle((
+                            block_structure._block_relations,
+                            block_structure._transformer_data,
+                            block_structure._block_data_map,
+                        ))
+                    with CodeBlockTimer("zpickle_load"):
+                        zunpickle(zpickled)
+                    with CodeBlockTimer("serializer_dump"):
+                        serialized = BlockStructureSerializer.serialize(block_structure)
+                    with CodeBlockTimer("serializer_load_all_transformers"):
+                        BlockStructureSerializer.deserialize(root_key, serialized)
+                    with CodeBlockTimer("serializer_load_one_transformer"):
+                        BlockStructureSerializer.deserialize(root_key, serialized, [MockTransformer.name()])
+
+            log.info(
+                "%d blocks: zpickle %d bytes, serializer %d bytes", num_blocks, len(zpickled), len(serialized)
+            )